@@ -10,12 +10,21 @@ import sys
 import json
 import time
 import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Add parent directory to path to import photo_tool
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from photo_tool.io import scan_multiple_directories, filter_by_type
+from photo_tool.io import filter_by_type
+from photo_tool.io.watcher import LibraryWatcher
+from photo_tool.io.thumbnails import render_thumbnails, get_thumbnail_data
+from photo_tool.io.thumb_store import ThumbnailStore
+from photo_tool.io.video_preview import build_video_preview, DEFAULT_PREVIEW_WORKERS
+from photo_tool.io.waveform import get_waveform_file
+from photo_tool.analysis.clustering import find_similar_photos, score_photos, update_hash_index
+from photo_tool.analysis.similarity import HashCache, HashIndex, HashMethod
 from photo_tool.config import load_config
 from photo_tool.workspace import Workspace
 from photo_tool.actions.rating import get_rating, get_rating_with_comment
@@ -49,6 +58,72 @@ _analysis_progress = {
     'message': ''
 }
 
+# Library watcher: keeps the media list in memory instead of re-walking the disk
+_library = {
+    'watcher': None,
+    'config_mtime': None,
+    'seq': 0,
+    'events': deque(maxlen=1000)  # (seq, event dict) for SSE clients
+}
+_library_lock = threading.Lock()
+
+# Video sprite sheets: bounded pool so browsing many clips cannot start
+# an unbounded number of decoders; concurrent requests share one job
+_preview_pool = ThreadPoolExecutor(max_workers=DEFAULT_PREVIEW_WORKERS)
+_preview_jobs = {}
+_preview_lock = threading.Lock()
+
+# Packed thumbnail store (opened on first use)
+_thumb_store = {'store': None}
+_thumb_store_lock = threading.Lock()
+
+# Near-duplicate index of the library's perceptual hashes (loaded on first use)
+_hash_index = {'index': None, 'path': None}
+_hash_index_lock = threading.Lock()
+
+
+def _on_library_events(events):
+    """Watcher callback: queue events for SSE clients, invalidate burst cache"""
+    for event in events:
+        _library['seq'] += 1
+        _library['events'].append((_library['seq'], event.to_dict()))
+    
+    # New or removed photos change the burst groups
+    _burst_cache['data'] = None
+    print(f"📥 Library changed: {len(events)} file(s)")
+
+
+def _get_library_watcher(ws, config):
+    """Start the library watcher on first use (restart if config changed)"""
+    config_mtime = ws.config_file.stat().st_mtime if ws.config_file.exists() else 0
+    
+    with _library_lock:
+        watcher = _library['watcher']
+        if watcher is not None and _library['config_mtime'] == config_mtime:
+            return watcher
+        
+        if watcher is not None:
+            watcher.stop()
+        
+        watcher = LibraryWatcher(
+            config.scan.roots,
+            config.scan.extensions,
+            ws.scan_manifest_file,
+            recursive=config.scan.recurse
+        )
+        watcher.add_listener(_on_library_events)
+        watcher.start()
+        print(f"👀 Watching library ({watcher.backend} backend, {len(watcher.media)} files)")
+        
+        _library['watcher'] = watcher
+        _library['config_mtime'] = config_mtime
+        return watcher
+
+
+def _get_library_media(ws, config):
+    """All media files, served from the watcher's in-memory index"""
+    return _get_library_watcher(ws, config).media
+
 
 @app.get('/')
 def index():
@@ -76,12 +151,7 @@ def get_photos():
         offset = int(request.args.get('offset', 0))
         
         # Scan for media
-        all_media = scan_multiple_directories(
-            config.scan.roots,
-            config.scan.extensions,
-            config.scan.recurse,
-            show_progress=False
-        )
+        all_media = _get_library_media(ws, config)
         
         # Filter to photos only
         photos = filter_by_type(all_media, "photo")
@@ -242,12 +312,7 @@ def get_all_keywords_api():
         min_count = int(request.args.get('min_count', 1))
         
         # Scan all media
-        all_media = scan_multiple_directories(
-            config.scan.roots,
-            config.scan.extensions,
-            config.scan.recurse,
-            show_progress=False
-        )
+        all_media = _get_library_media(ws, config)
         
         photos = filter_by_type(all_media, "photo")
         photo_paths = [p.path for p in photos]
@@ -270,6 +335,85 @@ def get_all_keywords_api():
         return jsonify({'error': str(e)}), 500
 
 
+def _get_hash_index(ws, config, photo_paths):
+    """
+    Load the workspace's hash index and bring it in line with the library
+    
+    Photos that are gone (deleted, moved, renamed) are removed; new and
+    changed photos are (re)hashed through the workspace HashCache.
+    """
+    method = config.similarity.method
+    suffix = "_preview" if config.similarity.use_embedded_preview else ""
+    index_path = ws.hashes_dir / f"index_{method}{suffix}.npz"
+    hash_cache = HashCache(
+        ws.hashes_dir,
+        HashMethod(method),
+        use_preview=config.similarity.use_embedded_preview,
+        content_fingerprint=config.similarity.hash_cache_by_content
+    )
+    
+    with _hash_index_lock:
+        if _hash_index['path'] != index_path:
+            _hash_index['index'] = HashIndex.load(index_path)
+            _hash_index['path'] = index_path
+        index = _hash_index['index']
+        
+        current = {str(p) for p in photo_paths}
+        removed = sum(index.remove(key) for key in index.keys() if key not in current)
+        
+        added = update_hash_index(
+            index, photo_paths, HashMethod(method), config.similarity.use_embedded_preview, hash_cache
+        )
+        if added or removed:
+            index.save(index_path)
+        return index
+
+
+@app.get('/api/photos/<path:photo_id>/similar')
+def get_similar_photos(photo_id):
+    """
+    Photos that look like this one (perceptual hash distance), closest first
+    Query params:
+        - threshold: Max hash distance (default: similarity.phash_threshold)
+    """
+    try:
+        from flask import request
+        
+        workspace_path = Path("C:/PhotoTool_Test")
+        ws = Workspace(workspace_path)
+        config = load_config(ws.config_file)
+        
+        photo_path = Path(photo_id)
+        if not photo_path.exists():
+            return jsonify({'error': 'Photo not found'}), 404
+        
+        threshold = int(request.args.get('threshold', config.similarity.phash_threshold))
+        
+        photos = filter_by_type(_get_library_media(ws, config), "photo")
+        index = _get_hash_index(ws, config, [p.path for p in photos])
+        
+        with _hash_index_lock:
+            similar = find_similar_photos(
+                photo_path,
+                index,
+                similarity_threshold=threshold,
+                hash_method=HashMethod(config.similarity.method),
+                use_embedded_preview=config.similarity.use_embedded_preview
+            )
+        
+        return jsonify({
+            'photo': str(photo_path),
+            'threshold': threshold,
+            'similar': [
+                {'path': str(path), 'name': path.name, 'distance': distance}
+                for path, distance in similar
+            ]
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @app.post('/api/export/gallery')
 def export_gallery_api():
     """
@@ -363,6 +507,14 @@ def get_export_progress():
     return Response(stream_with_context(generate()), mimetype='text/event-stream')
 
 
+def _get_thumbnail_store(ws):
+    """Open the workspace's packed thumbnail store once per server"""
+    with _thumb_store_lock:
+        if _thumb_store['store'] is None:
+            _thumb_store['store'] = ThumbnailStore(ws.thumbnail_store_dir)
+        return _thumb_store['store']
+
+
 @app.get('/thumbnails/<path:filename>')
 def get_thumbnail(filename):
     """Serve thumbnail images"""
@@ -392,24 +544,12 @@ def get_thumbnail(filename):
                 for ext in ['.JPG', '.jpg', '.JPEG', '.jpeg']:
                     original = root_path / f"{Path(filename).stem}{ext}"
                     if original.exists():
-                        # Generate thumbnail on-the-fly using Pillow
-                        from PIL import Image
-                        from io import BytesIO
-                        from flask import send_file
-                        
-                        img = Image.open(original)
-                        img.thumbnail((300, 300), Image.Resampling.LANCZOS)
+                        # Packed store; generated on first view
+                        store = _get_thumbnail_store(Workspace(workspace_path))
+                        data = get_thumbnail_data(original, store, (300, 300))
                         
-                        # Convert to JPEG
-                        if img.mode in ('RGBA', 'LA', 'P'):
-                            img = img.convert('RGB')
-                        
-                        # Save to BytesIO
-                        img_io = BytesIO()
-                        img.save(img_io, 'JPEG', quality=85)
-                        img_io.seek(0)
-                        
-                        return send_file(img_io, mimetype='image/jpeg')
+                        # WSGI servers only accept bytes, not the store's memoryview
+                        return Response(bytes(data), mimetype='image/jpeg')
             
             return jsonify({'error': 'Thumbnail not found'}), 404
     
@@ -432,20 +572,11 @@ def get_full_image(filename):
                 image_path = root_path / f"{Path(filename).stem}{ext}"
                 if image_path.exists():
                     # Serve with optimized size (max 2500px)
-                    from PIL import Image
                     from io import BytesIO
                     from flask import send_file
                     
-                    img = Image.open(image_path)
-                    
-                    # Resize if too large
-                    max_size = 2500
-                    if img.width > max_size or img.height > max_size:
-                        img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-                    
-                    # Convert to JPEG
-                    if img.mode in ('RGBA', 'LA', 'P'):
-                        img = img.convert('RGB')
+                    max_size = (2500, 2500)
+                    img = render_thumbnails(image_path, [max_size])[max_size]
                     
                     # Save to BytesIO
                     img_io = BytesIO()
@@ -460,6 +591,89 @@ def get_full_image(filename):
         return jsonify({'error': str(e)}), 500
 
 
+def _get_video_preview(video_path, thumb_dir):
+    """Build the sprite sheet in the preview pool (one job per video at a time)"""
+    key = str(video_path)
+    with _preview_lock:
+        future = _preview_jobs.get(key)
+        if future is None:
+            future = _preview_pool.submit(build_video_preview, video_path, thumb_dir)
+            _preview_jobs[key] = future
+    
+    try:
+        return future.result()
+    finally:
+        with _preview_lock:
+            if _preview_jobs.get(key) is future:
+                del _preview_jobs[key]
+
+
+@app.get('/api/videos/<path:video_id>/preview')
+def get_video_preview(video_id):
+    """
+    Scrub preview of a video: sprite sheet + WebVTT thumbnail track
+    (cached in the thumbnails dir, built on first request)
+    """
+    try:
+        workspace_path = Path("C:/PhotoTool_Test")
+        ws = Workspace(workspace_path)
+        
+        video_path = Path(video_id)
+        if not video_path.exists():
+            return jsonify({'error': 'Video not found'}), 404
+        
+        preview = _get_video_preview(video_path, ws.thumbnails_dir)
+        if preview is None:
+            return jsonify({'error': 'Could not extract frames'}), 500
+        
+        return jsonify({
+            'sprite': f"/previews/{preview.sprite_path.name}",
+            'vtt': f"/previews/{preview.vtt_path.name}",
+            'duration': preview.duration,
+            'frames': preview.frame_count
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.get('/previews/<path:filename>')
+def get_preview_file(filename):
+    """Serve sprite sheets and WebVTT files (cue URLs are relative to this route)"""
+    workspace_path = Path("C:/PhotoTool_Test")
+    thumb_dir = Workspace(workspace_path).thumbnails_dir
+    
+    if filename.endswith('.vtt'):
+        return send_from_directory(thumb_dir, filename, mimetype='text/vtt')
+    return send_from_directory(thumb_dir, filename)
+
+
+@app.get('/api/audio/<path:audio_id>/waveform')
+def get_audio_waveform(audio_id):
+    """
+    Waveform peaks of an audio file (compact binary, see photo_tool.io.waveform)
+    Computed on first request and cached in the workspace
+    """
+    try:
+        from flask import send_file
+        
+        workspace_path = Path("C:/PhotoTool_Test")
+        ws = Workspace(workspace_path)
+        
+        audio_path = Path(audio_id)
+        if not audio_path.exists():
+            return jsonify({'error': 'Audio file not found'}), 404
+        
+        peaks_path = get_waveform_file(audio_path, ws.waveforms_dir)
+        if peaks_path is None:
+            return jsonify({'error': 'Could not decode audio'}), 500
+        
+        return send_file(peaks_path, mimetype='application/octet-stream', max_age=3600)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @app.get('/api/stats')
 def get_stats():
     """Get workspace statistics"""
@@ -469,12 +683,7 @@ def get_stats():
         config = load_config(ws.config_file)
         
         # Scan all media
-        all_media = scan_multiple_directories(
-            config.scan.roots,
-            config.scan.extensions,
-            config.scan.recurse,
-            show_progress=False
-        )
+        all_media = _get_library_media(ws, config)
         
         photos = filter_by_type(all_media, "photo")
         videos = filter_by_type(all_media, "video")
@@ -526,19 +735,14 @@ def _compute_bursts_cached(workspace_path, force=False):
         
         # Import analysis functions
         from photo_tool.analysis import group_by_time, cluster_similar_photos
-        from photo_tool.analysis.similarity import detect_blur, HashMethod
-        from photo_tool.io import get_capture_time
+        from photo_tool.analysis.similarity import HashMethod, HashCache, ProxyCache
+        from photo_tool.io import read_capture_times
         
         # Step 1: Scan photos
         _analysis_progress['step'] = 'scanning'
         _analysis_progress['message'] = 'Scanning photos...'
         
-        all_media = scan_multiple_directories(
-            config.scan.roots,
-            config.scan.extensions,
-            config.scan.recurse,
-            show_progress=False
-        )
+        all_media = _get_library_media(ws, config)
         
         photos = filter_by_type(all_media, "photo")
         _analysis_progress['total'] = len(photos)
@@ -554,16 +758,20 @@ def _compute_bursts_cached(workspace_path, force=False):
         _analysis_progress['step'] = 'metadata'
         _analysis_progress['message'] = f'Reading metadata ({len(photos)} photos)...'
         
+        def on_progress(done, total):
+            _analysis_progress['progress'] = done
+            _analysis_progress['total'] = total
+        
+        # Parallel; cached in the workspace index so unchanged photos are not parsed again
+        all_times = read_capture_times([p.path for p in photos], db_path=ws.db_file, progress=on_progress)
+        
         capture_times = []
         photo_paths = []
         
-        for i, photo in enumerate(photos):
-            capture_time = get_capture_time(photo.path)
+        for photo, capture_time in zip(photos, all_times):
             if capture_time:
                 capture_times.append(capture_time)
                 photo_paths.append(photo.path)
-            if i % 50 == 0:
-                _analysis_progress['progress'] = i
         
         # Step 3: Time grouping
         _analysis_progress['step'] = 'grouping'
@@ -576,36 +784,45 @@ def _compute_bursts_cached(workspace_path, force=False):
             config.grouping.max_group_gap_seconds
         )
         
-        # Step 4: Blur detection
+        # Step 4: Blur detection (hashes come from the same decode)
         _analysis_progress['step'] = 'quality'
         _analysis_progress['message'] = 'Computing quality scores...'
         
-        blur_scores = {}
-        total_to_score = sum(len(g.photos) for g in time_groups)
-        scored = 0
-        
-        for group in time_groups:
-            for photo in group.photos:
-                try:
-                    blur_scores[photo] = detect_blur(photo)
-                except:
-                    pass
-                scored += 1
-                if scored % 10 == 0:
-                    _analysis_progress['progress'] = scored
-                    _analysis_progress['total'] = total_to_score
+        all_photos = [photo for group in time_groups for photo in group.photos]
+        _analysis_progress['progress'] = 0
+        _analysis_progress['total'] = len(all_photos)
+        
+        hash_method = HashMethod(config.similarity.method)
+        hash_cache = HashCache(
+            ws.hashes_dir,
+            hash_method,
+            use_preview=config.similarity.use_embedded_preview,
+            content_fingerprint=config.similarity.hash_cache_by_content
+        )
+        blur_scores = score_photos(
+            all_photos, hash_method, config.similarity.use_embedded_preview, hash_cache,
+            analysis_scale=config.quality.analysis_scale
+        )
+        _analysis_progress['progress'] = len(all_photos)
         
         # Step 5: Clustering
         _analysis_progress['step'] = 'clustering'
         _analysis_progress['message'] = 'Clustering similar photos...'
         
-        hash_method = HashMethod(config.similarity.method)
         clusters = cluster_similar_photos(
             time_groups,
             hash_method=hash_method,
             similarity_threshold=config.similarity.phash_threshold,
             blur_scores=blur_scores,
-            show_progress=False
+            show_progress=False,
+            use_embedded_preview=config.similarity.use_embedded_preview,
+            hash_cache=hash_cache,
+            ssim_threshold=config.similarity.ssim_threshold if config.similarity.use_ssim_refine else None,
+            proxy_cache=ProxyCache(
+                ws.proxies_dir,
+                use_preview=config.similarity.use_embedded_preview,
+                content_fingerprint=config.similarity.hash_cache_by_content
+            )
         )
         
         # Step 6: Build response
@@ -709,6 +926,32 @@ def get_burst_progress():
     return Response(stream_with_context(generate()), mimetype='text/event-stream')
 
 
+@app.get('/api/library/events')
+def get_library_events():
+    """
+    Stream library changes detected by the watcher (SSE)
+    
+    Each message: {"kind": "added|modified|removed", "path": ..., "name": ...,
+                   "media_type": ..., "size": ...}
+    """
+    workspace_path = Path("C:/PhotoTool_Test")
+    ws = Workspace(workspace_path)
+    _get_library_watcher(ws, load_config(ws.config_file))
+    
+    def generate():
+        last_seq = _library['seq']
+        while True:
+            new_events = [(seq, event) for seq, event in list(_library['events']) if seq > last_seq]
+            
+            for seq, event in new_events:
+                yield f"data: {json.dumps(event)}\n\n"
+                last_seq = seq
+            
+            time.sleep(1.0)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream')
+
+
 @app.get('/api/bursts/<burst_id>')
 def get_burst_detail(burst_id):
     """Get detailed information about a specific burst"""
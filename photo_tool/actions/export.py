@@ -9,8 +9,7 @@ from pathlib import Path
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
-from PIL import Image
-
+from ..io.thumbnails import render_thumbnails
 from ..util.logging import get_logger
 from .metadata import get_metadata
 
@@ -88,31 +87,16 @@ def export_gallery(
             img_path = images_dir / img_filename
             thumb_path = thumbs_dir / thumb_filename
             
-            # Resize main image
-            with Image.open(photo_path) as img:
-                # Get original dimensions
-                width, height = img.size
-                
-                # Resize if needed
-                if width > max_image_size or height > max_image_size:
-                    img.thumbnail((max_image_size, max_image_size), Image.Resampling.LANCZOS)
-                    width, height = img.size
-                
-                # Convert RGBA to RGB if needed
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    img = img.convert('RGB')
-                
-                # Save image
-                img.save(img_path, 'JPEG', quality=90, optimize=True)
+            # One reduced-resolution decode for both the image and its thumbnail
+            img_size = (max_image_size, max_image_size)
+            thumb_size = (thumbnail_size, thumbnail_size)
+            rendered = render_thumbnails(photo_path, [img_size, thumb_size])
+            
+            img = rendered[img_size]
+            width, height = img.size
+            img.save(img_path, 'JPEG', quality=90, optimize=True)
             
-            # Generate thumbnail
-            with Image.open(photo_path) as img:
-                img.thumbnail((thumbnail_size, thumbnail_size), Image.Resampling.LANCZOS)
-                
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    img = img.convert('RGB')
-                
-                img.save(thumb_path, 'JPEG', quality=85, optimize=True)
+            rendered[thumb_size].save(thumb_path, 'JPEG', quality=85, optimize=True)
             
             # Get metadata if requested
             metadata = {}
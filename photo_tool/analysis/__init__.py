@@ -2,5 +2,8 @@
 
 from .time_grouping import group_by_time, TimeGroup
 from .clustering import cluster_similar_photos, PhotoCluster
+from .duplicates import find_exact_duplicates
+from .features import FeatureExtractor, PhotoFeatures
+from .quality_matrix import QualityMatrix
 
-__all__ = ["group_by_time", "TimeGroup", "cluster_similar_photos", "PhotoCluster"]
+__all__ = ["group_by_time", "TimeGroup", "cluster_similar_photos", "PhotoCluster", "find_exact_duplicates", "FeatureExtractor", "PhotoFeatures", "QualityMatrix"]
@@ -4,18 +4,27 @@ Stage 3: Clustering similar photos within time groups
 
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Any, Callable, List, Dict, Optional, Tuple
 
+import numpy as np
 from tqdm import tqdm
 
+from .features import FeatureExtractor
 from .time_grouping import TimeGroup
-from .similarity import compute_phash, compare_hashes, HashMethod
+from .similarity import compute_phash, HashMethod
+from .similarity.hash_array import hamming_distances, hash_pairs_within, pack_hashes
+from .similarity.hash_cache import HashCache, SegmentCache
+from .similarity.hash_index import HashIndex
+from .similarity.ssim import PROXY_SIZE, ProxyCache, batch_ssim, compute_proxy
 from ..util.logging import get_logger
 
 
 logger = get_logger("clustering")
 
 
+HASH_CACHE_BATCH = 256  # computed hashes/proxies per cache insert
+
+
 @dataclass
 class PhotoCluster:
     """Cluster of similar photos"""
@@ -55,13 +64,18 @@ def cluster_similar_photos(
     hash_method: HashMethod = HashMethod.PHASH,
     similarity_threshold: int = 6,
     blur_scores: Optional[Dict[Path, float]] = None,
-    show_progress: bool = True
+    show_progress: bool = True,
+    use_embedded_preview: bool = False,
+    hash_cache: Optional[HashCache] = None,
+    ssim_threshold: Optional[float] = None,
+    proxy_cache: Optional[ProxyCache] = None
 ) -> List[PhotoCluster]:
     """
     Cluster similar photos within time groups
     
     This is Stage 2+3 of the pipeline:
     - Compute perceptual hashes
+    - Optionally confirm the hash matches by SSIM (see _ssim_confirmed_pairs)
     - Group similar photos together
     
     Args:
@@ -70,61 +84,44 @@ def cluster_similar_photos(
         similarity_threshold: Max hash distance for similarity
         blur_scores: Optional dict of blur scores for ranking
         show_progress: Show progress bar
+        use_embedded_preview: Hash embedded JPEG previews (see compute_phash)
+        hash_cache: Persistent hashes (same method and preview mode); only
+            photos missing from it are decoded
+        ssim_threshold: Minimum SSIM of proxies for hash matches (None = hashes only)
+        proxy_cache: Persistent SSIM proxies (same preview mode)
         
     Returns:
         List of PhotoCluster objects
     """
     all_clusters = []
     
+    # Hash all photos in one pass (batch cache lookup)
+    all_photos = list(dict.fromkeys(photo for group in time_groups for photo in group.photos))
+    hashes = dict(zip(all_photos, compute_hashes(
+        all_photos, hash_method, use_embedded_preview, hash_cache, show_progress
+    )))
+    
+    if ssim_threshold is not None:
+        confirmed = _ssim_confirmed_pairs(
+            time_groups, hashes, similarity_threshold, ssim_threshold,
+            use_embedded_preview, proxy_cache, show_progress
+        )
+    
     iterator = tqdm(time_groups, desc="Clustering photos") if show_progress else time_groups
     
-    for time_group in iterator:
-        # Compute hashes for all photos in group
-        photo_hashes = []
-        for photo in time_group.photos:
-            try:
-                hash_str = compute_phash(photo, method=hash_method)
-                photo_hashes.append(hash_str)
-            except Exception as e:
-                logger.warning(f"Could not hash {photo}: {e}")
-                photo_hashes.append(None)
+    for number, time_group in enumerate(iterator):
+        photo_hashes = [hashes[photo] for photo in time_group.photos]
         
         # Build clusters using simple sequential grouping
         # (More sophisticated: use graph clustering, but this is fast and works well)
-        clusters = []
-        used = set()
-        
-        for i, (photo, hash_val) in enumerate(zip(time_group.photos, photo_hashes)):
-            if i in used or hash_val is None:
-                continue
-            
-            # Start new cluster
-            cluster_photos = [photo]
-            cluster_hashes = [hash_val]
-            cluster_blur_scores = [blur_scores.get(photo) if blur_scores else None]
-            used.add(i)
-            
-            # Find similar photos
-            for j, (other_photo, other_hash) in enumerate(zip(time_group.photos, photo_hashes)):
-                if j <= i or j in used or other_hash is None:
-                    continue
-                
-                # Compare hashes
-                distance = compare_hashes(hash_val, other_hash)
-                
-                if distance <= similarity_threshold:
-                    cluster_photos.append(other_photo)
-                    cluster_hashes.append(other_hash)
-                    cluster_blur_scores.append(blur_scores.get(other_photo) if blur_scores else None)
-                    used.add(j)
-            
-            # Only create cluster if multiple photos
-            if len(cluster_photos) >= 2:
-                clusters.append(PhotoCluster(
-                    photos=cluster_photos,
-                    hashes=cluster_hashes,
-                    blur_scores=cluster_blur_scores
-                ))
+        if ssim_threshold is None:
+            clusters = _sequential_clusters(
+                time_group.photos, photo_hashes, similarity_threshold, blur_scores
+            )
+        else:
+            clusters = _greedy_clusters(
+                time_group.photos, photo_hashes, confirmed.get(number, {}), blur_scores
+            )
         
         all_clusters.extend(clusters)
     
@@ -137,18 +134,28 @@ def cluster_single_group(
     photos: List[Path],
     hash_method: HashMethod = HashMethod.PHASH,
     similarity_threshold: int = 6,
-    blur_scores: Optional[Dict[Path, float]] = None
+    blur_scores: Optional[Dict[Path, float]] = None,
+    use_embedded_preview: bool = False,
+    index: Optional[HashIndex] = None,
+    hash_cache: Optional[HashCache] = None
 ) -> List[PhotoCluster]:
     """
     Cluster photos without time grouping (use all photos as one group)
     
-    Useful for when you want to find duplicates across entire collection
+    Useful for when you want to find duplicates across entire collection.
+    Similar pairs come from a multi-index hash search (see hash_index), so
+    this scales to whole libraries; the grouping is the same as in
+    cluster_similar_photos.
     
     Args:
         photos: List of photo paths
         hash_method: Hashing method
         similarity_threshold: Max distance for similarity
         blur_scores: Optional blur scores
+        use_embedded_preview: Hash embedded JPEG previews (see compute_phash)
+        index: Persistent index (keyed by path) to reuse hashes from; new
+            hashes are added to it. Must hold hashes of the same method.
+        hash_cache: Persistent hashes by file identity (see update_hash_index)
         
     Returns:
         List of PhotoCluster objects
@@ -156,55 +163,389 @@ def cluster_single_group(
     if not photos:
         return []
     
+    if index is None:
+        index = HashIndex()
+    
     logger.info(f"Computing hashes for {len(photos)} photos")
+    update_hash_index(index, photos, hash_method, use_embedded_preview, hash_cache, show_progress=True)
     
-    # Compute all hashes
-    photo_hashes = []
-    for photo in tqdm(photos, desc="Computing hashes"):
-        try:
-            hash_str = compute_phash(photo, method=hash_method)
-            photo_hashes.append(hash_str)
-        except Exception as e:
-            logger.warning(f"Could not hash {photo}: {e}")
-            photo_hashes.append(None)
-    
-    # Build similarity graph (this can be slow for large collections)
     logger.info("Building similarity clusters")
     
-    clusters = []
-    used = set()
+    # Photo list positions; a path listed twice is one photo
+    positions: Dict[str, int] = {}
+    for i, photo in enumerate(photos):
+        positions.setdefault(str(photo), i)
     
-    for i, (photo, hash_val) in enumerate(tqdm(list(zip(photos, photo_hashes)), desc="Clustering")):
-        if i in used or hash_val is None:
-            continue
+    neighbours: Dict[int, List[int]] = {}
+    for key_a, key_b, _ in index.all_pairs(similarity_threshold):
+        i, j = positions.get(key_a), positions.get(key_b)
+        if i is not None and j is not None:
+            neighbours.setdefault(min(i, j), []).append(max(i, j))
+    
+    clusters = _greedy_clusters(photos, [index.get(str(photo)) for photo in photos], neighbours, blur_scores)
+    
+    logger.info(f"Found {len(clusters)} clusters")
+    
+    return clusters
+
+
+def update_hash_index(
+    index: HashIndex,
+    photos: List[Path],
+    hash_method: HashMethod = HashMethod.PHASH,
+    use_embedded_preview: bool = False,
+    hash_cache: Optional[HashCache] = None,
+    show_progress: bool = False
+) -> int:
+    """
+    Insert the hashes of photos into the index
+    
+    Without a cache only photos that are not in the index are hashed. With
+    a cache every photo is looked up by its current identity, so photos
+    changed since they were indexed get their new hash.
+    
+    Args:
+        index: Hash index keyed by path
+        photos: Photo paths
+        hash_method: Hashing method (must match the index)
+        use_embedded_preview: Hash embedded JPEG previews (see compute_phash)
+        hash_cache: Persistent hashes by file identity
+        show_progress: Show progress bar
+        
+    Returns:
+        Number of photos added or changed
+    """
+    photos = list(dict.fromkeys(photos))
+    if hash_cache is None:
+        photos = [p for p in photos if str(p) not in index]
+    
+    hashes = compute_hashes(photos, hash_method, use_embedded_preview, hash_cache, show_progress)
+    return index.add_many((str(p), h) for p, h in zip(photos, hashes) if h is not None)
+
+
+def compute_hashes(
+    photos: List[Path],
+    hash_method: HashMethod = HashMethod.PHASH,
+    use_embedded_preview: bool = False,
+    hash_cache: Optional[HashCache] = None,
+    show_progress: bool = False
+) -> List[Optional[str]]:
+    """
+    Perceptual hashes of many photos, served from the cache where possible
+    
+    Computed hashes are added to the cache in batches, so an interrupted
+    run keeps what it hashed.
+    
+    Args:
+        photos: Photo paths
+        hash_method: Hashing method
+        use_embedded_preview: Hash embedded JPEG previews (see compute_phash)
+        hash_cache: Persistent hashes (same method and preview mode)
+        show_progress: Show progress bar
+        
+    Returns:
+        Hex hash per photo, None where it could not be hashed
+    """
+    return _cached_values(
+        photos,
+        lambda photo: compute_phash(photo, method=hash_method, use_preview=use_embedded_preview),
+        hash_cache,
+        "hashes",
+        show_progress
+    )
+
+
+def compute_proxies(
+    photos: List[Path],
+    use_embedded_preview: bool = False,
+    proxy_cache: Optional[ProxyCache] = None,
+    show_progress: bool = False
+) -> List[Optional[np.ndarray]]:
+    """
+    SSIM proxies of many photos, served from the cache where possible
+    
+    Args:
+        photos: Photo paths
+        use_embedded_preview: Use embedded JPEG previews (see compute_proxy)
+        proxy_cache: Persistent proxies (same preview mode)
+        show_progress: Show progress bar
         
-        # Start new cluster
-        cluster_photos = [photo]
-        cluster_hashes = [hash_val]
-        cluster_blur_scores = [blur_scores.get(photo) if blur_scores else None]
-        used.add(i)
+    Returns:
+        Proxy per photo, None where it could not be computed
+    """
+    size = proxy_cache.size if proxy_cache is not None else PROXY_SIZE
+    return _cached_values(
+        photos,
+        lambda photo: compute_proxy(photo, size, use_preview=use_embedded_preview),
+        proxy_cache,
+        "SSIM proxies",
+        show_progress
+    )
+
+
+def _cached_values(
+    photos: List[Path],
+    compute: Callable[[Path], Any],
+    cache: Optional[SegmentCache],
+    label: str,
+    show_progress: bool
+) -> list:
+    """Per-photo values from the cache, computing and caching the missing ones"""
+    values: list = [None] * len(photos)
+    keys: List[Optional[bytes]] = [None] * len(photos)
+    
+    if cache is not None:
+        for i, photo in enumerate(photos):
+            try:
+                keys[i] = cache.file_key(photo)
+            except OSError as e:
+                logger.warning(f"Could not read {photo}: {e}")
         
-        # Find all similar photos
-        for j, (other_photo, other_hash) in enumerate(zip(photos, photo_hashes)):
-            if j <= i or j in used or other_hash is None:
+        readable = [i for i, key in enumerate(keys) if key is not None]
+        for i, value in zip(readable, cache.lookup([keys[i] for i in readable])):
+            values[i] = value
+        todo = [i for i in readable if values[i] is None]
+        logger.info(f"Cached {label}: {len(readable) - len(todo)} cached, {len(todo)} to compute")
+    else:
+        todo = list(range(len(photos)))
+    
+    iterator = tqdm(todo, desc=f"Computing {label}") if show_progress and todo else todo
+    pending = []
+    try:
+        for i in iterator:
+            try:
+                values[i] = compute(photos[i])
+            except Exception as e:
+                logger.warning(f"Could not compute {label} for {photos[i]}: {e}")
                 continue
             
-            distance = compare_hashes(hash_val, other_hash)
-            
-            if distance <= similarity_threshold:
-                cluster_photos.append(other_photo)
-                cluster_hashes.append(other_hash)
-                cluster_blur_scores.append(blur_scores.get(other_photo) if blur_scores else None)
-                used.add(j)
+            if cache is not None:
+                pending.append((keys[i], values[i]))
+                if len(pending) >= HASH_CACHE_BATCH:
+                    cache.insert(pending)
+                    pending = []
+    finally:
+        if pending:
+            cache.insert(pending)
+    
+    return values
+
+
+def score_photos(
+    photos: List[Path],
+    hash_method: HashMethod = HashMethod.PHASH,
+    use_embedded_preview: bool = False,
+    hash_cache: Optional[HashCache] = None,
+    jobs: Optional[int] = None,
+    show_progress: bool = False,
+    analysis_scale: int = 1
+) -> Dict[Path, float]:
+    """
+    Blur scores of photos, hashing them in the same decode
+    
+    Photos whose hash is not in the cache yet are hashed from the pixels
+    decoded for the blur score and the hashes are added to the cache, so
+    a following cluster_similar_photos() with the same cache decodes
+    nothing. (Embedded-preview hashes need the preview, not the full
+    image, and are left to compute_hashes().)
+    
+    Args:
+        photos: Photo paths
+        hash_method: Hashing method of the cache
+        use_embedded_preview: Hashes come from embedded previews
+        hash_cache: Persistent hashes to fill
+        jobs: Worker processes (None = CPU count, 1 = serial)
+        show_progress: Show progress bar
+        analysis_scale: Resolution divisor for the blur score (1, 2, 4 or 8)
         
-        # Only save if multiple photos
-        if len(cluster_photos) >= 2:
-            clusters.append(PhotoCluster(
-                photos=cluster_photos,
-                hashes=cluster_hashes,
-                blur_scores=cluster_blur_scores
-            ))
+    Returns:
+        Dict of blur scores (photos that could not be read are missing)
+    """
+    photos = list(dict.fromkeys(photos))
+    keys: Dict[Path, bytes] = {}
     
-    logger.info(f"Found {len(clusters)} clusters")
+    if hash_cache is not None and not use_embedded_preview:
+        for photo in photos:
+            try:
+                keys[photo] = hash_cache.file_key(photo)
+            except OSError:
+                pass
+        cached = hash_cache.lookup(list(keys.values()))
+        keys = {photo: key for (photo, key), hash_str in zip(keys.items(), cached) if hash_str is None}
+    
+    # Photos to hash and photos that only need a blur score
+    passes = [
+        ([p for p in photos if p in keys], FeatureExtractor((hash_method,), exposure=False, analysis_scale=analysis_scale)),
+        ([p for p in photos if p not in keys], FeatureExtractor((), exposure=False, analysis_scale=analysis_scale)),
+    ]
+    
+    blur_scores = {}
+    new_hashes = []
+    for batch, extractor in passes:
+        if not batch:
+            continue
+        for photo, features in zip(batch, extractor.extract_many(batch, jobs, show_progress)):
+            if features is None:
+                continue
+            blur_scores[photo] = features.blur_score
+            if photo in keys:
+                new_hashes.append((keys[photo], features.hashes[hash_method]))
+    
+    if new_hashes:
+        hash_cache.insert(new_hashes)
+    return blur_scores
+
+
+def find_similar_photos(
+    photo: Path,
+    index: HashIndex,
+    similarity_threshold: int = 6,
+    hash_method: HashMethod = HashMethod.PHASH,
+    use_embedded_preview: bool = False
+) -> List[Tuple[Path, int]]:
+    """
+    Photos in the index that look like a given photo
+    
+    Args:
+        photo: Photo to compare (hashed if it is not in the index)
+        index: Hash index keyed by path
+        similarity_threshold: Max hash distance
+        hash_method: Hashing method of the index
+        use_embedded_preview: Hash embedded JPEG previews (see compute_phash)
+        
+    Returns:
+        (path, distance) of the similar photos, closest first (without the photo itself)
+    """
+    key = str(photo)
+    hash_str = index.get(key)
+    if hash_str is None:
+        hash_str = compute_phash(photo, method=hash_method, use_preview=use_embedded_preview)
+    
+    return [(Path(other), distance) for other, distance in index.query(hash_str, similarity_threshold) if other != key]
+
+
+def _sequential_clusters(
+    photos: List[Path],
+    hashes: List[Optional[str]],
+    similarity_threshold: int,
+    blur_scores: Optional[Dict[Path, float]],
+    show_progress: bool = False
+) -> List[PhotoCluster]:
+    """
+    Greedy grouping: each unassigned photo takes all later unassigned
+    photos within the threshold (vectorized one-vs-many distances)
+    """
+    packed, available = pack_hashes(hashes)
+    
+    indices = range(len(photos))
+    if show_progress:
+        indices = tqdm(indices, desc="Clustering")
+    
+    clusters = []
+    for i in indices:
+        if not available[i]:
+            continue
+        available[i] = False
+        
+        distances = hamming_distances(packed[i], packed[i + 1:])
+        members = np.nonzero((distances <= similarity_threshold) & available[i + 1:])[0] + i + 1
+        if len(members) == 0:
+            continue
+        available[members] = False
+        
+        members = [i] + members.tolist()
+        clusters.append(_make_cluster(photos, [hashes[j] for j in members], members, blur_scores))
+    
+    return clusters
+
+
+def _greedy_clusters(
+    photos: List[Path],
+    hashes: List[Optional[str]],
+    neighbours: Dict[int, List[int]],
+    blur_scores: Optional[Dict[Path, float]]
+) -> List[PhotoCluster]:
+    """
+    Greedy grouping as in _sequential_clusters, on precomputed similar
+    pairs (neighbours: position -> later similar positions)
+    """
+    clusters = []
+    used = set()
+    for i in sorted(neighbours):
+        if i in used:
+            continue
+        members = [i] + sorted(j for j in neighbours[i] if j not in used)
+        if len(members) < 2:
+            continue
+        used.update(members)
+        clusters.append(_make_cluster(photos, [hashes[j] for j in members], members, blur_scores))
     
     return clusters
+
+
+def _ssim_confirmed_pairs(
+    time_groups: List[TimeGroup],
+    hashes: Dict[Path, Optional[str]],
+    similarity_threshold: int,
+    ssim_threshold: float,
+    use_embedded_preview: bool,
+    proxy_cache: Optional[ProxyCache],
+    show_progress: bool
+) -> Dict[int, Dict[int, List[int]]]:
+    """
+    Hash-similar pairs of each time group that also pass the SSIM check
+    
+    SSIM only runs on the hash candidates: proxies are loaded for the
+    photos in a candidate pair and all pairs are scored in one batch.
+    Pairs without proxies (unreadable file) keep the hash verdict.
+    
+    Returns:
+        Time group number -> neighbours (position -> later similar positions)
+    """
+    candidates = []  # (group number, i, j)
+    for number, time_group in enumerate(time_groups):
+        packed, valid = pack_hashes([hashes[photo] for photo in time_group.photos])
+        candidates.extend(
+            (number, i, j) for i, j, _ in hash_pairs_within(packed, similarity_threshold)
+            if valid[i] and valid[j]
+        )
+    
+    involved = list(dict.fromkeys(
+        time_groups[number].photos[k] for number, i, j in candidates for k in (i, j)
+    ))
+    proxies = dict(zip(involved, compute_proxies(involved, use_embedded_preview, proxy_cache, show_progress)))
+    rows = {photo: row for row, photo in enumerate(p for p in involved if proxies[p] is not None)}
+    
+    scored = [
+        (rows[time_groups[number].photos[i]], rows[time_groups[number].photos[j]])
+        for number, i, j in candidates
+        if time_groups[number].photos[i] in rows and time_groups[number].photos[j] in rows
+    ]
+    stack = np.stack([proxies[photo] for photo in rows]) if rows else np.zeros((0, PROXY_SIZE, PROXY_SIZE), np.uint8)
+    scores = iter(batch_ssim(stack, np.array(scored, dtype=np.intp)).tolist())
+    
+    confirmed: Dict[int, Dict[int, List[int]]] = {}
+    rejected = 0
+    for number, i, j in candidates:
+        photos = time_groups[number].photos
+        if photos[i] in rows and photos[j] in rows and next(scores) < ssim_threshold:
+            rejected += 1
+            continue
+        confirmed.setdefault(number, {}).setdefault(i, []).append(j)
+    
+    logger.info(f"SSIM refinement: {len(candidates) - rejected} of {len(candidates)} hash matches confirmed")
+    return confirmed
+
+
+def _make_cluster(
+    photos: List[Path],
+    hashes: List[str],
+    members: List[int],
+    blur_scores: Optional[Dict[Path, float]]
+) -> PhotoCluster:
+    """PhotoCluster of the photos at the given positions"""
+    return PhotoCluster(
+        photos=[photos[j] for j in members],
+        hashes=hashes,
+        blur_scores=[blur_scores.get(photos[j]) if blur_scores else None for j in members]
+    )
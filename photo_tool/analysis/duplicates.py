@@ -0,0 +1,172 @@
+"""
+Exact (byte-identical) duplicate detection
+
+Three tiers, each only run on the survivors of the previous one:
+1. Group by file size (free: known from the scan)
+2. Hash the first and last 64 KiB of each candidate
+3. Full blake2b content hash, with parallel reads
+
+Files that share size, head and tail are almost always identical, so the
+expensive full read is rarely wasted.
+"""
+
+import hashlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from tqdm import tqdm
+
+from .clustering import PhotoCluster
+from ..io.scanner import MediaFile
+from ..util.logging import get_logger
+
+
+logger = get_logger("duplicates")
+
+
+PARTIAL_HASH_BYTES = 64 * 1024
+READ_CHUNK_BYTES = 1024 * 1024
+DIGEST_SIZE = 20  # bytes
+
+
+def partial_hash(path: Path, size_bytes: int) -> str:
+    """
+    Hash the first and last PARTIAL_HASH_BYTES of a file
+
+    For files up to 2 * PARTIAL_HASH_BYTES the two windows cover the whole
+    content without overlap, so the result equals full_hash().
+    """
+    h = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    with open(path, 'rb') as f:
+        h.update(f.read(PARTIAL_HASH_BYTES))
+        if size_bytes > PARTIAL_HASH_BYTES:
+            f.seek(max(PARTIAL_HASH_BYTES, size_bytes - PARTIAL_HASH_BYTES))
+            h.update(f.read(PARTIAL_HASH_BYTES))
+    return h.hexdigest()
+
+
+def full_hash(path: Path) -> str:
+    """blake2b hash of the complete file content"""
+    h = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    with open(path, 'rb') as f:
+        while chunk := f.read(READ_CHUNK_BYTES):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def find_exact_duplicates(
+    media_files: Sequence[MediaFile],
+    max_workers: Optional[int] = None,
+    show_progress: bool = True
+) -> List[PhotoCluster]:
+    """
+    Find groups of byte-identical files
+
+    Within each group, files are ordered oldest first (by modification
+    time, then path), so strategy "keep_first" in deduplicate_photos()
+    keeps the original import.
+
+    Args:
+        media_files: Scanned files (MediaFile or MediaTable rows)
+        max_workers: Number of parallel reader threads
+        show_progress: Show progress bars
+
+    Returns:
+        List of PhotoCluster objects (one per set of identical files);
+        `hashes` holds the content hash of each file
+    """
+    # Tier 1: same size (empty files are trivially equal and not interesting)
+    by_size: Dict[int, List[MediaFile]] = defaultdict(list)
+    for media in media_files:
+        if media.size_bytes > 0:
+            by_size[media.size_bytes].append(media)
+
+    candidates = [group for group in by_size.values() if len(group) >= 2]
+    candidate_count = sum(len(g) for g in candidates)
+    logger.info(f"Exact duplicates: {candidate_count} files share a size with another file")
+
+    # Tier 2: head + tail hash
+    partial_groups = _split_groups(
+        candidates,
+        lambda m: partial_hash(m.path, m.size_bytes),
+        max_workers,
+        "Hashing file edges" if show_progress else None
+    )
+
+    # Small files were hashed completely in tier 2
+    final_groups = [(k, g) for k, g in partial_groups if g[0].size_bytes <= 2 * PARTIAL_HASH_BYTES]
+    large_groups = [g for k, g in partial_groups if g[0].size_bytes > 2 * PARTIAL_HASH_BYTES]
+
+    # Tier 3: full content hash
+    final_groups.extend(_split_groups(
+        large_groups,
+        lambda m: full_hash(m.path),
+        max_workers,
+        "Hashing file content" if show_progress else None
+    ))
+
+    clusters = []
+    for digest, group in final_groups:
+        group.sort(key=lambda m: (m.modified_time, str(m.path)))
+        clusters.append(PhotoCluster(
+            photos=[m.path for m in group],
+            hashes=[digest] * len(group),
+            blur_scores=[None] * len(group)
+        ))
+
+    clusters.sort(key=lambda c: str(c.photos[0]))
+
+    logger.info(
+        f"Exact duplicates: {len(clusters)} groups, "
+        f"{sum(c.count - 1 for c in clusters)} redundant copies"
+    )
+
+    return clusters
+
+
+def _split_groups(
+    groups: List[List[MediaFile]],
+    key_func: Callable[[MediaFile], str],
+    max_workers: Optional[int],
+    progress_desc: Optional[str]
+) -> List[Tuple[str, List[MediaFile]]]:
+    """
+    Split each group by a per-file key computed in parallel
+
+    Files whose key cannot be computed (unreadable) are dropped.
+    Only sub-groups with at least two files are returned.
+
+    Returns:
+        (key, files) pairs
+    """
+    files = [m for group in groups for m in group]
+    if not files:
+        return []
+
+    def compute(media: MediaFile) -> Optional[str]:
+        try:
+            return key_func(media)
+        except OSError as e:
+            logger.warning(f"Could not read {media.path}: {e}")
+            return None
+
+    # Reading is I/O bound and hashlib releases the GIL on large buffers
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        keys = pool.map(compute, files)
+        if progress_desc:
+            keys = tqdm(keys, total=len(files), desc=progress_desc)
+        keys = list(keys)
+
+    result = []
+    offset = 0
+    for group in groups:
+        by_key: Dict[str, List[MediaFile]] = defaultdict(list)
+        for media, key in zip(group, keys[offset:offset + len(group)]):
+            if key is not None:
+                by_key[key].append(media)
+        offset += len(group)
+        result.extend((k, g) for k, g in by_key.items() if len(g) >= 2)
+
+    return result
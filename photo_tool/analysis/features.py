@@ -0,0 +1,236 @@
+"""
+Single-decode feature extraction for photo analysis
+
+compute_phash, detect_blur and the exposure functions each open and
+decode the image on their own. FeatureExtractor reads the file into
+memory once, decodes it once (PIL, like compute_phash) and computes all
+requested features from the same pixels: perceptual hashes, blur score,
+luminance/RGB histograms and exposure statistics.
+
+Hashes are bit-identical to compute_phash (same decoder, stored
+orientation), so they can be mixed with cached hashes. Blur and
+histograms use the same grayscale conversion as detect_blur and
+compute_histogram. Images with more than 8 bits per sample (16-bit
+PNG/TIFF) are decoded with OpenCV for blur and exposure, like in
+detect_blur, because PIL clips them to 8 bits where OpenCV scales them;
+with hashes requested, they are decoded twice.
+
+With an analysis_scale above 1, blur and exposure come from a reduced
+OpenCV decode of the same in-memory file (see detect_blur); the full
+PIL decode is then only done when hashes are requested. With exposure
+on, that reduced decode is done twice (grayscale and color, see
+extract()).
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import cv2
+import numpy as np
+from PIL import Image
+from tqdm import tqdm
+
+from ..util.logging import get_logger
+from .similarity.blur import ANALYSIS_SCALES, BlurMethod, blur_score, read_gray
+from .similarity.exposure import detect_clipping
+from .similarity.phash import HashMethod, _hash_image
+
+
+logger = get_logger("features")
+
+
+MIN_PARALLEL_FILES = 16
+
+# Modes with more than 8 bits per sample (PIL opens 16-bit grayscale PNG/TIFF as I;16)
+_HIGH_DEPTH_MODES = {'I', 'F', 'I;16', 'I;16L', 'I;16B', 'I;16N'}
+
+_REDUCED_COLOR = {
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+@dataclass
+class PhotoFeatures:
+    """Analysis features of one photo"""
+    path: Path
+    width: int
+    height: int
+    hashes: Dict[HashMethod, str] = field(default_factory=dict)
+    blur_score: Optional[float] = None
+    luminance_histogram: Optional[np.ndarray] = None  # 256 bins, uint32
+    rgb_histograms: Optional[np.ndarray] = None  # (3, 256) uint32: red, green, blue
+    mean_brightness: Optional[float] = None
+    std_dev: Optional[float] = None
+    shadow_clipping: Optional[float] = None  # fraction of pixels in the 5 darkest bins
+    highlight_clipping: Optional[float] = None  # fraction in the 5 brightest bins
+
+    @property
+    def exposure(self) -> Dict[str, float]:
+        """Exposure metrics as returned by compute_exposure_score"""
+        if self.luminance_histogram is None:
+            return {}
+        clipping = detect_clipping(self.luminance_histogram)
+        return {
+            'mean_brightness': self.mean_brightness,
+            'std_dev': self.std_dev,
+            'contrast': self.std_dev / self.mean_brightness if self.mean_brightness > 0 else 0,
+            **clipping
+        }
+
+
+class FeatureExtractor:
+    """
+    Computes the requested features of photos from one decode each
+
+    Args:
+        hash_methods: Perceptual hashes to compute (empty for none)
+        hash_size: Hash size (see compute_phash)
+        blur_method: Blur score method, None to skip
+        exposure: Compute histograms and exposure statistics
+        analysis_scale: Resolution divisor for blur and exposure (1, 2, 4 or 8)
+    """
+
+    def __init__(
+        self,
+        hash_methods: Sequence[HashMethod] = (HashMethod.PHASH,),
+        hash_size: int = 8,
+        blur_method: Optional[BlurMethod] = BlurMethod.LAPLACIAN,
+        exposure: bool = True,
+        analysis_scale: int = 1
+    ):
+        if analysis_scale not in ANALYSIS_SCALES:
+            raise ValueError(f"Unsupported analysis scale: {analysis_scale}")
+        self.hash_methods = tuple(hash_methods)
+        self.hash_size = hash_size
+        self.blur_method = blur_method
+        self.exposure = exposure
+        self.analysis_scale = analysis_scale
+
+    def extract(self, image_path: Path) -> PhotoFeatures:
+        """
+        Features of one photo
+
+        Raises:
+            OSError: File cannot be read or decoded
+        """
+        data = Path(image_path).read_bytes()
+        encoded = np.frombuffer(data, dtype=np.uint8)
+        pixels_needed = self.blur_method is not None or self.exposure
+        full_resolution = pixels_needed and self.analysis_scale == 1
+
+        with Image.open(BytesIO(data)) as img:
+            features = PhotoFeatures(path=image_path, width=img.width, height=img.height)
+            # PIL's convert('RGB') clips 16-bit samples where OpenCV scales them
+            pil_pixels = full_resolution and img.mode not in _HIGH_DEPTH_MODES
+            if self.hash_methods or pil_pixels:
+                if img.mode != 'RGB':
+                    img = img.convert('RGB')
+                else:
+                    img.load()
+
+            for method in self.hash_methods:
+                features.hashes[method] = _hash_image(img, method, self.hash_size)
+
+            if not pixels_needed:
+                return features
+            rgb = np.asarray(img) if pil_pixels else None
+
+        if pil_pixels:
+            gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+        elif full_resolution:
+            # Same decode as detect_blur (8-bit color from 16-bit samples)
+            bgr = cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+            if bgr is None:
+                raise OSError(f"Could not decode {image_path}")
+            rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+            gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+        else:
+            # Reduced decode of the bytes already in memory (DCT scaling for JPEG)
+            try:
+                gray = read_gray(encoded, self.analysis_scale)
+            except ValueError as e:
+                raise OSError(f"Could not decode {image_path}: {e}") from e
+            if self.exposure:
+                # Decoded again in color: the reduced grayscale decode (the
+                # JPEG luma plane) differs from a conversion of the color
+                # decode by a few levels, and blur scores must match
+                # detect_blur at this scale (calibrate-blur, blur-only runs)
+                bgr = cv2.imdecode(encoded, _REDUCED_COLOR[self.analysis_scale])
+                if bgr is None:
+                    raise OSError(f"Could not decode {image_path}")
+                rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+
+        if self.blur_method is not None:
+            features.blur_score = blur_score(gray, self.blur_method)
+
+        if self.exposure:
+            self._add_exposure(features, rgb, gray)
+
+        return features
+
+    def extract_many(
+        self,
+        image_paths: Sequence[Path],
+        jobs: Optional[int] = None,
+        show_progress: bool = False
+    ) -> List[Optional[PhotoFeatures]]:
+        """
+        Features of many photos, in a process pool for large batches
+
+        Args:
+            image_paths: Photos
+            jobs: Worker processes (None = CPU count, 1 = serial)
+            show_progress: Show progress bar
+
+        Returns:
+            Features in input order, None where a photo could not be read
+        """
+        results = self._map(list(image_paths), jobs)
+        if show_progress:
+            results = tqdm(results, total=len(image_paths), desc="Analyzing photos")
+        return list(results)
+
+    def _map(self, paths: List[Path], jobs: Optional[int]) -> Iterator[Optional[PhotoFeatures]]:
+        jobs = jobs or os.cpu_count() or 1
+
+        if jobs <= 1 or len(paths) < MIN_PARALLEL_FILES:
+            for path in paths:
+                yield self._extract_safe(path)
+            return
+
+        # Decoding dominates; small chunks keep the workers balanced
+        chunksize = max(1, min(16, len(paths) // (jobs * 4)))
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            yield from pool.map(self._extract_safe, paths, chunksize=chunksize)
+
+    def _extract_safe(self, path: Path) -> Optional[PhotoFeatures]:
+        """extract() that logs instead of raising (pool worker)"""
+        try:
+            return self.extract(path)
+        except Exception as e:
+            logger.warning(f"Could not analyze {path}: {e}")
+            return None
+
+    @staticmethod
+    def _add_exposure(features: PhotoFeatures, rgb: np.ndarray, gray: np.ndarray) -> None:
+        """Histograms, brightness statistics and clipping"""
+        histogram = cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel()
+        features.luminance_histogram = histogram.astype(np.uint32)
+        features.rgb_histograms = np.stack([
+            cv2.calcHist([rgb], [channel], None, [256], [0, 256]).ravel()
+            for channel in range(3)
+        ]).astype(np.uint32)
+
+        mean, std = cv2.meanStdDev(gray)
+        features.mean_brightness = float(mean[0, 0])
+        features.std_dev = float(std[0, 0])
+
+        clipping = detect_clipping(histogram)
+        features.shadow_clipping = clipping['shadow_clipping']
+        features.highlight_clipping = clipping['highlight_clipping']
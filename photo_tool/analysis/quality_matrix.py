@@ -0,0 +1,421 @@
+"""
+Library-wide exposure and sharpness statistics
+
+QualityMatrix keeps per-photo analysis results in NumPy columns: blur
+score, brightness statistics, clipping and a 64-bin luminance histogram
+(the 256-bin histogram summed in groups of four). Saved to the workspace
+as one file of consecutive column sections, it is memory-mapped on load,
+so queries like "underexposed", "highlights clipped above 2%" or "the 20
+sharpest photos in May" are vectorized masks over the columns and take
+milliseconds for a million photos without opening any image.
+
+File layout: HEADER, then each column of COLUMNS for all rows (8-byte
+aligned), then the UTF-8 path blob (row i ends at path_end[i]). The
+histogram is stored bin-major, so a query over a few bins only reads
+those bins.
+"""
+
+import os
+import struct
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..io import read_capture_times
+from ..util.logging import get_logger
+from .features import FeatureExtractor, PhotoFeatures
+from .similarity.blur import BlurMethod
+from .similarity.hash_cache import HashCache
+from .similarity.phash import HashMethod
+
+
+logger = get_logger("quality_matrix")
+
+
+MAGIC = b'PTQM'
+VERSION = 1
+HEADER = struct.Struct('<4sBBBxIxxxxQQ')  # magic, version, scale, blur method, bins, rows, path bytes
+HISTOGRAM_BINS = 64
+
+BLUR_METHOD_CODES = {None: 0, BlurMethod.LAPLACIAN: 1, BlurMethod.VARIANCE: 2}
+
+# name, dtype, values per row
+COLUMNS = (
+    ('mtime_ns', np.int64, 1),         # file version the row belongs to
+    ('size_bytes', np.int64, 1),
+    ('time_ns', np.int64, 1),          # capture time (modification time if unknown)
+    ('path_end', np.int64, 1),         # end of the row's path in the path blob
+    ('blur_score', np.float32, 1),     # NaN if not computed
+    ('mean_brightness', np.float32, 1),  # NaN (and zero histogram) if exposure not computed
+    ('std_dev', np.float32, 1),
+    ('shadow_clipping', np.float32, 1),
+    ('highlight_clipping', np.float32, 1),
+    ('pixels', np.int64, 1),           # analyzed pixels (histogram total)
+    ('histogram', np.uint32, HISTOGRAM_BINS),  # (rows, bins) view of a (bins, rows) section
+)
+
+
+def _timestamp_ns(value: datetime) -> int:
+    """Same conversion as MediaTable (microsecond datetimes)"""
+    return int(round(value.timestamp() * 1e6)) * 1000
+
+
+class QualityMatrix:
+    """
+    Per-photo quality statistics in NumPy columns (see module docstring)
+
+    Args:
+        columns: Array per COLUMNS name, all with the same number of rows
+        path_blob: UTF-8 paths, concatenated
+        analysis_scale: Resolution divisor the rows were analyzed at
+        blur_method: Blur score method of the rows
+    """
+
+    def __init__(
+        self,
+        columns: Dict[str, np.ndarray],
+        path_blob: bytes,
+        analysis_scale: int = 1,
+        blur_method: Optional[BlurMethod] = BlurMethod.LAPLACIAN
+    ):
+        for name, _, _ in COLUMNS:
+            setattr(self, name, columns[name])
+        self.path_blob = path_blob
+        self.analysis_scale = analysis_scale
+        self.blur_method = blur_method
+
+    @classmethod
+    def empty(cls, analysis_scale: int = 1, blur_method: Optional[BlurMethod] = BlurMethod.LAPLACIAN) -> "QualityMatrix":
+        columns = {
+            name: np.zeros((0, width) if width > 1 else 0, dtype=dtype)
+            for name, dtype, width in COLUMNS
+        }
+        return cls(columns, b'', analysis_scale, blur_method)
+
+    @classmethod
+    def from_features(
+        cls,
+        features: Sequence[PhotoFeatures],
+        modified_times: Sequence[datetime],
+        sizes: Sequence[int],
+        capture_times: Sequence[Optional[datetime]],
+        analysis_scale: int = 1,
+        blur_method: Optional[BlurMethod] = BlurMethod.LAPLACIAN
+    ) -> "QualityMatrix":
+        """
+        Rows for freshly analyzed photos
+
+        Args:
+            features: Analysis results (FeatureExtractor)
+            modified_times: File modification time per photo
+            sizes: File size per photo
+            capture_times: Capture time per photo (None = use modification time)
+            analysis_scale: Scale the features were computed at
+            blur_method: Blur method the features were computed with
+        """
+        n = len(features)
+        nan = np.float32('nan')
+
+        def column(values, dtype):
+            return np.array(values, dtype=dtype).reshape(n)
+
+        histograms = np.zeros((n, HISTOGRAM_BINS), dtype=np.uint32)
+        for i, f in enumerate(features):
+            if f.luminance_histogram is not None:
+                histograms[i] = f.luminance_histogram.reshape(HISTOGRAM_BINS, -1).sum(axis=1)
+
+        paths = [str(f.path).encode('utf-8', 'surrogateescape') for f in features]
+        mtime_ns = [_timestamp_ns(t) for t in modified_times]
+
+        columns = {
+            'mtime_ns': column(mtime_ns, np.int64),
+            'size_bytes': column(sizes, np.int64),
+            'time_ns': column([
+                _timestamp_ns(c) if c is not None else m for c, m in zip(capture_times, mtime_ns)
+            ], np.int64),
+            'path_end': np.cumsum([len(p) for p in paths], dtype=np.int64),
+            'blur_score': column([nan if f.blur_score is None else f.blur_score for f in features], np.float32),
+            'pixels': histograms.sum(axis=1, dtype=np.int64),
+            'histogram': histograms,
+        }
+        for name in ('mean_brightness', 'std_dev', 'shadow_clipping', 'highlight_clipping'):
+            columns[name] = column([nan if getattr(f, name) is None else getattr(f, name) for f in features], np.float32)
+
+        return cls(columns, b''.join(paths), analysis_scale, blur_method)
+
+    @classmethod
+    def load(cls, path: Path) -> "QualityMatrix":
+        """
+        Memory-map a saved matrix
+
+        Returns:
+            Matrix backed by the file (empty if it is missing or unreadable)
+        """
+        path = Path(path)
+        if not path.exists():
+            return cls.empty()
+
+        try:
+            raw = np.memmap(path, dtype=np.uint8, mode='r')
+            magic, version, scale, method, bins, rows, path_bytes = HEADER.unpack_from(raw[:HEADER.size].tobytes())
+            methods = {code: m for m, code in BLUR_METHOD_CODES.items()}
+            if magic != MAGIC or version != VERSION or bins != HISTOGRAM_BINS or method not in methods:
+                raise ValueError("not a compatible quality matrix")
+
+            columns = {}
+            offset = HEADER.size
+            for name, dtype, width in COLUMNS:
+                size = rows * width * np.dtype(dtype).itemsize
+                column = raw[offset:offset + size].view(dtype)
+                columns[name] = column.reshape(width, rows).T if width > 1 else column
+                offset += -(-size // 8) * 8
+            path_blob = raw[offset:offset + path_bytes]
+            if len(path_blob) != path_bytes:
+                raise ValueError("file is truncated")
+
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"Ignoring quality matrix {path}: {e}")
+            return cls.empty()
+
+        return cls(columns, path_blob, scale, methods[method])
+
+    def save(self, path: Path) -> None:
+        """Write the matrix (temporary file, then rename)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(
+                MAGIC, VERSION, self.analysis_scale, BLUR_METHOD_CODES[self.blur_method],
+                HISTOGRAM_BINS, len(self), len(self.path_blob)
+            ))
+            for name, dtype, _ in COLUMNS:
+                data = np.ascontiguousarray(getattr(self, name).T, dtype=dtype).tobytes()
+                f.write(data)
+                f.write(b'\0' * (-len(data) % 8))
+            f.write(bytes(self.path_blob))
+
+        # Replacing fails on Windows while the old file is mapped
+        os.replace(tmp_path, path)
+
+    def __len__(self) -> int:
+        return len(self.mtime_ns)
+
+    def path(self, row: int) -> Path:
+        """Path of one row"""
+        start = int(self.path_end[row - 1]) if row > 0 else 0
+        return Path(bytes(self.path_blob[start:int(self.path_end[row])]).decode('utf-8', 'surrogateescape'))
+
+    def paths(self, rows: Optional[Sequence[int]] = None) -> List[Path]:
+        """Paths of rows (all rows by default)"""
+        rows = range(len(self)) if rows is None else rows
+        return [self.path(int(row)) for row in rows]
+
+    def row_index(self) -> Dict[str, int]:
+        """Path string -> row"""
+        blob = bytes(self.path_blob).decode('utf-8', 'surrogateescape')
+        if len(blob) != len(self.path_blob):
+            return {str(p): i for i, p in enumerate(self.paths())}  # non-ASCII paths
+        ends = self.path_end.tolist()
+        return {blob[start:end]: i for i, (start, end) in enumerate(zip([0] + ends[:-1], ends))}
+
+    def take(self, rows: np.ndarray) -> "QualityMatrix":
+        """In-memory matrix of some rows (row indices or bool mask)"""
+        rows = np.arange(len(self))[rows]
+        starts = np.concatenate([[0], self.path_end[:-1]])[rows]
+        ends = self.path_end[rows]
+        blob = bytes(self.path_blob)
+        path_blob = b''.join(blob[s:e] for s, e in zip(starts.tolist(), ends.tolist()))
+
+        columns = {name: np.array(getattr(self, name)[rows]) for name, _, _ in COLUMNS}
+        columns['path_end'] = np.cumsum(ends - starts, dtype=np.int64)
+        return QualityMatrix(columns, path_blob, self.analysis_scale, self.blur_method)
+
+    @classmethod
+    def concat(cls, first: "QualityMatrix", second: "QualityMatrix") -> "QualityMatrix":
+        """Rows of both matrices (analysis settings of the second)"""
+        columns = {
+            name: np.concatenate([getattr(first, name), getattr(second, name)])
+            for name, _, _ in COLUMNS
+        }
+        offset = int(first.path_end[-1]) if len(first) else 0
+        columns['path_end'] = np.concatenate([first.path_end, second.path_end + offset])
+        return cls(columns, bytes(first.path_blob) + bytes(second.path_blob), second.analysis_scale, second.blur_method)
+
+    @property
+    def has_exposure(self) -> np.ndarray:
+        """Rows with exposure statistics"""
+        return ~np.isnan(self.mean_brightness)
+
+    def underexposed(self, max_brightness: float = 60.0) -> np.ndarray:
+        """Rows with mean brightness below max_brightness (0-255)"""
+        return self.mean_brightness < max_brightness
+
+    def overexposed(self, min_brightness: float = 195.0) -> np.ndarray:
+        """Rows with mean brightness above min_brightness (0-255)"""
+        return self.mean_brightness > min_brightness
+
+    def highlight_clipped(self, min_fraction: float = 0.01) -> np.ndarray:
+        """Rows with more than min_fraction of pixels in the 5 brightest levels"""
+        return self.highlight_clipping > min_fraction
+
+    def shadow_clipped(self, min_fraction: float = 0.01) -> np.ndarray:
+        """Rows with more than min_fraction of pixels in the 5 darkest levels"""
+        return self.shadow_clipping > min_fraction
+
+    def brightness_share(self, low: int, high: int) -> np.ndarray:
+        """
+        Share of pixels per row with luminance in [low, high)
+
+        Bounds are rounded to the 4-level histogram bins.
+        """
+        step = 256 // HISTOGRAM_BINS
+        inside = self.histogram[:, low // step:-(-high // step)].sum(axis=1, dtype=np.int64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.pixels > 0, inside / self.pixels, np.nan)
+
+    def in_date_range(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> np.ndarray:
+        """Rows captured in [start, end] (either bound optional)"""
+        mask = np.ones(len(self), dtype=bool)
+        if start is not None:
+            mask &= self.time_ns >= _timestamp_ns(start)
+        if end is not None:
+            mask &= self.time_ns <= _timestamp_ns(end)
+        return mask
+
+    def sharpest(self, count: int, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Rows with the highest blur scores, sharpest first"""
+        return self._top(self.blur_score, count, mask)
+
+    def blurriest(self, count: int, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Rows with the lowest blur scores, blurriest first"""
+        return self._top(-self.blur_score, count, mask)
+
+    def _top(self, values: np.ndarray, count: int, mask: Optional[np.ndarray]) -> np.ndarray:
+        """Rows of the count largest values among the masked rows (argpartition, no full sort)"""
+        candidates = ~np.isnan(values)
+        if mask is not None:
+            candidates &= mask
+        rows = np.flatnonzero(candidates)
+        if count < len(rows):
+            rows = rows[np.argpartition(-values[rows], count)[:count]]
+        return rows[np.argsort(-values[rows], kind='stable')]
+
+    def __repr__(self) -> str:
+        return f"QualityMatrix({len(self)} photos)"
+
+
+def update_quality_matrix(
+    matrix_file: Path,
+    photos: Sequence,
+    analysis_scale: int = 1,
+    blur_method: BlurMethod = BlurMethod.LAPLACIAN,
+    exposure: bool = True,
+    jobs: Optional[int] = None,
+    db_path: Optional[Path] = None,
+    show_progress: bool = False,
+    prune: bool = True,
+    hash_cache: Optional[HashCache] = None,
+    hash_method: HashMethod = HashMethod.PHASH
+) -> QualityMatrix:
+    """
+    Bring the saved matrix up to date with the library and save it
+
+    Only photos that are new, changed (size or modification time), or
+    missing statistics are analyzed; rows of photos not in `photos` are
+    dropped unless prune is off. Changing the analysis scale or blur
+    method recomputes all. Nothing is written if the matrix is up to date.
+    With a hash cache, the analyzed photos are hashed in the same decode.
+
+    Args:
+        matrix_file: Workspace quality matrix file
+        photos: Photos of the library (MediaFile or MediaRow)
+        analysis_scale: Resolution divisor (see QualityConfig)
+        blur_method: Blur score method
+        exposure: Compute exposure statistics and histograms
+        jobs: Worker processes (None = CPU count, 1 = serial)
+        db_path: Workspace index for cached capture times
+        show_progress: Show progress bars
+        prune: Drop rows of photos not in `photos` (off when `photos` is
+            only part of the library, e.g. burst members)
+        hash_cache: Cache to add hashes of the analyzed photos to (not
+            for embedded-preview caches, whose hashes need the preview)
+        hash_method: Hashing method of the cache
+
+    Returns:
+        Updated matrix; with prune, rows in the order of `photos`
+    """
+    matrix = QualityMatrix.load(matrix_file)
+    if matrix.analysis_scale != analysis_scale or matrix.blur_method != blur_method:
+        matrix = QualityMatrix.empty(analysis_scale, blur_method)
+
+    rows = matrix.row_index()
+    kept_rows = []
+    todo = []
+    for photo in photos:
+        row = rows.get(str(photo.path))
+        if (
+            row is None
+            or matrix.mtime_ns[row] != _timestamp_ns(photo.modified_time)
+            or matrix.size_bytes[row] != photo.size_bytes
+            or (exposure and np.isnan(matrix.mean_brightness[row]))
+        ):
+            todo.append(photo)
+        else:
+            kept_rows.append(row)
+
+    if not prune:
+        listed = {str(photo.path) for photo in photos}
+        kept_rows = sorted(set(kept_rows).union(row for key, row in rows.items() if key not in listed))
+
+    if not todo and kept_rows == list(range(len(matrix))):
+        logger.info(f"Quality matrix: {len(matrix)} rows up to date")
+        return matrix
+
+    logger.info(f"Quality matrix: {len(kept_rows)} up to date, {len(todo)} to analyze")
+
+    extractor = FeatureExtractor(
+        hash_methods=(hash_method,) if hash_cache is not None else (),
+        blur_method=blur_method,
+        exposure=exposure,
+        analysis_scale=analysis_scale
+    )
+    results = extractor.extract_many([p.path for p in todo], jobs=jobs, show_progress=show_progress)
+    analyzed = [(photo, f) for photo, f in zip(todo, results) if f is not None]
+
+    if hash_cache is not None and analyzed:
+        new_hashes = []
+        for photo, f in analyzed:
+            try:
+                new_hashes.append((hash_cache.file_key(photo.path), f.hashes[hash_method]))
+            except OSError:
+                pass
+        hash_cache.insert(new_hashes)
+
+    capture_times = read_capture_times(
+        [photo.path for photo, _ in analyzed], jobs=jobs, db_path=db_path, show_progress=show_progress
+    ) if analyzed else []
+
+    new_rows = QualityMatrix.from_features(
+        [f for _, f in analyzed],
+        [photo.modified_time for photo, _ in analyzed],
+        [photo.size_bytes for photo, _ in analyzed],
+        capture_times,
+        analysis_scale,
+        blur_method
+    )
+    updated = QualityMatrix.concat(matrix.take(np.array(kept_rows, dtype=np.int64)), new_rows)
+
+    if prune:
+        # Library order, so repeated runs give the same file
+        positions = {str(photo.path): i for i, photo in enumerate(photos)}
+        order = np.argsort([positions[str(p)] for p in updated.paths()], kind='stable')
+        updated = updated.take(order)
+
+    del matrix  # release the mapping before replacing the file
+    updated.save(matrix_file)
+    return updated
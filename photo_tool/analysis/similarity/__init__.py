@@ -2,6 +2,8 @@
 
 from .phash import compute_phash, compare_hashes, HashMethod
 from .blur import detect_blur, BlurMethod
-from .ssim import compute_ssim
+from .ssim import compute_ssim, ProxyCache
+from .hash_index import HashIndex
+from .hash_cache import HashCache
 
-__all__ = ["compute_phash", "compare_hashes", "HashMethod", "detect_blur", "BlurMethod", "compute_ssim"]
+__all__ = ["compute_phash", "compare_hashes", "HashMethod", "detect_blur", "BlurMethod", "compute_ssim", "ProxyCache", "HashIndex", "HashCache"]
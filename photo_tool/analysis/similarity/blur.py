@@ -1,12 +1,21 @@
 """
 Blur/sharpness detection
+
+Scores can be computed at a reduced analysis resolution (scale 2, 4 or
+8). JPEGs are then decoded at that size directly by libjpeg's DCT
+scaling, which cuts decode time and memory by about scale squared.
+Scores at different scales are not comparable; calibrate_blur_scale()
+maps a threshold from one scale to another.
 """
 
+from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
+from typing import Iterable, Union
 
 import cv2
 import numpy as np
+from tqdm import tqdm
 
 from ...util.logging import get_logger
 
@@ -14,15 +23,82 @@ from ...util.logging import get_logger
 logger = get_logger("blur")
 
 
+ANALYSIS_SCALES = (1, 2, 4, 8)
+
+_REDUCED_GRAYSCALE = {
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+
 class BlurMethod(Enum):
     """Blur detection methods"""
     LAPLACIAN = "laplacian"  # Variance of Laplacian (recommended)
     VARIANCE = "variance"    # Simple variance
 
 
+def read_gray(image: Union[Path, np.ndarray], scale: int = 1) -> np.ndarray:
+    """
+    Decode an image to grayscale for blur analysis
+    
+    Args:
+        image: Path to image, or the encoded file as uint8 array
+        scale: Downscale factor (1, 2, 4 or 8)
+        
+    Returns:
+        Grayscale pixels (uint8)
+        
+    Raises:
+        ValueError: Image cannot be decoded or scale is not supported
+    """
+    if scale not in ANALYSIS_SCALES:
+        raise ValueError(f"Unsupported analysis scale: {scale} (use {', '.join(map(str, ANALYSIS_SCALES))})")
+    
+    # Full resolution keeps the color decode + conversion of earlier versions (same scores)
+    flag = _REDUCED_GRAYSCALE.get(scale, cv2.IMREAD_COLOR)
+    if isinstance(image, np.ndarray):
+        img = cv2.imdecode(image, flag)
+        if img is None:
+            raise ValueError("Could not decode image data")
+    else:
+        img = cv2.imread(str(image), flag)
+        if img is None:
+            raise ValueError(f"Could not read image: {image}")
+    
+    if scale == 1:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    return img
+
+
+def blur_score(gray: np.ndarray, method: BlurMethod = BlurMethod.LAPLACIAN) -> float:
+    """
+    Blur score of grayscale pixels (higher = sharper)
+    
+    Args:
+        gray: Grayscale image (uint8)
+        method: Detection method
+        
+    Returns:
+        Blur score
+    """
+    if method == BlurMethod.LAPLACIAN:
+        # float32 is exact for 8-bit input (|value| <= 1020) and half the size
+        # of CV_64F; meanStdDev accumulates in double
+        pixels = cv2.Laplacian(gray, cv2.CV_32F)
+    elif method == BlurMethod.VARIANCE:
+        pixels = gray
+    else:
+        raise ValueError(f"Unknown blur method: {method}")
+    
+    _, std = cv2.meanStdDev(pixels)
+    return float(std[0, 0] ** 2)
+
+
 def detect_blur(
     image_path: Path,
-    method: BlurMethod = BlurMethod.LAPLACIAN
+    method: BlurMethod = BlurMethod.LAPLACIAN,
+    scale: int = 1
 ) -> float:
     """
     Detect blur/sharpness of image
@@ -32,32 +108,13 @@ def detect_blur(
     Args:
         image_path: Path to image
         method: Detection method
+        scale: Analysis resolution divisor (1, 2, 4 or 8)
         
     Returns:
         Blur score (higher = sharper)
     """
     try:
-        # Read image
-        img = cv2.imread(str(image_path))
-        if img is None:
-            raise ValueError(f"Could not read image: {image_path}")
-        
-        # Convert to grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
-        if method == BlurMethod.LAPLACIAN:
-            # Compute variance of Laplacian
-            laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-            score = laplacian.var()
-        
-        elif method == BlurMethod.VARIANCE:
-            # Simple variance method
-            score = gray.var()
-        
-        else:
-            raise ValueError(f"Unknown blur method: {method}")
-        
-        return float(score)
+        return blur_score(read_gray(image_path, scale), method)
     
     except Exception as e:
         logger.error(f"Error detecting blur for {image_path}: {e}")
@@ -67,7 +124,8 @@ def detect_blur(
 def is_blurry(
     image_path: Path,
     threshold: float = 120.0,
-    method: BlurMethod = BlurMethod.LAPLACIAN
+    method: BlurMethod = BlurMethod.LAPLACIAN,
+    scale: int = 1
 ) -> tuple[bool, float]:
     """
     Check if image is blurry
@@ -76,9 +134,96 @@ def is_blurry(
         image_path: Path to image
         threshold: Blur threshold (adjust based on your images)
         method: Detection method
+        scale: Analysis resolution divisor (threshold must be for this scale)
         
     Returns:
         (is_blurry, score) tuple
     """
-    score = detect_blur(image_path, method)
+    score = detect_blur(image_path, method, scale)
     return (score < threshold, score)
+
+
+@dataclass
+class BlurCalibration:
+    """Blur scores of sample photos at a reference and a target scale"""
+    method: BlurMethod
+    reference_scale: int
+    scale: int
+    reference_scores: np.ndarray
+    scores: np.ndarray
+    
+    def map_threshold(self, threshold: float) -> float:
+        """
+        Threshold at the target scale that marks the same share of photos as blurry
+        
+        Quantile matching on the samples; beyond the sampled range the
+        ratio of the outermost samples is used.
+        """
+        reference = np.log(np.sort(self.reference_scores))
+        target = np.log(np.sort(self.scores))
+        value = np.log(threshold) if threshold > 0 else reference[0]
+        
+        if value <= reference[0]:
+            return float(np.exp(value + target[0] - reference[0]))
+        if value >= reference[-1]:
+            return float(np.exp(value + target[-1] - reference[-1]))
+        return float(np.exp(np.interp(value, reference, target)))
+    
+    def agreement(self, threshold: float) -> float:
+        """Share of sample photos classified the same at both scales"""
+        mapped = self.map_threshold(threshold)
+        same = (self.reference_scores < threshold) == (self.scores < mapped)
+        return float(same.mean())
+
+
+def calibrate_blur_scale(
+    image_paths: Iterable[Path],
+    scale: int,
+    method: BlurMethod = BlurMethod.LAPLACIAN,
+    reference_scale: int = 1,
+    show_progress: bool = False
+) -> BlurCalibration:
+    """
+    Score sample photos at two analysis scales to translate blur thresholds
+    
+    Args:
+        image_paths: Sample photos (a few hundred typical ones are plenty)
+        scale: Target analysis scale
+        method: Detection method
+        reference_scale: Scale the existing threshold was chosen for
+        show_progress: Show progress bar
+        
+    Returns:
+        BlurCalibration
+        
+    Raises:
+        ValueError: Fewer than two sample photos could be scored
+    """
+    paths = list(image_paths)
+    if show_progress:
+        paths = tqdm(paths, desc="Calibrating blur scores")
+    
+    reference_scores = []
+    scores = []
+    for path in paths:
+        try:
+            reference = blur_score(read_gray(path, reference_scale), method)
+            score = blur_score(read_gray(path, scale), method)
+        except Exception as e:
+            logger.warning(f"Skipping {path} for calibration: {e}")
+            continue
+        # Flat images score 0, which has no place on the log scale
+        if reference > 0 and score > 0:
+            reference_scores.append(reference)
+            scores.append(score)
+    
+    if len(scores) < 2:
+        raise ValueError("Calibration needs at least two readable, non-flat sample photos")
+    
+    return BlurCalibration(
+        method=method,
+        reference_scale=reference_scale,
+        scale=scale,
+        reference_scores=np.array(reference_scores),
+        scores=np.array(scores)
+    )
@@ -0,0 +1,133 @@
+"""
+Perceptual hashes as packed uint64 arrays for vectorized Hamming distances
+
+A hash is stored as ceil(bits / 64) native uint64 words (one word for the
+default 8x8 hash, four for hash_size 16). Distances are an XOR followed by
+a popcount over all words, so one-vs-many and all-pairs comparisons run
+in numpy instead of building imagehash objects per pair.
+"""
+
+from typing import Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+WORD_BITS = 64
+PAIR_BLOCK_WORDS = 1 << 22  # XOR words per block in hash_pairs_within (32 MB)
+
+# Per-byte popcounts for numpy < 2.0 (no np.bitwise_count)
+_BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def pack_hash(hash_hex: str) -> np.ndarray:
+    """
+    Hex hash string (as returned by compute_phash) to uint64 words
+
+    Args:
+        hash_hex: Hash as hex string
+
+    Returns:
+        1-D uint64 array, most significant word first
+    """
+    digits = WORD_BITS // 4
+    words = -(-len(hash_hex) // digits)
+    padded = hash_hex.rjust(words * digits, '0')
+    return np.frombuffer(bytes.fromhex(padded), dtype='>u8').astype(np.uint64)
+
+
+def pack_hashes(hashes: Sequence[Optional[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pack many hex hashes into one (n, words) array
+
+    Args:
+        hashes: Hex hash strings; None for photos that could not be hashed
+
+    Returns:
+        (packed, valid): uint64 array of shape (n, words) with zero rows for
+        missing hashes, and a boolean mask of the rows that hold a hash
+
+    Raises:
+        ValueError: Hashes of different lengths (different hash_size)
+    """
+    lengths = {len(h) for h in hashes if h is not None}
+    if len(lengths) > 1:
+        raise ValueError(f"Cannot compare hashes of different sizes: {sorted(lengths)}")
+
+    digits = WORD_BITS // 4
+    words = -(-lengths.pop() // digits) if lengths else 1
+    packed = np.zeros((len(hashes), words), dtype=np.uint64)
+    valid = np.zeros(len(hashes), dtype=bool)
+
+    for i, hash_hex in enumerate(hashes):
+        if hash_hex is not None:
+            packed[i] = pack_hash(hash_hex)
+            valid[i] = True
+
+    return packed, valid
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """Number of set bits of each element of an unsigned integer array"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words)
+    as_bytes = np.ascontiguousarray(words).view(np.uint8).reshape(words.shape + (words.itemsize,))
+    return _BYTE_POPCOUNT[as_bytes].sum(axis=-1, dtype=np.uint8)
+
+
+def hamming_distances(query: np.ndarray, packed: np.ndarray) -> np.ndarray:
+    """
+    Hamming distances of one packed hash to many
+
+    Args:
+        query: Packed hash, shape (words,)
+        packed: Packed hashes, shape (n, words)
+
+    Returns:
+        int32 array of n distances
+    """
+    return popcount(np.bitwise_xor(packed, query)).sum(axis=-1, dtype=np.int32)
+
+
+def pairwise_distances(packed: np.ndarray) -> np.ndarray:
+    """
+    All-pairs Hamming distance matrix
+
+    Memory grows with n², use hash_pairs_within() for large sets.
+
+    Args:
+        packed: Packed hashes, shape (n, words)
+
+    Returns:
+        int32 array of shape (n, n)
+    """
+    xor = np.bitwise_xor(packed[:, None, :], packed[None, :, :])
+    return popcount(xor).sum(axis=-1, dtype=np.int32)
+
+
+def hash_pairs_within(
+    packed: np.ndarray,
+    threshold: int
+) -> Iterator[Tuple[int, int, int]]:
+    """
+    All pairs i < j with distance <= threshold, computed block by block
+
+    Args:
+        packed: Packed hashes, shape (n, words)
+        threshold: Maximum Hamming distance
+
+    Yields:
+        (i, j, distance) in row order
+    """
+    n = len(packed)
+    block_rows = max(1, PAIR_BLOCK_WORDS // max(1, packed.size))
+    for start in range(0, n, block_rows):
+        block = packed[start:start + block_rows]
+        # Only columns after the block's first row can pair with it (i < j)
+        xor = np.bitwise_xor(block[:, None, :], packed[None, start:, :])
+        distances = popcount(xor).sum(axis=-1, dtype=np.int32)
+
+        rows, cols = np.nonzero(distances <= threshold)
+        for row, col in zip(rows.tolist(), cols.tolist()):
+            i, j = start + row, start + col
+            if i < j:
+                yield i, j, int(distances[row, col])
@@ -0,0 +1,313 @@
+"""
+Persistent perceptual-hash cache in the workspace hashes_dir
+
+Hashes are stored per file identity: a digest of path, size and mtime, or
+(with content_fingerprint) of size and the head/tail content hash, which
+survives renames and moves at the cost of reading 128 KB per file.
+Method, hash size and preview mode each get their own directory, so a
+cached hash is always comparable with a freshly computed one.
+
+Storage is a set of immutable segment files of fixed-size records
+(16-byte identity digest + the hash as uint64 words); SegmentCache
+implements it for any fixed-size value, the SSIM proxies use it too.
+Segments are memory-mapped, so only the keys are held in memory.
+Every insert writes a new segment to a temporary file and renames it
+into place, so several processes can add values at the same time
+without locks and a reader never sees a partial segment. When there are
+too many segments they are merged into one; a merge racing with another
+only leaves duplicate records, which are identical and collapse on load.
+"""
+
+import hashlib
+import os
+import struct
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ...util.logging import get_logger
+from .hash_array import WORD_BITS, pack_hash
+from .phash import HashMethod
+
+
+logger = get_logger("hash_cache")
+
+
+MAGIC = b'PTHC'
+VERSION = 2  # 1 had a one-byte size field
+HEADER = struct.Struct('<4sBxH')  # magic, version, padding, words per value
+MAX_SEGMENTS = 32  # merged into one beyond this
+COMPACT_CHUNK = 4096  # records copied at a time when merging (16 MB of SSIM proxies)
+
+
+class SegmentCache(ABC):
+    """
+    Fixed-size values by file identity, stored in segment files
+
+    Subclasses convert their values to and from uint64 words
+    (_encode/_decode). Segments are memory-mapped: only the sorted keys
+    and record locations (about 24 bytes per file) are held in memory,
+    values are read from the mapping on lookup, so large values (a 4 KB
+    SSIM proxy per photo) stay in the OS page cache rather than in RAM.
+
+    Args:
+        cache_dir: Directory of the segment files
+        words: Size of one value in uint64 words
+        content_fingerprint: Identify files by content instead of path and mtime
+    """
+
+    def __init__(self, cache_dir: Path, words: int, content_fingerprint: bool = False):
+        self.dir = Path(cache_dir)
+        self.words = words
+        self.content_fingerprint = content_fingerprint
+        self.dtype = np.dtype([('key', '<u8', (2,)), ('value', '<u8', (words,))])
+
+        self._maps: Optional[List[np.memmap]] = None  # records of each segment
+        self._keys: Optional[np.ndarray] = None  # (n, 2), sorted
+        self._locations: Optional[np.ndarray] = None  # (n, 2): segment, record
+        self._added: Dict[Tuple[int, int], np.ndarray] = {}
+
+    def file_key(self, path: Path, stat: Optional[os.stat_result] = None) -> bytes:
+        """
+        16-byte identity of a file's current version
+
+        Raises:
+            OSError: File cannot be read
+        """
+        stat = stat or os.stat(path)
+        if self.content_fingerprint:
+            from ..duplicates import partial_hash  # duplicates imports clustering
+
+            identity = f"{stat.st_size}\0{partial_hash(path, stat.st_size)}"
+        else:
+            identity = f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}"
+        return hashlib.blake2b(identity.encode('utf-8', 'surrogateescape'), digest_size=16).digest()
+
+    def lookup(self, keys: Sequence[bytes]) -> list:
+        """
+        Cached values of many files
+
+        Args:
+            keys: File keys from file_key()
+
+        Returns:
+            Value per key, None where not cached
+        """
+        self._load()
+        if not keys:
+            return []
+
+        wanted = np.frombuffer(b''.join(keys), dtype='<u8').reshape(-1, 2)
+        found: list = [None] * len(keys)
+
+        if len(self._keys):
+            # Sorted by first word; the second word only disambiguates
+            positions = np.searchsorted(self._keys[:, 0], wanted[:, 0])
+            for i, pos in enumerate(positions.tolist()):
+                while pos < len(self._keys) and self._keys[pos, 0] == wanted[i, 0]:
+                    if self._keys[pos, 1] == wanted[i, 1]:
+                        segment, record = self._locations[pos].tolist()
+                        found[i] = self._decode(np.array(self._maps[segment][record]['value']))
+                        break
+                    pos += 1
+
+        if self._added:
+            for i, key in enumerate(wanted.tolist()):
+                if found[i] is None and tuple(key) in self._added:
+                    found[i] = self._decode(self._added[tuple(key)])
+        return found
+
+    def insert(self, items: Sequence[tuple]) -> None:
+        """
+        Add values (one new segment file)
+
+        Args:
+            items: (file key, value) pairs
+
+        Raises:
+            ValueError: Value has a different size than the cache
+        """
+        if not items:
+            return
+
+        records = np.zeros(len(items), dtype=self.dtype)
+        for i, (key, value) in enumerate(items):
+            records['key'][i] = np.frombuffer(key, dtype='<u8')
+            records['value'][i] = self._encode(value)
+
+        self._write_segment([records])
+
+        self._load()
+        for record in records:
+            self._added[tuple(record['key'].tolist())] = record['value'].copy()
+
+        if len(self._segments()) > MAX_SEGMENTS:
+            self.compact()
+
+    def compact(self) -> None:
+        """Merge all segment files into one (copied in chunks, not loaded at once)"""
+        segments = self._segments()
+        if len(segments) <= 1:
+            return
+
+        maps = self._map_segments(segments)
+        _, locations = self._index(maps)
+        locations = locations[np.lexsort((locations[:, 1], locations[:, 0]))]  # file order
+
+        def chunks():
+            for segment, records in enumerate(maps):
+                rows = locations[locations[:, 0] == segment, 1]
+                for start in range(0, len(rows), COMPACT_CHUNK):
+                    yield records[rows[start:start + COMPACT_CHUNK]]
+
+        self._write_segment(chunks())
+
+        # Release the mappings (ours included) before deleting the merged files
+        del maps, chunks
+        self._maps = self._keys = self._locations = None
+        self._added = {}
+        for segment in segments:
+            try:
+                segment.unlink()
+            except FileNotFoundError:
+                pass  # merged by another process
+            except PermissionError:
+                pass  # open in a reader (Windows); merged again next time
+        logger.debug(f"Merged {len(segments)} cache segments ({len(locations)} records)")
+
+    def _load(self) -> None:
+        """Map all segments once (later inserts are kept in memory)"""
+        if self._keys is not None:
+            return
+        self._maps = self._map_segments(self._segments())
+        self._keys, self._locations = self._index(self._maps)
+
+    def _segments(self) -> List[Path]:
+        if not self.dir.exists():
+            return []
+        return sorted(self.dir.glob('*.seg'))
+
+    def _map_segments(self, segments: List[Path]) -> List[np.memmap]:
+        """Memory-mapped records of the readable segments"""
+        maps = []
+        for segment in segments:
+            try:
+                f = open(segment, 'rb')
+            except FileNotFoundError:
+                continue  # merged away meanwhile; its records are in the merged segment
+            with f:
+                header = f.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    continue
+                magic, version, words = HEADER.unpack(header)
+                if magic != MAGIC or version != VERSION or words != self.words:
+                    logger.warning(f"Ignoring incompatible cache segment {segment}")
+                    continue
+                count = (os.fstat(f.fileno()).st_size - HEADER.size) // self.dtype.itemsize
+                if count:
+                    # Mapped through the open file, so a concurrent merge cannot delete it in between
+                    maps.append(np.memmap(f, dtype=self.dtype, mode='r', offset=HEADER.size, shape=(count,)))
+        return maps
+
+    def _index(self, maps: List[np.memmap]) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorted keys and their (segment, record) locations, one per key"""
+        if not maps:
+            return np.zeros((0, 2), dtype='<u8'), np.zeros((0, 2), dtype=np.int64)
+        keys = np.concatenate([np.array(records['key']) for records in maps])
+        locations = np.concatenate([
+            np.stack([np.full(len(records), segment), np.arange(len(records))], axis=1)
+            for segment, records in enumerate(maps)
+        ])
+
+        order = np.lexsort((keys[:, 1], keys[:, 0]))
+        keys, locations = keys[order], locations[order]
+        unique = np.ones(len(keys), dtype=bool)
+        unique[1:] = (keys[1:] != keys[:-1]).any(axis=1)
+        return keys[unique], locations[unique]
+
+    def _write_segment(self, parts: Iterable[np.ndarray]) -> None:
+        """Write record arrays as a new segment (temporary file, then rename)"""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        name = f"{time.time_ns():020d}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        tmp_path = self.dir / f"{name}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.words))
+            for records in parts:
+                f.write(records.tobytes())
+        tmp_path.replace(self.dir / f"{name}.seg")
+
+    @abstractmethod
+    def _encode(self, value) -> np.ndarray:
+        """Value as `words` uint64 words"""
+
+    @abstractmethod
+    def _decode(self, words: np.ndarray):
+        """Value from its uint64 words"""
+
+
+class HashCache(SegmentCache):
+    """
+    Cached perceptual hashes of one method, hash size and preview mode
+
+    Args:
+        cache_dir: Workspace hashes directory
+        method: Hashing method
+        hash_size: Hash size (compute_phash hash_size)
+        use_preview: Hashes of embedded previews (see compute_phash)
+        content_fingerprint: Identify files by content instead of path and mtime
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        method: HashMethod = HashMethod.PHASH,
+        hash_size: int = 8,
+        use_preview: bool = False,
+        content_fingerprint: bool = False
+    ):
+        name = f"{method.value}_{hash_size}"
+        if use_preview:
+            name += "_preview"
+        if content_fingerprint:
+            name += "_content"
+
+        self.hex_digits = -(-hash_size * hash_size // 4)
+        words = -(-self.hex_digits // (WORD_BITS // 4))
+        super().__init__(Path(cache_dir) / name, words, content_fingerprint)
+
+    def lookup(self, keys: Sequence[bytes]) -> List[Optional[str]]:
+        """
+        Cached hashes of many files
+
+        Args:
+            keys: File keys from file_key()
+
+        Returns:
+            Hex hash per key, None where not cached
+        """
+        return super().lookup(keys)
+
+    def insert(self, items: Sequence[Tuple[bytes, str]]) -> None:
+        """
+        Add hashes (one new segment file)
+
+        Args:
+            items: (file key, hex hash) pairs
+
+        Raises:
+            ValueError: Hash has a different size than the cache
+        """
+        super().insert(items)
+
+    def _encode(self, hash_hex: str) -> np.ndarray:
+        if len(hash_hex) != self.hex_digits:
+            raise ValueError(f"Hash has {len(hash_hex)} digits, cache expects {self.hex_digits}")
+        return pack_hash(hash_hex)
+
+    def _decode(self, words: np.ndarray) -> str:
+        digits = ''.join(f"{int(word):016x}" for word in words)
+        return digits[-self.hex_digits:]
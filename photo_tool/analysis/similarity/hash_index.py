@@ -0,0 +1,394 @@
+"""
+Near-duplicate index over perceptual hashes (multi-index hashing)
+
+Hashes are split into 16-bit chunks. If two hashes differ in at most r
+bits, at least one of their m chunks differs in at most r // m bits
+(pigeonhole). Each chunk has a sorted table of its values, so a query
+only verifies the rows found by binary search for its chunk values with
+up to r // m bits flipped: for the default 64-bit hash and threshold 6,
+4 chunks x 17 lookups instead of a scan of the library.
+
+all_pairs() runs the same idea as a join over equal (or r // m bits
+apart) chunk values, generated and verified in numpy batches, so
+whole-library dedupe costs about n x bucket size distance checks
+instead of n².
+
+Inserts append rows; the sorted tables cover a prefix of the rows and
+the tail is scanned until it is large enough to be re-sorted. Changed
+and removed keys are tombstoned and dropped when the index is saved.
+"""
+
+import itertools
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ...util.logging import get_logger
+from .hash_array import WORD_BITS, hamming_distances, hash_pairs_within, pack_hash, popcount
+
+
+logger = get_logger("hash_index")
+
+
+CHUNK_BITS = 16
+MAX_CHUNK_RADIUS = 2  # more flipped bits per chunk enumerate too many variants; scan instead
+MIN_INDEXED_ROWS = 1024  # smaller indexes are scanned
+REINDEX_TAIL = 4096  # unsorted rows before the tables are rebuilt
+PAIR_BATCH = 1 << 22  # candidate pairs verified per batch
+INDEX_VERSION = 1
+
+_CHUNK_MASK = np.uint64((1 << CHUNK_BITS) - 1)
+
+
+class HashIndex:
+    """
+    Perceptual hashes by key (usually the photo path) with radius search
+
+    All hashes must have the same size (hex digits of the first insert).
+    """
+
+    def __init__(self):
+        self.hex_digits: Optional[int] = None
+        self._hashes = np.zeros((0, 1), dtype=np.uint64)
+        self._alive = np.zeros(0, dtype=bool)
+        self._keys: List[str] = []  # by row, including tombstoned rows
+        self._rows: Dict[str, int] = {}
+        self._count = 0  # rows in use
+        self._tables: Optional[List[Tuple[np.ndarray, np.ndarray]]] = None  # per chunk: (values, rows)
+        self._indexed = 0  # rows covered by the tables
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def keys(self) -> List[str]:
+        """Keys of all hashes"""
+        return list(self._rows)
+
+    def get(self, key: str) -> Optional[str]:
+        """Hash of a key as hex string, or None"""
+        row = self._rows.get(key)
+        return None if row is None else self._hex(row)
+
+    def add(self, key: str, hash_hex: str) -> None:
+        """Insert or update one hash"""
+        self.add_many([(key, hash_hex)])
+
+    def add_many(self, items: Iterable[Tuple[str, str]]) -> int:
+        """
+        Insert or update many hashes
+
+        Args:
+            items: (key, hex hash) pairs; a repeated key keeps its last hash
+
+        Returns:
+            Number of keys that were new or got a different hash
+
+        Raises:
+            ValueError: Hash size differs from the index
+        """
+        added = []
+        for key, hash_hex in dict(items).items():
+            self._check_size(hash_hex)
+            row = self._rows.get(key)
+            if row is not None:
+                if self._hex(row) == hash_hex:
+                    continue
+                self._alive[row] = False
+                del self._rows[key]
+            added.append((key, hash_hex))
+
+        if not added:
+            return 0
+
+        start = self._count
+        self._reserve(start + len(added))
+        self._hashes[start:start + len(added)] = [pack_hash(h) for _, h in added]
+        self._alive[start:start + len(added)] = True
+        for row, (key, _) in enumerate(added, start):
+            self._rows[key] = row
+            self._keys.append(key)
+        self._count += len(added)
+        return len(added)
+
+    def remove(self, key: str) -> bool:
+        """Remove a key (True if it was indexed)"""
+        row = self._rows.pop(key, None)
+        if row is None:
+            return False
+        self._alive[row] = False
+        return True
+
+    def query(self, hash_hex: str, radius: int) -> List[Tuple[str, int]]:
+        """
+        All keys whose hash is within `radius` bits of a hash
+
+        Args:
+            hash_hex: Hash as hex string (same size as the index)
+            radius: Maximum Hamming distance
+
+        Returns:
+            (key, distance) pairs, closest first (ties in insertion order)
+        """
+        if not self._rows:
+            return []
+        self._check_size(hash_hex)
+
+        query = pack_hash(hash_hex)
+        rows = self._candidate_rows(query, radius)
+        distances = hamming_distances(query, self._hashes[rows])
+        keep = (distances <= radius) & self._alive[rows]
+        rows, distances = rows[keep], distances[keep]
+
+        order = np.lexsort((rows, distances))
+        return [(self._keys[r], d) for r, d in zip(rows[order].tolist(), distances[order].tolist())]
+
+    def all_pairs(self, radius: int) -> List[Tuple[str, str, int]]:
+        """
+        All pairs of keys whose hashes are within `radius` bits
+
+        Args:
+            radius: Maximum Hamming distance
+
+        Returns:
+            (key_a, key_b, distance) with key_a inserted before key_b,
+            sorted by insertion order of key_a, then key_b
+        """
+        rows_a, rows_b, distances = self.pair_rows(radius)
+        return [
+            (self._keys[a], self._keys[b], d)
+            for a, b, d in zip(rows_a.tolist(), rows_b.tolist(), distances.tolist())
+        ]
+
+    def pair_rows(self, radius: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """all_pairs() as arrays of row numbers (row_a < row_b) and distances"""
+        live = np.nonzero(self._alive[:self._count])[0]
+        packed = self._hashes[live]
+        chunk_radius = radius // self._chunk_count
+
+        if len(live) < MIN_INDEXED_ROWS or chunk_radius > MAX_CHUNK_RADIUS:
+            found = np.array(list(hash_pairs_within(packed, radius)), dtype=np.int64).reshape(-1, 3)
+            rows_a, rows_b, distances = found[:, 0], found[:, 1], found[:, 2].astype(np.int32)
+        else:
+            rows_a, rows_b, distances = _mih_pairs(packed, radius, self._chunk_count, chunk_radius)
+
+        order = np.lexsort((rows_b, rows_a))
+        return live[rows_a[order]], live[rows_b[order]], distances[order]
+
+    def save(self, path: Path) -> None:
+        """
+        Write the index (tombstoned rows are dropped)
+
+        Written to a temporary file first, so readers never see a partial index.
+        """
+        rows = np.array(sorted(self._rows.values()), dtype=np.int64)
+        encoded = [self._keys[r].encode('utf-8') for r in rows.tolist()]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                version=np.array(INDEX_VERSION),
+                hex_digits=np.array(self.hex_digits or 0),
+                hashes=self._hashes[rows] if len(rows) else np.zeros((0, 1), dtype=np.uint64),
+                key_data=np.frombuffer(b''.join(encoded), dtype=np.uint8),
+                key_offsets=offsets
+            )
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "HashIndex":
+        """
+        Read an index written by save()
+
+        Returns:
+            The index; empty if the file is missing or unreadable
+        """
+        index = cls()
+        if not Path(path).exists():
+            return index
+
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data['version']) != INDEX_VERSION:
+                    logger.warning(f"Ignoring hash index {path}: unsupported version")
+                    return index
+                hex_digits = int(data['hex_digits'])
+                hashes = data['hashes']
+                key_data = data['key_data'].tobytes()
+                offsets = data['key_offsets'].tolist()
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable hash index {path}: {e}")
+            return index
+
+        if len(hashes):
+            index.hex_digits = hex_digits
+            index._hashes = hashes.astype(np.uint64)
+            index._alive = np.ones(len(hashes), dtype=bool)
+            index._keys = [key_data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(hashes))]
+            index._rows = {key: row for row, key in enumerate(index._keys)}
+            index._count = len(hashes)
+        return index
+
+    @property
+    def _chunk_count(self) -> int:
+        return self._hashes.shape[1] * (WORD_BITS // CHUNK_BITS)
+
+    def _check_size(self, hash_hex: str) -> None:
+        if self.hex_digits is None:
+            self.hex_digits = len(hash_hex)
+            self._hashes = np.zeros((0, len(pack_hash(hash_hex))), dtype=np.uint64)
+        elif len(hash_hex) != self.hex_digits:
+            raise ValueError(f"Hash has {len(hash_hex)} digits, index has {self.hex_digits}")
+
+    def _hex(self, row: int) -> str:
+        digits = ''.join(f"{int(word):016x}" for word in self._hashes[row])
+        return digits[-self.hex_digits:]
+
+    def _reserve(self, rows: int) -> None:
+        """Grow the row arrays (doubling) to hold at least `rows` rows"""
+        capacity = len(self._hashes)
+        if rows <= capacity:
+            return
+        capacity = max(rows, capacity * 2, 64)
+        hashes = np.zeros((capacity, self._hashes.shape[1]), dtype=np.uint64)
+        hashes[:self._count] = self._hashes[:self._count]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self._count] = self._alive[:self._count]
+        self._hashes, self._alive = hashes, alive
+
+    def _candidate_rows(self, query: np.ndarray, radius: int) -> np.ndarray:
+        """Rows that can be within radius of the query (superset)"""
+        chunk_radius = radius // self._chunk_count
+        if self._count < MIN_INDEXED_ROWS or chunk_radius > MAX_CHUNK_RADIUS:
+            return np.arange(self._count)
+
+        if self._tables is None or self._count - self._indexed > REINDEX_TAIL:
+            self._build_tables()
+
+        masks = _flip_masks(chunk_radius)
+        parts = [np.arange(self._indexed, self._count)]  # unsorted tail
+        for chunk, (values, rows) in enumerate(self._tables):
+            targets = _chunk_values(query[None, :], chunk)[0] ^ masks
+            starts = np.searchsorted(values, targets, side='left')
+            stops = np.searchsorted(values, targets, side='right')
+            parts.append(rows[_ranges(starts, stops)])
+        return np.unique(np.concatenate(parts))
+
+    def _build_tables(self) -> None:
+        packed = self._hashes[:self._count]
+        self._tables = []
+        for chunk in range(self._chunk_count):
+            values = _chunk_values(packed, chunk)
+            order = np.argsort(values, kind='stable')
+            self._tables.append((values[order], order))
+        self._indexed = self._count
+
+
+def _chunk_values(packed: np.ndarray, chunk: int) -> np.ndarray:
+    """16-bit chunk `chunk` (most significant first) of each packed hash"""
+    word, part = divmod(chunk, WORD_BITS // CHUNK_BITS)
+    shift = np.uint64(WORD_BITS - CHUNK_BITS * (part + 1))
+    return ((packed[:, word] >> shift) & _CHUNK_MASK).astype(np.uint16)
+
+
+def _flip_masks(radius: int) -> np.ndarray:
+    """All chunk masks with at most `radius` bits set (0 first)"""
+    masks = [0]
+    for bits in range(1, radius + 1):
+        for positions in itertools.combinations(range(CHUNK_BITS), bits):
+            masks.append(sum(1 << p for p in positions))
+    return np.array(masks, dtype=np.uint16)
+
+
+def _ranges(starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """Concatenation of arange(start, stop) for all pairs"""
+    lengths = (stops - starts).astype(np.int64)
+    total = int(lengths.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64)
+    shifts = starts - (np.cumsum(lengths) - lengths)
+    return np.repeat(shifts, lengths) + np.arange(total)
+
+
+def _mih_pairs(
+    packed: np.ndarray,
+    radius: int,
+    chunk_count: int,
+    chunk_radius: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pairs within radius via chunk-value joins
+
+    A pair is reported from the first chunk whose values are within
+    chunk_radius, so each pair is verified and returned once.
+    """
+    values = [_chunk_values(packed, chunk) for chunk in range(chunk_count)]
+    masks = _flip_masks(chunk_radius)
+    found_a, found_b, found_d = [], [], []
+
+    for chunk in range(chunk_count):
+        order = np.argsort(values[chunk], kind='stable')
+        groups, starts, counts = np.unique(values[chunk][order], return_index=True, return_counts=True)
+
+        for mask in masks.tolist():
+            partners = groups ^ np.uint16(mask)
+            positions = np.minimum(np.searchsorted(groups, partners), len(groups) - 1)
+            match = groups[positions] == partners
+            # Same group: pairs inside it; otherwise each pair of groups once
+            match &= (counts > 1) if mask == 0 else (partners > groups)
+            group_a = np.nonzero(match)[0]
+            group_b = positions[group_a]
+
+            for rows_a, rows_b in _group_pairs(order, starts, counts, group_a, group_b, mask == 0):
+                low, high = np.minimum(rows_a, rows_b), np.maximum(rows_a, rows_b)
+                distances = popcount(packed[low] ^ packed[high]).sum(axis=1, dtype=np.int32)
+                keep = distances <= radius
+                for earlier in range(chunk):
+                    keep &= popcount(values[earlier][low] ^ values[earlier][high]) > chunk_radius
+                found_a.append(low[keep])
+                found_b.append(high[keep])
+                found_d.append(distances[keep])
+
+    if not found_a:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.int32)
+    return np.concatenate(found_a), np.concatenate(found_b), np.concatenate(found_d)
+
+
+def _group_pairs(
+    order: np.ndarray,
+    starts: np.ndarray,
+    counts: np.ndarray,
+    group_a: np.ndarray,
+    group_b: np.ndarray,
+    same_group: bool
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Row pairs of the group pairs (cross products), in batches of about PAIR_BATCH"""
+    sizes = counts[group_a].astype(np.int64) * counts[group_b]
+    ends = np.cumsum(sizes)
+
+    first = 0
+    while first < len(group_a):
+        done = ends[first - 1] if first else 0
+        last = max(first + 1, int(np.searchsorted(ends, done + PAIR_BATCH, side='right')))
+        batch_a, batch_b = group_a[first:last], group_b[first:last]
+        batch_sizes = sizes[first:last]
+
+        pair = np.repeat(np.arange(len(batch_a)), batch_sizes)
+        offset = _ranges(np.zeros(len(batch_sizes), dtype=np.int64), batch_sizes)
+        width = counts[batch_b][pair]
+        index_a, index_b = offset // width, offset % width
+        if same_group:
+            upper = index_a < index_b
+            pair, index_a, index_b = pair[upper], index_a[upper], index_b[upper]
+
+        yield order[starts[batch_a][pair] + index_a], order[starts[batch_b][pair] + index_b]
+        first = last
@@ -9,6 +9,7 @@ from typing import Tuple
 import imagehash
 from PIL import Image
 
+from ...io.exif_preview import open_embedded_preview
 from ...util.logging import get_logger
 
 
@@ -25,59 +26,87 @@ class HashMethod(Enum):
 def compute_phash(
     image_path: Path,
     method: HashMethod = HashMethod.PHASH,
-    hash_size: int = 8
+    hash_size: int = 8,
+    use_preview: bool = False
 ) -> str:
     """
     Compute perceptual hash of image
     
+    With use_preview, the embedded EXIF/MPF preview of JPEGs is hashed
+    instead of the full image (no full decode). The preview is a separate,
+    camera-scaled JPEG, so its hash can differ from the full-image hash
+    by a few bits (PHASH typically 0-6 of 64, DHASH/AHASH 0-1): compare
+    only hashes computed the same way, and expect more borderline pairs
+    near the threshold. Files without a usable preview fall back to the full image.
+    
     Args:
         image_path: Path to image
         method: Hashing method
         hash_size: Hash size (default 8 = 64-bit hash)
+        use_preview: Hash the embedded preview when available
         
     Returns:
         Hex string of hash
     """
     try:
+        preview = None
+        if use_preview:
+            # phash resamples to 4x hash_size, the others to hash_size;
+            # stored orientation, like the full-image path below
+            preview = open_embedded_preview(
+                image_path, (hash_size * 4, hash_size * 4), apply_orientation=False
+            )
+        
+        if preview is not None:
+            return _hash_image(preview, method, hash_size)
+        
         with Image.open(image_path) as img:
             # Convert to RGB
             if img.mode != 'RGB':
                 img = img.convert('RGB')
             
-            # Compute hash based on method
-            if method == HashMethod.PHASH:
-                hash_obj = imagehash.phash(img, hash_size=hash_size)
-            elif method == HashMethod.DHASH:
-                hash_obj = imagehash.dhash(img, hash_size=hash_size)
-            elif method == HashMethod.AHASH:
-                hash_obj = imagehash.average_hash(img, hash_size=hash_size)
-            else:
-                raise ValueError(f"Unknown hash method: {method}")
-            
-            return str(hash_obj)
+            return _hash_image(img, method, hash_size)
     
     except Exception as e:
         logger.error(f"Error computing hash for {image_path}: {e}")
         raise
 
 
+def _hash_image(img: Image.Image, method: HashMethod, hash_size: int) -> str:
+    """Hash an opened RGB image"""
+    if method == HashMethod.PHASH:
+        hash_obj = imagehash.phash(img, hash_size=hash_size)
+    elif method == HashMethod.DHASH:
+        hash_obj = imagehash.dhash(img, hash_size=hash_size)
+    elif method == HashMethod.AHASH:
+        hash_obj = imagehash.average_hash(img, hash_size=hash_size)
+    else:
+        raise ValueError(f"Unknown hash method: {method}")
+    
+    return str(hash_obj)
+
+
 def compare_hashes(hash1: str, hash2: str) -> int:
     """
     Compare two perceptual hashes
     
+    For many comparisons use the packed arrays in hash_array instead.
+    
     Args:
         hash1: First hash (hex string)
         hash2: Second hash (hex string)
-        
+    
     Returns:
         Hamming distance (0 = identical, larger = more different)
+    
+    Raises:
+        ValueError: Hashes of different sizes
     """
-    # Convert hex strings to imagehash objects
-    h1 = imagehash.hex_to_hash(hash1)
-    h2 = imagehash.hex_to_hash(hash2)
+    if len(hash1) != len(hash2):
+        raise ValueError(f"Cannot compare hashes of different sizes: {len(hash1)} and {len(hash2)} digits")
     
-    # Compute Hamming distance
-    return h1 - h2
+    # Hamming distance = set bits of the XOR
+    return (int(hash1, 16) ^ int(hash2, 16)).bit_count()
 
 
 def are_similar(
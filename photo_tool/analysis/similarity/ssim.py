@@ -1,18 +1,33 @@
 """
 Structural Similarity (SSIM) for refined comparison
+
+compute_ssim compares two files at full resolution. For clustering,
+photos are reduced once to small fixed-size grayscale proxies (cached
+in the workspace by ProxyCache) and the SSIM of many pairs is computed
+in one vectorized pass (batch_ssim), with the same window and constants
+as skimage's structural_similarity.
 """
 
 from pathlib import Path
 
 import cv2
+import numpy as np
+from PIL import Image
 from skimage.metrics import structural_similarity as ssim
 
+from ...io.exif_preview import open_embedded_preview
 from ...util.logging import get_logger
+from .hash_cache import SegmentCache
 
 
 logger = get_logger("ssim")
 
 
+PROXY_SIZE = 64  # proxy edge length in pixels
+SSIM_WINDOW = 7  # uniform window, as skimage
+SSIM_PAIR_BATCH = 256  # pairs per vectorized block (fits in cache)
+
+
 def compute_ssim(image1_path: Path, image2_path: Path) -> float:
     """
     Compute SSIM between two images
@@ -70,3 +85,139 @@ def are_similar_ssim(
     """
     score = compute_ssim(image1_path, image2_path)
     return (score >= threshold, score)
+
+
+def compute_proxy(
+    image_path: Path,
+    size: int = PROXY_SIZE,
+    use_preview: bool = False
+) -> np.ndarray:
+    """
+    Fixed-size grayscale proxy of an image for batch_ssim
+    
+    JPEGs are decoded at the smallest DCT scale that still covers the
+    proxy size (PIL draft), so this costs a fraction of a full decode.
+    The stored orientation is kept, as for perceptual hashes.
+    
+    Args:
+        image_path: Path to image
+        size: Proxy edge length (aspect ratio is not kept)
+        use_preview: Use the embedded preview when available (see compute_phash)
+        
+    Returns:
+        uint8 array of shape (size, size)
+    """
+    preview = None
+    if use_preview:
+        preview = open_embedded_preview(image_path, (size, size), apply_orientation=False)
+    
+    if preview is not None:
+        img = preview
+    else:
+        img = Image.open(image_path)
+        img.draft('L', (size, size))
+    
+    with img:
+        proxy = img.convert('L').resize((size, size), Image.Resampling.BOX)
+    return np.asarray(proxy, dtype=np.uint8)
+
+
+def batch_ssim(proxies: np.ndarray, pairs: np.ndarray) -> np.ndarray:
+    """
+    SSIM of many proxy pairs
+    
+    Same as skimage structural_similarity(proxies[a], proxies[b]) per
+    pair (to float32 precision), but window statistics of each proxy are
+    computed once, and those of the pairs a block at a time from exact
+    integer window sums.
+    
+    Args:
+        proxies: uint8 array of shape (n, size, size)
+        pairs: Index pairs, shape (m, 2)
+        
+    Returns:
+        SSIM per pair (1 = identical)
+    """
+    pairs = np.asarray(pairs, dtype=np.intp).reshape(-1, 2)
+    scores = np.zeros(len(pairs))
+    if not len(pairs):
+        return scores
+    
+    # Window sums of squares stay below 2**31 up to 181x181 proxies
+    dtype = np.int32 if proxies[0].size * 255 * 255 < 2 ** 31 else np.int64
+    images = proxies.astype(dtype)
+    
+    # Sample (co)variances and the constants for uint8 data, as skimage
+    count = SSIM_WINDOW * SSIM_WINDOW
+    sums = _window_sums(images)
+    means = (sums / count).astype(np.float32)
+    variances = ((_window_sums(images * images) - sums.astype(np.int64) ** 2 / count) / (count - 1)).astype(np.float32)
+    c1 = np.float32((0.01 * 255) ** 2)
+    c2 = np.float32((0.03 * 255) ** 2)
+    
+    for start in range(0, len(pairs), SSIM_PAIR_BATCH):
+        a, b = pairs[start:start + SSIM_PAIR_BATCH].T
+        cross = _window_sums(images[a] * images[b])
+        covariance = ((cross - sums[a].astype(np.int64) * sums[b] / count) / (count - 1)).astype(np.float32)
+        
+        mean_a, mean_b = means[a], means[b]
+        ssim_map = (
+            (2 * mean_a * mean_b + c1) * (2 * covariance + c2)
+            / ((mean_a * mean_a + mean_b * mean_b + c1) * (variances[a] + variances[b] + c2))
+        )
+        scores[start:start + len(a)] = ssim_map.mean(axis=(1, 2), dtype=np.float64)
+    
+    return scores
+
+
+def _window_sums(images: np.ndarray) -> np.ndarray:
+    """
+    Sums of all windows fully inside the images (n, h, w)
+    
+    These are the positions skimage keeps after cropping the border of
+    its filtered images.
+    """
+    sums = np.zeros((images.shape[0], images.shape[1] + 1, images.shape[2] + 1), dtype=images.dtype)
+    np.cumsum(images, axis=1, out=sums[:, 1:, 1:])
+    np.cumsum(sums[:, 1:, 1:], axis=2, out=sums[:, 1:, 1:])
+    w = SSIM_WINDOW
+    return sums[:, w:, w:] - sums[:, :-w, w:] - sums[:, w:, :-w] + sums[:, :-w, :-w]
+
+
+class ProxyCache(SegmentCache):
+    """
+    Cached SSIM proxies by file identity (see HashCache)
+    
+    Args:
+        cache_dir: Workspace proxies directory
+        size: Proxy edge length
+        use_preview: Proxies of embedded previews
+        content_fingerprint: Identify files by content instead of path and mtime
+    """
+    
+    def __init__(
+        self,
+        cache_dir: Path,
+        size: int = PROXY_SIZE,
+        use_preview: bool = False,
+        content_fingerprint: bool = False
+    ):
+        name = f"ssim_{size}"
+        if use_preview:
+            name += "_preview"
+        if content_fingerprint:
+            name += "_content"
+        
+        self.size = size
+        super().__init__(Path(cache_dir) / name, -(-size * size // 8), content_fingerprint)
+    
+    def _encode(self, proxy: np.ndarray) -> np.ndarray:
+        if proxy.shape != (self.size, self.size):
+            raise ValueError(f"Proxy has shape {proxy.shape}, cache expects {self.size}x{self.size}")
+        data = np.zeros(self.words * 8, dtype=np.uint8)
+        data[:proxy.size] = proxy.ravel()
+        return data.view('<u8')
+    
+    def _decode(self, words: np.ndarray) -> np.ndarray:
+        data = np.ascontiguousarray(words, dtype='<u8').view(np.uint8)
+        return data[:self.size * self.size].reshape(self.size, self.size)
@@ -2,18 +2,22 @@
 Photo analysis commands (bursts, quality, similarity)
 """
 
+from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
 import typer
 from rich.console import Console
 from rich.table import Table
 
 from ..workspace import Workspace
-from ..config import load_config
-from ..io import scan_multiple_directories, get_capture_time, get_video_capture_time, filter_by_type
+from ..config import load_config, save_config
+from ..io import scan_multiple_directories, read_capture_times, get_video_capture_time, filter_by_type
 from ..analysis import group_by_time, cluster_similar_photos
-from ..analysis.similarity import detect_blur, compute_phash, HashMethod
+from ..analysis.quality_matrix import QualityMatrix, update_quality_matrix
+from ..analysis.similarity import compute_phash, BlurMethod, HashMethod, HashCache, ProxyCache
+from ..analysis.similarity.blur import calibrate_blur_scale
 from ..util.timing import timer
 
 
@@ -26,6 +30,7 @@ def find_bursts(
     workspace: Path = typer.Option(".", "--workspace", "-w", help="Workspace directory"),
     time_window: Optional[float] = typer.Option(None, "--time-window", help="Override time window (seconds)"),
     threshold: Optional[int] = typer.Option(None, "--threshold", help="Override similarity threshold"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", help="Worker processes for metadata and blur scores (default: CPU count)"),
 ):
     """
     Find burst photo sequences
@@ -33,6 +38,7 @@ def find_bursts(
     Example:
         photo-tool analyze bursts
         photo-tool analyze bursts --time-window 5.0 --threshold 8
+        photo-tool analyze bursts --jobs 16
     """
     try:
         ws = Workspace(workspace)
@@ -53,7 +59,8 @@ def find_bursts(
                 config.scan.roots,
                 config.scan.extensions,
                 config.scan.recurse,
-                show_progress=True
+                show_progress=True,
+                manifest_path=ws.scan_manifest_file
             )
         
         if not all_media:
@@ -76,10 +83,16 @@ def find_bursts(
         capture_times = []
         photo_paths = []
         
+        # Photo metadata is parsed in parallel and cached in the workspace index
+        photo_times = read_capture_times(
+            [p.path for p in photos if p.is_photo], jobs=jobs, db_path=ws.db_file, show_progress=True
+        )
+        photo_times = iter(photo_times)
+        
         for photo in photos:
             # Use appropriate method based on file type
             if photo.is_photo:
-                capture_time = get_capture_time(photo.path)
+                capture_time = next(photo_times)
             elif photo.is_video:
                 capture_time = get_video_capture_time(photo.path)
             else:
@@ -110,27 +123,49 @@ def find_bursts(
         # Step 4: Visual similarity clustering
         console.print("\nStep 4: Analyzing visual similarity...")
         
-        # Optionally compute blur scores
-        console.print("  Computing blur scores...")
-        blur_scores = {}
-        for group in time_groups:
-            for photo in group.photos:
-                try:
-                    score = detect_blur(photo)
-                    blur_scores[photo] = score
-                except:
-                    pass
-        
         with timer("Clustering"):
             hash_method = HashMethod(config.similarity.method)
             clusters = cluster_similar_photos(
                 time_groups,
                 hash_method=hash_method,
                 similarity_threshold=config.similarity.phash_threshold,
-                blur_scores=blur_scores,
-                show_progress=True
+                show_progress=True,
+                use_embedded_preview=config.similarity.use_embedded_preview,
+                hash_cache=HashCache(
+                    ws.hashes_dir,
+                    hash_method,
+                    use_preview=config.similarity.use_embedded_preview,
+                    content_fingerprint=config.similarity.hash_cache_by_content
+                ),
+                ssim_threshold=config.similarity.ssim_threshold if config.similarity.use_ssim_refine else None,
+                proxy_cache=ProxyCache(
+                    ws.proxies_dir,
+                    use_preview=config.similarity.use_embedded_preview,
+                    content_fingerprint=config.similarity.hash_cache_by_content
+                )
             )
         
+        # Blur scores only pick the best photo of a burst: score burst members
+        # only, kept in the workspace quality matrix (a re-run decodes nothing)
+        console.print("  Computing blur scores...")
+        by_path = {str(photo.path): photo for photo in photos}
+        matrix = update_quality_matrix(
+            ws.quality_matrix_file,
+            [by_path[str(photo)] for cluster in clusters for photo in cluster.photos],
+            analysis_scale=config.quality.analysis_scale,
+            blur_method=BlurMethod(config.quality.blur_method),
+            exposure=False,
+            jobs=jobs,
+            db_path=ws.db_file,
+            prune=False
+        )
+        rows = matrix.row_index()
+        for cluster in clusters:
+            for i, photo in enumerate(cluster.photos):
+                row = rows.get(str(photo))
+                if row is not None and not np.isnan(matrix.blur_score[row]):
+                    cluster.blur_scores[i] = float(matrix.blur_score[row])
+        
         # Show results
         console.print(f"\n[green]✓[/green] Found {len(clusters)} burst sequences")
         
@@ -160,6 +195,7 @@ def analyze_quality(
     workspace: Path = typer.Option(".", "--workspace", "-w", help="Workspace directory"),
     blur_only: bool = typer.Option(False, "--blur-only", help="Only detect blur"),
     top: int = typer.Option(20, "--top", help="Show top N results"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", help="Worker processes for image analysis (default: CPU count)"),
 ):
     """
     Analyze photo quality (blur, exposure, etc.)
@@ -167,6 +203,7 @@ def analyze_quality(
     Example:
         photo-tool analyze quality --top 50
         photo-tool analyze quality --blur-only
+        photo-tool analyze quality --jobs 8
     """
     try:
         ws = Workspace(workspace)
@@ -179,7 +216,8 @@ def analyze_quality(
             config.scan.roots,
             config.scan.extensions,
             config.scan.recurse,
-            show_progress=True
+            show_progress=True,
+            manifest_path=ws.scan_manifest_file
         )
         
         if not all_media:
@@ -197,38 +235,205 @@ def analyze_quality(
             console.print("[yellow]No photos found[/yellow]")
             return
         
-        # Compute blur scores
-        console.print("\nComputing blur scores...")
-        blur_results = []
+        # Blur and exposure from one decode per new or changed photo; the
+        # statistics are kept in the workspace for 'analyze find'
+        console.print("\nComputing quality scores...")
+        matrix = update_quality_matrix(
+            ws.quality_matrix_file,
+            photos,
+            analysis_scale=config.quality.analysis_scale,
+            blur_method=BlurMethod(config.quality.blur_method),
+            exposure=not blur_only,
+            jobs=jobs,
+            db_path=ws.db_file,
+            show_progress=True
+        )
         
-        for photo in photos:
-            try:
-                score = detect_blur(photo.path)
-                blur_results.append((photo.path, score))
-            except Exception as e:
-                console.print(f"[yellow]Warning:[/yellow] Could not analyze {photo.filename}: {e}")
+        if len(matrix) < len(photos):
+            console.print(f"[yellow]Warning:[/yellow] Could not analyze {len(photos) - len(matrix)} photos")
         
-        # Sort by score (lower = more blurry)
-        blur_results.sort(key=lambda x: x[1])
+        if not len(matrix):
+            console.print("[yellow]No photos could be analyzed[/yellow]")
+            return
         
-        # Show results
+        # Show results (lower score = more blurry)
         table = Table(title=f"Top {top} Blurriest Photos")
         table.add_column("#", style="cyan")
         table.add_column("Photo", style="white")
         table.add_column("Blur Score", style="red")
         
-        for i, (photo, score) in enumerate(blur_results[:top], 1):
-            table.add_row(str(i), photo.name, f"{score:.2f}")
+        for i, row in enumerate(matrix.blurriest(top), 1):
+            table.add_row(str(i), matrix.path(row).name, f"{matrix.blur_score[row]:.2f}")
         
         console.print(table)
         
         # Statistics
         console.print(f"\nStatistics:")
-        scores = [s for _, s in blur_results]
-        console.print(f"  Mean blur score: {sum(scores) / len(scores):.2f}")
-        console.print(f"  Min (blurriest): {min(scores):.2f}")
-        console.print(f"  Max (sharpest):  {max(scores):.2f}")
+        console.print(f"  Mean blur score: {np.nanmean(matrix.blur_score):.2f}")
+        console.print(f"  Min (blurriest): {np.nanmin(matrix.blur_score):.2f}")
+        console.print(f"  Max (sharpest):  {np.nanmax(matrix.blur_score):.2f}")
+        
+        if not blur_only:
+            console.print(f"\nExposure:")
+            console.print(f"  Mean brightness: {np.nanmean(matrix.mean_brightness):.1f}")
+            console.print(f"  Shadows clipped:    {matrix.shadow_clipped().sum()} photos")
+            console.print(f"  Highlights clipped: {matrix.highlight_clipped().sum()} photos")
+    
+    except Exception as e:
+        console.print(f"[red]Error:[/red] {e}")
+        raise typer.Exit(1)
+
+
+@app.command("find")
+def find_by_quality(
+    workspace: Path = typer.Option(".", "--workspace", "-w", help="Workspace directory"),
+    underexposed: bool = typer.Option(False, "--underexposed", help="Mean brightness below --max-brightness"),
+    max_brightness: float = typer.Option(60.0, "--max-brightness", help="Brightness limit for --underexposed (0-255)"),
+    highlights: Optional[float] = typer.Option(None, "--highlights", help="Highlights clipped above this percentage"),
+    shadows: Optional[float] = typer.Option(None, "--shadows", help="Shadows clipped above this percentage"),
+    sharpest: Optional[int] = typer.Option(None, "--sharpest", help="Only the N sharpest matches"),
+    blurriest: Optional[int] = typer.Option(None, "--blurriest", help="Only the N blurriest matches"),
+    date_from: Optional[datetime] = typer.Option(None, "--from", formats=["%Y-%m-%d", "%Y-%m-%dT%H:%M:%S"], help="Captured on or after"),
+    date_to: Optional[datetime] = typer.Option(None, "--to", formats=["%Y-%m-%d", "%Y-%m-%dT%H:%M:%S"], help="Captured on or before (a date includes the whole day)"),
+    limit: int = typer.Option(50, "--limit", help="Show at most N photos"),
+):
+    """
+    Find photos by stored blur and exposure statistics
+    
+    Uses the statistics saved by 'analyze quality'; no image is opened.
+    
+    Example:
+        photo-tool analyze find --underexposed
+        photo-tool analyze find --highlights 2
+        photo-tool analyze find --sharpest 20 --from 2024-05-01 --to 2024-05-31
+    """
+    try:
+        ws = Workspace(workspace)
+        matrix = QualityMatrix.load(ws.quality_matrix_file)
+        if not len(matrix):
+            console.print("[yellow]No quality statistics yet - run 'photo-tool analyze quality' first[/yellow]")
+            return
+        
+        if date_to is not None and date_to.time() == datetime.min.time():
+            date_to = date_to.replace(hour=23, minute=59, second=59, microsecond=999999)
+        
+        mask = matrix.in_date_range(date_from, date_to)
+        if underexposed:
+            mask &= matrix.underexposed(max_brightness)
+        if highlights is not None:
+            mask &= matrix.highlight_clipped(highlights / 100)
+        if shadows is not None:
+            mask &= matrix.shadow_clipped(shadows / 100)
+        
+        if sharpest is not None:
+            rows = matrix.sharpest(sharpest, mask)
+        elif blurriest is not None:
+            rows = matrix.blurriest(blurriest, mask)
+        else:
+            rows = np.flatnonzero(mask)
+            rows = rows[np.argsort(matrix.time_ns[rows], kind='stable')]
+        
+        console.print(f"[bold]{len(rows)} of {len(matrix)} photos match[/bold]")
+        if not len(rows):
+            return
+        
+        table = Table()
+        table.add_column("#", style="cyan")
+        table.add_column("Photo", style="white")
+        table.add_column("Captured", style="dim")
+        table.add_column("Blur Score", justify="right")
+        table.add_column("Brightness", justify="right")
+        table.add_column("Shadows", justify="right")
+        table.add_column("Highlights", justify="right")
+        
+        for i, row in enumerate(rows[:limit], 1):
+            captured = datetime.fromtimestamp(int(matrix.time_ns[row]) / 1e9)
+            table.add_row(
+                str(i),
+                str(matrix.path(row)),
+                captured.strftime("%Y-%m-%d %H:%M"),
+                f"{matrix.blur_score[row]:.2f}",
+                f"{matrix.mean_brightness[row]:.1f}",
+                f"{matrix.shadow_clipping[row]:.1%}",
+                f"{matrix.highlight_clipping[row]:.1%}"
+            )
+        
+        console.print(table)
+        if len(rows) > limit:
+            console.print(f"[dim]... {len(rows) - limit} more (use --limit)[/dim]")
+    
+    except Exception as e:
+        console.print(f"[red]Error:[/red] {e}")
+        raise typer.Exit(1)
+
+
+@app.command("calibrate-blur")
+def calibrate_blur(
+    workspace: Path = typer.Option(".", "--workspace", "-w", help="Workspace directory"),
+    scale: int = typer.Option(4, "--scale", help="Target analysis scale (1, 2, 4 or 8)"),
+    sample: int = typer.Option(200, "--sample", help="Number of sample photos"),
+    apply: bool = typer.Option(False, "--apply", help="Write scale and converted threshold to the config"),
+):
+    """
+    Convert the blur threshold to another analysis resolution
+    
+    Scores a sample of the library at the configured and the target
+    scale and maps quality.blur_threshold so the same share of photos
+    counts as blurry.
+    
+    Example:
+        photo-tool analyze calibrate-blur --scale 4
+        photo-tool analyze calibrate-blur --scale 4 --apply
+    """
+    try:
+        ws = Workspace(workspace)
+        config = load_config(ws.config_file)
+        quality = config.quality
+        
+        if scale not in (1, 2, 4, 8):
+            console.print("[red]Error:[/red] Scale must be 1, 2, 4 or 8")
+            raise typer.Exit(1)
+        
+        all_media = scan_multiple_directories(
+            config.scan.roots,
+            config.scan.extensions,
+            config.scan.recurse,
+            show_progress=True,
+            manifest_path=ws.scan_manifest_file
+        )
+        photos = filter_by_type(all_media, "photo")
+        if len(photos) < 2:
+            console.print("[yellow]Not enough photos to calibrate[/yellow]")
+            return
+        
+        # Evenly spread over the library (scan order is by folder)
+        step = max(1, len(photos) // sample)
+        sample_paths = [p.path for p in photos[::step][:sample]]
+        
+        calibration = calibrate_blur_scale(
+            sample_paths,
+            scale,
+            BlurMethod(quality.blur_method),
+            reference_scale=quality.analysis_scale,
+            show_progress=True
+        )
+        threshold = calibration.map_threshold(quality.blur_threshold)
+        
+        console.print(f"\n[bold]Blur threshold calibration[/bold] ({len(calibration.scores)} photos)")
+        console.print(f"  Scale {quality.analysis_scale}: {quality.blur_threshold:.2f}")
+        console.print(f"  Scale {scale}: {threshold:.2f}")
+        console.print(f"  Same verdict for {calibration.agreement(quality.blur_threshold):.1%} of the sample")
+        
+        if apply:
+            quality.blur_threshold = round(threshold, 2)
+            quality.analysis_scale = scale
+            save_config(config, ws.config_file)
+            console.print(f"\n[green]✓[/green] Updated {ws.config_file}")
+        else:
+            console.print(f"\n[dim]Use --apply to write analysis_scale: {scale} and blur_threshold: {threshold:.2f}[/dim]")
     
+    except typer.Exit:
+        raise
     except Exception as e:
         console.print(f"[red]Error:[/red] {e}")
         raise typer.Exit(1)
@@ -13,6 +13,7 @@ from ..workspace import Workspace
 from ..config import load_config
 from ..io import (
     extract_audio_metadata,
+    extract_audio_metadata_batch,
     get_audio_capture_time,
     format_duration,
     format_file_size
@@ -123,6 +124,7 @@ def audio_info(
 def list_audio(
     workspace: Path = typer.Option(".", "--workspace", "-w", help="Workspace directory"),
     sort_by: str = typer.Option("name", "--sort", help="Sort by: name, size, date, duration"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", help="Concurrent ffprobe processes"),
 ):
     """
     List all audio files in workspace with metadata
@@ -144,7 +146,8 @@ def list_audio(
             config.scan.roots,
             config.scan.extensions,
             config.scan.recurse,
-            show_progress=True
+            show_progress=True,
+            manifest_path=ws.scan_manifest_file
         )
         
         # Filter audio only
@@ -160,10 +163,18 @@ def list_audio(
         console.print("\nCollecting audio information...")
         audio_data = []
         
+        # Concurrent ffprobe runs, cached in the workspace
+        all_metadata = extract_audio_metadata_batch(
+            [a.path for a in audio_files],
+            cache_path=ws.ffprobe_cache_file,
+            max_workers=jobs,
+            show_progress=True
+        )
+        
         for audio in audio_files:
             try:
-                metadata = extract_audio_metadata(audio.path)
-                capture_time = get_audio_capture_time(audio.path)
+                metadata = all_metadata[audio.path]
+                capture_time = metadata.get('created_time') or audio.modified_time
                 
                 audio_data.append({
                     'path': audio.path,
@@ -10,9 +10,10 @@ from rich.console import Console
 
 from ..workspace import Workspace
 from ..config import load_config
-from ..io import scan_multiple_directories, get_capture_time, get_video_capture_time, filter_by_type
-from ..analysis import group_by_time, cluster_similar_photos
-from ..analysis.similarity import detect_blur, HashMethod
+from ..io import scan_multiple_directories, read_capture_times, get_video_capture_time, filter_by_type
+from ..analysis import group_by_time, cluster_similar_photos, find_exact_duplicates
+from ..analysis.clustering import score_photos
+from ..analysis.similarity import HashMethod, HashCache, ProxyCache
 from ..actions import organize_clusters, deduplicate_photos
 from ..util.timing import timer
 
@@ -26,6 +27,7 @@ def organize_bursts(
     workspace: Path = typer.Option(".", "--workspace", "-w", help="Workspace directory"),
     dry_run: bool = typer.Option(True, "--dry-run/--apply", help="Preview changes"),
     min_size: Optional[int] = typer.Option(None, "--min-size", help="Minimum cluster size"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", help="Worker processes for metadata and image analysis (default: CPU count)"),
 ):
     """
     Organize burst photos into folders
@@ -57,7 +59,8 @@ def organize_bursts(
             config.scan.roots,
             config.scan.extensions,
             config.scan.recurse,
-            show_progress=True
+            show_progress=True,
+            manifest_path=ws.scan_manifest_file
         )
         
         if not all_media:
@@ -75,11 +78,13 @@ def organize_bursts(
             console.print("[yellow]No photos found[/yellow]")
             return
         
-        # Get capture times
+        # Get capture times (parallel, cached in the workspace index)
+        all_times = read_capture_times(
+            [p.path for p in photos], jobs=jobs, db_path=ws.db_file, show_progress=True
+        )
         capture_times = []
         photo_paths = []
-        for photo in photos:
-            capture_time = get_capture_time(photo.path)
+        for photo, capture_time in zip(photos, all_times):
             if capture_time:
                 capture_times.append(capture_time)
                 photo_paths.append(photo.path)
@@ -92,25 +97,41 @@ def organize_bursts(
             config.grouping.max_group_gap_seconds
         )
         
-        # Compute blur scores
-        blur_scores = {}
+        # Blur scores (hashes come from the same decode)
+        hash_method = HashMethod(config.similarity.method)
+        hash_cache = HashCache(
+            ws.hashes_dir,
+            hash_method,
+            use_preview=config.similarity.use_embedded_preview,
+            content_fingerprint=config.similarity.hash_cache_by_content
+        )
+        
         console.print("Computing quality scores...")
-        for group in time_groups:
-            for photo in group.photos:
-                try:
-                    score = detect_blur(photo)
-                    blur_scores[photo] = score
-                except:
-                    pass
+        blur_scores = score_photos(
+            [photo for group in time_groups for photo in group.photos],
+            hash_method,
+            config.similarity.use_embedded_preview,
+            hash_cache,
+            jobs=jobs,
+            show_progress=True,
+            analysis_scale=config.quality.analysis_scale
+        )
         
         # Cluster
-        hash_method = HashMethod(config.similarity.method)
         clusters = cluster_similar_photos(
             time_groups,
             hash_method=hash_method,
             similarity_threshold=config.similarity.phash_threshold,
             blur_scores=blur_scores,
-            show_progress=True
+            show_progress=True,
+            use_embedded_preview=config.similarity.use_embedded_preview,
+            hash_cache=hash_cache,
+            ssim_threshold=config.similarity.ssim_threshold if config.similarity.use_ssim_refine else None,
+            proxy_cache=ProxyCache(
+                ws.proxies_dir,
+                use_preview=config.similarity.use_embedded_preview,
+                content_fingerprint=config.similarity.hash_cache_by_content
+            )
         )
         
         console.print(f"\nFound {len(clusters)} burst sequences")
@@ -151,12 +172,19 @@ def dedupe(
     action: str = typer.Option("list", "--action", help="list, delete, move"),
     move_to: Optional[Path] = typer.Option(None, "--move-to", help="Target directory for move action"),
     dry_run: bool = typer.Option(True, "--dry-run/--apply", help="Preview changes"),
+    exact: bool = typer.Option(False, "--exact", help="Only byte-identical files (all media types, no similarity)"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", help="Parallel workers for hashing / metadata"),
 ):
     """
     Find and handle duplicate photos
     
+    With --exact, finds byte-identical copies of any media file (size,
+    then head/tail hash, then full content hash). With keep_first the
+    oldest copy is kept.
+    
     Example:
         photo-tool organize dedupe --dry-run
+        photo-tool organize dedupe --exact --strategy keep_first
         photo-tool organize dedupe --action delete --apply
         photo-tool organize dedupe --action move --move-to duplicates/ --apply
     """
@@ -177,60 +205,21 @@ def dedupe(
             config.scan.roots,
             config.scan.extensions,
             config.scan.recurse,
-            show_progress=True
+            show_progress=True,
+            manifest_path=ws.scan_manifest_file
         )
         
         if not all_media:
             console.print("[yellow]No files found[/yellow]")
             return
         
-        # Filter photos only (deduplication for photos)
-        photos = filter_by_type(all_media, "photo")
-        other_count = len(all_media) - len(photos)
-        
-        if other_count > 0:
-            console.print(f"[dim]Note: Skipping {other_count} video/audio files (deduplication for photos only)[/dim]")
-        
-        if not photos:
-            console.print("[yellow]No photos found[/yellow]")
-            return
-        
-        # Get capture times and cluster
-        capture_times = []
-        photo_paths = []
-        for photo in photos:
-            capture_time = get_capture_time(photo.path)
-            if capture_time:
-                capture_times.append(capture_time)
-                photo_paths.append(photo.path)
-        
-        time_groups = group_by_time(
-            photo_paths,
-            capture_times,
-            config.grouping.time_window_seconds,
-            config.grouping.max_group_gap_seconds
-        )
-        
-        # Blur scores
-        blur_scores = {}
-        console.print("Computing quality scores...")
-        for group in time_groups:
-            for photo in group.photos:
-                try:
-                    blur_scores[photo] = detect_blur(photo)
-                except:
-                    pass
-        
-        hash_method = HashMethod(config.similarity.method)
-        clusters = cluster_similar_photos(
-            time_groups,
-            hash_method=hash_method,
-            similarity_threshold=config.similarity.phash_threshold,
-            blur_scores=blur_scores,
-            show_progress=True
-        )
-        
-        console.print(f"\nFound {len(clusters)} groups of similar photos")
+        if exact:
+            clusters = find_exact_duplicates(all_media, max_workers=jobs)
+            console.print(f"\nFound {len(clusters)} groups of identical files")
+        else:
+            clusters = _find_similar_photos(all_media, config, ws, jobs)
+            if clusters is None:
+                return
         
         # Deduplicate
         affected = deduplicate_photos(
@@ -251,6 +240,77 @@ def dedupe(
         raise typer.Exit(1)
 
 
+def _find_similar_photos(all_media, config, ws, jobs):
+    """Perceptual-hash clusters within time groups (None if no photos)"""
+    # Filter photos only (deduplication for photos)
+    photos = filter_by_type(all_media, "photo")
+    other_count = len(all_media) - len(photos)
+    
+    if other_count > 0:
+        console.print(f"[dim]Note: Skipping {other_count} video/audio files (deduplication for photos only)[/dim]")
+    
+    if not photos:
+        console.print("[yellow]No photos found[/yellow]")
+        return None
+    
+    # Get capture times and cluster
+    all_times = read_capture_times(
+        [p.path for p in photos], jobs=jobs, db_path=ws.db_file, show_progress=True
+    )
+    capture_times = []
+    photo_paths = []
+    for photo, capture_time in zip(photos, all_times):
+        if capture_time:
+            capture_times.append(capture_time)
+            photo_paths.append(photo.path)
+    
+    time_groups = group_by_time(
+        photo_paths,
+        capture_times,
+        config.grouping.time_window_seconds,
+        config.grouping.max_group_gap_seconds
+    )
+    
+    # Blur scores (hashes come from the same decode)
+    hash_method = HashMethod(config.similarity.method)
+    hash_cache = HashCache(
+        ws.hashes_dir,
+        hash_method,
+        use_preview=config.similarity.use_embedded_preview,
+        content_fingerprint=config.similarity.hash_cache_by_content
+    )
+    
+    console.print("Computing quality scores...")
+    blur_scores = score_photos(
+        [photo for group in time_groups for photo in group.photos],
+        hash_method,
+        config.similarity.use_embedded_preview,
+        hash_cache,
+        jobs=jobs,
+        show_progress=True,
+        analysis_scale=config.quality.analysis_scale
+    )
+    
+    clusters = cluster_similar_photos(
+        time_groups,
+        hash_method=hash_method,
+        similarity_threshold=config.similarity.phash_threshold,
+        blur_scores=blur_scores,
+        show_progress=True,
+        use_embedded_preview=config.similarity.use_embedded_preview,
+        hash_cache=hash_cache,
+        ssim_threshold=config.similarity.ssim_threshold if config.similarity.use_ssim_refine else None,
+        proxy_cache=ProxyCache(
+            ws.proxies_dir,
+            use_preview=config.similarity.use_embedded_preview,
+            content_fingerprint=config.similarity.hash_cache_by_content
+        )
+    )
+    
+    console.print(f"\nFound {len(clusters)} groups of similar photos")
+    return clusters
+
+
 @app.command("undo")
 def undo_organization(
     workspace: Path = typer.Option(".", "--workspace", "-w", help="Workspace directory"),
@@ -283,7 +343,8 @@ def undo_organization(
             config.scan.roots,
             config.scan.extensions,
             config.scan.recurse,
-            show_progress=True
+            show_progress=True,
+            manifest_path=ws.scan_manifest_file
         )
         
         # Find burst folders (folders that contain photos)
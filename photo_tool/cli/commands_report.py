@@ -12,12 +12,13 @@ from ..workspace import Workspace
 from ..config import load_config
 from ..io import (
     scan_multiple_directories,
-    get_capture_time,
+    read_capture_times,
     get_video_capture_time,
     filter_by_type
 )
 from ..analysis import group_by_time, cluster_similar_photos
-from ..analysis.similarity import detect_blur, HashMethod
+from ..analysis.clustering import score_photos
+from ..analysis.similarity import HashMethod, HashCache, ProxyCache
 from ..report import generate_text_report, generate_html_report
 from ..util.timing import timer
 
@@ -32,6 +33,7 @@ def generate(
     format: str = typer.Option("text", "--format", "-f", help="Report format: text, html"),
     output: Optional[Path] = typer.Option(None, "--output", "-o", help="Output file path"),
     thumbnails: bool = typer.Option(True, "--thumbnails/--no-thumbnails", help="Include thumbnails (HTML only)"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", help="Worker processes for metadata and image analysis (default: CPU count)"),
 ):
     """
     Generate analysis report
@@ -54,7 +56,8 @@ def generate(
             config.scan.roots,
             config.scan.extensions,
             config.scan.recurse,
-            show_progress=True
+            show_progress=True,
+            manifest_path=ws.scan_manifest_file
         )
         
         if not all_media:
@@ -72,11 +75,13 @@ def generate(
             console.print("[yellow]No photos found for analysis[/yellow]")
             return
         
-        # Get capture times
+        # Get capture times (parallel, cached in the workspace index)
+        all_times = read_capture_times(
+            [p.path for p in photos], jobs=jobs, db_path=ws.db_file, show_progress=True
+        )
         capture_times = []
         photo_paths = []
-        for photo in photos:
-            capture_time = get_capture_time(photo.path)
+        for photo, capture_time in zip(photos, all_times):
             if capture_time:
                 capture_times.append(capture_time)
                 photo_paths.append(photo.path)
@@ -89,24 +94,42 @@ def generate(
             config.grouping.max_group_gap_seconds
         )
         
-        # Blur scores
+        # Blur scores (hashes come from the same decode)
+        hash_method = HashMethod(config.similarity.method)
+        hash_cache = HashCache(
+            ws.hashes_dir,
+            hash_method,
+            use_preview=config.similarity.use_embedded_preview,
+            content_fingerprint=config.similarity.hash_cache_by_content
+        )
+        
         blur_scores = {}
         if format == "html" or config.quality.compute_histogram:
             console.print("Computing quality scores...")
-            for group in time_groups:
-                for photo in group.photos:
-                    try:
-                        blur_scores[photo] = detect_blur(photo)
-                    except:
-                        pass
+            blur_scores = score_photos(
+                [photo for group in time_groups for photo in group.photos],
+                hash_method,
+                config.similarity.use_embedded_preview,
+                hash_cache,
+                jobs=jobs,
+                show_progress=True,
+                analysis_scale=config.quality.analysis_scale
+            )
         
-        hash_method = HashMethod(config.similarity.method)
         clusters = cluster_similar_photos(
             time_groups,
             hash_method=hash_method,
             similarity_threshold=config.similarity.phash_threshold,
             blur_scores=blur_scores,
-            show_progress=True
+            show_progress=True,
+            use_embedded_preview=config.similarity.use_embedded_preview,
+            hash_cache=hash_cache,
+            ssim_threshold=config.similarity.ssim_threshold if config.similarity.use_ssim_refine else None,
+            proxy_cache=ProxyCache(
+                ws.proxies_dir,
+                use_preview=config.similarity.use_embedded_preview,
+                content_fingerprint=config.similarity.hash_cache_by_content
+            )
         )
         
         console.print(f"\nFound {len(clusters)} photo clusters")
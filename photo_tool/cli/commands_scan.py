@@ -17,6 +17,8 @@ from ..io import (
     extract_exif,
     get_capture_time,
     filter_by_type,
+    incremental_scan,
+    ScanManifest,
     extract_video_metadata,
     get_video_capture_time
 )
@@ -32,13 +34,17 @@ def scan(
     workspace: Path = typer.Option(".", "--workspace", "-w", help="Workspace directory"),
     roots: Optional[List[Path]] = typer.Option(None, "--root", help="Override scan roots"),
     recursive: bool = typer.Option(True, "--recursive/--no-recursive", help="Scan subdirectories"),
+    full: bool = typer.Option(False, "--full", help="Re-list all directories (ignore scan manifest)"),
 ):
     """
     Scan photo directories and build index
     
+    Only directories that changed since the last scan are listed again.
+    
     Example:
         photo-tool scan --workspace D:/PhotoWorkspace
         photo-tool scan --root E:/Photos --root F:/Camera
+        photo-tool scan --full
     """
     try:
         ws = Workspace(workspace)
@@ -55,12 +61,15 @@ def scan(
         console.print(f"[bold]Scanning directories...[/bold]")
         
         with timer("Scan completed"):
-            media_files = scan_multiple_directories(
+            delta = incremental_scan(
                 scan_roots,
                 config.scan.extensions,
+                ScanManifest(ws.scan_manifest_file),
                 recursive=recursive,
-                show_progress=True
+                show_progress=True,
+                full=full
             )
+        media_files = delta.media
         
         # Count by type
         photos = filter_by_type(media_files, "photo")
@@ -72,6 +81,12 @@ def scan(
         console.print(f"  Videos: {len(videos)}")
         console.print(f"  Audio: {len(audio)}")
         
+        console.print(
+            f"\nChanges since last scan: [green]+{len(delta.added)}[/green] added, "
+            f"[yellow]~{len(delta.changed)}[/yellow] changed, [red]-{len(delta.removed)}[/red] removed "
+            f"[dim]({delta.dirs_listed} directories listed, {delta.dirs_reused} unchanged)[/dim]"
+        )
+        
         # Show summary table
         table = Table(title="Scan Summary")
         table.add_column("Statistic", style="cyan")
@@ -0,0 +1,111 @@
+"""
+Thumbnail cache commands
+"""
+
+from pathlib import Path
+from typing import Optional
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from ..workspace import Workspace
+from ..config import load_config
+from ..io import scan_multiple_directories, filter_by_type, ThumbnailStore
+from ..io.thumb_build import build_thumbnails, parse_sizes
+from ..util.timing import format_duration
+
+
+app = typer.Typer()
+console = Console()
+
+
+@app.command("build")
+def build(
+    workspace: Path = typer.Option(".", "--workspace", "-w", help="Workspace directory"),
+    sizes: str = typer.Option("300", "--sizes", "-s", help="Comma-separated sizes, e.g. 256,400,1920 (the web GUI uses 300)"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", help="Worker processes (default: CPU count)"),
+    videos: bool = typer.Option(True, "--videos/--no-videos", help="Include video poster frames"),
+    retry_failed: bool = typer.Option(False, "--retry-failed", help="Retry files that failed in earlier runs"),
+    budget_gb: Optional[float] = typer.Option(None, "--budget-gb", help="Thumbnail store size limit (saved for later runs)"),
+):
+    """
+    Pre-generate thumbnails into the packed thumbnail store
+    
+    Up-to-date thumbnails are skipped, so repeated runs only render new or
+    changed files. An interrupted build continues where it stopped.
+    
+    Example:
+        photo-tool thumbs build
+        photo-tool thumbs build --sizes 256,400,1920 --jobs 8
+    """
+    try:
+        ws = Workspace(workspace)
+        config = load_config(ws.config_file)
+        
+        try:
+            thumb_sizes = parse_sizes(sizes)
+        except ValueError as e:
+            console.print(f"[red]Error:[/red] {e}")
+            raise typer.Exit(1)
+        
+        console.print("[bold]Scanning media files...[/bold]")
+        all_media = scan_multiple_directories(
+            config.scan.roots,
+            config.scan.extensions,
+            config.scan.recurse,
+            show_progress=True,
+            manifest_path=ws.scan_manifest_file
+        )
+        
+        media = filter_by_type(all_media, "photo")
+        if videos:
+            media += filter_by_type(all_media, "video")
+        
+        if not media:
+            console.print("[yellow]No photos or videos found[/yellow]")
+            return
+        
+        size_text = ", ".join(f"{w}x{h}" for w, h in thumb_sizes)
+        console.print(f"\nBuilding thumbnails ({size_text}) for {len(media)} files...")
+        
+        max_bytes = int(budget_gb * 1024 ** 3) if budget_gb else None
+        with ThumbnailStore(ws.thumbnail_store_dir, max_bytes=max_bytes) as store:
+            stats = build_thumbnails(
+                [m.path for m in media],
+                store,
+                thumb_sizes,
+                jobs=jobs,
+                checkpoint_path=ws.thumbnail_store_dir / "build_checkpoint.json",
+                retry_failed=retry_failed,
+                show_progress=True
+            )
+        
+        table = Table(title="Thumbnail Build")
+        table.add_column("Statistic", style="cyan")
+        table.add_column("Value", style="magenta")
+        
+        table.add_row("Files", str(stats.files_total))
+        table.add_row("Up to date (skipped)", str(stats.files_skipped))
+        table.add_row("Rendered", str(stats.files_rendered))
+        table.add_row("Failed", str(stats.files_failed))
+        table.add_row("Thumbnails written", str(stats.thumbnails_written))
+        table.add_row("Thumbnail data", f"{stats.bytes_written / (1024**2):.1f} MB")
+        table.add_row("Elapsed", format_duration(stats.elapsed))
+        table.add_row("Throughput", f"{stats.files_per_second:.1f} files/s, {stats.thumbnails_per_second:.1f} thumbs/s")
+        table.add_row("Source read", f"{stats.source_mb_per_second:.1f} MB/s")
+        
+        console.print()
+        console.print(table)
+        
+        if stats.files_failed:
+            console.print(
+                f"[yellow]{stats.files_failed} files could not be rendered[/yellow] "
+                "[dim](skipped until they change; use --retry-failed)[/dim]"
+            )
+    
+    except typer.Exit:
+        raise
+    except Exception as e:
+        console.print(f"[red]Error:[/red] {e}")
+        raise typer.Exit(1)
@@ -13,6 +13,7 @@ from ..workspace import Workspace
 from ..config import load_config
 from ..io import (
     extract_video_metadata,
+    extract_video_metadata_batch,
     get_video_capture_time,
     is_ffprobe_available,
     format_duration,
@@ -103,6 +104,7 @@ def video_info(
 def list_videos(
     workspace: Path = typer.Option(".", "--workspace", "-w", help="Workspace directory"),
     sort_by: str = typer.Option("name", "--sort", help="Sort by: name, size, date, duration"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", help="Concurrent ffprobe processes"),
 ):
     """
     List all videos in workspace with metadata
@@ -123,7 +125,8 @@ def list_videos(
             config.scan.roots,
             config.scan.extensions,
             config.scan.recurse,
-            show_progress=True
+            show_progress=True,
+            manifest_path=ws.scan_manifest_file
         )
         
         # Filter videos only
@@ -139,10 +142,18 @@ def list_videos(
         console.print("\nCollecting video information...")
         video_data = []
         
+        # Concurrent ffprobe runs, cached in the workspace
+        all_metadata = extract_video_metadata_batch(
+            [v.path for v in videos],
+            cache_path=ws.ffprobe_cache_file,
+            max_workers=jobs,
+            show_progress=True
+        )
+        
         for video in videos:
             try:
-                metadata = extract_video_metadata(video.path)
-                capture_time = get_video_capture_time(video.path)
+                metadata = all_metadata[video.path]
+                capture_time = metadata.get('created_time') or video.modified_time
                 
                 video_data.append({
                     'path': video.path,
@@ -0,0 +1,142 @@
+"""
+Library watch command
+"""
+
+from pathlib import Path
+from typing import List
+
+import typer
+from rich.console import Console
+
+from ..workspace import Workspace
+from ..config import PhotoToolConfig, load_config
+from ..io import MediaFile, ThumbnailStore, get_thumbnail_data
+from ..io.thumb_build import parse_sizes
+from ..io.watcher import LibraryWatcher, LibraryEvent
+from ..analysis.clustering import compute_hashes
+from ..analysis.quality_matrix import update_quality_matrix
+from ..analysis.similarity import BlurMethod, HashCache, HashMethod
+
+
+app = typer.Typer()
+console = Console()
+
+
+@app.callback(invoke_without_command=True)
+def watch(
+    workspace: Path = typer.Option(".", "--workspace", "-w", help="Workspace directory"),
+    interval: float = typer.Option(5.0, "--interval", help="Polling interval in seconds (polling backend)"),
+    polling: bool = typer.Option(False, "--polling", help="Force polling instead of native notifications"),
+    thumbnails: bool = typer.Option(False, "--thumbnails/--no-thumbnails", help="Add thumbnails of new and changed files to the thumbnail store"),
+    sizes: str = typer.Option("300", "--sizes", "-s", help="Thumbnail sizes for --thumbnails (the web GUI uses 300)"),
+    features: bool = typer.Option(False, "--features/--no-features", help="Update hashes and quality statistics of new and changed photos"),
+):
+    """
+    Watch scan roots and keep the workspace index current
+
+    Uses native file notifications if 'watchdog' is installed
+    (pip install photo-tool[watch]), otherwise polls directory mtimes.
+
+    Example:
+        photo-tool watch --workspace D:/PhotoWorkspace
+        photo-tool watch --thumbnails --features
+    """
+    try:
+        ws = Workspace(workspace)
+        config = load_config(ws.config_file)
+        thumb_sizes = parse_sizes(sizes)
+
+        if not config.scan.roots:
+            console.print("[red]Error:[/red] No scan roots configured")
+            raise typer.Exit(1)
+
+        watcher = LibraryWatcher(
+            config.scan.roots,
+            config.scan.extensions,
+            ws.scan_manifest_file,
+            recursive=config.scan.recurse,
+            poll_interval=interval,
+            use_native=not polling
+        )
+
+        # Same store the GUI serves thumbnails from
+        store = ThumbnailStore(ws.thumbnail_store_dir) if thumbnails else None
+
+        def on_events(events: List[LibraryEvent]):
+            for event in events:
+                if event.kind == "added":
+                    console.print(f"[green]+[/green] {event.path}")
+                elif event.kind == "modified":
+                    console.print(f"[yellow]~[/yellow] {event.path}")
+                else:
+                    console.print(f"[red]-[/red] {event.path}")
+
+                if store is not None and event.media and (event.media.is_photo or event.media.is_video):
+                    try:
+                        for size in thumb_sizes:
+                            get_thumbnail_data(event.path, store, size)
+                    except Exception as e:
+                        console.print(f"  [yellow]Warning:[/yellow] No thumbnail for {event.path.name}: {e}")
+
+            changed_photos = [e.media for e in events if e.media is not None and e.media.is_photo]
+            if features and changed_photos:
+                try:
+                    _update_features(ws, config, changed_photos)
+                except Exception as e:
+                    console.print(f"  [yellow]Warning:[/yellow] Could not update photo features: {e}")
+
+        watcher.add_listener(on_events)
+
+        console.print("[bold]Syncing index...[/bold]")
+        watcher.start()
+        console.print(
+            f"Watching {len(config.scan.roots)} root(s), {len(watcher.media)} files "
+            f"[dim]({watcher.backend} backend)[/dim]"
+        )
+        console.print("Press Ctrl+C to stop\n")
+
+        try:
+            watcher.run_forever()
+        finally:
+            if store is not None:
+                store.close()
+        console.print("\nStopped")
+
+    except typer.Exit:
+        raise
+    except Exception as e:
+        console.print(f"[red]Error:[/red] {e}")
+        raise typer.Exit(1)
+
+
+def _update_features(ws: Workspace, config: PhotoToolConfig, photos: List[MediaFile]) -> None:
+    """
+    Hashes and quality statistics of new or changed photos
+
+    Feeds the workspace HashCache and quality matrix, so later 'analyze'
+    runs and the GUI do not decode these photos again. Rows of other
+    photos are kept (the matrix is pruned by 'analyze quality').
+    """
+    hash_method = HashMethod(config.similarity.method)
+    use_preview = config.similarity.use_embedded_preview
+    hash_cache = HashCache(
+        ws.hashes_dir,
+        hash_method,
+        use_preview=use_preview,
+        content_fingerprint=config.similarity.hash_cache_by_content
+    )
+
+    # Full-image hashes come from the analysis decode; preview hashes need the preview
+    update_quality_matrix(
+        ws.quality_matrix_file,
+        photos,
+        analysis_scale=config.quality.analysis_scale,
+        blur_method=BlurMethod(config.quality.blur_method),
+        jobs=1,
+        db_path=ws.db_file,
+        prune=False,
+        hash_cache=None if use_preview else hash_cache,
+        hash_method=hash_method
+    )
+    if use_preview:
+        compute_hashes([photo.path for photo in photos], hash_method, True, hash_cache)
@@ -20,6 +20,8 @@ from . import commands_report
 from . import commands_video
 from . import commands_audio
 from . import commands_rate
+from . import commands_watch
+from . import commands_thumbs
 
 
 # Create main app
@@ -66,6 +68,8 @@ app.add_typer(commands_report.app, name="report", help="Generate reports")
 app.add_typer(commands_video.app, name="video", help="Video file management")
 app.add_typer(commands_audio.app, name="audio", help="Audio file management")
 app.add_typer(commands_rate.app, name="rate", help="Rate and tag files")
+app.add_typer(commands_watch.app, name="watch", help="Watch scan roots and keep the index current")
+app.add_typer(commands_thumbs.app, name="thumbs", help="Thumbnail cache")
 
 
 if __name__ == "__main__":
@@ -72,6 +72,16 @@ class SimilarityConfig(BaseModel):
         le=64,
         description="Maximum hash distance for similar photos (lower = stricter)"
     )
+    use_embedded_preview: bool = Field(
+        default=False,
+        description="Hash the camera's embedded JPEG preview instead of the full image "
+                    "(much faster; hashes may differ by a few bits from full-image hashes)"
+    )
+    hash_cache_by_content: bool = Field(
+        default=False,
+        description="Identify cached hashes by file content (head/tail hash) instead of "
+                    "path and modification time (survives renames and moves)"
+    )
     use_ssim_refine: bool = Field(
         default=False,
         description="Use SSIM for refinement (slower but more accurate)"
@@ -95,6 +105,11 @@ class QualityConfig(BaseModel):
         ge=0.0,
         description="Blur threshold (higher = sharper)"
     )
+    analysis_scale: Literal[1, 2, 4, 8] = Field(
+        default=1,
+        description="Resolution divisor for blur/exposure analysis (blur_threshold is for this scale, "
+                    "see 'analyze calibrate-blur')"
+    )
     compute_histogram: bool = Field(
         default=True,
         description="Compute exposure histogram"
@@ -1,43 +1,92 @@
 """I/O operations: scanning, EXIF, thumbnails, video metadata, audio metadata"""
 
-from .scanner import scan_directory, scan_multiple_directories, MediaFile, PhotoFile, filter_by_type
-from .exif import extract_exif, get_capture_time, get_gps_coordinates, get_keywords
-from .thumbnails import generate_thumbnail
+from .scanner import scan_directory, scan_multiple_directories, iter_media, MediaFile, PhotoFile, filter_by_type
+from .media_table import MediaTable, MediaRow
+from .manifest import ScanManifest, ScanDelta, incremental_scan
+from .exif import (
+    extract_exif,
+    get_capture_time,
+    get_gps_coordinates,
+    get_keywords,
+    extract_photo_record,
+    load_photo_records,
+    read_capture_times
+)
+from .exif_header import read_exif_header
+from .exif_preview import EmbeddedPreview, list_embedded_previews, read_embedded_preview, open_embedded_preview
+from .thumbnails import generate_thumbnail, get_thumbnail_data
+from .thumb_store import ThumbnailStore, thumbnail_key
+from .video_preview import VideoPreview, build_video_preview, build_video_previews, extract_frames
 from .video_metadata import (
     extract_video_metadata,
+    extract_video_metadata_batch,
     get_video_capture_time,
     is_ffprobe_available,
     format_duration,
     format_file_size
 )
+from .video_header import read_video_header
 from .audio_metadata import (
     extract_audio_metadata,
+    extract_audio_metadata_batch,
     get_audio_capture_time,
     format_sample_rate,
     format_channels
 )
+from .audio_header import read_audio_header
+from .waveform import Waveform, compute_waveform, get_waveform_file, read_waveform
 
 __all__ = [
     # Scanner
     "scan_directory",
     "scan_multiple_directories",
+    "iter_media",
     "MediaFile",
     "PhotoFile",  # Backwards compatibility
     "filter_by_type",
+    "MediaTable",
+    "MediaRow",
+    # Scan manifest
+    "ScanManifest",
+    "ScanDelta",
+    "incremental_scan",
     # EXIF
     "extract_exif",
     "get_capture_time",
+    "read_exif_header",
+    "extract_photo_record",
+    "load_photo_records",
+    "read_capture_times",
+    "EmbeddedPreview",
+    "list_embedded_previews",
+    "read_embedded_preview",
+    "open_embedded_preview",
     # Thumbnails
     "generate_thumbnail",
+    "get_thumbnail_data",
+    "ThumbnailStore",
+    "thumbnail_key",
+    "VideoPreview",
+    "build_video_preview",
+    "build_video_previews",
+    "extract_frames",
     # Video
     "extract_video_metadata",
+    "extract_video_metadata_batch",
     "get_video_capture_time",
     "is_ffprobe_available",
     "format_duration",
     "format_file_size",
+    "read_video_header",
     # Audio
     "extract_audio_metadata",
+    "extract_audio_metadata_batch",
     "get_audio_capture_time",
     "format_sample_rate",
     "format_channels",
+    "read_audio_header",
+    "Waveform",
+    "compute_waveform",
+    "get_waveform_file",
+    "read_waveform",
 ]
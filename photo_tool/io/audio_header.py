@@ -0,0 +1,454 @@
+"""
+Native audio header reader (no ffprobe)
+
+Reads only the headers of common recorder and music formats:
+- RIFF/WAVE: fmt and data chunk sizes, bext (Broadcast WAV) origination
+  date, LIST/INFO tags
+- FLAC: STREAMINFO and Vorbis comments
+- MP3: ID3v2 text frames, first frame header, Xing/Info or VBRI frame count
+- M4A/MP4 audio: moov/mvhd and the sound track's sample entry
+
+read_audio_header() returns a dict with the same keys as
+extract_audio_metadata() (plus bit_depth), or None for other formats.
+"""
+
+import os
+import struct
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional
+
+from .video_header import _iter_boxes, _parse_mvhd, _read_leaf
+from ..util.logging import get_logger
+
+
+logger = get_logger("audio_header")
+
+
+MAX_CHUNK_BYTES = 64 * 1024  # metadata chunks/blocks read into memory
+MP3_SCAN_BYTES = 64 * 1024   # search window for the first MPEG frame
+
+# WAVE format tags (PCM and float are named from the bit depth)
+_WAVE_PCM = 1
+_WAVE_FLOAT = 3
+_WAVE_CODECS = {6: 'pcm_alaw', 7: 'pcm_mulaw', 0x55: 'mp3'}
+_WAVE_EXTENSIBLE = 0xFFFE
+
+_RIFF_INFO_TAGS = {
+    b'INAM': 'title',
+    b'IART': 'artist',
+    b'IPRD': 'album',
+    b'IGNR': 'genre',
+    b'ICMT': 'comment',
+    b'ICRD': 'date',
+}
+
+_VORBIS_TAGS = {
+    'TITLE': 'title',
+    'ARTIST': 'artist',
+    'ALBUM': 'album',
+    'GENRE': 'genre',
+    'COMMENT': 'comment',
+    'DESCRIPTION': 'comment',
+    'DATE': 'date',
+}
+
+_ID3_TAGS = {
+    'TIT2': 'title',
+    'TPE1': 'artist',
+    'TALB': 'album',
+    'TCON': 'genre',
+    'TDRC': 'date',
+    'TYER': 'date',
+}
+
+# MPEG audio: bitrate tables (kbps) indexed [version_group][layer][index]
+_MP3_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+_DATE_FORMATS = ['%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M:%SZ', '%Y-%m-%d', '%Y']
+
+
+def read_audio_header(audio_path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Read sample rate, channels, bit depth, duration and recording time
+
+    Args:
+        audio_path: Path to audio file
+
+    Returns:
+        Metadata dict (keys as in extract_audio_metadata(), plus bit_depth),
+        or None if the format is not supported or the header is damaged
+    """
+    try:
+        with open(audio_path, 'rb') as f:
+            head = f.read(12)
+            size = os.fstat(f.fileno()).st_size
+
+            if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+                metadata = _read_wave(f, size)
+            elif head[:4] == b'fLaC':
+                metadata = _read_flac(f, size)
+            elif head[4:8] == b'ftyp':
+                metadata = _read_m4a(f, size)
+            elif head[:3] == b'ID3' or (len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+                metadata = _read_mp3(f, size)
+            else:
+                return None
+
+    except (OSError, struct.error, ValueError, IndexError, OverflowError) as e:
+        logger.debug(f"Could not parse audio header of {audio_path}: {e}")
+        return None
+
+    if metadata is None:
+        return None
+
+    date = metadata.pop('date', None)
+    if date and metadata.get('created_time') is None:
+        metadata['created_time'] = _parse_date(date)
+
+    if metadata['duration'] > 0 and not metadata['bit_rate']:
+        metadata['bit_rate'] = int(size * 8 / metadata['duration'])
+
+    return metadata
+
+
+def _empty_metadata(size: int, format_name: str) -> Dict[str, Any]:
+    """Metadata dict with all keys of extract_audio_metadata()"""
+    return {
+        'size_bytes': size,
+        'created_time': None,
+        'duration': 0.0,
+        'codec': 'unknown',
+        'sample_rate': 0,
+        'channels': 0,
+        'channel_layout': 'unknown',
+        'bit_depth': 0,
+        'bit_rate': 0,
+        'format_name': format_name,
+        'title': '',
+        'artist': '',
+        'album': '',
+        'genre': '',
+        'comment': '',
+    }
+
+
+def _layout(channels: int) -> str:
+    """Channel layout name as ffprobe reports it for common cases"""
+    return {1: 'mono', 2: 'stereo'}.get(channels, 'unknown')
+
+
+def _parse_date(text: str) -> Optional[datetime]:
+    """Parse tag dates such as '2024-05-06 07:08:09', '2024:05:06' or '2024'"""
+    text = text.strip()
+    if len(text) >= 10 and text[4] in ':_./ ':
+        # BWF allows any separator in the origination date
+        text = f"{text[:4]}-{text[5:7]}-{text[8:]}"
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _text(data: bytes) -> str:
+    """Null-terminated / padded text"""
+    return data.split(b'\x00', 1)[0].decode('utf-8', 'replace').strip()
+
+
+# --- RIFF/WAVE ----------------------------------------------------------------
+
+def _read_wave(f: BinaryIO, size: int) -> Optional[Dict[str, Any]]:
+    """Walk RIFF chunks, skipping the audio data with a seek"""
+    metadata = _empty_metadata(size, 'wav')
+    byte_rate = 0
+    data_size = None
+    pos = 12
+
+    while pos + 8 <= size:
+        f.seek(pos)
+        chunk_id, chunk_size = struct.unpack('<4sI', f.read(8))
+        start = pos + 8
+
+        if chunk_id == b'fmt ':
+            fmt = f.read(min(chunk_size, 40))
+            tag, channels, sample_rate, byte_rate, _, bits = struct.unpack('<HHIIHH', fmt[:16])
+            if tag == _WAVE_EXTENSIBLE and len(fmt) >= 26:
+                tag = struct.unpack('<H', fmt[24:26])[0]
+            if tag == _WAVE_PCM:
+                codec = f"pcm_{'u' if bits <= 8 else 's'}{bits}le"
+            elif tag == _WAVE_FLOAT:
+                codec = f"pcm_f{bits}le"
+            else:
+                codec = _WAVE_CODECS.get(tag, f"0x{tag:04x}")
+            metadata.update(
+                codec=codec,
+                channels=channels,
+                channel_layout=_layout(channels),
+                sample_rate=sample_rate,
+                bit_depth=bits
+            )
+        elif chunk_id == b'data':
+            # 0xFFFFFFFF / 0: size unknown (streamed or RF64-style); use the file
+            data_size = chunk_size if 0 < chunk_size < 0xFFFFFFFF else size - start
+        elif chunk_id == b'bext' and chunk_size >= 338:
+            bext = f.read(338)
+            date, time = _text(bext[320:330]), _text(bext[330:338])
+            if date:
+                metadata['date'] = f"{date} {time.replace('-', ':').replace('.', ':')}" if time else date
+        elif chunk_id == b'LIST' and chunk_size <= MAX_CHUNK_BYTES:
+            _parse_riff_info(f.read(chunk_size), metadata)
+
+        pos = start + chunk_size + (chunk_size & 1)  # chunks are word aligned
+
+    if data_size is None or not byte_rate:
+        return metadata if metadata['sample_rate'] else None
+
+    metadata['duration'] = data_size / byte_rate
+    metadata['bit_rate'] = byte_rate * 8
+    return metadata
+
+
+def _parse_riff_info(data: bytes, metadata: Dict[str, Any]) -> None:
+    """LIST/INFO sub-chunks (title, artist, date, ...)"""
+    if data[:4] != b'INFO':
+        return
+    pos = 4
+    while pos + 8 <= len(data):
+        sub_id, sub_size = struct.unpack('<4sI', data[pos:pos + 8])
+        key = _RIFF_INFO_TAGS.get(sub_id)
+        if key and not metadata.get(key):
+            metadata[key] = _text(data[pos + 8:pos + 8 + sub_size])
+        pos += 8 + sub_size + (sub_size & 1)
+
+
+# --- FLAC ---------------------------------------------------------------------
+
+def _read_flac(f: BinaryIO, size: int) -> Optional[Dict[str, Any]]:
+    """STREAMINFO and VORBIS_COMMENT metadata blocks"""
+    metadata = _empty_metadata(size, 'flac')
+    metadata['codec'] = 'flac'
+    pos = 4
+    found = False
+
+    while pos + 4 <= size:
+        f.seek(pos)
+        header = f.read(4)
+        last = header[0] & 0x80
+        block_type = header[0] & 0x7F
+        length = int.from_bytes(header[1:4], 'big')
+
+        if block_type == 0:
+            info = f.read(34)
+            packed = int.from_bytes(info[10:18], 'big')
+            sample_rate = packed >> 44
+            channels = ((packed >> 41) & 0x7) + 1
+            bits = ((packed >> 36) & 0x1F) + 1
+            total_samples = packed & 0xFFFFFFFFF
+            metadata.update(
+                sample_rate=sample_rate,
+                channels=channels,
+                channel_layout=_layout(channels),
+                bit_depth=bits
+            )
+            if sample_rate:
+                metadata['duration'] = total_samples / sample_rate
+            found = True
+        elif block_type == 4 and length <= MAX_CHUNK_BYTES:
+            _parse_vorbis_comment(f.read(length), metadata)
+
+        pos += 4 + length
+        if last:
+            break
+
+    return metadata if found else None
+
+
+def _parse_vorbis_comment(data: bytes, metadata: Dict[str, Any]) -> None:
+    """KEY=value comments (little-endian lengths)"""
+    vendor_length = struct.unpack('<I', data[:4])[0]
+    pos = 4 + vendor_length
+    count = struct.unpack('<I', data[pos:pos + 4])[0]
+    pos += 4
+
+    for _ in range(count):
+        if pos + 4 > len(data):
+            break
+        length = struct.unpack('<I', data[pos:pos + 4])[0]
+        entry = data[pos + 4:pos + 4 + length].decode('utf-8', 'replace')
+        pos += 4 + length
+
+        name, _, value = entry.partition('=')
+        key = _VORBIS_TAGS.get(name.upper())
+        if key and not metadata.get(key):
+            metadata[key] = value.strip()
+
+
+# --- MP3 ----------------------------------------------------------------------
+
+def _read_mp3(f: BinaryIO, size: int) -> Optional[Dict[str, Any]]:
+    """ID3v2 tags, first frame header and Xing/Info/VBRI frame count"""
+    metadata = _empty_metadata(size, 'mp3')
+    metadata['codec'] = 'mp3'
+    audio_start = 0
+
+    f.seek(0)
+    header = f.read(10)
+    if header[:3] == b'ID3':
+        tag_size = _synchsafe(header[6:10])
+        audio_start = 10 + tag_size + (10 if header[5] & 0x10 else 0)  # footer
+        if tag_size <= MAX_CHUNK_BYTES:
+            _parse_id3v2(f.read(tag_size), header[3], metadata)
+
+    f.seek(audio_start)
+    window = f.read(MP3_SCAN_BYTES)
+
+    for offset in range(len(window) - 4):
+        if window[offset] != 0xFF or window[offset + 1] & 0xE0 != 0xE0:
+            continue
+        frame = _parse_mp3_frame(window[offset:offset + 4])
+        if frame is None:
+            continue
+
+        version, layer, bitrate, sample_rate, channels = frame
+        samples_per_frame = 1152 if layer != 1 else 384
+        if version != 1 and layer == 3:
+            samples_per_frame = 576
+
+        frames = _vbr_frame_count(window[offset:offset + 200], version, channels)
+        if frames:
+            duration = frames * samples_per_frame / sample_rate
+        else:
+            # Constant bit rate: audio bytes / byte rate
+            duration = (size - audio_start - offset) * 8 / (bitrate * 1000)
+            metadata['bit_rate'] = bitrate * 1000
+
+        metadata.update(
+            sample_rate=sample_rate,
+            channels=channels,
+            channel_layout=_layout(channels),
+            duration=duration
+        )
+        return metadata
+
+    return None
+
+
+def _synchsafe(data: bytes) -> int:
+    """ID3v2 synchsafe integer (7 bits per byte)"""
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+
+def _parse_id3v2(data: bytes, major_version: int, metadata: Dict[str, Any]) -> None:
+    """Text frames of an ID3v2.3/2.4 tag"""
+    if major_version < 3:
+        return
+
+    pos = 0
+    while pos + 10 <= len(data):
+        frame_id = data[pos:pos + 4]
+        if frame_id[0] == 0:
+            break  # padding
+        raw_size = data[pos + 4:pos + 8]
+        frame_size = _synchsafe(raw_size) if major_version == 4 else struct.unpack('>I', raw_size)[0]
+        body = data[pos + 10:pos + 10 + frame_size]
+        pos += 10 + frame_size
+
+        key = _ID3_TAGS.get(frame_id.decode('latin-1'))
+        if not key or not body or metadata.get(key):
+            continue
+
+        encoding, text = body[0], body[1:]
+        if encoding == 1:
+            value = text.decode('utf-16', 'replace')
+        elif encoding == 2:
+            value = text.decode('utf-16-be', 'replace')
+        elif encoding == 3:
+            value = text.decode('utf-8', 'replace')
+        else:
+            value = text.decode('latin-1')
+        metadata[key] = value.split('\x00', 1)[0].strip()
+
+
+def _parse_mp3_frame(header: bytes) -> Optional[tuple]:
+    """(version, layer, kbps, sample rate, channels) or None if invalid"""
+    version_bits = (header[1] >> 3) & 0x3
+    layer_bits = (header[1] >> 1) & 0x3
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x3
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    version = 1 if version_bits == 3 else 2
+    layer = 4 - layer_bits
+    bitrate = _MP3_BITRATES[(version, layer)][bitrate_index]
+    sample_rate = _MP3_SAMPLE_RATES[version_bits][rate_index]
+    channels = 1 if (header[3] >> 6) == 3 else 2
+    return version, layer, bitrate, sample_rate, channels
+
+
+def _vbr_frame_count(frame: bytes, version: int, channels: int) -> Optional[int]:
+    """Total frames from a Xing/Info or VBRI header in the first frame"""
+    # Xing/Info follows the side information
+    if version == 1:
+        xing = 36 if channels == 2 else 21
+    else:
+        xing = 21 if channels == 2 else 13
+
+    tag = frame[xing:xing + 4]
+    if tag in (b'Xing', b'Info'):
+        flags = struct.unpack('>I', frame[xing + 4:xing + 8])[0]
+        if flags & 0x1:
+            return struct.unpack('>I', frame[xing + 8:xing + 12])[0]
+
+    if frame[36:40] == b'VBRI':
+        return struct.unpack('>I', frame[50:54])[0]
+
+    return None
+
+
+# --- M4A ----------------------------------------------------------------------
+
+def _read_m4a(f: BinaryIO, size: int) -> Optional[Dict[str, Any]]:
+    """moov/mvhd plus the sample entry of the sound track"""
+    moov = next(((s, e) for t, s, e in _iter_boxes(f, 0, size) if t == b'moov'), None)
+    if moov is None:
+        return None
+
+    metadata = _empty_metadata(size, 'mp4')
+    sound = False
+
+    def walk(start: int, end: int, depth: int):
+        nonlocal sound
+        if depth > 6:
+            return
+        for box_type, s, e in _iter_boxes(f, start, end):
+            if box_type == b'mvhd':
+                metadata['created_time'], metadata['duration'] = _parse_mvhd(_read_leaf(f, s, e))
+            elif box_type == b'hdlr':
+                sound = sound or _read_leaf(f, s, e)[8:12] == b'soun'
+            elif box_type == b'stsd':
+                entry = _read_leaf(f, s, min(e, s + 44))
+                if len(entry) >= 44:
+                    metadata['codec'] = entry[12:16].decode('ascii', 'replace').strip()
+                    channels, bits = struct.unpack('>HH', entry[32:36])
+                    sample_rate = struct.unpack('>I', entry[40:44])[0] >> 16
+                    metadata.update(channels=channels, bit_depth=bits, sample_rate=sample_rate)
+            elif box_type in (b'trak', b'mdia', b'minf', b'stbl'):
+                walk(s, e, depth + 1)
+
+    walk(*moov, 0)
+
+    if not sound:
+        return None  # video file with an audio extension
+    metadata['channel_layout'] = _layout(metadata['channels'])
+    return metadata
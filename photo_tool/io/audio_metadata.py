@@ -1,13 +1,18 @@
 """
-Audio metadata extraction using ffprobe
+Audio metadata extraction
+
+WAV, FLAC, MP3 and M4A headers are parsed natively (audio_header);
+ffprobe is only used for other formats or unreadable headers.
 """
 
 import json
 import subprocess
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Sequence
 
+from .audio_header import read_audio_header
+from .ffprobe import is_ffprobe_available, probe_file, probe_files
 from ..util.logging import get_logger
 
 
@@ -16,7 +21,7 @@ logger = get_logger("audio_metadata")
 
 def extract_audio_metadata(audio_path: Path) -> Dict[str, Any]:
     """
-    Extract metadata from audio file using ffprobe
+    Extract metadata from audio file (native header parser, then ffprobe)
     
     Args:
         audio_path: Path to audio file
@@ -24,7 +29,9 @@ def extract_audio_metadata(audio_path: Path) -> Dict[str, Any]:
     Returns:
         Dictionary with audio metadata
     """
-    from .video_metadata import is_ffprobe_available
+    header = read_audio_header(audio_path)
+    if header and header['duration'] > 0:
+        return header
     
     if not is_ffprobe_available():
         logger.warning(
@@ -33,25 +40,12 @@ def extract_audio_metadata(audio_path: Path) -> Dict[str, Any]:
         return _get_basic_audio_info(audio_path)
     
     try:
-        cmd = [
-            'ffprobe',
-            '-v', 'quiet',
-            '-print_format', 'json',
-            '-show_format',
-            '-show_streams',
-            str(audio_path)
-        ]
-        
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        
-        data = json.loads(result.stdout)
+        data = probe_file(audio_path)
         return _parse_audio_ffprobe_output(data, audio_path)
     
+    except subprocess.TimeoutExpired as e:
+        logger.error(f"ffprobe timed out for {audio_path}: {e}")
+        return _get_basic_audio_info(audio_path)
     except subprocess.CalledProcessError as e:
         logger.error(f"ffprobe failed for {audio_path}: {e}")
         return _get_basic_audio_info(audio_path)
@@ -63,6 +57,47 @@ def extract_audio_metadata(audio_path: Path) -> Dict[str, Any]:
         return _get_basic_audio_info(audio_path)
 
 
+def extract_audio_metadata_batch(
+    audio_paths: Sequence[Path],
+    cache_path: Optional[Path] = None,
+    max_workers: Optional[int] = None,
+    show_progress: bool = False
+) -> Dict[Path, Dict[str, Any]]:
+    """
+    Extract metadata for many audio files
+    
+    Headers are parsed natively; only the remaining files are probed with
+    concurrent, cached ffprobe runs.
+    
+    Args:
+        audio_paths: Audio files
+        cache_path: Persistent ffprobe cache (Workspace.ffprobe_cache_file)
+        max_workers: Concurrent ffprobe processes
+        show_progress: Show progress bar
+        
+    Returns:
+        Dict mapping path to metadata (basic file info where ffprobe failed)
+    """
+    metadata = {}
+    for path in audio_paths:
+        header = read_audio_header(path)
+        if header and header['duration'] > 0:
+            metadata[path] = header
+    
+    remaining = [p for p in audio_paths if p not in metadata]
+    probed = probe_files(remaining, cache_path, max_workers, show_progress=show_progress) if remaining else {}
+    
+    for path in remaining:
+        data = probed.get(path)
+        try:
+            metadata[path] = _parse_audio_ffprobe_output(data, path) if data else _get_basic_audio_info(path)
+        except Exception as e:
+            logger.error(f"Error extracting audio metadata from {path}: {e}")
+            metadata[path] = _get_basic_audio_info(path)
+    
+    return metadata
+
+
 def _parse_audio_ffprobe_output(data: dict, audio_path: Path) -> Dict[str, Any]:
     """Parse ffprobe JSON output for audio"""
     metadata = {}
@@ -120,6 +155,10 @@ def _parse_audio_ffprobe_output(data: dict, audio_path: Path) -> Dict[str, Any]:
 
 def _get_basic_audio_info(audio_path: Path) -> Dict[str, Any]:
     """Get basic audio info without ffprobe (fallback)"""
+    header = read_audio_header(audio_path)
+    if header is not None:
+        return header
+    
     stat = audio_path.stat()
     
     return {
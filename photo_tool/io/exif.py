@@ -1,21 +1,40 @@
 """
 EXIF metadata extraction
+
+Capture time, camera info and dimensions use the header-only reader in
+exif_header; the full PIL/exifread path is the fallback for formats it
+does not handle. Parsed tags are memoized per (path, size, mtime), and
+load_photo_records() persists them in the workspace index so unchanged
+files are not parsed again on the next run.
 """
 
+import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Iterator, List, Sequence
 
 from PIL import Image
 from PIL.ExifTags import TAGS
 import exifread
+from tqdm import tqdm
 
+from .exif_header import read_exif_header
+from ..workspace.db import PhotoDatabase, PhotoRecord
 from ..util.logging import get_logger
 
 
 logger = get_logger("exif")
 
 
+EXIF_CACHE_SIZE = 4096  # in-process memo entries
+MIN_PARALLEL_FILES = 64  # smaller batches are parsed serially
+PROGRESS_EVERY = 50
+
+ProgressCallback = Callable[[int, int], None]
+
+
 def extract_exif(image_path: Path) -> Dict[str, Any]:
     """
     Extract EXIF metadata from image
@@ -49,20 +68,55 @@ def extract_exif(image_path: Path) -> Dict[str, Any]:
     return exif_data
 
 
-def get_capture_time(image_path: Path, fallback_to_mtime: bool = True) -> Optional[datetime]:
+def extract_exif_fast(image_path: Path) -> Dict[str, Any]:
     """
-    Get photo capture time from EXIF or file modification time
+    EXIF tags needed for capture time, camera info and dimensions
+
+    Reads only the file header when the format is supported, otherwise
+    falls back to extract_exif(). ImageWidth/ImageLength are always the
+    frame dimensions. Results are memoized per (path, size, mtime), so
+    callers must not modify the returned dict.
     
     Args:
-        image_path: Path to image
-        fallback_to_mtime: Use file modification time if EXIF not available
+        image_path: Path to image file
         
     Returns:
-        Datetime object or None
+        Dictionary of EXIF tags
     """
-    exif = extract_exif(image_path)
+    try:
+        stat = os.stat(image_path)
+    except OSError as e:
+        logger.debug(f"Could not stat {image_path}: {e}")
+        return {}
+    
+    return _cached_exif(str(image_path), stat.st_size, stat.st_mtime_ns)
+
+
+@lru_cache(maxsize=EXIF_CACHE_SIZE)
+def _cached_exif(path_str: str, size_bytes: int, mtime_ns: int) -> Dict[str, Any]:
+    """Parse once per file version (size and mtime are part of the key)"""
+    tags = read_exif_header(Path(path_str))
+    if tags is not None:
+        return tags
     
-    # Try various EXIF date fields
+    tags = dict(extract_exif(Path(path_str)))
+    try:
+        # Lazy open: reads the header only
+        with Image.open(path_str) as img:
+            tags['ImageWidth'], tags['ImageLength'] = img.size
+    except Exception as e:
+        logger.debug(f"Could not read dimensions from {path_str}: {e}")
+    return tags
+
+
+def _subsec_microseconds(value: Any) -> int:
+    """Convert an EXIF SubSecTime string ("12", "123456") to microseconds"""
+    digits = ''.join(c for c in str(value) if c.isdigit())[:6]
+    return int(digits.ljust(6, '0')) if digits else 0
+
+
+def _capture_time_from_exif(exif: Dict[str, Any]) -> Optional[datetime]:
+    """Capture time from EXIF date fields, or None"""
     date_fields = [
         'DateTimeOriginal',
         'DateTime',
@@ -77,7 +131,14 @@ def get_capture_time(image_path: Path, fallback_to_mtime: bool = True) -> Option
             try:
                 date_str = str(exif[field])
                 # EXIF format: "YYYY:MM:DD HH:MM:SS"
-                return datetime.strptime(date_str, "%Y:%m:%d %H:%M:%S")
+                capture_time = datetime.strptime(date_str, "%Y:%m:%d %H:%M:%S")
+                
+                # Sub-second part keeps burst frames in order
+                subsec = exif.get('SubsecTimeOriginal') or exif.get('EXIF SubSecTimeOriginal')
+                if subsec and field.endswith('DateTimeOriginal'):
+                    capture_time = capture_time.replace(microsecond=_subsec_microseconds(subsec))
+                
+                return capture_time
             except ValueError:
                 try:
                     # Try alternative format
@@ -85,6 +146,24 @@ def get_capture_time(image_path: Path, fallback_to_mtime: bool = True) -> Option
                 except:
                     continue
     
+    return None
+
+
+def get_capture_time(image_path: Path, fallback_to_mtime: bool = True) -> Optional[datetime]:
+    """
+    Get photo capture time from EXIF or file modification time
+    
+    Args:
+        image_path: Path to image
+        fallback_to_mtime: Use file modification time if EXIF not available
+        
+    Returns:
+        Datetime object or None
+    """
+    capture_time = _capture_time_from_exif(extract_exif_fast(image_path))
+    if capture_time:
+        return capture_time
+    
     # Fallback to file modification time
     if fallback_to_mtime:
         stat = image_path.stat()
@@ -100,7 +179,7 @@ def get_camera_info(image_path: Path) -> Dict[str, Optional[str]]:
     Returns:
         Dict with camera_model, lens_model, etc.
     """
-    exif = extract_exif(image_path)
+    exif = extract_exif_fast(image_path)
     
     return {
         'camera_model': exif.get('Model') or exif.get('EXIF Model'),
@@ -119,12 +198,247 @@ def get_image_dimensions(image_path: Path) -> tuple[int, int]:
     Returns:
         (width, height) tuple
     """
+    exif = extract_exif_fast(image_path)
+    width = exif.get('ImageWidth') or exif.get('ExifImageWidth')
+    height = exif.get('ImageLength') or exif.get('ExifImageHeight')
+    
+    if width and height:
+        return (int(width), int(height))
+    
+    logger.debug(f"Could not read dimensions from {image_path}")
+    return (0, 0)
+
+
+def extract_photo_record(image_path: Path) -> PhotoRecord:
+    """
+    Read all PhotoRecord metadata fields in one pass
+    
+    captured_time is the EXIF capture time (None without EXIF date);
+    phash and blur_score are left empty.
+    
+    Args:
+        image_path: Path to image
+        
+    Returns:
+        PhotoRecord
+    """
+    stat = os.stat(image_path)
+    exif = _cached_exif(str(image_path), stat.st_size, stat.st_mtime_ns)
+    
+    return PhotoRecord(
+        path=str(image_path),
+        filename=Path(image_path).name,
+        size_bytes=stat.st_size,
+        modified_time=datetime.fromtimestamp(stat.st_mtime),
+        captured_time=_capture_time_from_exif(exif),
+        width=int(exif.get('ImageWidth') or exif.get('ExifImageWidth') or 0),
+        height=int(exif.get('ImageLength') or exif.get('ExifImageHeight') or 0),
+        camera_model=_to_text(exif.get('Model') or exif.get('Image Model')),
+        lens_model=_to_text(exif.get('LensModel') or exif.get('EXIF LensModel')),
+        focal_length=_to_float(exif.get('FocalLength') or exif.get('EXIF FocalLength')),
+        aperture=_to_float(exif.get('FNumber') or exif.get('EXIF FNumber')),
+        iso=_to_int(exif.get('ISOSpeedRatings') or exif.get('EXIF ISOSpeedRatings')),
+        shutter_speed=_format_shutter_speed(exif.get('ExposureTime') or exif.get('EXIF ExposureTime')),
+        indexed_time=datetime.now()
+    )
+
+
+def load_photo_records(
+    image_paths: Sequence[Path],
+    db_path: Optional[Path] = None,
+    show_progress: bool = False,
+    jobs: Optional[int] = 1,
+    chunksize: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None
+) -> Dict[Path, PhotoRecord]:
+    """
+    Photo records for many files, using the workspace index as a cache
+    
+    Records in the index are reused when size and modification time
+    still match; only new or changed files are parsed (in a process pool
+    if jobs > 1), and their records are written back in one transaction.
+    
+    Args:
+        image_paths: Photos to read
+        db_path: Workspace index (Workspace.db_file), None for no persistence
+        show_progress: Show progress bar
+        jobs: Worker processes for parsing (None = CPU count, 1 = serial)
+        chunksize: Files per task sent to a worker (default: automatic)
+        progress: Callback(done, total), e.g. for GUI progress
+        
+    Returns:
+        Dict mapping path to record (unreadable files are omitted)
+    """
+    total = len(image_paths)
+    db = PhotoDatabase(db_path) if db_path else None
+    cached = db.get_photos_by_path(str(p) for p in image_paths) if db else {}
+    
+    records: Dict[Path, PhotoRecord] = {}
+    to_parse: List[Path] = []
+    
+    for path in image_paths:
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            logger.warning(f"Could not read {path}: {e}")
+            continue
+        
+        record = cached.get(str(path))
+        if (
+            record is not None
+            and record.size_bytes == stat.st_size
+            and record.modified_time == datetime.fromtimestamp(stat.st_mtime)
+        ):
+            records[path] = record
+        else:
+            to_parse.append(path)
+    
+    done = total - len(to_parse)
+    if progress:
+        progress(done, total)
+    
+    bar = tqdm(total=len(to_parse), desc="Reading metadata") if show_progress and to_parse else None
+    fresh: List[PhotoRecord] = []
+    
+    for path, record in zip(to_parse, _map_records(to_parse, jobs, chunksize)):
+        done += 1
+        if bar:
+            bar.update(1)
+        if progress and (done % PROGRESS_EVERY == 0 or done == total):
+            progress(done, total)
+        
+        if record is not None:
+            records[path] = record
+            fresh.append(record)
+    
+    if bar:
+        bar.close()
+    
+    if db and fresh:
+        db.insert_photos(fresh)
+    
+    logger.info(f"Photo metadata: {len(records) - len(fresh)} cached, {len(fresh)} parsed")
+    return records
+
+
+def read_capture_times(
+    image_paths: Sequence[Path],
+    jobs: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    db_path: Optional[Path] = None,
+    fallback_to_mtime: bool = True,
+    show_progress: bool = False
+) -> List[Optional[datetime]]:
+    """
+    Capture times for many photos, parsed in parallel
+    
+    Results are in the same order as `image_paths`. A file that cannot
+    be read yields None instead of failing the batch.
+    
+    Args:
+        image_paths: Photos to read
+        jobs: Worker processes (None = CPU count, 1 = serial)
+        chunksize: Files per task sent to a worker (default: automatic)
+        progress: Callback(done, total), e.g. for GUI progress
+        db_path: Workspace index used as cache (Workspace.db_file)
+        fallback_to_mtime: Use file modification time if EXIF has no date
+        show_progress: Show progress bar
+        
+    Returns:
+        List of capture times (None where unavailable)
+    """
+    records = load_photo_records(
+        image_paths,
+        db_path,
+        show_progress=show_progress,
+        jobs=jobs,
+        chunksize=chunksize,
+        progress=progress
+    )
+    
+    capture_times = []
+    for path in image_paths:
+        record = records.get(path)
+        if record is None:
+            capture_times.append(None)
+        elif record.captured_time or not fallback_to_mtime:
+            capture_times.append(record.captured_time)
+        else:
+            capture_times.append(record.modified_time)
+    
+    return capture_times
+
+
+def _map_records(
+    paths: List[Path],
+    jobs: Optional[int],
+    chunksize: Optional[int]
+) -> Iterator[Optional[PhotoRecord]]:
+    """Parse records in order, in a process pool for large batches"""
+    jobs = jobs or os.cpu_count() or 1
+    
+    if jobs <= 1 or len(paths) < MIN_PARALLEL_FILES:
+        for path in paths:
+            yield _extract_photo_record_safe(path)
+        return
+    
+    if chunksize is None:
+        # A few chunks per worker keeps the load balanced at low IPC overhead
+        chunksize = max(1, min(256, len(paths) // (jobs * 4)))
+    
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(_extract_photo_record_safe, paths, chunksize=chunksize)
+
+
+def _extract_photo_record_safe(path: Path) -> Optional[PhotoRecord]:
+    """extract_photo_record() that logs instead of raising (pool worker)"""
     try:
-        with Image.open(image_path) as img:
-            return img.size
+        return extract_photo_record(path)
     except Exception as e:
-        logger.debug(f"Could not read dimensions from {image_path}: {e}")
-        return (0, 0)
+        logger.warning(f"Could not read metadata from {path}: {e}")
+        return None
+
+
+def _to_text(value: Any) -> Optional[str]:
+    """Non-empty string or None"""
+    if value is None:
+        return None
+    text = str(value).strip().strip('\x00')
+    return text or None
+
+
+def _to_float(value: Any) -> Optional[float]:
+    """Convert EXIF numbers (float, IFDRational, "28/10") to float"""
+    if value is None:
+        return None
+    try:
+        if isinstance(value, str) and '/' in value:
+            num, den = value.split('/', 1)
+            return float(num) / float(den) if float(den) else None
+        return float(value)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+
+
+def _to_int(value: Any) -> Optional[int]:
+    """Convert EXIF integers (int, tuple, "[100, 100]") to int"""
+    if isinstance(value, (tuple, list)):
+        value = value[0] if value else None
+    number = _to_float(str(value).strip('[]').split(',')[0]) if value is not None else None
+    return int(number) if number is not None else None
+
+
+def _format_shutter_speed(value: Any) -> Optional[str]:
+    """Exposure time as "1/250" or "2" (seconds)"""
+    if isinstance(value, str) and '/' in value:
+        return value
+    seconds = _to_float(value)
+    if not seconds:
+        return None
+    if seconds < 1:
+        return f"1/{round(1 / seconds)}"
+    return f"{seconds:g}"
 
 
 def get_gps_coordinates(image_path: Path) -> Optional[Dict[str, float]]:
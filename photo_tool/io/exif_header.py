@@ -0,0 +1,280 @@
+"""
+Fast header-only EXIF reader
+
+Parses the TIFF structure of JPEG APP1 segments, PNG eXIf chunks and
+TIFF-based files (TIFF, DNG, NEF, CR2, ARW, ...) directly, reading only a
+bounded window at the start of the file plus the few IFDs it points to.
+Only the tags photo_tool uses are decoded; everything else is skipped
+without touching the image data.
+
+Keys use the same tag names as PIL.ExifTags.TAGS, so results can be used
+wherever extract_exif() results are used. Formats that are not recognized
+(HEIC, corrupt files, ...) return None and callers fall back to the full
+PIL/exifread path.
+"""
+
+import struct
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ..util.logging import get_logger
+
+
+logger = get_logger("exif_header")
+
+
+HEADER_WINDOW_BYTES = 128 * 1024  # APP1 is at most 64 KiB
+MAX_IFD_ENTRIES = 1024
+MAX_VALUE_BYTES = 4096
+
+EXIF_IFD_POINTER = 0x8769
+
+IFD0_TAGS = {
+    0x010F: "Make",
+    0x0110: "Model",
+    0x0112: "Orientation",
+    0x0132: "DateTime",
+    0x0100: "ImageWidth",
+    0x0101: "ImageLength",
+}
+
+EXIF_IFD_TAGS = {
+    0x9003: "DateTimeOriginal",
+    0x9004: "DateTimeDigitized",
+    0x9291: "SubsecTimeOriginal",
+    0x829A: "ExposureTime",
+    0x829D: "FNumber",
+    0x8827: "ISOSpeedRatings",
+    0x920A: "FocalLength",
+    0xA434: "LensModel",
+    0xA002: "ExifImageWidth",
+    0xA003: "ExifImageHeight",
+}
+
+# TIFF field type -> (struct code, size in bytes)
+_TYPES = {
+    1: ("B", 1),   # BYTE
+    2: ("s", 1),   # ASCII
+    3: ("H", 2),   # SHORT
+    4: ("L", 4),   # LONG
+    5: ("LL", 8),  # RATIONAL
+    7: ("B", 1),   # UNDEFINED
+    8: ("h", 2),   # SSHORT
+    9: ("l", 4),   # SLONG
+    10: ("ll", 8), # SRATIONAL
+    11: ("f", 4),  # FLOAT
+    12: ("d", 8),  # DOUBLE
+}
+
+# JPEG start-of-frame markers (carry the real pixel dimensions)
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+ReadAt = Callable[[int, int], bytes]
+
+
+def read_exif_header(image_path: Path, window: int = HEADER_WINDOW_BYTES) -> Optional[Dict[str, Any]]:
+    """
+    Read the EXIF tags photo_tool uses from the file header
+
+    Values are str for text tags, int for integer tags and float for
+    rational tags (e.g. FNumber 2.8, ExposureTime 0.004). For JPEG and PNG,
+    ImageWidth/ImageLength are the frame dimensions.
+
+    Args:
+        image_path: Path to image file
+        window: Bytes read from the start of the file
+
+    Returns:
+        Dictionary of tags (possibly empty if the file has no EXIF),
+        or None if the format is not supported or the header is damaged
+    """
+    try:
+        with open(image_path, 'rb') as f:
+            head = f.read(window)
+
+            if head[:2] == b'\xff\xd8':
+                return _parse_jpeg(head)
+
+            if head[:8] == b'\x89PNG\r\n\x1a\n':
+                return _parse_png(head)
+
+            if head[:2] in (b'II', b'MM'):
+                def read_at(offset: int, size: int) -> bytes:
+                    if offset + size <= len(head):
+                        return head[offset:offset + size]
+                    f.seek(offset)
+                    return f.read(size)
+
+                return _parse_tiff(read_at)
+
+    except (OSError, struct.error, ValueError) as e:
+        logger.debug(f"Header EXIF parse failed for {image_path}: {e}")
+
+    return None
+
+
+def _parse_jpeg(head: bytes) -> Optional[Dict[str, Any]]:
+    """Walk JPEG markers up to the first scan"""
+    tags: Dict[str, Any] = {}
+    frame: Optional[Tuple[int, int]] = None
+    pos = 2
+
+    while pos + 4 <= len(head):
+        if head[pos] != 0xFF:
+            return None
+        marker = head[pos + 1]
+        if marker == 0xFF:  # fill byte
+            pos += 1
+            continue
+        if marker == 0xD8 or 0xD0 <= marker <= 0xD7:  # no length
+            pos += 2
+            continue
+        if marker in (0xD9, 0xDA):  # end of image / start of scan
+            break
+
+        length = struct.unpack('>H', head[pos + 2:pos + 4])[0]
+        start, end = pos + 4, pos + 2 + length
+        if end > len(head):
+            # Segment extends beyond the window (e.g. large ICC profile)
+            return tags or None
+
+        if marker == 0xE1 and head[start:start + 6] == b'Exif\x00\x00' and not tags:
+            segment = head[start + 6:end]
+            tags = _parse_tiff(lambda offset, size: segment[offset:offset + size])
+            if tags is None:
+                return None
+        elif marker in _SOF_MARKERS:
+            height, width = struct.unpack('>HH', head[start + 1:start + 5])
+            frame = (width, height)
+            break
+
+        pos = end
+
+    if frame:
+        tags["ImageWidth"], tags["ImageLength"] = frame
+    return tags
+
+
+def _parse_png(head: bytes) -> Optional[Dict[str, Any]]:
+    """Walk PNG chunks up to the image data"""
+    tags: Dict[str, Any] = {}
+    frame: Optional[Tuple[int, int]] = None
+    pos = 8
+
+    while pos + 8 <= len(head):
+        length, chunk_type = struct.unpack('>I4s', head[pos:pos + 8])
+        data = head[pos + 8:pos + 8 + length]
+
+        if chunk_type == b'IHDR':
+            frame = struct.unpack('>II', data[:8])
+        elif chunk_type == b'eXIf':
+            if len(data) < length:
+                return None  # chunk extends beyond the window
+            parsed = _parse_tiff(lambda offset, size: data[offset:offset + size])
+            if parsed is not None:
+                tags = parsed
+        elif chunk_type in (b'IDAT', b'IEND'):
+            break
+
+        pos += 12 + length  # length + type + data + crc
+
+    if frame:
+        tags["ImageWidth"], tags["ImageLength"] = frame
+    return tags
+
+
+def _parse_tiff(read_at: ReadAt) -> Optional[Dict[str, Any]]:
+    """Parse IFD0 and the Exif sub-IFD of a TIFF structure"""
+    header = read_at(0, 8)
+    if len(header) < 8:
+        return None
+
+    if header[:2] == b'II':
+        endian = '<'
+    elif header[:2] == b'MM':
+        endian = '>'
+    else:
+        return None
+
+    # 42 for TIFF; raw variants use their own magic (ORF 'RO', RW2 0x55)
+    ifd0_offset = struct.unpack(endian + 'L', header[4:8])[0]
+
+    tags: Dict[str, Any] = {}
+    pointers = _read_ifd(read_at, endian, ifd0_offset, IFD0_TAGS, tags)
+    if pointers is None:
+        return None
+
+    exif_offset = pointers.get(EXIF_IFD_POINTER)
+    if exif_offset:
+        _read_ifd(read_at, endian, exif_offset, EXIF_IFD_TAGS, tags)
+
+    return tags
+
+
+def _read_ifd(
+    read_at: ReadAt,
+    endian: str,
+    offset: int,
+    wanted: Dict[int, str],
+    tags: Dict[str, Any]
+) -> Optional[Dict[int, int]]:
+    """
+    Decode wanted tags of one IFD into `tags`
+
+    Returns:
+        IFD pointer tags found ({tag: offset}), or None if unreadable
+    """
+    count_bytes = read_at(offset, 2)
+    if len(count_bytes) < 2:
+        return None
+
+    count = struct.unpack(endian + 'H', count_bytes)[0]
+    if count > MAX_IFD_ENTRIES:
+        return None
+
+    entries = read_at(offset + 2, count * 12)
+    if len(entries) < count * 12:
+        return None
+
+    pointers: Dict[int, int] = {}
+    for i in range(count):
+        tag, field_type, n, value = struct.unpack(endian + 'HHL4s', entries[i * 12:i * 12 + 12])
+
+        if tag == EXIF_IFD_POINTER:
+            pointers[tag] = struct.unpack(endian + 'L', value)[0]
+            continue
+
+        name = wanted.get(tag)
+        if name is None or field_type not in _TYPES:
+            continue
+
+        code, size = _TYPES[field_type]
+        total = size * n
+        if total > MAX_VALUE_BYTES or n == 0:
+            continue
+        if total > 4:
+            value = read_at(struct.unpack(endian + 'L', value)[0], total)
+            if len(value) < total:
+                continue
+
+        decoded = _decode_value(endian, field_type, code, n, value[:total])
+        if decoded is not None:
+            tags[name] = decoded
+
+    return pointers
+
+
+def _decode_value(endian: str, field_type: int, code: str, n: int, raw: bytes) -> Any:
+    """Convert a raw field to str, int or float (first value for arrays)"""
+    if field_type == 2:
+        return raw.split(b'\x00', 1)[0].decode('utf-8', 'replace').strip() or None
+
+    if field_type in (5, 10):
+        num, den = struct.unpack(endian + code, raw[:8])
+        return num / den if den else None
+
+    if field_type == 7:
+        # UNDEFINED text (e.g. some SubsecTime writers)
+        return raw.split(b'\x00', 1)[0].decode('ascii', 'replace').strip() or None
+
+    return struct.unpack(endian + code, raw[:struct.calcsize(code)])[0]
@@ -0,0 +1,313 @@
+"""
+Embedded JPEG preview extraction
+
+Camera JPEGs carry a small thumbnail (typically 160x120) in IFD1 of the
+EXIF APP1 segment, and many also carry larger previews (VGA up to full
+HD) registered in an APP2 MPF (Multi-Picture Format) index. Both can be
+read without decoding the main image: the EXIF thumbnail lies inside the
+header window, MPF previews are a single seek and read each.
+
+Previews are stored unrotated like the main image; open_embedded_preview()
+applies the main image's orientation and crops the black bars cameras add
+when the sensor aspect ratio differs from the thumbnail's (e.g. 3:2
+photos in a 4:3 thumbnail).
+"""
+
+import struct
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from ..util.logging import get_logger
+from .exif_header import HEADER_WINDOW_BYTES, _parse_jpeg
+
+
+logger = get_logger("exif_preview")
+
+
+MAX_PREVIEW_BYTES = 8 * 1024 * 1024
+ASPECT_TOLERANCE = 0.02
+MAX_LETTERBOX = 0.25  # larger bars mean the preview is not the same picture
+
+# IFD1 tags locating the EXIF thumbnail
+_THUMB_OFFSET = 0x0201  # JPEGInterchangeFormat
+_THUMB_LENGTH = 0x0202  # JPEGInterchangeFormatLength
+
+_MPF_ENTRY = 0xB002
+_MPF_PREVIEW_TYPES = {0x010001, 0x010002}  # large thumbnail (VGA / full HD)
+
+
+@dataclass
+class EmbeddedPreview:
+    """Location of one embedded preview JPEG"""
+    offset: int  # absolute file offset
+    length: int
+    width: int
+    height: int
+    source: str  # 'exif' (IFD1 thumbnail) or 'mpf'
+
+
+def list_embedded_previews(image_path: Path, window: int = HEADER_WINDOW_BYTES) -> List[EmbeddedPreview]:
+    """
+    Find the embedded previews of a JPEG file, smallest first
+
+    Args:
+        image_path: Path to JPEG file
+        window: Bytes read from the start of the file
+
+    Returns:
+        List of previews (empty for non-JPEG files or files without previews)
+    """
+    previews: List[EmbeddedPreview] = []
+
+    try:
+        with open(image_path, 'rb') as f:
+            head = f.read(window)
+            if head[:2] != b'\xff\xd8':
+                return []
+
+            for marker, start, end in _iter_segments(head):
+                segment = head[start:end]
+                if marker == 0xE1 and segment[:6] == b'Exif\x00\x00':
+                    found = _exif_thumbnail(segment[6:], start + 6)
+                elif marker == 0xE2 and segment[:4] == b'MPF\x00':
+                    found = _mpf_previews(segment[4:], start + 4)
+                else:
+                    continue
+
+                for offset, length, source in found:
+                    if 0 < length <= MAX_PREVIEW_BYTES:
+                        f.seek(offset)
+                        size = _jpeg_size(f.read(min(length, HEADER_WINDOW_BYTES)))
+                        if size:
+                            previews.append(EmbeddedPreview(offset, length, size[0], size[1], source))
+
+    except (OSError, struct.error, ValueError) as e:
+        logger.debug(f"Could not read embedded previews of {image_path}: {e}")
+        return []
+
+    previews.sort(key=lambda p: p.width * p.height)
+    return previews
+
+
+def read_embedded_preview(
+    image_path: Path,
+    min_size: Tuple[int, int] = (0, 0)
+) -> Optional[Tuple[EmbeddedPreview, bytes]]:
+    """
+    Smallest embedded preview that covers min_size (stored orientation)
+
+    Args:
+        image_path: Path to JPEG file
+        min_size: Minimum (width, height); the box is also tried rotated
+
+    Returns:
+        (preview, JPEG bytes), or None if no preview is large enough
+    """
+    for preview in list_embedded_previews(image_path):
+        if _covers(preview, min_size):
+            with open(image_path, 'rb') as f:
+                f.seek(preview.offset)
+                data = f.read(preview.length)
+            if len(data) == preview.length:
+                return preview, data
+    return None
+
+
+def open_embedded_preview(
+    image_path: Path,
+    max_size: Tuple[int, int] = (0, 0),
+    apply_orientation: bool = True
+) -> Optional[Image.Image]:
+    """
+    Decoded embedded preview, oriented and cropped like the main image
+
+    Args:
+        image_path: Path to JPEG file
+        max_size: Bounding box (width, height, display orientation) the
+            picture will be fitted into; the preview must fill it
+        apply_orientation: Rotate/mirror per the main image's EXIF
+            orientation (False keeps the stored orientation)
+
+    Returns:
+        RGB image, or None if there is no usable preview (too small, or
+        its aspect ratio cannot be matched to the main image)
+    """
+    header = _main_image_header(image_path)
+    if header is None:
+        return None
+    main_size, orientation = header
+
+    for preview in list_embedded_previews(image_path):
+        crop = _content_box(preview, main_size)
+        if crop is None:
+            continue
+
+        # Same aspect ratio as the main image, so comparing widths suffices
+        if crop[2] - crop[0] < _fitted_width(main_size, orientation, max_size):
+            continue
+
+        with open(image_path, 'rb') as f:
+            f.seek(preview.offset)
+            data = f.read(preview.length)
+
+        try:
+            img = Image.open(BytesIO(data))
+            img.load()
+        except OSError as e:
+            logger.debug(f"Unreadable embedded preview in {image_path}: {e}")
+            continue
+
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        if crop != (0, 0, img.width, img.height):
+            img = img.crop(crop)
+        if apply_orientation and orientation != 1:
+            img.getexif()[0x0112] = orientation
+            img = ImageOps.exif_transpose(img)
+        return img
+
+    return None
+
+
+def _iter_segments(head: bytes):
+    """(marker, data start, data end) of the JPEG segments in the window"""
+    pos = 2
+    while pos + 4 <= len(head):
+        if head[pos] != 0xFF:
+            return
+        marker = head[pos + 1]
+        if marker == 0xFF:
+            pos += 1
+            continue
+        if marker == 0xD8 or 0xD0 <= marker <= 0xD7:
+            pos += 2
+            continue
+        if marker in (0xD9, 0xDA):
+            return
+
+        length = struct.unpack('>H', head[pos + 2:pos + 4])[0]
+        end = pos + 2 + length
+        if end > len(head):
+            return
+        yield marker, pos + 4, end
+        pos = end
+
+
+def _exif_thumbnail(tiff: bytes, base: int) -> List[Tuple[int, int, str]]:
+    """IFD1 JPEG thumbnail of an APP1 TIFF structure"""
+    endian = '<' if tiff[:2] == b'II' else '>'
+    ifd0 = struct.unpack(endian + 'L', tiff[4:8])[0]
+    count = struct.unpack(endian + 'H', tiff[ifd0:ifd0 + 2])[0]
+    next_offset = ifd0 + 2 + count * 12
+    ifd1 = struct.unpack(endian + 'L', tiff[next_offset:next_offset + 4])[0]
+    if not ifd1 or ifd1 + 2 > len(tiff):
+        return []
+
+    count = struct.unpack(endian + 'H', tiff[ifd1:ifd1 + 2])[0]
+    values = {}
+    for i in range(count):
+        entry = tiff[ifd1 + 2 + i * 12:ifd1 + 14 + i * 12]
+        if len(entry) < 12:
+            break
+        tag, field_type = struct.unpack(endian + 'HH', entry[:4])
+        if tag in (_THUMB_OFFSET, _THUMB_LENGTH):
+            code = 'H' if field_type == 3 else 'L'
+            values[tag] = struct.unpack(endian + code, entry[8:8 + struct.calcsize(code)])[0]
+
+    offset, length = values.get(_THUMB_OFFSET), values.get(_THUMB_LENGTH)
+    if not offset or not length or offset + length > len(tiff):
+        return []
+    return [(base + offset, length, 'exif')]
+
+
+def _mpf_previews(tiff: bytes, base: int) -> List[Tuple[int, int, str]]:
+    """Preview images listed in an APP2 MPF index (offsets relative to its TIFF header)"""
+    endian = '<' if tiff[:2] == b'II' else '>'
+    ifd = struct.unpack(endian + 'L', tiff[4:8])[0]
+    count = struct.unpack(endian + 'H', tiff[ifd:ifd + 2])[0]
+
+    found = []
+    for i in range(count):
+        tag, _, n, value = struct.unpack(endian + 'HHL4s', tiff[ifd + 2 + i * 12:ifd + 14 + i * 12])
+        if tag != _MPF_ENTRY:
+            continue
+        entries_offset = struct.unpack(endian + 'L', value)[0]
+        for j in range(n // 16):
+            attribute, size, offset, _, _ = struct.unpack(
+                endian + 'LLLHH', tiff[entries_offset + j * 16:entries_offset + j * 16 + 16]
+            )
+            if attribute & 0xFFFFFF in _MPF_PREVIEW_TYPES and offset:
+                found.append((base + offset, size, 'mpf'))
+    return found
+
+
+def _jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """(width, height) from the frame header of a JPEG stream"""
+    if data[:2] != b'\xff\xd8':
+        return None
+    tags = _parse_jpeg(data)
+    if not tags or "ImageWidth" not in tags:
+        return None
+    return tags["ImageWidth"], tags["ImageLength"]
+
+
+def _main_image_header(image_path: Path) -> Optional[Tuple[Tuple[int, int], int]]:
+    """((width, height), orientation) of the main image from its header"""
+    try:
+        with open(image_path, 'rb') as f:
+            head = f.read(HEADER_WINDOW_BYTES)
+    except OSError:
+        return None
+
+    tags = _parse_jpeg(head) if head[:2] == b'\xff\xd8' else None
+    if not tags or "ImageWidth" not in tags:
+        return None
+    return (tags["ImageWidth"], tags["ImageLength"]), tags.get("Orientation", 1) or 1
+
+
+def _content_box(preview: EmbeddedPreview, main_size: Tuple[int, int]) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Crop box of the picture inside a (possibly letterboxed) preview
+
+    Returns None if the preview's aspect ratio does not fit the main image
+    (e.g. a crop or a different picture).
+    """
+    main_aspect = main_size[0] / main_size[1]
+    preview_aspect = preview.width / preview.height
+
+    if abs(preview_aspect - main_aspect) / main_aspect <= ASPECT_TOLERANCE:
+        return (0, 0, preview.width, preview.height)
+
+    if preview_aspect < main_aspect:
+        # Bars at top and bottom
+        height = round(preview.width / main_aspect)
+        if height < preview.height * (1 - MAX_LETTERBOX):
+            return None
+        top = (preview.height - height) // 2
+        return (0, top, preview.width, top + height)
+
+    # Bars left and right
+    width = round(preview.height * main_aspect)
+    if width < preview.width * (1 - MAX_LETTERBOX):
+        return None
+    left = (preview.width - width) // 2
+    return (left, 0, left + width, preview.height)
+
+
+def _fitted_width(main_size: Tuple[int, int], orientation: int, box: Tuple[int, int]) -> int:
+    """Stored-orientation width of the main image fitted into a display box"""
+    width, height = main_size
+    if orientation >= 5:
+        box = (box[1], box[0])
+    scale = min(box[0] / width, box[1] / height, 1.0)
+    return int(width * scale)
+
+
+def _covers(preview: EmbeddedPreview, min_size: Tuple[int, int]) -> bool:
+    """True if the preview is at least min_size in either orientation"""
+    w, h = preview.width, preview.height
+    return (w >= min_size[0] and h >= min_size[1]) or (w >= min_size[1] and h >= min_size[0])
@@ -0,0 +1,221 @@
+"""
+ffprobe execution layer
+
+- is_ffprobe_available() spawns `ffprobe -version` once per process
+- probe_file() runs ffprobe with a timeout; results are memoized per
+  (path, size, mtime)
+- probe_files() runs a bounded number of ffprobe processes concurrently
+  and keeps results in a persistent cache (Workspace.ffprobe_cache_file),
+  so repeat listings of an unchanged library spawn no processes at all
+"""
+
+import json
+import os
+import sqlite3
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from tqdm import tqdm
+
+from ..util.logging import get_logger
+
+
+logger = get_logger("ffprobe")
+
+
+FFPROBE_TIMEOUT = 30.0  # seconds per file
+DEFAULT_PROBE_WORKERS = min(8, os.cpu_count() or 1)
+PROBE_MEMO_SIZE = 1024
+
+
+@lru_cache(maxsize=1)
+def is_ffprobe_available() -> bool:
+    """Check if ffprobe is available in PATH (checked once per process)"""
+    try:
+        subprocess.run(
+            ['ffprobe', '-version'],
+            capture_output=True,
+            check=True,
+            timeout=FFPROBE_TIMEOUT
+        )
+        return True
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError):
+        return False
+
+
+def run_ffprobe(path: Path, timeout: float = FFPROBE_TIMEOUT) -> Dict[str, Any]:
+    """
+    Run ffprobe on one file (no caching)
+
+    Returns:
+        Parsed ffprobe JSON (format and streams)
+
+    Raises:
+        subprocess.CalledProcessError: ffprobe failed
+        subprocess.TimeoutExpired: ffprobe did not finish in time
+        json.JSONDecodeError: Unreadable output
+    """
+    cmd = [
+        'ffprobe',
+        '-v', 'quiet',
+        '-print_format', 'json',
+        '-show_format',
+        '-show_streams',
+        str(path)
+    ]
+
+    result = subprocess.run(
+        cmd,
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=timeout
+    )
+
+    return json.loads(result.stdout)
+
+
+def probe_file(path: Path, timeout: float = FFPROBE_TIMEOUT) -> Dict[str, Any]:
+    """
+    ffprobe result for one file, memoized per (path, size, mtime)
+
+    Raises:
+        Same as run_ffprobe(), plus OSError if the file cannot be stat'ed
+    """
+    stat = os.stat(path)
+    return _probe_memo(str(path), stat.st_size, stat.st_mtime_ns, timeout)
+
+
+@lru_cache(maxsize=PROBE_MEMO_SIZE)
+def _probe_memo(path_str: str, size_bytes: int, mtime_ns: int, timeout: float) -> Dict[str, Any]:
+    """Run once per file version (size and mtime are part of the key)"""
+    return run_ffprobe(Path(path_str), timeout)
+
+
+def probe_files(
+    paths: Sequence[Path],
+    cache_path: Optional[Path] = None,
+    max_workers: Optional[int] = None,
+    timeout: float = FFPROBE_TIMEOUT,
+    show_progress: bool = False
+) -> Dict[Path, Optional[Dict[str, Any]]]:
+    """
+    ffprobe many files with a bounded pool of concurrent processes
+
+    Args:
+        paths: Files to probe
+        cache_path: Persistent cache (Workspace.ffprobe_cache_file), None to disable
+        max_workers: Concurrent ffprobe processes (default: min(8, CPU count))
+        timeout: Seconds per file before ffprobe is killed
+        show_progress: Show progress bar
+
+    Returns:
+        Dict mapping path to ffprobe JSON, or None where probing failed
+    """
+    cache = FFprobeCache(cache_path) if cache_path else None
+    cached = cache.get_many(str(p) for p in paths) if cache else {}
+
+    results: Dict[Path, Optional[Dict[str, Any]]] = {}
+    to_probe: List[Tuple[Path, int, int]] = []
+
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            logger.warning(f"Could not read {path}: {e}")
+            results[path] = None
+            continue
+
+        entry = cached.get(str(path))
+        if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            results[path] = entry[2]
+        else:
+            to_probe.append((path, stat.st_size, stat.st_mtime_ns))
+
+    if to_probe and not is_ffprobe_available():
+        logger.warning("ffprobe not found. Install ffmpeg to extract video/audio metadata.")
+        for path, _, _ in to_probe:
+            results[path] = None
+        return results
+
+    def probe(item: Tuple[Path, int, int]) -> Optional[Dict[str, Any]]:
+        path = item[0]
+        try:
+            return run_ffprobe(path, timeout)
+        except subprocess.TimeoutExpired:
+            logger.warning(f"ffprobe timed out after {timeout:.0f}s: {path}")
+        except (subprocess.CalledProcessError, json.JSONDecodeError, OSError) as e:
+            logger.error(f"ffprobe failed for {path}: {e}")
+        return None
+
+    fresh = []
+    if to_probe:
+        # Threads only wait on the child processes, so they are cheap
+        with ThreadPoolExecutor(max_workers=max_workers or DEFAULT_PROBE_WORKERS) as pool:
+            probed = pool.map(probe, to_probe)
+            if show_progress:
+                probed = tqdm(probed, total=len(to_probe), desc="Probing media")
+
+            for (path, size_bytes, mtime_ns), data in zip(to_probe, probed):
+                results[path] = data
+                if data is not None:
+                    fresh.append((str(path), size_bytes, mtime_ns, data))
+
+    if cache and fresh:
+        cache.put_many(fresh)
+
+    logger.info(f"ffprobe: {len(paths) - len(to_probe)} cached, {len(to_probe)} probed")
+    return results
+
+
+class FFprobeCache:
+    """SQLite cache of raw ffprobe output keyed by path, size and mtime"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _init_db(self):
+        """Initialize database schema"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS probes (
+                    path TEXT PRIMARY KEY,
+                    size_bytes INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    data TEXT NOT NULL
+                )
+            """)
+            conn.commit()
+
+    def get_many(self, paths: Iterable[str]) -> Dict[str, Tuple[int, int, Dict[str, Any]]]:
+        """Cached entries as {path: (size_bytes, mtime_ns, data)}"""
+        paths = list(paths)
+        entries = {}
+
+        with sqlite3.connect(self.db_path) as conn:
+            # Stay below SQLite's host parameter limit
+            for i in range(0, len(paths), 500):
+                chunk = paths[i:i + 500]
+                cursor = conn.execute(
+                    f"SELECT path, size_bytes, mtime_ns, data FROM probes "
+                    f"WHERE path IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                for path, size_bytes, mtime_ns, data in cursor:
+                    entries[path] = (size_bytes, mtime_ns, json.loads(data))
+
+        return entries
+
+    def put_many(self, entries: List[Tuple[str, int, int, Dict[str, Any]]]) -> None:
+        """Store (path, size_bytes, mtime_ns, data) entries"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO probes (path, size_bytes, mtime_ns, data) VALUES (?, ?, ?, ?)",
+                [(path, size, mtime, json.dumps(data)) for path, size, mtime, data in entries]
+            )
+            conn.commit()
@@ -0,0 +1,388 @@
+"""
+Persistent scan manifest for incremental rescans
+
+The manifest stores the listing and mtime of every scanned directory and
+the size and mtime of every media file. On a rescan, a directory whose
+mtime is unchanged is not listed again; its files are taken from the
+manifest. Directory mtimes only change when entries are added, removed or
+renamed directly inside them, so each known directory is still stat'ed
+once per scan, but the files in unchanged directories are not.
+
+Note: a file that is rewritten in place (same name, same directory) does
+not touch the directory mtime. Use a full rescan to pick up such edits.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from tqdm import tqdm
+
+from .scanner import MediaFile, mtime_from_ns
+from ..util.paths import list_directory, DEFAULT_SCAN_WORKERS
+from ..util.logging import get_logger
+
+
+logger = get_logger("manifest")
+
+
+# Directories modified this recently are stored as "unknown" and listed
+# again next time: a change within the same mtime tick would otherwise go
+# unnoticed (FAT/exFAT memory cards have a 2 second resolution)
+MTIME_SETTLE_SECONDS = 2.0
+
+
+# Cached directory: (mtime_ns, subdirectory names)
+CachedDir = Tuple[int, List[str]]
+# Cached files of one directory: {path: (size_bytes, mtime_ns)}
+CachedFiles = Dict[str, Tuple[int, int]]
+
+
+@dataclass
+class ScanDelta:
+    """Result of an incremental scan"""
+    media: List[MediaFile] = field(default_factory=list)
+    added: List[MediaFile] = field(default_factory=list)
+    changed: List[MediaFile] = field(default_factory=list)
+    removed: List[Path] = field(default_factory=list)
+    dirs_listed: int = 0
+    dirs_reused: int = 0
+    initial: bool = False  # No usable manifest existed: everything is "added"
+
+    @property
+    def has_changes(self) -> bool:
+        """True if any file was added, changed or removed"""
+        return bool(self.added or self.changed or self.removed)
+
+    def __repr__(self) -> str:
+        return (
+            f"ScanDelta({len(self.media)} files, +{len(self.added)} "
+            f"~{len(self.changed)} -{len(self.removed)})"
+        )
+
+
+class ScanManifest:
+    """SQLite store of the last scan (directories and files)"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _init_db(self):
+        """Initialize database schema"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS dirs (
+                    path TEXT PRIMARY KEY,
+                    mtime_ns INTEGER NOT NULL,
+                    subdirs TEXT NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    dir TEXT NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_files_dir ON files(dir)")
+            conn.commit()
+
+    def load(self, extensions_key: str) -> Tuple[Dict[str, CachedDir], Dict[str, CachedFiles]]:
+        """
+        Load the manifest into memory
+
+        Args:
+            extensions_key: Identifies the extension filter of the scan.
+                If it differs from the stored one, the manifest is stale
+                and nothing is returned.
+
+        Returns:
+            (directories, files grouped by directory)
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'extensions'").fetchone()
+            if row is None or row[0] != extensions_key:
+                return {}, {}
+
+            dirs = {
+                path: (mtime_ns, json.loads(subdirs))
+                for path, mtime_ns, subdirs in conn.execute("SELECT path, mtime_ns, subdirs FROM dirs")
+            }
+
+            files: Dict[str, CachedFiles] = {}
+            for path, directory, size_bytes, mtime_ns in conn.execute(
+                "SELECT path, dir, size_bytes, mtime_ns FROM files"
+            ):
+                files.setdefault(directory, {})[path] = (size_bytes, mtime_ns)
+
+        return dirs, files
+
+    def apply(
+        self,
+        extensions_key: str,
+        dir_updates: Dict[str, CachedDir],
+        removed_dirs: List[str],
+        file_updates: List[Tuple[str, str, int, int]],
+        removed_files: List[str],
+        reset: bool = False
+    ) -> None:
+        """
+        Write scan results in a single transaction
+
+        Args:
+            extensions_key: Extension filter of the scan
+            dir_updates: Directories that were listed
+            removed_dirs: Directories that no longer exist
+            file_updates: (path, dir, size_bytes, mtime_ns) of new/changed files
+            removed_files: Paths of deleted files
+            reset: Drop all previous content first
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            if reset:
+                conn.execute("DELETE FROM dirs")
+                conn.execute("DELETE FROM files")
+
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('extensions', ?)",
+                (extensions_key,)
+            )
+            conn.executemany("DELETE FROM dirs WHERE path = ?", [(d,) for d in removed_dirs])
+            conn.executemany("DELETE FROM files WHERE dir = ?", [(d,) for d in removed_dirs])
+            conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in removed_files])
+            conn.executemany(
+                "INSERT OR REPLACE INTO dirs (path, mtime_ns, subdirs) VALUES (?, ?, ?)",
+                [(d, mtime_ns, json.dumps(subdirs)) for d, (mtime_ns, subdirs) in dir_updates.items()]
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO files (path, dir, size_bytes, mtime_ns) VALUES (?, ?, ?, ?)",
+                file_updates
+            )
+            conn.commit()
+
+    def update_files(
+        self,
+        file_updates: List[Tuple[str, str, int, int]],
+        removed_files: List[str]
+    ) -> None:
+        """
+        Record individual file changes (e.g. from a file system watcher)
+
+        Directory rows are left alone: their stored mtime no longer matches,
+        so the next incremental scan lists them again.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in removed_files])
+            conn.executemany(
+                "INSERT OR REPLACE INTO files (path, dir, size_bytes, mtime_ns) VALUES (?, ?, ?, ?)",
+                file_updates
+            )
+            conn.commit()
+
+    def clear(self) -> None:
+        """Forget everything (next scan is a full scan)"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM meta")
+            conn.execute("DELETE FROM dirs")
+            conn.execute("DELETE FROM files")
+            conn.commit()
+
+
+def extensions_key(extensions) -> str:
+    """Canonical form of an extension filter, as stored in the manifest"""
+    return ",".join(sorted(ext.lower() for ext in extensions))
+
+
+def incremental_scan(
+    roots: List[Path],
+    extensions: List[str],
+    manifest: ScanManifest,
+    recursive: bool = True,
+    show_progress: bool = True,
+    max_workers: Optional[int] = None,
+    full: bool = False
+) -> ScanDelta:
+    """
+    Scan directories, reusing the manifest for unchanged directories
+
+    Args:
+        roots: List of root directories
+        extensions: File extensions
+        manifest: Manifest of the previous scan (updated in place)
+        recursive: Scan subdirectories
+        show_progress: Show progress bar
+        max_workers: Number of directory listing threads
+        full: Re-list every directory (still reports the delta)
+
+    Returns:
+        ScanDelta with all current files and the changes since last scan
+    """
+    extensions_lower = frozenset(ext.lower() for ext in extensions)
+    key = extensions_key(extensions_lower)
+
+    cached_dirs, cached_files = manifest.load(key)
+    reset = not cached_dirs
+    trusted_dirs = {} if full else cached_dirs
+
+    settle_ns = int(MTIME_SETTLE_SECONDS * 1e9)
+    now_ns = time.time_ns()
+
+    delta = ScanDelta(initial=reset)
+    dir_updates: Dict[str, CachedDir] = {}
+    file_updates: List[Tuple[str, str, int, int]] = []
+    removed_files: List[str] = []
+    seen_dirs = set()
+    scanned_roots = []
+
+    progress = tqdm(desc="Scanning directories", unit=" dirs") if show_progress else None
+
+    with ThreadPoolExecutor(max_workers=max_workers or DEFAULT_SCAN_WORKERS, thread_name_prefix="scan") as pool:
+        for root in roots:
+            if not root.exists():
+                logger.warning(f"Directory not found: {root}")
+                continue
+
+            root_str = str(root)
+            scanned_roots.append(root_str)
+            if root_str in seen_dirs:
+                continue
+
+            seen_dirs.add(root_str)
+            pending = {pool.submit(_visit_directory, root_str, trusted_dirs, extensions_lower)}
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    directory, mtime_ns, listing, subdir_names = future.result()
+                    if progress is not None:
+                        progress.update(1)
+
+                    if mtime_ns is None:
+                        # Vanished between listing the parent and visiting it
+                        seen_dirs.discard(directory)
+                        continue
+
+                    old_files = cached_files.get(directory, {})
+
+                    if listing is None:
+                        delta.dirs_reused += 1
+                        for path, (size_bytes, file_mtime_ns) in old_files.items():
+                            delta.media.append(
+                                MediaFile.from_attributes(Path(path), size_bytes, mtime_from_ns(file_mtime_ns))
+                            )
+                    else:
+                        delta.dirs_listed += 1
+                        _diff_listing(directory, listing, old_files, delta, file_updates, removed_files)
+
+                        # Too fresh to trust: force a re-list next time
+                        stored_mtime = mtime_ns if now_ns - mtime_ns > settle_ns else -1
+                        dir_updates[directory] = (stored_mtime, subdir_names)
+
+                    if recursive:
+                        for name in subdir_names:
+                            subdir = os.path.join(directory, name)
+                            if subdir not in seen_dirs:
+                                seen_dirs.add(subdir)
+                                pending.add(pool.submit(_visit_directory, subdir, trusted_dirs, extensions_lower))
+
+    if progress is not None:
+        progress.close()
+
+    # Known directories under a scanned root that were not reached are gone
+    removed_dirs = []
+    if recursive:
+        for directory in cached_dirs:
+            if directory not in seen_dirs and _is_under_any(directory, scanned_roots):
+                removed_dirs.append(directory)
+                for path in cached_files.get(directory, {}):
+                    delta.removed.append(Path(path))
+
+    manifest.apply(key, dir_updates, removed_dirs, file_updates, removed_files, reset=reset)
+
+    delta.media.sort(key=lambda m: m.path)
+
+    logger.info(
+        f"Incremental scan: {len(delta.media)} files, {delta.dirs_listed} directories listed, "
+        f"{delta.dirs_reused} unchanged (+{len(delta.added)} ~{len(delta.changed)} -{len(delta.removed)})"
+    )
+
+    return delta
+
+
+def _visit_directory(
+    directory: str,
+    trusted_dirs: Dict[str, CachedDir],
+    extensions: frozenset
+) -> Tuple[str, Optional[int], Optional[list], List[str]]:
+    """
+    Stat a directory and list it only if its mtime changed
+
+    Returns:
+        (directory, mtime_ns or None if gone, listing or None if reused, subdirectory names)
+    """
+    try:
+        mtime_ns = os.stat(directory).st_mtime_ns
+    except OSError:
+        return directory, None, None, []
+
+    cached = trusted_dirs.get(directory)
+    if cached is not None and cached[0] == mtime_ns:
+        return directory, mtime_ns, None, cached[1]
+
+    files, subdirs = list_directory(directory, extensions)
+    return directory, mtime_ns, files, [os.path.basename(d) for d in subdirs]
+
+
+def _diff_listing(
+    directory: str,
+    listing: list,
+    old_files: CachedFiles,
+    delta: ScanDelta,
+    file_updates: List[Tuple[str, str, int, int]],
+    removed_files: List[str]
+) -> None:
+    """Compare a fresh directory listing against the manifest"""
+    current = set()
+
+    for path, stat in listing:
+        path_str = str(path)
+        current.add(path_str)
+
+        media_file = MediaFile.from_stat(path, stat)
+        delta.media.append(media_file)
+
+        previous = old_files.get(path_str)
+        if previous == (stat.st_size, stat.st_mtime_ns):
+            continue
+
+        if previous is None:
+            delta.added.append(media_file)
+        else:
+            delta.changed.append(media_file)
+        file_updates.append((path_str, directory, stat.st_size, stat.st_mtime_ns))
+
+    for path_str in old_files:
+        if path_str not in current:
+            delta.removed.append(Path(path_str))
+            removed_files.append(path_str)
+
+
+def _is_under_any(directory: str, roots: List[str]) -> bool:
+    """Check if directory is one of the roots or below one of them"""
+    for root in roots:
+        if directory == root or directory.startswith(root.rstrip(os.sep) + os.sep):
+            return True
+    return False
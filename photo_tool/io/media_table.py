@@ -0,0 +1,368 @@
+"""
+Compact columnar storage for large scan results
+
+A list of MediaFile objects costs several hundred bytes per file (Path,
+datetime and string objects). MediaTable stores the same information in
+NumPy columns plus one UTF-8 blob for the file names, about 40 bytes per
+file, and filters with vectorized masks instead of list copies.
+
+Rows are exposed as lightweight MediaRow views with the same attributes
+as MediaFile, so most code accepting MediaFile works unchanged.
+"""
+
+import os
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+from tqdm import tqdm
+
+from .scanner import MediaFile, media_type_for_extension, mtime_from_ns, _outermost_roots
+from ..util.paths import iter_files
+from ..util.logging import get_logger
+
+
+logger = get_logger("media_table")
+
+
+# uint8 media type codes (index = code)
+MEDIA_TYPES = ("unknown", "photo", "video", "audio")
+MEDIA_TYPE_CODES = {name: code for code, name in enumerate(MEDIA_TYPES)}
+
+
+def _suffix(name: str) -> str:
+    """Lower-case suffix, same rules as Path.suffix"""
+    i = name.rfind('.')
+    if 0 < i < len(name) - 1:
+        return name[i:].lower()
+    return ''
+
+
+class MediaRow:
+    """Lazy row view into a MediaTable, attribute-compatible with MediaFile"""
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: "MediaTable", index: int):
+        self._table = table
+        self._index = index
+
+    @property
+    def path(self) -> Path:
+        return Path(self._table.path_str(self._index))
+
+    @property
+    def filename(self) -> str:
+        return self._table.name(self._index)
+
+    @property
+    def size_bytes(self) -> int:
+        return int(self._table.size_bytes[self._index])
+
+    @property
+    def modified_time(self) -> datetime:
+        return datetime.fromtimestamp(mtime_from_ns(self._table.mtime_ns[self._index]))
+
+    @property
+    def extension(self) -> str:
+        return self._table.extensions[self._table.ext_id[self._index]]
+
+    @property
+    def media_type(self) -> str:
+        return MEDIA_TYPES[self._table.media_type[self._index]]
+
+    @property
+    def is_photo(self) -> bool:
+        return self._table.media_type[self._index] == MEDIA_TYPE_CODES["photo"]
+
+    @property
+    def is_video(self) -> bool:
+        return self._table.media_type[self._index] == MEDIA_TYPE_CODES["video"]
+
+    @property
+    def is_audio(self) -> bool:
+        return self._table.media_type[self._index] == MEDIA_TYPE_CODES["audio"]
+
+    def to_media_file(self) -> MediaFile:
+        """Materialize as a regular MediaFile"""
+        return MediaFile(
+            path=self.path,
+            filename=self.filename,
+            size_bytes=self.size_bytes,
+            modified_time=self.modified_time,
+            extension=self.extension,
+            media_type=self.media_type
+        )
+
+    def __repr__(self) -> str:
+        return f"MediaRow({self.path})"
+
+
+class MediaTable:
+    """
+    Columnar table of media files
+
+    Columns (one entry per file):
+        dir_id:     int32 index into `dirs` (interned directory paths)
+        name_start: int64 byte offset of the file name in `names`
+        name_end:   int64 end offset of the file name in `names`
+        ext_id:     uint8/uint16 index into `extensions`
+        media_type: uint8 code (see MEDIA_TYPES)
+        size_bytes: int64
+        mtime_ns:   int64 modification time (ns since epoch)
+
+    Subsets (filters, slices) share `dirs`, `names` and `extensions` with
+    the parent table; only the column arrays are copied.
+    """
+
+    def __init__(
+        self,
+        dirs: List[str],
+        names: bytes,
+        extensions: List[str],
+        dir_id: np.ndarray,
+        name_start: np.ndarray,
+        name_end: np.ndarray,
+        ext_id: np.ndarray,
+        media_type: np.ndarray,
+        size_bytes: np.ndarray,
+        mtime_ns: np.ndarray
+    ):
+        self.dirs = dirs
+        self.names = names
+        self.extensions = extensions
+        self.dir_id = dir_id
+        self.name_start = name_start
+        self.name_end = name_end
+        self.ext_id = ext_id
+        self.media_type = media_type
+        self.size_bytes = size_bytes
+        self.mtime_ns = mtime_ns
+
+    @classmethod
+    def from_scan(
+        cls,
+        roots: List[Path],
+        extensions: List[str],
+        recursive: bool = True,
+        show_progress: bool = True,
+        max_workers: Optional[int] = None
+    ) -> "MediaTable":
+        """Scan directories straight into a table (no MediaFile objects)"""
+        builder = MediaTableBuilder()
+
+        for root in _outermost_roots(roots, recursive):
+            if not root.exists():
+                logger.warning(f"Directory not found: {root}")
+                continue
+
+            entries = iter_files(root, extensions, recursive, max_workers)
+            if show_progress:
+                entries = tqdm(entries, desc="Scanning files", unit=" files")
+
+            for path, stat in entries:
+                builder.append(str(path), stat.st_size, stat.st_mtime_ns)
+
+        table = builder.build()
+        logger.info(f"Indexed {len(table)} files into media table ({table.nbytes / 1e6:.1f} MB)")
+        return table
+
+    @classmethod
+    def from_media_files(cls, media_files: Iterable[MediaFile]) -> "MediaTable":
+        """Convert MediaFile objects (e.g. from the scan manifest)"""
+        builder = MediaTableBuilder()
+        for m in media_files:
+            builder.append(str(m.path), m.size_bytes, int(round(m.modified_time.timestamp() * 1e6)) * 1000)
+        return builder.build()
+
+    def __len__(self) -> int:
+        return len(self.size_bytes)
+
+    def __iter__(self) -> Iterator[MediaRow]:
+        for i in range(len(self)):
+            yield MediaRow(self, i)
+
+    def __getitem__(self, key: Union[int, slice, np.ndarray]) -> Union[MediaRow, "MediaTable"]:
+        """Row view for an int; sub-table for a slice, index array or bool mask"""
+        if isinstance(key, (int, np.integer)):
+            index = int(key)
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError("MediaTable index out of range")
+            return MediaRow(self, index)
+        return self._take(key)
+
+    def name(self, index: int) -> str:
+        """File name of row"""
+        return self.names[self.name_start[index]:self.name_end[index]].decode('utf-8', 'surrogateescape')
+
+    def path_str(self, index: int) -> str:
+        """Full path of row as string"""
+        return os.path.join(self.dirs[self.dir_id[index]], self.name(index))
+
+    def paths(self) -> List[Path]:
+        """All paths (materializes Path objects)"""
+        return [Path(self.path_str(i)) for i in range(len(self))]
+
+    def to_media_files(self) -> List[MediaFile]:
+        """Materialize all rows as MediaFile objects"""
+        return [row.to_media_file() for row in self]
+
+    def filter_by_type(self, media_type: str) -> "MediaTable":
+        """Rows of one media type ('photo', 'video', 'audio', 'all')"""
+        if media_type == "all":
+            return self
+        if media_type not in MEDIA_TYPE_CODES:
+            raise ValueError(f"Unknown media type: {media_type}")
+        return self._take(self.media_type == MEDIA_TYPE_CODES[media_type])
+
+    def filter_by_extension(self, extensions: Iterable[str]) -> "MediaTable":
+        """Rows whose extension is in `extensions` (case-insensitive)"""
+        wanted = {ext.lower() for ext in extensions}
+        ids = [i for i, ext in enumerate(self.extensions) if ext in wanted]
+        return self._take(np.isin(self.ext_id, ids))
+
+    def filter_by_date(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> "MediaTable":
+        """Rows modified in [start, end] (either bound optional)"""
+        mask = np.ones(len(self), dtype=bool)
+        if start is not None:
+            mask &= self.mtime_ns >= int(start.timestamp() * 1e9)
+        if end is not None:
+            mask &= self.mtime_ns <= int(end.timestamp() * 1e9)
+        return self._take(mask)
+
+    def count_by_type(self) -> Dict[str, int]:
+        """Number of rows per media type"""
+        counts = np.bincount(self.media_type, minlength=len(MEDIA_TYPES))
+        return {name: int(counts[code]) for code, name in enumerate(MEDIA_TYPES)}
+
+    @property
+    def total_size(self) -> int:
+        """Sum of file sizes in bytes"""
+        return int(self.size_bytes.sum())
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by columns and name blob"""
+        columns = (self.dir_id, self.name_start, self.name_end, self.ext_id,
+                   self.media_type, self.size_bytes, self.mtime_ns)
+        return sum(c.nbytes for c in columns) + len(self.names)
+
+    def _take(self, key) -> "MediaTable":
+        """Sub-table sharing dictionaries and name blob"""
+        return MediaTable(
+            dirs=self.dirs,
+            names=self.names,
+            extensions=self.extensions,
+            dir_id=self.dir_id[key],
+            name_start=self.name_start[key],
+            name_end=self.name_end[key],
+            ext_id=self.ext_id[key],
+            media_type=self.media_type[key],
+            size_bytes=self.size_bytes[key],
+            mtime_ns=self.mtime_ns[key]
+        )
+
+    def __repr__(self) -> str:
+        return f"MediaTable({len(self)} files, {len(self.dirs)} directories)"
+
+
+class MediaTableBuilder:
+    """Append-only builder for MediaTable (compact while collecting)"""
+
+    def __init__(self):
+        self._dir_index: Dict[str, int] = {}
+        self._dirs: List[str] = []
+        self._ext_index: Dict[str, int] = {}
+        self._extensions: List[str] = []
+        self._names = bytearray()
+        self._dir_id = array('i')
+        self._name_end = array('q')
+        self._ext_id = array('H')
+        self._size_bytes = array('q')
+        self._mtime_ns = array('q')
+
+    def append(self, path: str, size_bytes: int, mtime_ns: int) -> None:
+        """Add one file"""
+        directory, name = os.path.split(path)
+
+        dir_id = self._dir_index.get(directory)
+        if dir_id is None:
+            dir_id = self._dir_index[directory] = len(self._dirs)
+            self._dirs.append(directory)
+
+        ext = _suffix(name)
+        ext_id = self._ext_index.get(ext)
+        if ext_id is None:
+            ext_id = self._ext_index[ext] = len(self._extensions)
+            self._extensions.append(ext)
+
+        self._names += name.encode('utf-8', 'surrogateescape')
+        self._dir_id.append(dir_id)
+        self._name_end.append(len(self._names))
+        self._ext_id.append(ext_id)
+        self._size_bytes.append(size_bytes)
+        self._mtime_ns.append(mtime_ns)
+
+    def build(self, sort: bool = True) -> MediaTable:
+        """
+        Create the table
+
+        Args:
+            sort: Order rows by directory, then file name
+        """
+        name_end = np.frombuffer(self._name_end, dtype=np.int64).copy()
+        name_start = np.empty_like(name_end)
+        if len(name_end):
+            name_start[0] = 0
+            name_start[1:] = name_end[:-1]
+
+        ext_dtype = np.uint8 if len(self._extensions) <= 256 else np.uint16
+        ext_id = np.frombuffer(self._ext_id, dtype=np.uint16).astype(ext_dtype)
+
+        # Media type per extension, then broadcast to rows
+        ext_types = np.array(
+            [MEDIA_TYPE_CODES[media_type_for_extension(ext)] for ext in self._extensions],
+            dtype=np.uint8
+        )
+
+        table = MediaTable(
+            dirs=self._dirs,
+            names=bytes(self._names),
+            extensions=self._extensions,
+            dir_id=np.frombuffer(self._dir_id, dtype=np.int32).copy(),
+            name_start=name_start,
+            name_end=name_end,
+            ext_id=ext_id,
+            media_type=ext_types[ext_id] if len(ext_id) else np.empty(0, dtype=np.uint8),
+            size_bytes=np.frombuffer(self._size_bytes, dtype=np.int64).copy(),
+            mtime_ns=np.frombuffer(self._mtime_ns, dtype=np.int64).copy()
+        )
+
+        if sort and len(table):
+            table = table._take(_sort_order(table))
+
+        return table
+
+
+def _sort_order(table: MediaTable) -> np.ndarray:
+    """Row order by (directory, file name)"""
+    dir_rank = np.empty(len(table.dirs), dtype=np.int64)
+    dir_rank[sorted(range(len(table.dirs)), key=table.dirs.__getitem__)] = np.arange(len(table.dirs))
+    row_dir_rank = dir_rank[table.dir_id].tolist()
+
+    names = table.names
+    starts = table.name_start.tolist()
+    ends = table.name_end.tolist()
+
+    return np.array(
+        sorted(range(len(table)), key=lambda i: (row_dir_rank[i], names[starts[i]:ends[i]])),
+        dtype=np.int64
+    )
@@ -2,16 +2,20 @@
 File scanner for finding photos and videos
 """
 
+import os
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Literal
+from typing import TYPE_CHECKING, Iterator, List, Optional, Literal, Union
 
 from tqdm import tqdm
 
-from ..util.paths import find_files
+from ..util.paths import iter_files
 from ..util.logging import get_logger
 
+if TYPE_CHECKING:
+    from .media_table import MediaTable
+
 
 logger = get_logger("scanner")
 
@@ -22,6 +26,28 @@ VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi', '.mkv', '.m4v', '.wmv', '.flv', '.we
 AUDIO_EXTENSIONS = {'.mp3', '.wav', '.m4a', '.aac', '.flac', '.ogg', '.opus', '.wma', '.aiff', '.alac'}
 
 
+def media_type_for_extension(ext: str) -> Literal["photo", "video", "audio", "unknown"]:
+    """Determine media type from a lower-case file extension"""
+    if ext in PHOTO_EXTENSIONS:
+        return "photo"
+    elif ext in VIDEO_EXTENSIONS:
+        return "video"
+    elif ext in AUDIO_EXTENSIONS:
+        return "audio"
+    return "unknown"
+
+
+def mtime_from_ns(mtime_ns: int) -> float:
+    """
+    Same float as os.stat().st_mtime for a stored st_mtime_ns
+    
+    CPython computes st_mtime as sec + nsec * 1e-9; mtime_ns / 1e9 differs
+    in the last bit for some timestamps, so datetimes would not compare equal.
+    """
+    seconds, nanos = divmod(int(mtime_ns), 1_000_000_000)
+    return seconds + nanos * 1e-9
+
+
 @dataclass
 class MediaFile:
     """Basic file information for photos, videos, and audio"""
@@ -35,26 +61,25 @@ class MediaFile:
     @classmethod
     def from_path(cls, path: Path) -> "MediaFile":
         """Create MediaFile from path"""
-        stat = path.stat()
+        return cls.from_stat(path, path.stat())
+    
+    @classmethod
+    def from_stat(cls, path: Path, stat: os.stat_result) -> "MediaFile":
+        """Create MediaFile from path and an already available stat result"""
+        return cls.from_attributes(path, stat.st_size, stat.st_mtime)
+    
+    @classmethod
+    def from_attributes(cls, path: Path, size_bytes: int, mtime: float) -> "MediaFile":
+        """Create MediaFile from known size and modification time (no I/O)"""
         ext = path.suffix.lower()
         
-        # Determine media type
-        if ext in PHOTO_EXTENSIONS:
-            media_type = "photo"
-        elif ext in VIDEO_EXTENSIONS:
-            media_type = "video"
-        elif ext in AUDIO_EXTENSIONS:
-            media_type = "audio"
-        else:
-            media_type = "unknown"
-        
         return cls(
             path=path,
             filename=path.name,
-            size_bytes=stat.st_size,
-            modified_time=datetime.fromtimestamp(stat.st_mtime),
+            size_bytes=size_bytes,
+            modified_time=datetime.fromtimestamp(mtime),
             extension=ext,
-            media_type=media_type
+            media_type=media_type_for_extension(ext)
         )
     
     @property
@@ -77,42 +102,106 @@ class MediaFile:
 PhotoFile = MediaFile
 
 
+def iter_media(
+    roots: List[Path],
+    extensions: List[str],
+    recursive: bool = True,
+    chunk_size: Optional[int] = None,
+    max_workers: Optional[int] = None
+) -> Iterator[Union[MediaFile, List[MediaFile]]]:
+    """
+    Stream media files as they are found
+    
+    Unlike scan_directory(), nothing is collected or sorted: each file is
+    yielded as soon as its directory has been listed, so downstream stages
+    (capture time, hashing, thumbnails) can start while the walk is still
+    running, and memory does not grow with library size.
+    
+    Roots nested inside another root are skipped, so no file is yielded twice.
+    
+    Args:
+        roots: List of root directories
+        extensions: File extensions to include
+        recursive: Scan subdirectories
+        chunk_size: If set, yield lists of up to chunk_size files instead
+            of single files (useful for feeding worker pools)
+        max_workers: Number of directory listing threads
+        
+    Yields:
+        MediaFile objects (or lists of them when chunk_size is set)
+    """
+    chunk = []
+    
+    for root in _outermost_roots(roots, recursive):
+        if not root.exists():
+            logger.warning(f"Directory not found: {root}")
+            continue
+        
+        for path, stat in iter_files(root, extensions, recursive, max_workers):
+            try:
+                media_file = MediaFile.from_stat(path, stat)
+            except Exception as e:
+                logger.warning(f"Error reading {path}: {e}")
+                continue
+            
+            if chunk_size is None:
+                yield media_file
+                continue
+            
+            chunk.append(media_file)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    
+    if chunk:
+        yield chunk
+
+
+def _outermost_roots(roots: List[Path], recursive: bool) -> List[Path]:
+    """Drop duplicate roots, and roots covered by another root when recursive"""
+    unique = list(dict.fromkeys(Path(r) for r in roots))
+    if not recursive:
+        return unique
+    
+    return [
+        root for root in unique
+        if not any(other != root and other in root.parents for other in unique)
+    ]
+
+
 def scan_directory(
     root: Path,
     extensions: List[str],
     recursive: bool = True,
-    show_progress: bool = True
+    show_progress: bool = True,
+    max_workers: Optional[int] = None
 ) -> List[MediaFile]:
     """
     Scan directory for media files (photos and videos)
     
+    Uses a parallel os.scandir walk; the stat result of each directory
+    entry is reused, so every file is stat'ed only once.
+    
     Args:
         root: Root directory to scan
         extensions: File extensions to include
         recursive: Scan subdirectories
         show_progress: Show progress bar
+        max_workers: Number of directory listing threads
         
     Returns:
-        List of MediaFile objects
+        List of MediaFile objects, sorted by path
     """
     logger.info(f"Scanning directory: {root}")
     logger.info(f"Extensions: {', '.join(extensions)}")
     
-    # Find all matching files
-    file_paths = find_files(root, extensions, recursive)
+    entries = iter_media([root], extensions, recursive, max_workers=max_workers)
+    iterator = tqdm(entries, desc="Scanning files", unit=" files") if show_progress else entries
     
-    logger.info(f"Found {len(file_paths)} files")
+    media_files = list(iterator)
     
-    # Create MediaFile objects
-    media_files = []
-    iterator = tqdm(file_paths, desc="Reading file info") if show_progress else file_paths
-    
-    for path in iterator:
-        try:
-            media_file = MediaFile.from_path(path)
-            media_files.append(media_file)
-        except Exception as e:
-            logger.warning(f"Error reading {path}: {e}")
+    # Walk order depends on thread scheduling; keep output deterministic
+    media_files.sort(key=lambda m: m.path)
     
     # Count by type
     photos = sum(1 for m in media_files if m.is_photo)
@@ -128,8 +217,11 @@ def scan_multiple_directories(
     roots: List[Path],
     extensions: List[str],
     recursive: bool = True,
-    show_progress: bool = True
-) -> List[MediaFile]:
+    show_progress: bool = True,
+    max_workers: Optional[int] = None,
+    manifest_path: Optional[Path] = None,
+    as_table: bool = False
+) -> Union[List[MediaFile], "MediaTable"]:
     """
     Scan multiple directories
     
@@ -138,10 +230,35 @@ def scan_multiple_directories(
         extensions: File extensions
         recursive: Scan subdirectories
         show_progress: Show progress bar
+        max_workers: Number of directory listing threads
+        manifest_path: Scan manifest (e.g. Workspace.scan_manifest_file);
+            if given, unchanged directories are not listed again
+        as_table: Return a compact columnar MediaTable instead of a list
+            (recommended for libraries with millions of files)
         
     Returns:
-        Combined list of MediaFile objects
+        Combined list of MediaFile objects (or MediaTable)
     """
+    if as_table and manifest_path is None:
+        from .media_table import MediaTable
+        return MediaTable.from_scan(roots, extensions, recursive, show_progress, max_workers)
+    
+    if manifest_path is not None:
+        from .manifest import ScanManifest, incremental_scan
+        
+        delta = incremental_scan(
+            roots,
+            extensions,
+            ScanManifest(manifest_path),
+            recursive=recursive,
+            show_progress=show_progress,
+            max_workers=max_workers
+        )
+        if as_table:
+            from .media_table import MediaTable
+            return MediaTable.from_media_files(delta.media)
+        return delta.media
+    
     all_media = []
     
     for root in roots:
@@ -149,7 +266,7 @@ def scan_multiple_directories(
             logger.warning(f"Directory not found: {root}")
             continue
         
-        media = scan_directory(root, extensions, recursive, show_progress)
+        media = scan_directory(root, extensions, recursive, show_progress, max_workers)
         all_media.extend(media)
     
     # Remove duplicates by path
@@ -167,19 +284,22 @@ def scan_multiple_directories(
 
 
 def filter_by_type(
-    media_files: List[MediaFile],
+    media_files: Union[List[MediaFile], "MediaTable"],
     media_type: Literal["photo", "video", "audio", "all"] = "all"
-) -> List[MediaFile]:
+) -> Union[List[MediaFile], "MediaTable"]:
     """
     Filter media files by type
     
     Args:
-        media_files: List of media files
+        media_files: List of media files or MediaTable
         media_type: Type to filter ('photo', 'video', 'audio', 'all')
         
     Returns:
-        Filtered list
+        Filtered list (or MediaTable, filtered with a vectorized mask)
     """
+    if not isinstance(media_files, list) and hasattr(media_files, "filter_by_type"):
+        return media_files.filter_by_type(media_type)
+    
     if media_type == "all":
         return media_files
     elif media_type == "photo":
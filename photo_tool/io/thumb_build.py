@@ -0,0 +1,259 @@
+"""
+Bulk thumbnail pre-generation into the packed thumbnail store
+
+Files whose thumbnails are all stored for their current size and mtime are
+skipped without decoding. The rest are rendered in a process pool (one
+decode per file for all sizes) and written to the store in batches; each
+batch is committed, so an interrupted build resumes where it stopped.
+Files that failed are remembered in a checkpoint file and not retried
+until they change (or retry_failed is set).
+"""
+
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from tqdm import tqdm
+
+from ..util.logging import get_logger
+from .thumb_store import ThumbnailStore, thumbnail_key
+from .thumbnails import encode_jpeg, render_media_thumbnails
+
+
+logger = get_logger("thumb_build")
+
+
+Size = Tuple[int, int]
+
+BATCH_SIZE = 64  # rendered files per store transaction
+MIN_PARALLEL_FILES = 16
+
+
+@dataclass
+class ThumbBuildStats:
+    """Result of a thumbnail build"""
+    files_total: int = 0
+    files_skipped: int = 0  # all sizes already up to date
+    files_rendered: int = 0
+    files_failed: int = 0
+    thumbnails_written: int = 0
+    bytes_written: int = 0
+    source_bytes: int = 0  # size of the rendered source files
+    elapsed: float = 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files_rendered / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def thumbnails_per_second(self) -> float:
+        return self.thumbnails_written / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def source_mb_per_second(self) -> float:
+        return self.source_bytes / (1024 * 1024) / self.elapsed if self.elapsed else 0.0
+
+
+class BuildCheckpoint:
+    """Files that failed to render, keyed by path with their size and mtime"""
+
+    def __init__(self, path: Optional[Path]):
+        self.path = Path(path) if path else None
+        self.failed: Dict[str, List[int]] = {}
+        if self.path and self.path.exists():
+            try:
+                self.failed = json.loads(self.path.read_text(encoding='utf-8')).get('failed', {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+
+    def has_failed(self, path: Path, stat: os.stat_result) -> bool:
+        """True if this version of the file failed before"""
+        return self.failed.get(str(path)) == [stat.st_size, stat.st_mtime_ns]
+
+    def mark_failed(self, path: Path, stat: os.stat_result) -> None:
+        self.failed[str(path)] = [stat.st_size, stat.st_mtime_ns]
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        tmp_path = self.path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps({'failed': self.failed}), encoding='utf-8')
+        tmp_path.replace(self.path)
+
+
+def parse_sizes(text: str) -> List[Size]:
+    """
+    Parse a size list like "256,400,1920" or "320x240,1920"
+
+    Raises:
+        ValueError: Malformed or non-positive size
+    """
+    sizes = []
+    for part in text.split(','):
+        part = part.strip().lower()
+        if not part:
+            continue
+        width, _, height = part.partition('x')
+        size = (int(width), int(height or width))
+        if size[0] <= 0 or size[1] <= 0:
+            raise ValueError(f"Invalid thumbnail size: {part}")
+        if size not in sizes:
+            sizes.append(size)
+    if not sizes:
+        raise ValueError("No thumbnail sizes given")
+    return sizes
+
+
+def build_thumbnails(
+    media_paths: Sequence[Path],
+    store: ThumbnailStore,
+    sizes: Sequence[Size],
+    jobs: Optional[int] = None,
+    checkpoint_path: Optional[Path] = None,
+    retry_failed: bool = False,
+    show_progress: bool = False
+) -> ThumbBuildStats:
+    """
+    Generate all missing thumbnails of the given files
+
+    Args:
+        media_paths: Images and videos
+        store: Packed thumbnail store
+        sizes: Thumbnail sizes (width, height)
+        jobs: Worker processes (default: CPU count; 1 = no pool)
+        checkpoint_path: File remembering failed files between runs
+        retry_failed: Render files that failed in an earlier run again
+        show_progress: Show progress bar
+
+    Returns:
+        ThumbBuildStats
+    """
+    start = time.perf_counter()
+    stats = ThumbBuildStats(files_total=len(media_paths))
+    checkpoint = BuildCheckpoint(checkpoint_path)
+
+    tasks = _plan(media_paths, store, sizes, checkpoint, retry_failed, stats)
+    logger.info(f"Thumbnails: {stats.files_skipped} files up to date, {len(tasks)} to render")
+
+    pending: List[Tuple[bytes, bytes]] = []  # all sizes of the files of the batch
+    batch_files = 0
+    progress = tqdm(total=len(tasks), desc="Building thumbnails") if show_progress else None
+
+    try:
+        for (path, stat, keys), rendered in _run(tasks, jobs):
+            if rendered is None:
+                stats.files_failed += 1
+                checkpoint.mark_failed(path, stat)
+            else:
+                stats.files_rendered += 1
+                stats.source_bytes += stat.st_size
+                for size, data in rendered.items():
+                    pending.append((keys[size], data))
+                    stats.thumbnails_written += 1
+                    stats.bytes_written += len(data)
+
+            batch_files += 1
+            if batch_files >= BATCH_SIZE:
+                store.put_many(pending)
+                pending = []
+                batch_files = 0
+                checkpoint.save()
+
+            if progress:
+                progress.update(1)
+    finally:
+        # Keep everything rendered so far, also on Ctrl+C
+        if pending:
+            store.put_many(pending)
+        checkpoint.save()
+        store.flush()
+        if progress:
+            progress.close()
+
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+Task = Tuple[Path, os.stat_result, Dict[Size, bytes]]
+
+
+def _plan(
+    media_paths: Sequence[Path],
+    store: ThumbnailStore,
+    sizes: Sequence[Size],
+    checkpoint: BuildCheckpoint,
+    retry_failed: bool,
+    stats: ThumbBuildStats
+) -> List[Task]:
+    """Files with at least one missing size, with the keys of the missing sizes"""
+    candidates = []
+    for path in media_paths:
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            logger.warning(f"Could not read {path}: {e}")
+            stats.files_failed += 1
+            continue
+
+        if not retry_failed and checkpoint.has_failed(path, stat):
+            stats.files_failed += 1
+            continue
+
+        candidates.append((path, stat, {size: thumbnail_key(path, size, stat) for size in sizes}))
+
+    missing = set(store.missing(key for _, _, keys in candidates for key in keys.values()))
+
+    tasks = []
+    for path, stat, keys in candidates:
+        todo = {size: key for size, key in keys.items() if key in missing}
+        if todo:
+            tasks.append((path, stat, todo))
+        else:
+            stats.files_skipped += 1
+    return tasks
+
+
+def _run(tasks: List[Task], jobs: Optional[int]) -> Iterator[Tuple[Task, Optional[Dict[Size, bytes]]]]:
+    """Render tasks inline or in a process pool (results in completion order)"""
+    jobs = jobs or os.cpu_count() or 1
+
+    if jobs <= 1 or len(tasks) < MIN_PARALLEL_FILES:
+        for task in tasks:
+            yield task, _render(task[0], list(task[2]))
+        return
+
+    # Bounded number of submitted tasks: memory does not grow with the library
+    max_in_flight = jobs * 4
+    remaining = iter(tasks)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        in_flight = {}
+        try:
+            while True:
+                while len(in_flight) < max_in_flight:
+                    task = next(remaining, None)
+                    if task is None:
+                        break
+                    in_flight[pool.submit(_render, task[0], list(task[2]))] = task
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield in_flight.pop(future), future.result()
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+
+def _render(path: Path, sizes: List[Size]) -> Optional[Dict[Size, bytes]]:
+    """JPEG bytes for all sizes of one file (pool worker; logs instead of raising)"""
+    try:
+        images = render_media_thumbnails(path, sizes)
+        return {size: encode_jpeg(img) for size, img in images.items()}
+    except Exception as e:
+        logger.warning(f"Could not render thumbnails for {path}: {e}")
+        return None
@@ -0,0 +1,472 @@
+"""
+Packed thumbnail store
+
+Thumbnails are appended to a few large segment files instead of one JPEG
+file per photo and size, which keeps directory operations and backups
+cheap for libraries with hundreds of thousands of thumbnails.
+
+- Segments (seg_00001.pack, ...) are append-only; a record is raw JPEG bytes
+- The index (index.sqlite) maps a 16-byte key to (segment, offset, length);
+  it is loaded into a dict when the store is opened, so lookups are O(1)
+- Reads are memoryview slices of memory-mapped segments (no copy)
+- A size budget evicts the least recently used thumbnails, and compaction
+  rewrites mostly-dead segments
+
+Keys include the source file's size and mtime (see thumbnail_key()), so a
+modified photo simply gets a new key; the stale entry ages out through
+the LRU budget. Writers in several processes (CLI build, GUI server) are
+serialized by the SQLite write lock.
+"""
+
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..util.logging import get_logger
+
+
+logger = get_logger("thumb_store")
+
+
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3
+DEFAULT_SEGMENT_BYTES = 256 * 1024 ** 2
+TOUCH_FLUSH_EVERY = 256  # access-time updates buffered before writing
+COMPACT_LIVE_RATIO = 0.5  # segments with less live data are rewritten
+EVICT_TARGET = 0.9  # evict down to this fraction of the budget
+
+# Packed index entry: segment (16 bits) | offset (32 bits) | length (32 bits)
+_OFFSET_BITS = 32
+_LENGTH_BITS = 32
+
+
+def thumbnail_key(media_path: Path, size: Tuple[int, int], stat: Optional[os.stat_result] = None) -> bytes:
+    """
+    Store key for one thumbnail of one version of a file
+
+    Args:
+        media_path: Source file
+        size: Thumbnail size (width, height)
+        stat: os.stat() of the source (looked up if not given)
+
+    Returns:
+        16-byte key
+    """
+    stat = stat or os.stat(media_path)
+    identity = f"{media_path}\0{stat.st_size}\0{stat.st_mtime_ns}\0{size[0]}x{size[1]}"
+    return hashlib.md5(identity.encode('utf-8', 'surrogateescape')).digest()
+
+
+def _pack(segment: int, offset: int, length: int) -> int:
+    return (segment << (_OFFSET_BITS + _LENGTH_BITS)) | (offset << _LENGTH_BITS) | length
+
+
+def _unpack(entry: int) -> Tuple[int, int, int]:
+    return (
+        entry >> (_OFFSET_BITS + _LENGTH_BITS),
+        (entry >> _LENGTH_BITS) & ((1 << _OFFSET_BITS) - 1),
+        entry & ((1 << _LENGTH_BITS) - 1)
+    )
+
+
+class ThumbnailStore:
+    """Append-only pack files with an in-memory index and an LRU size budget"""
+
+    def __init__(
+        self,
+        root: Path,
+        max_bytes: Optional[int] = None,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES
+    ):
+        """
+        Args:
+            root: Store directory (Workspace.thumbnail_store_dir)
+            max_bytes: Size budget; saved in the index so every process
+                uses the same one (None: saved value, else DEFAULT_MAX_BYTES)
+            segment_bytes: Segment file size before rolling over
+        """
+        if segment_bytes >= 1 << _OFFSET_BITS:
+            raise ValueError("Segments must be smaller than 4 GiB")
+
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.root / "index.sqlite"
+        self.max_bytes = DEFAULT_MAX_BYTES
+        self.segment_bytes = segment_bytes
+
+        self._lock = threading.RLock()
+        self._entries: Dict[bytes, int] = {}
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._touched: Dict[bytes, int] = {}
+        self._live_bytes = 0  # estimate; other processes may have added more
+
+        self._init_db()
+        self._load_budget(max_bytes)
+        self._load_index()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Other processes may hold the write lock while they append
+        return sqlite3.connect(self.db_path, timeout=60)
+
+    def _init_db(self):
+        """Initialize database schema"""
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS thumbs (
+                    key BLOB PRIMARY KEY,
+                    segment INTEGER NOT NULL,
+                    offset INTEGER NOT NULL,
+                    length INTEGER NOT NULL,
+                    last_access INTEGER NOT NULL
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_thumbs_access ON thumbs(last_access)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_thumbs_segment ON thumbs(segment)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS segments (
+                    id INTEGER PRIMARY KEY,
+                    dead INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            """)
+            conn.commit()
+
+    def _load_budget(self, max_bytes: Optional[int]):
+        """Use the given size budget (and save it), else the saved one"""
+        with self._connect() as conn:
+            if max_bytes is not None:
+                conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('max_bytes', ?)", (max_bytes,))
+                conn.commit()
+                self.max_bytes = max_bytes
+            else:
+                row = conn.execute("SELECT value FROM meta WHERE name = 'max_bytes'").fetchone()
+                if row:
+                    self.max_bytes = row[0]
+
+    def _load_index(self):
+        """Read the whole index into memory"""
+        with self._connect() as conn:
+            cursor = conn.execute("SELECT key, segment, offset, length FROM thumbs")
+            self._entries = {key: _pack(seg, off, length) for key, seg, off, length in cursor}
+        self._live_bytes = sum(entry & ((1 << _LENGTH_BITS) - 1) for entry in self._entries.values())
+        self._remove_dead_segments()
+        logger.debug(f"Thumbnail store {self.root}: {len(self._entries)} entries")
+
+    def segment_path(self, segment: int) -> Path:
+        """Path of a segment file"""
+        return self.root / f"seg_{segment:05d}.pack"
+
+    # --- Reads -------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: bytes) -> bool:
+        return self._lookup(key) is not None
+
+    def get(self, key: bytes) -> Optional[memoryview]:
+        """
+        Thumbnail bytes as a zero-copy view into the segment
+
+        Returns:
+            memoryview of the JPEG data, or None if not stored
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                return None
+
+            view = self._view(*_unpack(entry))
+            if view is None:
+                # Moved by another process (compaction); re-read the index
+                self._entries.pop(key, None)
+                entry = self._lookup(key)
+                view = self._view(*_unpack(entry)) if entry is not None else None
+                if view is None:
+                    return None
+
+            self._touched[key] = _now()
+            if len(self._touched) >= TOUCH_FLUSH_EVERY:
+                self.flush()
+            return view
+
+    def missing(self, keys: Iterable[bytes]) -> List[bytes]:
+        """Keys that are not stored (one index query for all in-memory misses)"""
+        unknown = [key for key in keys if key not in self._entries]
+        if not unknown:
+            return []
+
+        found = set()
+        with self._connect() as conn:
+            # Stay below SQLite's host parameter limit
+            for i in range(0, len(unknown), 500):
+                chunk = unknown[i:i + 500]
+                cursor = conn.execute(
+                    f"SELECT key, segment, offset, length FROM thumbs "
+                    f"WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                for key, segment, offset, length in cursor:
+                    self._entries[key] = _pack(segment, offset, length)
+                    found.add(key)
+
+        return [key for key in unknown if key not in found]
+
+    def _lookup(self, key: bytes) -> Optional[int]:
+        """Packed entry from memory, else from the index (added by another process)"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT segment, offset, length FROM thumbs WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        entry = _pack(*row)
+        self._entries[key] = entry
+        return entry
+
+    def _view(self, segment: int, offset: int, length: int) -> Optional[memoryview]:
+        """Slice of a mapped segment (remapped if the file has grown)"""
+        mapped = self._maps.get(segment)
+        if mapped is None or offset + length > len(mapped):
+            try:
+                with open(self.segment_path(segment), 'rb') as f:
+                    size = os.fstat(f.fileno()).st_size
+                    if offset + length > size:
+                        return None
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                return None
+            # The previous map is released once no view refers to it
+            self._maps[segment] = mapped
+        return memoryview(mapped)[offset:offset + length]
+
+    # --- Writes ------------------------------------------------------------
+
+    def put(self, key: bytes, data: bytes) -> None:
+        """Store one thumbnail"""
+        self.put_many([(key, data)])
+
+    def put_many(self, items: Iterable[Tuple[bytes, bytes]]) -> None:
+        """Append thumbnails in one transaction, then enforce the size budget"""
+        items = list(items)
+        if not items:
+            return
+
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                written = self._append(conn, items)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+
+            for key, entry in written.items():
+                previous = self._entries.get(key)
+                if previous is not None:
+                    self._live_bytes -= _unpack(previous)[2]
+                self._live_bytes += _unpack(entry)[2]
+                self._entries[key] = entry
+
+            # The estimate only triggers the exact (full index) check
+            if self._live_bytes > self.max_bytes:
+                self._live_bytes = self.live_bytes()
+                if self._live_bytes > self.max_bytes:
+                    self.evict(int(self.max_bytes * EVICT_TARGET))
+
+    def _append(self, conn: sqlite3.Connection, items: List[Tuple[bytes, bytes]]) -> Dict[bytes, int]:
+        """Write records to the active segment (caller holds the write lock)"""
+        now = _now()
+        written = {}
+        segment = self._active_segment(conn)
+        f = open(self.segment_path(segment), 'ab')
+        try:
+            for key, data in items:
+                offset = f.seek(0, os.SEEK_END)
+                if offset and offset + len(data) > self.segment_bytes:
+                    f.close()
+                    segment = self._new_segment(conn)
+                    f = open(self.segment_path(segment), 'ab')
+                    offset = 0
+
+                f.write(data)
+                conn.execute(
+                    "INSERT OR REPLACE INTO thumbs (key, segment, offset, length, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, segment, offset, len(data), now)
+                )
+                written[key] = _pack(segment, offset, len(data))
+            f.flush()
+            os.fsync(f.fileno())
+        finally:
+            f.close()
+        return written
+
+    def _active_segment(self, conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT MAX(id) FROM segments WHERE dead = 0").fetchone()
+        return row[0] if row[0] is not None else self._new_segment(conn)
+
+    def _new_segment(self, conn: sqlite3.Connection) -> int:
+        return conn.execute("INSERT INTO segments (dead) VALUES (0)").lastrowid
+
+    # --- Budget and compaction ---------------------------------------------
+
+    def flush(self) -> None:
+        """Write buffered access times to the index"""
+        with self._lock:
+            if not self._touched:
+                return
+            touched, self._touched = self._touched, {}
+            with self._connect() as conn:
+                conn.executemany(
+                    "UPDATE thumbs SET last_access = ? WHERE key = ?",
+                    [(stamp, key) for key, stamp in touched.items()]
+                )
+                conn.commit()
+
+    def live_bytes(self) -> int:
+        """Total size of all indexed thumbnails"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COALESCE(SUM(length), 0) FROM thumbs").fetchone()[0]
+
+    def evict(self, target_bytes: int) -> int:
+        """
+        Drop least recently used thumbnails until at most target_bytes remain
+
+        Returns:
+            Number of thumbnails evicted
+        """
+        with self._lock:
+            self.flush()
+            evicted = 0
+            with self._connect() as conn:
+                excess = conn.execute("SELECT COALESCE(SUM(length), 0) FROM thumbs").fetchone()[0] - target_bytes
+                while excess > 0:
+                    rows = conn.execute(
+                        "SELECT key, length FROM thumbs ORDER BY last_access LIMIT 1000"
+                    ).fetchall()
+                    if not rows:
+                        break
+                    victims = []
+                    for key, length in rows:
+                        victims.append((key,))
+                        excess -= length
+                        if excess <= 0:
+                            break
+                    conn.executemany("DELETE FROM thumbs WHERE key = ?", victims)
+                    for (key,) in victims:
+                        self._entries.pop(key, None)
+                    evicted += len(victims)
+                conn.commit()
+                self._live_bytes = conn.execute("SELECT COALESCE(SUM(length), 0) FROM thumbs").fetchone()[0]
+
+        if evicted:
+            logger.info(f"Evicted {evicted} thumbnails (LRU budget {self.max_bytes} bytes)")
+            self.compact()
+        return evicted
+
+    def compact(self, min_live_ratio: float = COMPACT_LIVE_RATIO) -> int:
+        """
+        Rewrite segments that are mostly dead space
+
+        Live records of sparse segments are copied to the active segment,
+        then the old files are deleted (or retried later if another process
+        still has them mapped).
+
+        Returns:
+            Bytes reclaimed
+        """
+        reclaimed = 0
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                active = self._active_segment(conn)
+                live = dict(conn.execute("SELECT segment, SUM(length) FROM thumbs GROUP BY segment"))
+                segments = [row[0] for row in conn.execute("SELECT id FROM segments WHERE dead = 0")]
+
+                for segment in segments:
+                    if segment == active:
+                        continue
+                    path = self.segment_path(segment)
+                    size = path.stat().st_size if path.exists() else 0
+                    live_bytes = live.get(segment, 0)
+                    if size and live_bytes >= size * min_live_ratio:
+                        continue
+
+                    records = conn.execute(
+                        "SELECT key, offset, length FROM thumbs WHERE segment = ?", (segment,)
+                    ).fetchall()
+                    if records:
+                        with open(path, 'rb') as f:
+                            items = []
+                            for key, offset, length in records:
+                                f.seek(offset)
+                                items.append((key, f.read(length)))
+                        self._entries.update(self._append(conn, items))
+
+                    conn.execute("UPDATE segments SET dead = 1 WHERE id = ?", (segment,))
+                    reclaimed += size - live_bytes
+
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+
+            self._remove_dead_segments()
+
+        if reclaimed:
+            logger.info(f"Compacted thumbnail store, reclaimed {reclaimed} bytes")
+        return reclaimed
+
+    def _remove_dead_segments(self) -> None:
+        """Delete files of compacted segments that are no longer mapped anywhere"""
+        with self._connect() as conn:
+            dead = [row[0] for row in conn.execute("SELECT id FROM segments WHERE dead = 1")]
+            removed = []
+            for segment in dead:
+                self._maps.pop(segment, None)
+                try:
+                    self.segment_path(segment).unlink(missing_ok=True)
+                    removed.append((segment,))
+                except PermissionError:
+                    pass  # still mapped by another process (Windows); retry later
+            conn.executemany("DELETE FROM segments WHERE id = ?", removed)
+            conn.commit()
+
+    def close(self) -> None:
+        """Flush access times and release the segment maps"""
+        with self._lock:
+            self.flush()
+            self._maps.clear()
+
+    def __enter__(self) -> "ThumbnailStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _now() -> int:
+    """Access time stamp (nanoseconds, so accesses in the same second are ordered)"""
+    return time.time_ns()
@@ -1,16 +1,31 @@
 """
 Thumbnail generation and caching for photos and videos
+
+Images are decoded at reduced resolution: JPEGs use libjpeg DCT scaling
+(PIL draft(), 1/2, 1/4 or 1/8) and other formats an integer reduce(),
+always staying at or above the largest requested size. All sizes are
+then resampled from that single decode. Small cached thumbnails come from
+the camera's embedded preview when it is large enough (no decode of the
+main image at all).
+
+generate_thumbnail() writes one JPEG file per photo and size (for HTML
+reports that link to files); get_thumbnail_data() serves the same
+thumbnails from the packed ThumbnailStore.
 """
 
 import hashlib
+import math
+from io import BytesIO
 from pathlib import Path
-from typing import Tuple
+from typing import Dict, Sequence, Tuple
 
-import cv2
 import numpy as np
-from PIL import Image
+from PIL import Image, ImageOps
 
 from ..util.logging import get_logger
+from .exif_preview import open_embedded_preview
+from .thumb_store import ThumbnailStore, thumbnail_key
+from .video_preview import read_poster_frame
 
 
 logger = get_logger("thumbnails")
@@ -19,6 +34,12 @@ logger = get_logger("thumbnails")
 # Video extensions
 VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi', '.mkv', '.m4v', '.wmv', '.flv', '.webm'}
 
+# Modes Image.reduce() rejects (palette GIF/PNG, bilevel, 16-bit grayscale)
+UNREDUCIBLE_MODES = {'1', 'P', 'I;16', 'I;16L', 'I;16B', 'I;16N'}
+
+# Integer grayscale modes holding 16-bit samples (PNG/TIFF)
+HIGH_DEPTH_MODES = {'I', 'I;16', 'I;16L', 'I;16B', 'I;16N'}
+
 
 def generate_thumbnail(
     media_path: Path,
@@ -29,7 +50,7 @@ def generate_thumbnail(
     """
     Generate and cache thumbnail for image or video
     
-    For videos, extracts the first frame.
+    For videos, extracts the frame at 1 second (see video_preview).
     
     Args:
         media_path: Source image/video path
@@ -47,6 +68,159 @@ def generate_thumbnail(
         return _generate_image_thumbnail(media_path, cache_dir, size, force_regenerate)
 
 
+def open_image_for_size(image_path: Path, max_size: Tuple[int, int]) -> Image.Image:
+    """
+    Decode an image just large enough to fill a bounding box
+    
+    JPEGs are decoded directly at the smallest DCT scale that still covers
+    the box; other formats are reduced by an integer factor after loading.
+    EXIF orientation is applied (all eight values, including mirrored),
+    and the result is RGB with transparency flattened onto white.
+    
+    Args:
+        image_path: Source image path
+        max_size: Largest (width, height) that will be produced from the image,
+            in display orientation
+        
+    Returns:
+        Oriented RGB image, at least as large as the fitted box (or the original size)
+    """
+    with Image.open(image_path) as img:
+        orientation = img.getexif().get(0x0112, 1)
+        
+        # Orientations 5-8 swap width and height
+        box = max_size if orientation < 5 else (max_size[1], max_size[0])
+        scale = min(box[0] / img.width, box[1] / img.height, 1.0)
+        target = (max(1, math.ceil(img.width * scale)), max(1, math.ceil(img.height * scale)))
+        
+        if img.format == 'JPEG':
+            img.draft('RGB', target)
+        img.load()
+        
+        factor = min(img.width // target[0], img.height // target[1])
+        if factor < 2:
+            reduced = img.copy()
+        elif img.mode in UNREDUCIBLE_MODES:
+            reduced = _to_rgb(img).reduce(factor)
+        else:
+            reduced = img.reduce(factor)
+    
+    if orientation != 1:
+        reduced.getexif()[0x0112] = orientation
+        reduced = ImageOps.exif_transpose(reduced)
+    
+    return _to_rgb(reduced)
+
+
+def _to_rgb(img: Image.Image) -> Image.Image:
+    """RGB image; transparent areas become white, 16-bit samples are scaled to 8 bits"""
+    if img.mode in HIGH_DEPTH_MODES:
+        # convert() would clip at 255; scale like OpenCV (and FeatureExtractor) instead
+        samples = np.clip(np.asarray(img), 0, 65535).astype(np.uint16)
+        img = Image.fromarray((samples >> 8).astype(np.uint8), 'L')
+    if img.mode in ('RGBA', 'LA', 'P'):
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+        return background
+    if img.mode != 'RGB':
+        return img.convert('RGB')
+    return img
+
+
+def render_thumbnails(
+    image_path: Path,
+    sizes: Sequence[Tuple[int, int]]
+) -> Dict[Tuple[int, int], Image.Image]:
+    """
+    Render several thumbnail sizes from one reduced-resolution decode
+    
+    Args:
+        image_path: Source image path
+        sizes: Bounding boxes (width, height)
+        
+    Returns:
+        Dict mapping each size to an oriented RGB image fitting inside it
+    """
+    largest = (max(w for w, _ in sizes), max(h for _, h in sizes))
+    base = open_image_for_size(image_path, largest)
+    
+    thumbs = {}
+    for size in sizes:
+        thumb = base.copy()
+        thumb.thumbnail(size, Image.Resampling.LANCZOS)
+        thumbs[size] = thumb
+    return thumbs
+
+
+def render_media_thumbnails(
+    media_path: Path,
+    sizes: Sequence[Tuple[int, int]]
+) -> Dict[Tuple[int, int], Image.Image]:
+    """
+    Render thumbnails of an image or video, all sizes from one decode
+    
+    Images use the embedded camera preview when it fills the largest
+    size, else a reduced-resolution decode; videos use the poster frame.
+    
+    Args:
+        media_path: Source image/video path
+        sizes: Bounding boxes (width, height)
+        
+    Returns:
+        Dict mapping each size to an RGB image fitting inside it
+    """
+    largest = (max(w for w, _ in sizes), max(h for _, h in sizes))
+    
+    if media_path.suffix.lower() in VIDEO_EXTENSIONS:
+        base = Image.fromarray(read_poster_frame(media_path, max_size=largest))
+    else:
+        base = open_embedded_preview(media_path, largest)
+        if base is None:
+            return render_thumbnails(media_path, sizes)
+    
+    thumbs = {}
+    for size in sizes:
+        thumb = base.copy()
+        thumb.thumbnail(size, Image.Resampling.LANCZOS)
+        thumbs[size] = thumb
+    return thumbs
+
+
+def encode_jpeg(img: Image.Image, quality: int = 85) -> bytes:
+    """JPEG bytes of a thumbnail"""
+    buffer = BytesIO()
+    img.save(buffer, "JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def get_thumbnail_data(
+    media_path: Path,
+    store: ThumbnailStore,
+    size: Tuple[int, int] = (256, 256)
+) -> memoryview:
+    """
+    Thumbnail JPEG from the packed store, generated and stored on a miss
+    
+    Args:
+        media_path: Source image/video path
+        store: Packed thumbnail store (Workspace.thumbnail_store_dir)
+        size: Thumbnail size (width, height)
+        
+    Returns:
+        JPEG data (a view into the store when cached)
+    """
+    key = thumbnail_key(media_path, size)
+    view = store.get(key)
+    if view is not None:
+        return view
+    
+    data = encode_jpeg(render_media_thumbnails(media_path, [size])[size])
+    store.put(key, data)
+    return memoryview(data)
+
+
 def _generate_image_thumbnail(
     image_path: Path,
     cache_dir: Path,
@@ -66,38 +240,10 @@ def _generate_image_thumbnail(
     cache_dir.mkdir(parents=True, exist_ok=True)
     
     try:
-        # Generate thumbnail
-        with Image.open(image_path) as img:
-            # Convert to RGB if necessary (e.g., PNG with alpha)
-            if img.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = background
-            elif img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # Apply EXIF orientation
-            try:
-                exif = img.getexif()
-                if exif:
-                    orientation = exif.get(0x0112)  # Orientation tag
-                    if orientation:
-                        if orientation == 3:
-                            img = img.rotate(180, expand=True)
-                        elif orientation == 6:
-                            img = img.rotate(270, expand=True)
-                        elif orientation == 8:
-                            img = img.rotate(90, expand=True)
-            except:
-                pass
-            
-            # Create thumbnail
-            img.thumbnail(size, Image.Resampling.LANCZOS)
-            
-            # Save to cache
-            img.save(thumb_path, "JPEG", quality=85, optimize=True)
+        img = render_media_thumbnails(image_path, [size])[size]
+        
+        # Save to cache
+        img.save(thumb_path, "JPEG", quality=85, optimize=True)
         
         logger.debug(f"Generated thumbnail: {thumb_path}")
         return thumb_path
@@ -114,7 +260,8 @@ def _generate_video_thumbnail(
     force_regenerate: bool
 ) -> Path:
     """
-    Generate thumbnail for video file by extracting first frame
+    Generate thumbnail for video file from the frame at 1 second
+    (first frame for shorter clips)
     
     Args:
         video_path: Source video path
@@ -135,40 +282,12 @@ def _generate_video_thumbnail(
         return thumb_path
     
     try:
-        # Open video
-        cap = cv2.VideoCapture(str(video_path))
-        
-        if not cap.isOpened():
-            raise ValueError(f"Could not open video: {video_path}")
-        
-        # Try to seek to a frame that's not black (first 5 seconds)
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        if fps > 0:
-            # Try frame at 1 second
-            cap.set(cv2.CAP_PROP_POS_FRAMES, int(fps))
-        
-        # Read frame
-        ret, frame = cap.read()
-        cap.release()
-        
-        if not ret or frame is None:
-            # Try first frame if seeking failed
-            cap = cv2.VideoCapture(str(video_path))
-            ret, frame = cap.read()
-            cap.release()
-            
-            if not ret or frame is None:
-                raise ValueError(f"Could not read frame from video: {video_path}")
-        
-        # Convert BGR to RGB
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        # Seek by time (a frame at 1 second is rarely black), shrink in cv2
+        frame_rgb = read_poster_frame(video_path, max_size=size)
         
         # Convert to PIL Image
         img = Image.fromarray(frame_rgb)
         
-        # Create thumbnail
-        img.thumbnail(size, Image.Resampling.LANCZOS)
-        
         # Save to cache
         cache_dir.mkdir(parents=True, exist_ok=True)
         img.save(thumb_path, "JPEG", quality=85, optimize=True)
@@ -189,9 +308,10 @@ def clear_thumbnail_cache(cache_dir: Path) -> int:
         Number of files deleted
     """
     count = 0
-    for thumb in cache_dir.glob("*.jpg"):
-        thumb.unlink()
-        count += 1
+    for pattern in ("*.jpg", "*.vtt"):
+        for thumb in cache_dir.glob(pattern):
+            thumb.unlink()
+            count += 1
     
     logger.info(f"Cleared {count} thumbnails from cache")
     return count
@@ -0,0 +1,378 @@
+"""
+Native video container reader (no ffprobe)
+
+ISO-BMFF (MP4, MOV, M4V, 3GP): walks the box tree with seeks and reads
+only the small boxes needed - moov/mvhd (creation time, duration),
+trak/tkhd (dimensions), mdia/mdhd + stbl/stts (frame rate), stsd (codec)
+and udta/(c)day. The media data itself is never read.
+
+MPEG-TS (AVCHD .MTS/.M2TS): reads the recording time from the MDPM
+block that camcorders put in the first H.264 SEI, and the duration from
+the first and last PCR in the stream.
+
+Both return a dict with the same keys as extract_video_metadata(), or
+None if the file is not a supported container.
+
+created_time is not in the same time base for both: the MP4 mvhd time
+is UTC (naive, like ffprobe's creation_time), while the MTS MDPM time is
+the camcorder's local clock (naive, like EXIF DateTimeOriginal). MP4
+times have to be converted before they are compared with local times.
+"""
+
+import os
+import struct
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+
+from ..util.logging import get_logger
+
+
+logger = get_logger("video_header")
+
+
+MP4_EPOCH = datetime(1904, 1, 1)
+MAX_LEAF_BYTES = 64 * 1024  # mvhd, tkhd, stts etc. are far smaller
+MAX_BOX_DEPTH = 8
+
+TS_PACKET_BYTES = 188
+TS_SYNC = 0x47
+TS_HEAD_BYTES = 512 * 1024  # MDPM sits in the first I-frame
+TS_TAIL_BYTES = 64 * 1024
+MDPM_MARKER = b'MDPM'
+PCR_HZ = 27_000_000
+
+# Boxes that only contain other boxes
+_CONTAINERS = {b'moov', b'trak', b'mdia', b'minf', b'stbl', b'udta', b'edts'}
+
+
+def read_video_header(video_path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Read creation time, duration, resolution and fps from the container
+
+    Args:
+        video_path: Path to video file
+
+    Returns:
+        Metadata dict (keys as in extract_video_metadata(); created_time
+        is naive UTC for MP4/MOV but naive camcorder local time for
+        MTS/M2TS, see module docstring), or None if the format is not
+        supported or the file is damaged
+    """
+    try:
+        with open(video_path, 'rb') as f:
+            head = f.read(12)
+            size = os.fstat(f.fileno()).st_size
+
+            if len(head) >= 8 and head[4:8] in (b'ftyp', b'moov', b'mdat', b'wide', b'free', b'skip'):
+                return _read_mp4(f, size)
+
+            packet = _ts_packet_size(f)
+            if packet:
+                return _read_mts(f, size, packet)
+
+    except (OSError, struct.error, ValueError, IndexError, OverflowError) as e:
+        logger.debug(f"Could not parse container of {video_path}: {e}")
+
+    return None
+
+
+# --- ISO-BMFF ---------------------------------------------------------------
+
+def _iter_boxes(f: BinaryIO, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """Yield (type, payload_start, payload_end) for boxes in [start, end)"""
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        box_size, box_type = struct.unpack('>I4s', header)
+        header_size = 8
+
+        if box_size == 1:
+            box_size = struct.unpack('>Q', f.read(8))[0]
+            header_size = 16
+        elif box_size == 0:
+            box_size = end - pos
+
+        if box_size < header_size or pos + box_size > end:
+            return  # truncated or corrupt
+
+        yield box_type, pos + header_size, pos + box_size
+        pos += box_size
+
+
+def _read_leaf(f: BinaryIO, start: int, end: int) -> bytes:
+    """Read a small box payload"""
+    f.seek(start)
+    return f.read(min(end - start, MAX_LEAF_BYTES))
+
+
+def _read_mp4(f: BinaryIO, file_size: int) -> Optional[Dict[str, Any]]:
+    """Parse the moov box of an ISO-BMFF file"""
+    moov = None
+    brand = None
+
+    for box_type, start, end in _iter_boxes(f, 0, file_size):
+        if box_type == b'ftyp':
+            brand = _read_leaf(f, start, min(end, start + 4)).decode('ascii', 'replace').strip()
+        elif box_type == b'moov':
+            moov = (start, end)
+            break
+
+    if moov is None:
+        return None
+
+    metadata: Dict[str, Any] = {
+        'size_bytes': file_size,
+        'created_time': None,
+        'duration': 0.0,
+        'width': 0,
+        'height': 0,
+        'codec': 'unknown',
+        'fps': 0.0,
+        'bit_rate': 0,
+        'format_name': 'mov' if brand == 'qt' else 'mp4',
+    }
+
+    udta_date = None
+
+    for box_type, start, end in _iter_boxes(f, *moov):
+        if box_type == b'mvhd':
+            created, duration = _parse_mvhd(_read_leaf(f, start, end))
+            metadata['created_time'] = created
+            metadata['duration'] = duration
+        elif box_type == b'trak':
+            track = _parse_trak(f, start, end)
+            if track and not metadata['width']:
+                metadata.update(track)
+        elif box_type == b'udta':
+            udta_date = udta_date or _parse_udta_date(f, start, end)
+
+    if metadata['created_time'] is None and udta_date:
+        metadata['created_time'] = udta_date
+
+    if metadata['duration'] > 0:
+        metadata['bit_rate'] = int(file_size * 8 / metadata['duration'])
+
+    return metadata
+
+
+def _mp4_time(seconds: int) -> Optional[datetime]:
+    """Seconds since 1904-01-01 UTC; 0 means unset"""
+    if seconds <= 0:
+        return None
+    return MP4_EPOCH + timedelta(seconds=seconds)
+
+
+def _parse_mvhd(data: bytes) -> Tuple[Optional[datetime], float]:
+    """(creation time, duration in seconds) from a movie header"""
+    if data[0] == 1:
+        created, _, timescale, duration = struct.unpack('>QQIQ', data[4:32])
+    else:
+        created, _, timescale, duration = struct.unpack('>IIII', data[4:20])
+    return _mp4_time(created), (duration / timescale if timescale else 0.0)
+
+
+def _parse_trak(f: BinaryIO, start: int, end: int) -> Optional[Dict[str, Any]]:
+    """Dimensions, codec and fps of a video track (None for other tracks)"""
+    width = height = 0
+    handler = None
+    timescale = duration = samples = 0
+    codec = 'unknown'
+
+    def walk(box_start: int, box_end: int, depth: int):
+        nonlocal width, height, handler, timescale, duration, samples, codec
+        if depth > MAX_BOX_DEPTH:
+            return
+
+        for box_type, s, e in _iter_boxes(f, box_start, box_end):
+            if box_type == b'tkhd':
+                data = _read_leaf(f, s, e)
+                offset = 88 if data[0] == 1 else 76  # after matrix
+                w, h = struct.unpack('>II', data[offset:offset + 8])
+                width, height = w >> 16, h >> 16
+            elif box_type == b'hdlr':
+                handler = _read_leaf(f, s, e)[8:12]
+            elif box_type == b'mdhd':
+                data = _read_leaf(f, s, e)
+                if data[0] == 1:
+                    timescale, duration = struct.unpack('>IQ', data[20:32])
+                else:
+                    timescale, duration = struct.unpack('>II', data[12:20])
+            elif box_type == b'stsd':
+                data = _read_leaf(f, s, min(e, s + 16))
+                if len(data) >= 16:
+                    codec = data[12:16].decode('ascii', 'replace').strip()
+            elif box_type == b'stts':
+                data = _read_leaf(f, s, e)
+                count = struct.unpack('>I', data[4:8])[0]
+                if count <= (len(data) - 8) // 8:  # else too large to read: fps unknown
+                    samples = sum(
+                        struct.unpack('>I', data[8 + i * 8:12 + i * 8])[0] for i in range(count)
+                    )
+            elif box_type in _CONTAINERS:
+                walk(s, e, depth + 1)
+
+    walk(start, end, 0)
+
+    if handler != b'vide':
+        return None
+
+    seconds = duration / timescale if timescale else 0
+    return {
+        'width': width,
+        'height': height,
+        'codec': codec,
+        'fps': samples / seconds if seconds else 0.0,
+    }
+
+
+def _parse_udta_date(f: BinaryIO, start: int, end: int) -> Optional[datetime]:
+    """QuickTime (c)day text, e.g. '2024-05-06T07:08:09+0200' (converted to UTC)"""
+    for box_type, s, e in _iter_boxes(f, start, end):
+        if box_type != b'\xa9day':
+            continue
+        data = _read_leaf(f, s, e)
+        # QuickTime text: 2-byte length, 2-byte language, then text
+        text = data[4:4 + struct.unpack('>H', data[:2])[0]].decode('utf-8', 'replace').strip()
+        for fmt in ('%Y-%m-%dT%H:%M:%S%z', '%Y-%m-%dT%H:%M:%SZ', '%Y-%m-%d'):
+            try:
+                parsed = datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+            if parsed.tzinfo is not None:
+                parsed = (parsed - parsed.utcoffset()).replace(tzinfo=None)
+            return parsed
+    return None
+
+
+# --- MPEG-TS (AVCHD) --------------------------------------------------------
+
+def _ts_packet_size(f: BinaryIO) -> Optional[int]:
+    """188 (.MTS) or 192 (.M2TS with timecode prefix) if the file is MPEG-TS"""
+    f.seek(0)
+    data = f.read(192 * 4)
+    for size, offset in ((TS_PACKET_BYTES, 0), (192, 4)):
+        if len(data) >= size * 4 and all(data[offset + i * size] == TS_SYNC for i in range(4)):
+            return size
+    return None
+
+
+def _iter_ts_packets(data: bytes, packet_size: int) -> Iterator[Tuple[int, bytes, Optional[int]]]:
+    """Yield (pid, payload, pcr) for each packet"""
+    offset = packet_size - TS_PACKET_BYTES
+    for pos in range(offset, len(data) - TS_PACKET_BYTES + 1, packet_size):
+        packet = data[pos:pos + TS_PACKET_BYTES]
+        if packet[0] != TS_SYNC:
+            continue
+
+        pid = ((packet[1] & 0x1F) << 8) | packet[2]
+        control = (packet[3] >> 4) & 0x3
+        payload_start = 4
+        pcr = None
+
+        if control & 0x2:  # adaptation field
+            length = packet[4]
+            if length >= 7 and packet[5] & 0x10:
+                base = int.from_bytes(packet[6:11], 'big') >> 7
+                extension = ((packet[10] & 0x1) << 8) | packet[11]
+                pcr = base * 300 + extension
+            payload_start = 5 + length
+
+        payload = packet[payload_start:] if control & 0x1 and payload_start < TS_PACKET_BYTES else b''
+        yield pid, payload, pcr
+
+
+def _read_mts(f: BinaryIO, file_size: int, packet_size: int) -> Dict[str, Any]:
+    """Recording time (MDPM) and duration (PCR span) of an AVCHD stream"""
+    f.seek(0)
+    head = f.read(TS_HEAD_BYTES)
+
+    streams: Dict[int, bytearray] = {}
+    mdpm_tries: Dict[int, int] = {}
+    first_pcr = None
+    created = None
+
+    for pid, payload, pcr in _iter_ts_packets(head, packet_size):
+        if pcr is not None and first_pcr is None:
+            first_pcr = pcr
+
+        if created is None and payload:
+            buffer = streams.setdefault(pid, bytearray())
+            buffer += payload
+            # The block may continue in the next packets of the same PID
+            if pid in mdpm_tries or MDPM_MARKER in buffer[-len(payload) - 4:]:
+                tries = mdpm_tries[pid] = mdpm_tries.get(pid, 0) + 1
+                if tries <= 4:
+                    created = _parse_mdpm(bytes(buffer[buffer.rfind(MDPM_MARKER):]))
+
+        if created is not None and first_pcr is not None:
+            break
+
+    last_pcr = None
+    tail_start = max(0, file_size - TS_TAIL_BYTES)
+    tail_start -= tail_start % packet_size  # stay aligned to packets
+    f.seek(tail_start)
+    for _, _, pcr in _iter_ts_packets(f.read(TS_TAIL_BYTES), packet_size):
+        if pcr is not None:
+            last_pcr = pcr
+
+    duration = 0.0
+    if first_pcr is not None and last_pcr is not None and last_pcr > first_pcr:
+        duration = (last_pcr - first_pcr) / PCR_HZ
+
+    return {
+        'size_bytes': file_size,
+        'created_time': created,
+        'duration': duration,
+        'width': 0,
+        'height': 0,
+        'codec': 'h264',
+        'fps': 0.0,
+        'bit_rate': int(file_size * 8 / duration) if duration else 0,
+        'format_name': 'mpegts',
+    }
+
+
+def _parse_mdpm(data: bytes) -> Optional[datetime]:
+    """
+    Decode the recording time from an H.264 SEI MDPM block
+
+    Layout after 'MDPM': entry count, then 5-byte entries (tag + 4 bytes).
+    Tag 0x18 = timezone, year (2 bytes BCD), month; tag 0x19 = day, hour,
+    minute, second (BCD). The camcorder writes local time, which is
+    returned as is (naive, not converted to UTC).
+    """
+    # Drop H.264 emulation prevention bytes (00 00 03 -> 00 00)
+    data = data.replace(b'\x00\x00\x03', b'\x00\x00')
+
+    index = data.find(MDPM_MARKER)
+    if index < 0 or index + 5 > len(data):
+        return None
+
+    count = data[index + 4]
+    entries = {}
+    pos = index + 5
+    for _ in range(count):
+        if pos + 5 > len(data):
+            break
+        entries[data[pos]] = data[pos + 1:pos + 5]
+        pos += 5
+
+    if 0x18 not in entries or 0x19 not in entries:
+        return None
+
+    def bcd(byte: int) -> int:
+        return (byte >> 4) * 10 + (byte & 0x0F)
+
+    _, year_hi, year_lo, month = entries[0x18]
+    day, hour, minute, second = entries[0x19]
+    try:
+        return datetime(
+            bcd(year_hi) * 100 + bcd(year_lo), bcd(month), bcd(day),
+            bcd(hour), bcd(minute), bcd(second)
+        )
+    except ValueError:
+        return None
@@ -6,27 +6,16 @@ import json
 import subprocess
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Sequence
 
+from .ffprobe import is_ffprobe_available, probe_file, probe_files
+from .video_header import read_video_header
 from ..util.logging import get_logger
 
 
 logger = get_logger("video_metadata")
 
 
-def is_ffprobe_available() -> bool:
-    """Check if ffprobe is available in PATH"""
-    try:
-        subprocess.run(
-            ['ffprobe', '-version'],
-            capture_output=True,
-            check=True
-        )
-        return True
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        return False
-
-
 def extract_video_metadata(video_path: Path) -> Dict[str, Any]:
     """
     Extract metadata from video file using ffprobe
@@ -49,25 +38,12 @@ def extract_video_metadata(video_path: Path) -> Dict[str, Any]:
         return _get_basic_video_info(video_path)
     
     try:
-        cmd = [
-            'ffprobe',
-            '-v', 'quiet',
-            '-print_format', 'json',
-            '-show_format',
-            '-show_streams',
-            str(video_path)
-        ]
-        
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        
-        data = json.loads(result.stdout)
+        data = probe_file(video_path)
         return _parse_ffprobe_output(data, video_path)
     
+    except subprocess.TimeoutExpired as e:
+        logger.error(f"ffprobe timed out for {video_path}: {e}")
+        return _get_basic_video_info(video_path)
     except subprocess.CalledProcessError as e:
         logger.error(f"ffprobe failed for {video_path}: {e}")
         return _get_basic_video_info(video_path)
@@ -79,6 +55,38 @@ def extract_video_metadata(video_path: Path) -> Dict[str, Any]:
         return _get_basic_video_info(video_path)
 
 
+def extract_video_metadata_batch(
+    video_paths: Sequence[Path],
+    cache_path: Optional[Path] = None,
+    max_workers: Optional[int] = None,
+    show_progress: bool = False
+) -> Dict[Path, Dict[str, Any]]:
+    """
+    Extract metadata for many videos with concurrent, cached ffprobe runs
+    
+    Args:
+        video_paths: Video files
+        cache_path: Persistent ffprobe cache (Workspace.ffprobe_cache_file)
+        max_workers: Concurrent ffprobe processes
+        show_progress: Show progress bar
+        
+    Returns:
+        Dict mapping path to metadata (basic file info where ffprobe failed)
+    """
+    probed = probe_files(video_paths, cache_path, max_workers, show_progress=show_progress)
+    
+    metadata = {}
+    for path in video_paths:
+        data = probed.get(path)
+        try:
+            metadata[path] = _parse_ffprobe_output(data, path) if data else _get_basic_video_info(path)
+        except Exception as e:
+            logger.error(f"Error extracting video metadata from {path}: {e}")
+            metadata[path] = _get_basic_video_info(path)
+    
+    return metadata
+
+
 def _parse_ffprobe_output(data: dict, video_path: Path) -> Dict[str, Any]:
     """Parse ffprobe JSON output"""
     metadata = {}
@@ -139,6 +147,11 @@ def _parse_frame_rate(fps_string: str) -> float:
 
 def _get_basic_video_info(video_path: Path) -> Dict[str, Any]:
     """Get basic video info without ffprobe (fallback)"""
+    # Container headers (MP4/MOV/MTS) still give time, duration and size
+    header = read_video_header(video_path)
+    if header is not None:
+        return header
+    
     stat = video_path.stat()
     
     return {
@@ -163,8 +176,14 @@ def get_video_capture_time(video_path: Path, fallback_to_mtime: bool = True) ->
         fallback_to_mtime: Use file modification time if metadata not available
         
     Returns:
-        Datetime object or None
+        Datetime object or None (naive; UTC for MP4/MOV container times,
+        local time for AVCHD/MTS, see video_header)
     """
+    # Native container parsing is enough for most cameras (no subprocess)
+    header = read_video_header(video_path)
+    if header and header.get('created_time'):
+        return header['created_time']
+    
     metadata = extract_video_metadata(video_path)
     
     # Try metadata first
@@ -0,0 +1,355 @@
+"""
+Video preview engine: poster frames, scrub sprite sheets and WebVTT
+
+Frames are located by timestamp (CAP_PROP_POS_MSEC), so the decoder jumps
+to the keyframe before the target instead of decoding every frame from
+the start. Several frames of one clip are taken in a single pass over one
+VideoCapture: targets close to the current position are reached by
+grabbing forward (no decode of skipped frames into images), distant ones
+by seeking. Frames are shrunk with cv2 before they are handed to PIL, so
+4K clips never go through a full-size LANCZOS resample.
+
+A sprite sheet is one JPEG with N tiles in a grid plus a WebVTT file
+whose cues point into it (`sprite.jpg#xywh=x,y,w,h`), the format video
+players use for hover scrubbing. Both live in the thumbnails cache and
+are rebuilt only when the video is newer than the cached files.
+"""
+
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+from tqdm import tqdm
+
+from ..util.logging import get_logger
+from .video_header import read_video_header
+
+
+logger = get_logger("video_preview")
+
+
+SPRITE_FRAMES = 20
+SPRITE_COLUMNS = 5
+SPRITE_TILE_WIDTH = 160
+POSTER_TIME = 1.0  # seconds; first frames are often black
+SEQUENTIAL_GAP_MS = 2000.0  # closer targets are reached by grabbing forward
+DEFAULT_PREVIEW_WORKERS = min(4, os.cpu_count() or 1)
+
+
+@dataclass
+class VideoPreview:
+    """Cached preview files of one video"""
+    video_path: Path
+    sprite_path: Path
+    vtt_path: Path
+    duration: float
+    frame_count: int
+
+
+def get_video_duration(video_path: Path) -> float:
+    """
+    Video duration in seconds (container header first, then OpenCV)
+
+    Returns:
+        Duration in seconds, 0.0 if unknown
+    """
+    header = read_video_header(video_path)
+    if header and header.get('duration', 0) > 0:
+        return float(header['duration'])
+
+    cap = cv2.VideoCapture(str(video_path))
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        return float(frames / fps) if fps > 0 and frames > 0 else 0.0
+    finally:
+        cap.release()
+
+
+def read_frames_at(
+    video_path: Path,
+    timestamps: Sequence[float],
+    max_size: Optional[Tuple[int, int]] = None
+) -> List[Optional[np.ndarray]]:
+    """
+    Decode the frames at the given times in one pass over the video
+
+    Args:
+        video_path: Path to video file
+        timestamps: Times in seconds (any order)
+        max_size: Shrink frames to fit (width, height), None for full size
+
+    Returns:
+        RGB frames in the order of `timestamps`, None where no frame could be read
+
+    Raises:
+        ValueError: Video cannot be opened
+    """
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video: {video_path}")
+
+    frames: List[Optional[np.ndarray]] = [None] * len(timestamps)
+    try:
+        position_ms = -1.0  # time of the frame the decoder is positioned after
+        for index in sorted(range(len(timestamps)), key=lambda i: timestamps[i]):
+            target_ms = max(0.0, timestamps[index] * 1000.0)
+            frame = _read_frame_at(cap, target_ms, position_ms)
+            if frame is None:
+                continue
+            position_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
+            frames[index] = _to_rgb(frame, max_size)
+    finally:
+        cap.release()
+
+    return frames
+
+
+def _read_frame_at(cap: cv2.VideoCapture, target_ms: float, position_ms: float) -> Optional[np.ndarray]:
+    """Read the first frame at or after target_ms, seeking only for long jumps"""
+    if position_ms < 0 or not 0 <= target_ms - position_ms <= SEQUENTIAL_GAP_MS:
+        cap.set(cv2.CAP_PROP_POS_MSEC, target_ms)
+
+    # Bound the walk in case the backend reports no usable position
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    max_grabs = int(SEQUENTIAL_GAP_MS / 1000.0 * (fps if fps > 0 else 60.0)) + 2
+
+    # grab() decodes without converting to an image; only the hit is retrieved
+    for _ in range(max_grabs):
+        if not cap.grab():
+            return None
+        if cap.get(cv2.CAP_PROP_POS_MSEC) >= target_ms:
+            break
+
+    ok, frame = cap.retrieve()
+    return frame if ok else None
+
+
+def _to_rgb(frame: np.ndarray, max_size: Optional[Tuple[int, int]]) -> np.ndarray:
+    """BGR frame to RGB, shrunk with area interpolation to fit max_size"""
+    if max_size:
+        height, width = frame.shape[:2]
+        scale = min(max_size[0] / width, max_size[1] / height)
+        if scale < 1.0:
+            frame = cv2.resize(
+                frame,
+                (max(1, round(width * scale)), max(1, round(height * scale))),
+                interpolation=cv2.INTER_AREA
+            )
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+
+def extract_frames(
+    video_path: Path,
+    count: int,
+    max_size: Optional[Tuple[int, int]] = None
+) -> List[Tuple[float, np.ndarray]]:
+    """
+    Extract `count` evenly spaced frames in one pass
+
+    Frame i is taken from the middle of the i-th of `count` equal
+    segments, so the first and last frames (often black) are avoided.
+
+    Args:
+        video_path: Path to video file
+        count: Number of frames
+        max_size: Shrink frames to fit (width, height)
+
+    Returns:
+        List of (time in seconds, RGB frame); unreadable positions are skipped
+    """
+    duration = get_video_duration(video_path)
+    if duration <= 0 or count <= 0:
+        return []
+
+    step = duration / count
+    timestamps = [step * (i + 0.5) for i in range(count)]
+    frames = read_frames_at(video_path, timestamps, max_size)
+
+    return [(t, frame) for t, frame in zip(timestamps, frames) if frame is not None]
+
+
+def read_poster_frame(
+    video_path: Path,
+    max_size: Optional[Tuple[int, int]] = None,
+    at: float = POSTER_TIME
+) -> np.ndarray:
+    """
+    Frame for a video thumbnail: `at` seconds in, else the first frame
+
+    Both attempts use the same VideoCapture (no reopen on failure).
+
+    Raises:
+        ValueError: Video cannot be opened or has no readable frame
+    """
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video: {video_path}")
+
+    try:
+        frame = _read_frame_at(cap, at * 1000.0, -1.0)
+        if frame is None:
+            # Shorter than `at`, or the seek failed
+            frame = _read_frame_at(cap, 0.0, -1.0)
+    finally:
+        cap.release()
+
+    if frame is None:
+        raise ValueError(f"Could not read frame from video: {video_path}")
+    return _to_rgb(frame, max_size)
+
+
+def preview_paths(video_path: Path, cache_dir: Path) -> Tuple[Path, Path]:
+    """Cache locations (sprite sheet, WebVTT) for a video"""
+    path_hash = hashlib.md5(str(video_path).encode()).hexdigest()
+    return cache_dir / f"{path_hash}_sprite.jpg", cache_dir / f"{path_hash}_sprite.vtt"
+
+
+def build_video_preview(
+    video_path: Path,
+    cache_dir: Path,
+    frames: int = SPRITE_FRAMES,
+    columns: int = SPRITE_COLUMNS,
+    tile_width: int = SPRITE_TILE_WIDTH,
+    force_regenerate: bool = False
+) -> Optional[VideoPreview]:
+    """
+    Build (or reuse) the scrub sprite sheet and WebVTT index of a video
+
+    Args:
+        video_path: Path to video file
+        cache_dir: Thumbnails cache directory
+        frames: Number of tiles
+        columns: Tiles per sprite row
+        tile_width: Tile width in pixels (height follows the aspect ratio)
+        force_regenerate: Rebuild even if cached
+
+    Returns:
+        VideoPreview, or None if no frame could be extracted
+    """
+    sprite_path, vtt_path = preview_paths(video_path, cache_dir)
+
+    if not force_regenerate and _is_fresh(video_path, sprite_path, vtt_path):
+        return VideoPreview(
+            video_path=video_path,
+            sprite_path=sprite_path,
+            vtt_path=vtt_path,
+            duration=get_video_duration(video_path),
+            frame_count=_count_cues(vtt_path)
+        )
+
+    duration = get_video_duration(video_path)
+    # Tiles are at most tile_width wide; height is bounded generously for portrait clips
+    extracted = extract_frames(video_path, frames, max_size=(tile_width, tile_width * 2))
+    if not extracted:
+        logger.warning(f"No frames extracted from {video_path}")
+        return None
+
+    tile_w = max(frame.shape[1] for _, frame in extracted)
+    tile_h = max(frame.shape[0] for _, frame in extracted)
+    columns = max(1, min(columns, len(extracted)))
+    rows = (len(extracted) + columns - 1) // columns
+
+    sheet = Image.new('RGB', (tile_w * columns, tile_h * rows))
+    cues = []
+    step = duration / frames
+
+    for i, (t, frame) in enumerate(extracted):
+        x, y = (i % columns) * tile_w, (i // columns) * tile_h
+        sheet.paste(Image.fromarray(frame), (x, y))
+        start = max(0.0, t - step / 2)
+        cues.append((start, min(duration, start + step), x, y))
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    sheet.save(sprite_path, "JPEG", quality=80, optimize=True)
+    vtt_path.write_text(_format_vtt(sprite_path.name, cues, tile_w, tile_h), encoding='utf-8')
+
+    logger.debug(f"Generated sprite sheet: {sprite_path}")
+    return VideoPreview(
+        video_path=video_path,
+        sprite_path=sprite_path,
+        vtt_path=vtt_path,
+        duration=duration,
+        frame_count=len(extracted)
+    )
+
+
+def build_video_previews(
+    video_paths: Sequence[Path],
+    cache_dir: Path,
+    max_workers: Optional[int] = None,
+    show_progress: bool = False,
+    **kwargs
+) -> Dict[Path, Optional[VideoPreview]]:
+    """
+    Build sprite sheets for many videos with a bounded worker pool
+
+    OpenCV releases the GIL while decoding, so threads decode in parallel;
+    the pool size caps how many clips are open (and buffered) at once.
+
+    Args:
+        video_paths: Videos to process
+        cache_dir: Thumbnails cache directory
+        max_workers: Concurrent videos (default: min(4, CPU count))
+        show_progress: Show progress bar
+        **kwargs: Passed to build_video_preview()
+
+    Returns:
+        Dict mapping path to VideoPreview, or None where it failed
+    """
+    def build(path: Path) -> Optional[VideoPreview]:
+        try:
+            return build_video_preview(path, cache_dir, **kwargs)
+        except Exception as e:
+            logger.error(f"Error generating preview for {path}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers or DEFAULT_PREVIEW_WORKERS) as pool:
+        results = pool.map(build, video_paths)
+        if show_progress:
+            results = tqdm(results, total=len(video_paths), desc="Video previews")
+        return dict(zip(video_paths, results))
+
+
+def _is_fresh(video_path: Path, *cached: Path) -> bool:
+    """True if all cached files exist and are newer than the video"""
+    try:
+        source_mtime = video_path.stat().st_mtime
+        return all(p.exists() and p.stat().st_mtime >= source_mtime for p in cached)
+    except OSError:
+        return False
+
+
+def _count_cues(vtt_path: Path) -> int:
+    """Number of cues in a WebVTT file"""
+    return vtt_path.read_text(encoding='utf-8').count(' --> ')
+
+
+def _format_vtt(
+    sprite_name: str,
+    cues: List[Tuple[float, float, int, int]],
+    tile_w: int,
+    tile_h: int
+) -> str:
+    """WebVTT thumbnail track referencing regions of the sprite sheet"""
+    lines = ["WEBVTT", ""]
+    for start, end, x, y in cues:
+        lines.append(f"{_format_timestamp(start)} --> {_format_timestamp(end)}")
+        lines.append(f"{sprite_name}#xywh={x},{y},{tile_w},{tile_h}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def _format_timestamp(seconds: float) -> str:
+    """Seconds as WebVTT timestamp (HH:MM:SS.mmm)"""
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millis:03d}"
@@ -0,0 +1,326 @@
+"""
+Library watcher: keeps the scan manifest and an in-memory index current
+
+Uses native file system notifications through the optional `watchdog`
+package (inotify on Linux, ReadDirectoryChangesW on Windows, FSEvents on
+macOS). Without it, or when the native observer cannot be started (e.g.
+inotify watch limit reached), the watcher polls with incremental scans,
+which only re-list directories whose mtime changed.
+
+Install native support with:
+    pip install photo-tool[watch]
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Literal, Optional, Set
+
+from .scanner import MediaFile
+from .manifest import ScanDelta, ScanManifest, incremental_scan
+from ..util.logging import get_logger
+
+
+logger = get_logger("watcher")
+
+
+@dataclass
+class LibraryEvent:
+    """A change in the media library"""
+    kind: Literal["added", "modified", "removed"]
+    path: Path
+    media: Optional[MediaFile] = None  # None for removed files
+
+    def to_dict(self) -> dict:
+        """JSON-friendly representation (for SSE / API responses)"""
+        return {
+            'kind': self.kind,
+            'path': str(self.path),
+            'name': self.path.name,
+            'media_type': self.media.media_type if self.media else None,
+            'size': self.media.size_bytes if self.media else None,
+        }
+
+
+LibraryListener = Callable[[List[LibraryEvent]], None]
+
+
+class LibraryWatcher:
+    """
+    Watch scan roots and report added, modified and removed media files
+
+    Usage:
+        watcher = LibraryWatcher(config.scan.roots, config.scan.extensions,
+                                 ws.scan_manifest_file)
+        watcher.add_listener(lambda events: print(events))
+        watcher.start()
+        ...
+        watcher.stop()
+    """
+
+    def __init__(
+        self,
+        roots: List[Path],
+        extensions: List[str],
+        manifest_path: Path,
+        recursive: bool = True,
+        poll_interval: float = 5.0,
+        resync_interval: float = 300.0,
+        debounce: float = 1.0,
+        use_native: bool = True
+    ):
+        """
+        Args:
+            roots: Directories to watch
+            extensions: File extensions to include
+            manifest_path: Scan manifest (Workspace.scan_manifest_file)
+            recursive: Watch subdirectories
+            poll_interval: Seconds between incremental scans when polling
+            resync_interval: Seconds between safety rescans with native events
+            debounce: Seconds to collect native events before processing
+                (a card import produces thousands of events)
+            use_native: Try native notifications before falling back to polling
+        """
+        self.roots = [Path(r) for r in roots]
+        self.extensions = frozenset(ext.lower() for ext in extensions)
+        self.manifest = ScanManifest(manifest_path)
+        self.recursive = recursive
+        self.poll_interval = poll_interval
+        self.resync_interval = resync_interval
+        self.debounce = debounce
+        self.use_native = use_native
+        self.backend: Literal["native", "polling", "stopped"] = "stopped"
+
+        self._media: Dict[Path, MediaFile] = {}
+        self._listeners: List[LibraryListener] = []
+        self._lock = threading.Lock()
+        self._pending_paths: Set[str] = set()
+        self._rescan_requested = False
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+
+    @property
+    def media(self) -> List[MediaFile]:
+        """Current library contents, sorted by path"""
+        with self._lock:
+            return sorted(self._media.values(), key=lambda m: m.path)
+
+    def add_listener(self, callback: LibraryListener) -> None:
+        """Register a callback that receives batches of LibraryEvent"""
+        self._listeners.append(callback)
+
+    def start(self) -> None:
+        """Sync with the disk once, then watch in a background thread"""
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        delta = self._sync()
+        if not delta.initial:
+            # Report what changed while nobody was watching
+            self._emit(_delta_to_events(delta))
+
+        if self.use_native:
+            self._observer = _start_native_observer(self)
+        self.backend = "native" if self._observer is not None else "polling"
+        logger.info(f"Watching {len(self.roots)} root(s) using {self.backend} backend")
+
+        self._thread = threading.Thread(target=self._run, name="library-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching"""
+        self._stop.set()
+        self._wakeup.set()
+
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        self.backend = "stopped"
+
+    def run_forever(self) -> None:
+        """Start and block until interrupted (Ctrl+C)"""
+        self.start()
+        try:
+            while self._thread is not None and self._thread.is_alive():
+                self._thread.join(0.5)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def _run(self) -> None:
+        """Background loop: process native events or poll"""
+        interval = self.resync_interval if self._observer is not None else self.poll_interval
+
+        while not self._stop.is_set():
+            woken = self._wakeup.wait(interval)
+            if self._stop.is_set():
+                break
+
+            try:
+                if woken:
+                    # Let a burst of events settle, then handle it in one batch
+                    self._stop.wait(self.debounce)
+                    self._wakeup.clear()
+                    with self._lock:
+                        paths, self._pending_paths = self._pending_paths, set()
+                        rescan, self._rescan_requested = self._rescan_requested, False
+
+                    events = self._apply_paths(paths)
+                    if rescan:
+                        events.extend(self._rescan())
+                else:
+                    events = self._rescan()
+
+                self._emit(events)
+            except Exception as e:
+                logger.error(f"Watcher error: {e}")
+
+    def _on_native_event(self, event) -> None:
+        """Called from the observer thread for every file system event"""
+        if event.is_directory:
+            # New/removed/renamed folders: let an incremental scan sort it out
+            if event.event_type in ("created", "deleted", "moved"):
+                with self._lock:
+                    self._rescan_requested = True
+                self._wakeup.set()
+            return
+
+        if event.event_type not in ("created", "modified", "deleted", "moved", "closed"):
+            return
+
+        paths = [event.src_path]
+        if event.event_type == "moved":
+            paths.append(event.dest_path)
+
+        paths = [os.fsdecode(p) for p in paths if self._matches(os.fsdecode(p))]
+        if not paths:
+            return
+
+        with self._lock:
+            self._pending_paths.update(paths)
+        self._wakeup.set()
+
+    def _matches(self, path: str) -> bool:
+        """Check extension filter"""
+        return os.path.splitext(path)[1].lower() in self.extensions
+
+    def _apply_paths(self, paths: Set[str]) -> List[LibraryEvent]:
+        """Stat individually reported files and update index and manifest"""
+        events = []
+        file_updates = []
+        removed_files = []
+
+        for path_str in sorted(paths):
+            path = Path(path_str)
+            try:
+                stat = os.stat(path_str)
+                exists = os.path.isfile(path_str)
+            except OSError:
+                exists = False
+
+            with self._lock:
+                previous = self._media.get(path)
+
+                if not exists:
+                    if previous is not None:
+                        del self._media[path]
+                        events.append(LibraryEvent("removed", path))
+                        removed_files.append(path_str)
+                    continue
+
+                media_file = MediaFile.from_stat(path, stat)
+                if (
+                    previous is not None
+                    and previous.size_bytes == media_file.size_bytes
+                    and previous.modified_time == media_file.modified_time
+                ):
+                    continue
+
+                self._media[path] = media_file
+
+            events.append(LibraryEvent("added" if previous is None else "modified", path, media_file))
+            file_updates.append((path_str, os.path.dirname(path_str), stat.st_size, stat.st_mtime_ns))
+
+        if file_updates or removed_files:
+            self.manifest.update_files(file_updates, removed_files)
+
+        return events
+
+    def _rescan(self) -> List[LibraryEvent]:
+        """Incremental scan of all roots; returns the changes as events"""
+        return _delta_to_events(self._sync())
+
+    def _sync(self) -> ScanDelta:
+        """Incremental scan of all roots; replaces the in-memory index"""
+        delta = incremental_scan(
+            self.roots,
+            list(self.extensions),
+            self.manifest,
+            recursive=self.recursive,
+            show_progress=False
+        )
+
+        with self._lock:
+            self._media = {m.path: m for m in delta.media}
+
+        return delta
+
+    def _emit(self, events: List[LibraryEvent]) -> None:
+        """Deliver events to all listeners"""
+        if not events:
+            return
+
+        logger.info(f"Library changed: {len(events)} event(s)")
+        for listener in self._listeners:
+            try:
+                listener(events)
+            except Exception as e:
+                logger.error(f"Library listener failed: {e}")
+
+
+def _delta_to_events(delta: ScanDelta) -> List[LibraryEvent]:
+    """Convert a ScanDelta to events"""
+    events = [LibraryEvent("added", m.path, m) for m in delta.added]
+    events.extend(LibraryEvent("modified", m.path, m) for m in delta.changed)
+    events.extend(LibraryEvent("removed", p) for p in delta.removed)
+    return events
+
+
+def _start_native_observer(watcher: LibraryWatcher):
+    """Start a watchdog observer, or return None to fall back to polling"""
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        logger.info("watchdog not installed, falling back to polling")
+        return None
+
+    class _Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            watcher._on_native_event(event)
+
+    handler = _Handler()
+    observer = Observer()
+
+    try:
+        for root in watcher.roots:
+            if root.exists():
+                observer.schedule(handler, str(root), recursive=watcher.recursive)
+        observer.start()
+    except Exception as e:
+        # e.g. inotify watch limit (fs.inotify.max_user_watches) exceeded
+        logger.warning(f"Native file watching unavailable ({e}), falling back to polling")
+        return None
+
+    return observer
@@ -0,0 +1,373 @@
+"""
+Audio waveform peaks for the web GUI
+
+Audio is decoded in fixed-size chunks and reduced to (min, max) pairs per
+block of samples at several zoom levels, so drawing a recording needs a
+few kilobytes instead of the full file. PCM/float WAV is read natively
+with numpy; other formats are streamed through an `ffmpeg` pipe. Decoder
+memory is bounded by the chunk size, not by the recording length; only
+the peaks (1/256 of the samples or less, one byte each) are kept.
+
+Peaks file layout (little endian):
+    header      4s magic 'PTPK', B version, B bits (8), B level count,
+                x pad, I sample rate, Q frame count
+    level table per level: I samples per peak, I peak count
+    data        per level: int8 (min, max) pairs, scaled to -127..127
+"""
+
+import hashlib
+import struct
+import subprocess
+import uuid
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..util.logging import get_logger
+from .audio_metadata import extract_audio_metadata
+
+
+logger = get_logger("waveform")
+
+
+PEAK_LEVELS = (256, 1024, 4096, 16384)  # samples per peak, finest first
+CHUNK_FRAMES = 65536
+FFMPEG_SAMPLE_RATE = 44100  # used when the source rate is unknown
+
+PEAKS_MAGIC = b'PTPK'
+PEAKS_VERSION = 1
+_HEADER = struct.Struct('<4sBBBxIQ')
+_LEVEL = struct.Struct('<II')
+
+_WAVE_PCM = 0x0001
+_WAVE_FLOAT = 0x0003
+_WAVE_EXTENSIBLE = 0xFFFE
+
+
+@dataclass
+class WaveformLevel:
+    """Peaks at one zoom level"""
+    samples_per_peak: int
+    peaks: np.ndarray  # int8, shape (n, 2): min, max
+
+
+@dataclass
+class Waveform:
+    """Multi-resolution waveform peaks of one recording"""
+    sample_rate: int
+    frames: int
+    levels: List[WaveformLevel]
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds"""
+        return self.frames / self.sample_rate if self.sample_rate else 0.0
+
+
+def compute_waveform(
+    audio_path: Path,
+    levels: Sequence[int] = PEAK_LEVELS,
+    chunk_frames: int = CHUNK_FRAMES
+) -> Optional[Waveform]:
+    """
+    Decode an audio file in chunks and reduce it to min/max peaks
+
+    Channels are merged (min over channels, max over channels).
+
+    Args:
+        audio_path: Path to audio file
+        levels: Samples per peak for each zoom level; every level must be
+            a multiple of the first
+        chunk_frames: Frames decoded per chunk
+
+    Returns:
+        Waveform, or None if the file cannot be decoded
+    """
+    base = levels[0]
+    if any(level % base for level in levels):
+        raise ValueError(f"Peak levels must be multiples of {base}: {levels}")
+
+    # Align chunks to whole peaks so only the last one can be partial
+    chunk_frames = max(base, chunk_frames - chunk_frames % base)
+
+    decoder = _open_decoder(audio_path, chunk_frames)
+    if decoder is None:
+        return None
+    sample_rate, chunks = decoder
+
+    lows: List[np.ndarray] = []
+    highs: List[np.ndarray] = []
+    frames = 0
+    pending: List[np.ndarray] = []  # short chunks carried to the next round
+    pending_frames = 0
+
+    try:
+        for chunk in chunks:
+            # (frames, channels) -> per-frame envelope over channels
+            low, high = chunk.min(axis=1), chunk.max(axis=1)
+            frames += len(low)
+
+            if pending:
+                pending.append(np.stack([low, high]))
+                pending_frames += len(low)
+                if pending_frames < base:
+                    continue
+                merged = np.concatenate(pending, axis=1)
+                pending, pending_frames = [], 0
+                low, high = merged[0], merged[1]
+
+            usable = len(low) - len(low) % base
+            if usable:
+                lows.append(low[:usable].reshape(-1, base).min(axis=1))
+                highs.append(high[:usable].reshape(-1, base).max(axis=1))
+            if usable < len(low):
+                pending = [np.stack([low[usable:], high[usable:]])]
+                pending_frames = len(low) - usable
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not decode {audio_path}: {e}")
+        return None
+
+    if pending:
+        rest = np.concatenate(pending, axis=1)
+        lows.append(rest[0].min(keepdims=True))
+        highs.append(rest[1].max(keepdims=True))
+
+    if not lows:
+        return None
+
+    low = np.concatenate(lows)
+    high = np.concatenate(highs)
+
+    result = []
+    for samples_per_peak in levels:
+        factor = samples_per_peak // base
+        starts = np.arange(0, len(low), factor)
+        result.append(WaveformLevel(
+            samples_per_peak=samples_per_peak,
+            peaks=_quantize(np.minimum.reduceat(low, starts), np.maximum.reduceat(high, starts))
+        ))
+
+    return Waveform(sample_rate=sample_rate, frames=frames, levels=result)
+
+
+def _quantize(low: np.ndarray, high: np.ndarray) -> np.ndarray:
+    """Float envelope (-1..1) to int8 (min, max) pairs"""
+    pairs = np.stack([low, high], axis=1)
+    return np.clip(np.round(pairs * 127.0), -127, 127).astype(np.int8)
+
+
+def write_waveform(waveform: Waveform, path: Path) -> None:
+    """Write peaks in the compact binary format (see module docstring)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Unique name: two GUI requests may generate the same waveform at once
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(
+            PEAKS_MAGIC, PEAKS_VERSION, 8, len(waveform.levels),
+            waveform.sample_rate, waveform.frames
+        ))
+        for level in waveform.levels:
+            f.write(_LEVEL.pack(level.samples_per_peak, len(level.peaks)))
+        for level in waveform.levels:
+            f.write(level.peaks.tobytes())
+
+    # Readers (the GUI server) never see a half-written file
+    tmp_path.replace(path)
+
+
+def read_waveform(path: Path) -> Waveform:
+    """
+    Read a peaks file
+
+    Raises:
+        ValueError: Not a peaks file or unsupported version
+    """
+    data = Path(path).read_bytes()
+    magic, version, bits, level_count, sample_rate, frames = _HEADER.unpack_from(data, 0)
+    if magic != PEAKS_MAGIC or version != PEAKS_VERSION or bits != 8:
+        raise ValueError(f"Not a waveform peaks file: {path}")
+
+    table_offset = _HEADER.size
+    offset = table_offset + level_count * _LEVEL.size
+    levels = []
+    for i in range(level_count):
+        samples_per_peak, count = _LEVEL.unpack_from(data, table_offset + i * _LEVEL.size)
+        peaks = np.frombuffer(data, dtype=np.int8, count=count * 2, offset=offset).reshape(-1, 2)
+        levels.append(WaveformLevel(samples_per_peak=samples_per_peak, peaks=peaks))
+        offset += count * 2
+
+    return Waveform(sample_rate=sample_rate, frames=frames, levels=levels)
+
+
+def waveform_path(audio_path: Path, cache_dir: Path) -> Path:
+    """Cache location of the peaks file for an audio file"""
+    path_hash = hashlib.md5(str(audio_path).encode()).hexdigest()
+    return cache_dir / f"{path_hash}.peaks"
+
+
+def get_waveform_file(
+    audio_path: Path,
+    cache_dir: Path,
+    force_regenerate: bool = False
+) -> Optional[Path]:
+    """
+    Peaks file for an audio file, computed on first use
+
+    Args:
+        audio_path: Path to audio file
+        cache_dir: Waveform cache directory (Workspace.waveforms_dir)
+        force_regenerate: Recompute even if cached
+
+    Returns:
+        Path to the peaks file, or None if the audio cannot be decoded
+    """
+    peaks_path = waveform_path(audio_path, cache_dir)
+
+    if not force_regenerate and peaks_path.exists():
+        if peaks_path.stat().st_mtime >= audio_path.stat().st_mtime:
+            return peaks_path
+
+    waveform = compute_waveform(audio_path)
+    if waveform is None:
+        return None
+
+    write_waveform(waveform, peaks_path)
+    logger.debug(f"Generated waveform peaks: {peaks_path}")
+    return peaks_path
+
+
+# --- Decoders ---------------------------------------------------------------
+
+Decoder = Tuple[int, Iterator[np.ndarray]]
+
+
+def _open_decoder(audio_path: Path, chunk_frames: int) -> Optional[Decoder]:
+    """(sample rate, iterator of float32 (frames, channels) chunks)"""
+    decoder = _open_wave(audio_path, chunk_frames)
+    if decoder is not None:
+        return decoder
+
+    if not is_ffmpeg_available():
+        logger.warning("ffmpeg not found. Install ffmpeg to draw waveforms of compressed audio.")
+        return None
+
+    sample_rate = extract_audio_metadata(audio_path).get('sample_rate') or FFMPEG_SAMPLE_RATE
+    return sample_rate, _iter_ffmpeg(audio_path, sample_rate, chunk_frames)
+
+
+def _open_wave(audio_path: Path, chunk_frames: int) -> Optional[Decoder]:
+    """Native decoder for PCM and float WAV files"""
+    try:
+        with open(audio_path, 'rb') as f:
+            head = f.read(12)
+            if head[:4] != b'RIFF' or head[8:12] != b'WAVE':
+                return None
+
+            fmt = None
+            while True:
+                chunk_header = f.read(8)
+                if len(chunk_header) < 8:
+                    return None
+                chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+                if chunk_id == b'fmt ':
+                    fmt = f.read(chunk_size + (chunk_size & 1))
+                elif chunk_id == b'data':
+                    data_offset = f.tell()
+                    break
+                else:
+                    f.seek(chunk_size + (chunk_size & 1), 1)
+    except (OSError, struct.error) as e:
+        logger.debug(f"Could not read WAV chunks of {audio_path}: {e}")
+        return None
+
+    if fmt is None or len(fmt) < 16:
+        return None
+
+    tag, channels, sample_rate, _, block_align, bits = struct.unpack('<HHIIHH', fmt[:16])
+    if tag == _WAVE_EXTENSIBLE and len(fmt) >= 26:
+        tag = struct.unpack('<H', fmt[24:26])[0]
+
+    sample_bytes = bits // 8
+    if not channels or block_align != channels * sample_bytes:
+        return None
+    if not ((tag == _WAVE_PCM and bits in (8, 16, 24, 32)) or (tag == _WAVE_FLOAT and bits in (32, 64))):
+        return None
+
+    # 0 / 0xFFFFFFFF: size unknown (streamed); read to the end of the file
+    data_size = chunk_size if 0 < chunk_size < 0xFFFFFFFF else None
+
+    def chunks() -> Iterator[np.ndarray]:
+        remaining = data_size
+        with open(audio_path, 'rb') as f:
+            f.seek(data_offset)
+            while remaining is None or remaining > 0:
+                want = chunk_frames * block_align
+                if remaining is not None:
+                    want = min(want, remaining)
+                raw = f.read(want)
+                usable = len(raw) - len(raw) % block_align
+                if not usable:
+                    return
+                if remaining is not None:
+                    remaining -= len(raw)
+                yield _decode_pcm(raw[:usable], tag, bits).reshape(-1, channels)
+
+    return sample_rate, chunks()
+
+
+def _decode_pcm(raw: bytes, tag: int, bits: int) -> np.ndarray:
+    """Raw WAV samples to float32 in -1..1"""
+    if tag == _WAVE_FLOAT:
+        return np.frombuffer(raw, dtype='<f4' if bits == 32 else '<f8').astype(np.float32)
+
+    if bits == 8:  # unsigned
+        return (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    if bits == 16:
+        return np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+    if bits == 24:
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        values = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        values = np.where(values & 0x800000, values - 0x1000000, values)
+        return values.astype(np.float32) / 8388608.0
+    return (np.frombuffer(raw, dtype='<i4') / 2147483648.0).astype(np.float32)
+
+
+@lru_cache(maxsize=1)
+def is_ffmpeg_available() -> bool:
+    """Check if ffmpeg is available in PATH (checked once per process)"""
+    try:
+        subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True, timeout=30)
+        return True
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError):
+        return False
+
+
+def _iter_ffmpeg(audio_path: Path, sample_rate: int, chunk_frames: int) -> Iterator[np.ndarray]:
+    """Decode any format ffmpeg reads to mono float32 through a pipe"""
+    cmd = [
+        'ffmpeg',
+        '-v', 'quiet',
+        '-i', str(audio_path),
+        '-vn',
+        '-ac', '1',
+        '-ar', str(sample_rate),
+        '-f', 'f32le',
+        '-'
+    ]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            raw = process.stdout.read(chunk_frames * 4)
+            usable = len(raw) - len(raw) % 4
+            if not usable:
+                break
+            yield np.frombuffer(raw[:usable], dtype='<f4').reshape(-1, 1)
+    finally:
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()
+        process.wait()
@@ -3,8 +3,19 @@ Path utilities for cross-platform compatibility
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
-from typing import List
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .logging import get_logger
+
+
+logger = get_logger("paths")
+
+# Default number of threads used to list directories in parallel.
+# Directory listing is I/O bound, so more threads than cores pays off
+# on network filesystems (NAS, SMB shares).
+DEFAULT_SCAN_WORKERS = min(32, (os.cpu_count() or 1) + 4)
 
 
 def ensure_dir(path: Path) -> Path:
@@ -67,13 +78,91 @@ def find_files(
     Returns:
         List of matching file paths
     """
-    extensions_lower = [ext.lower() for ext in extensions]
-    files = []
+    return sorted(path for path, _ in iter_files(root, extensions, recursive))
+
+
+def iter_files(
+    root: Path,
+    extensions: Iterable[str],
+    recursive: bool = True,
+    max_workers: Optional[int] = None
+) -> Iterator[Tuple[Path, os.stat_result]]:
+    """
+    Walk a directory tree with os.scandir and yield matching files
     
-    pattern = "**/*" if recursive else "*"
+    Each file is yielded together with its stat result, so callers do not
+    need to stat it again. Subdirectories are listed in parallel on a
+    bounded thread pool. Files are yielded as soon as their directory has
+    been listed, in no particular order.
     
-    for item in root.glob(pattern):
-        if item.is_file() and item.suffix.lower() in extensions_lower:
-            files.append(item)
+    Args:
+        root: Root directory to search
+        extensions: File extensions to include (e.g., ['.jpg', '.jpeg'])
+        recursive: Search subdirectories
+        max_workers: Number of listing threads (default: DEFAULT_SCAN_WORKERS)
+        
+    Yields:
+        (path, stat_result) tuples
+    """
+    extensions_lower = frozenset(ext.lower() for ext in extensions)
+    workers = max_workers or DEFAULT_SCAN_WORKERS
+    
+    if not recursive or workers <= 1:
+        # Serial walk: no thread overhead for flat or tiny trees
+        stack = [str(root)]
+        while stack:
+            files, subdirs = list_directory(stack.pop(), extensions_lower)
+            yield from files
+            if recursive:
+                stack.extend(subdirs)
+        return
+    
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan") as pool:
+        pending = {pool.submit(list_directory, str(root), extensions_lower)}
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    files, subdirs = future.result()
+                    for subdir in subdirs:
+                        pending.add(pool.submit(list_directory, subdir, extensions_lower))
+                    yield from files
+        finally:
+            # Generator closed early: drop work that has not started yet
+            for future in pending:
+                future.cancel()
+
+
+def list_directory(
+    directory: str,
+    extensions: frozenset
+) -> Tuple[List[Tuple[Path, os.stat_result]], List[str]]:
+    """
+    List a single directory (non-recursive)
+    
+    Args:
+        directory: Directory to list
+        extensions: Lower-case file extensions to include
+        
+    Returns:
+        (matching files with stat results, subdirectory paths)
+    """
+    files = []
+    subdirs = []
+    
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in extensions and entry.is_file():
+                        # DirEntry caches the stat result (free on Windows,
+                        # one syscall elsewhere)
+                        files.append((Path(entry.path), entry.stat()))
+                except OSError as e:
+                    logger.debug(f"Could not stat {entry.path}: {e}")
+    except OSError as e:
+        logger.warning(f"Could not read directory {directory}: {e}")
     
-    return sorted(files)
+    return files, subdirs
@@ -5,7 +5,7 @@ Simple SQLite database for photo indexing
 
 import sqlite3
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
 from dataclasses import dataclass
 from datetime import datetime
 
@@ -98,6 +98,46 @@ class PhotoDatabase:
             conn.commit()
             return cursor.lastrowid
     
+    def insert_photos(self, photos: List[PhotoRecord]) -> None:
+        """Insert or update many photo records in one transaction"""
+        if not photos:
+            return
+        
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO photos 
+                (path, filename, size_bytes, modified_time, captured_time,
+                 width, height, camera_model, lens_model, focal_length,
+                 aperture, iso, shutter_speed, phash, blur_score)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(
+                photo.path, photo.filename, photo.size_bytes,
+                photo.modified_time, photo.captured_time,
+                photo.width, photo.height, photo.camera_model,
+                photo.lens_model, photo.focal_length, photo.aperture,
+                photo.iso, photo.shutter_speed, photo.phash, photo.blur_score
+            ) for photo in photos])
+            conn.commit()
+    
+    def get_photos_by_path(self, paths: Iterable[str]) -> Dict[str, PhotoRecord]:
+        """Get records for the given paths (missing paths are omitted)"""
+        paths = list(paths)
+        records = {}
+        
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            # Stay below SQLite's host parameter limit
+            for i in range(0, len(paths), 500):
+                chunk = paths[i:i + 500]
+                cursor = conn.execute(
+                    f"SELECT * FROM photos WHERE path IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                for row in cursor:
+                    records[row['path']] = self._row_to_record(row)
+        
+        return records
+    
     def get_all_photos(self, order_by: str = "captured_time") -> List[PhotoRecord]:
         """Get all photos, optionally sorted"""
         with sqlite3.connect(self.db_path) as conn:
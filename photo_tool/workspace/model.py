@@ -18,9 +18,15 @@ class Workspace:
             config.yaml           # Configuration
             cache/                # Cached data (thumbnails, hashes)
                 thumbnails/
+                thumbstore/       # Packed thumbnails (segments + index)
                 hashes/
+                proxies/          # SSIM proxies (use_ssim_refine)
+                waveforms/        # Audio peaks for the web GUI
+                quality_matrix.bin  # Blur/exposure statistics
+                ffprobe.sqlite    # Cached ffprobe output
             db/                   # SQLite database
                 index.sqlite
+                scan_manifest.sqlite
             reports/              # Generated reports
             exports/              # Exported/processed images
             logs/                 # Log files
@@ -45,11 +51,36 @@ class Workspace:
         """Thumbnails cache"""
         return self.cache_dir / "thumbnails"
     
+    @property
+    def thumbnail_store_dir(self) -> Path:
+        """Packed thumbnail store"""
+        return self.cache_dir / "thumbstore"
+    
     @property
     def hashes_dir(self) -> Path:
         """Perceptual hashes cache"""
         return self.cache_dir / "hashes"
     
+    @property
+    def proxies_dir(self) -> Path:
+        """SSIM proxy cache"""
+        return self.cache_dir / "proxies"
+    
+    @property
+    def waveforms_dir(self) -> Path:
+        """Audio waveform peaks cache"""
+        return self.cache_dir / "waveforms"
+    
+    @property
+    def quality_matrix_file(self) -> Path:
+        """Per-photo blur and exposure statistics (memory-mapped)"""
+        return self.cache_dir / "quality_matrix.bin"
+    
+    @property
+    def ffprobe_cache_file(self) -> Path:
+        """Cached ffprobe output for videos and audio"""
+        return self.cache_dir / "ffprobe.sqlite"
+    
     @property
     def db_dir(self) -> Path:
         """Database directory"""
@@ -60,6 +91,11 @@ class Workspace:
         """SQLite database file"""
         return self.db_dir / "index.sqlite"
     
+    @property
+    def scan_manifest_file(self) -> Path:
+        """Scan manifest for incremental rescans"""
+        return self.db_dir / "scan_manifest.sqlite"
+    
     @property
     def reports_dir(self) -> Path:
         """Reports output directory"""
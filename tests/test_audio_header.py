@@ -0,0 +1,83 @@
+"""
+Tests for the native audio header reader
+"""
+
+import struct
+import wave
+from datetime import datetime
+
+import pytest
+
+from photo_tool.io.audio_header import read_audio_header
+
+
+def test_broadcast_wav(tmp_path):
+    """fmt/data sizes give the duration; bext gives the recording time"""
+    path = tmp_path / "ZOOM0001.WAV"
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(2)
+        w.setsampwidth(3)
+        w.setframerate(48000)
+        w.writeframes(bytes(6 * 48000 * 3))
+
+    # Insert a bext chunk before fmt, as field recorders do
+    data = path.read_bytes()
+    bext = bytearray(602)
+    bext[320:338] = b"2024-05-0607:08:09"
+    chunk = b"bext" + struct.pack("<I", len(bext)) + bytes(bext)
+    data = data[:12] + chunk + data[12:]
+    data = data[:4] + struct.pack("<I", len(data) - 8) + data[8:]
+    path.write_bytes(data)
+
+    meta = read_audio_header(path)
+
+    assert meta["duration"] == pytest.approx(3.0)
+    assert (meta["sample_rate"], meta["channels"], meta["bit_depth"]) == (48000, 2, 24)
+    assert meta["codec"] == "pcm_s24le"
+    assert meta["created_time"] == datetime(2024, 5, 6, 7, 8, 9)
+
+
+def test_flac_streaminfo(tmp_path):
+    """STREAMINFO fields and Vorbis comments"""
+    sample_rate, channels, bits, samples = 96000, 2, 24, 96000 * 90
+    packed = (sample_rate << 44) | ((channels - 1) << 41) | ((bits - 1) << 36) | samples
+    streaminfo = bytes(10) + packed.to_bytes(8, "big") + bytes(16)
+    comments = [b"TITLE=Birds", b"DATE=2023-04-01"]
+    vorbis = struct.pack("<I", 3) + b"lib" + struct.pack("<I", len(comments))
+    vorbis += b"".join(struct.pack("<I", len(c)) + c for c in comments)
+
+    path = tmp_path / "take.flac"
+    path.write_bytes(
+        b"fLaC"
+        + bytes([0]) + len(streaminfo).to_bytes(3, "big") + streaminfo
+        + bytes([0x84]) + len(vorbis).to_bytes(3, "big") + vorbis
+        + bytes(1000)
+    )
+
+    meta = read_audio_header(path)
+
+    assert meta["duration"] == pytest.approx(90.0)
+    assert (meta["sample_rate"], meta["channels"], meta["bit_depth"]) == (96000, 2, 24)
+    assert meta["title"] == "Birds"
+    assert meta["created_time"] == datetime(2023, 4, 1)
+
+
+def test_mp3_xing(tmp_path):
+    """Duration from the Xing frame count after an ID3v2 tag"""
+    title = b"\x03Song"
+    id3_frame = b"TIT2" + struct.pack(">I", len(title)) + b"\x00\x00" + title
+    id3 = b"ID3\x03\x00\x00" + bytes([0, 0, 0, len(id3_frame)]) + id3_frame
+
+    # MPEG-1 Layer III, 128 kbps, 44.1 kHz, stereo
+    frame = bytearray(417)
+    frame[0:4] = b"\xff\xfb\x90\x00"
+    frame[36:48] = b"Xing" + struct.pack(">II", 1, 1000)
+
+    path = tmp_path / "song.mp3"
+    path.write_bytes(id3 + bytes(frame) * 3)
+
+    meta = read_audio_header(path)
+
+    assert meta["duration"] == pytest.approx(1000 * 1152 / 44100)
+    assert (meta["sample_rate"], meta["channels"]) == (44100, 2)
+    assert meta["title"] == "Song"
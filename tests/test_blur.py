@@ -0,0 +1,64 @@
+"""
+Tests for blur scoring at reduced analysis resolution
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from photo_tool.analysis.features import FeatureExtractor
+from photo_tool.analysis.similarity.blur import BlurMethod, calibrate_blur_scale, detect_blur, read_gray
+
+
+def _photo(path, sigma, seed=0):
+    """Random discs, blurred by sigma"""
+    rng = np.random.default_rng(seed)
+    img = np.zeros((480, 640, 3), np.uint8)
+    for _ in range(60):
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        center = (int(rng.integers(0, 640)), int(rng.integers(0, 480)))
+        cv2.circle(img, center, int(rng.integers(5, 80)), color, -1)
+    cv2.imwrite(str(path), cv2.GaussianBlur(img, (0, 0), sigma), [cv2.IMWRITE_JPEG_QUALITY, 92])
+    return path
+
+
+def test_scales_and_feature_extractor(tmp_path):
+    """Full scale keeps the previous scores; reduced scales decode smaller and agree with FeatureExtractor"""
+    path = _photo(tmp_path / "a.jpg", 0.5)
+    gray = cv2.cvtColor(cv2.imread(str(path)), cv2.COLOR_BGR2GRAY)
+    assert detect_blur(path) == pytest.approx(cv2.Laplacian(gray, cv2.CV_64F).var(), rel=1e-9)
+    assert detect_blur(path, BlurMethod.VARIANCE) == pytest.approx(gray.var(), rel=1e-9)
+
+    for scale in (2, 4, 8):
+        assert read_gray(path, scale).shape == (480 // scale, 640 // scale)
+        features = FeatureExtractor(analysis_scale=scale).extract(path)
+        assert features.blur_score == detect_blur(path, scale=scale)
+        assert features.luminance_histogram.sum() == (480 // scale) * (640 // scale)
+        assert (features.width, features.height) == (640, 480)
+
+    with pytest.raises(ValueError):
+        detect_blur(path, scale=3)
+
+
+def test_calibration_keeps_blurry_share(tmp_path):
+    """Mapped threshold marks the same sample photos as blurry"""
+    sigmas = [0.3, 0.6, 1, 1.5, 2, 3, 4, 6]
+    paths = [_photo(tmp_path / f"{i}.jpg", s, seed=i) for i, s in enumerate(sigmas)]
+    (tmp_path / "broken.jpg").write_bytes(b"no image")
+
+    calibration = calibrate_blur_scale(paths + [tmp_path / "broken.jpg"], scale=4)
+    assert len(calibration.scores) == len(paths)
+
+    full = [detect_blur(p) for p in paths]
+    threshold = float(np.median(full))
+    mapped = calibration.map_threshold(threshold)
+    assert calibration.agreement(threshold) == 1.0
+    assert [s < threshold for s in full] == [detect_blur(p, scale=4) < mapped for p in paths]
+
+    # Monotonic, also outside the sampled range
+    thresholds = [min(full) / 2, threshold, max(full) * 2]
+    mapped = [calibration.map_threshold(t) for t in thresholds]
+    assert mapped == sorted(mapped)
+
+    with pytest.raises(ValueError):
+        calibrate_blur_scale(paths[:1], scale=4)
@@ -0,0 +1,46 @@
+"""
+Tests for exact duplicate detection
+"""
+
+import os
+
+from photo_tool.analysis.duplicates import PARTIAL_HASH_BYTES, find_exact_duplicates, full_hash, partial_hash
+from photo_tool.io.scanner import scan_directory
+
+
+def _write(path, data, mtime):
+    path.write_bytes(data)
+    os.utime(path, (mtime, mtime))
+
+
+def test_exact_duplicates_tiers(tmp_path):
+    """Same size, head and tail but different middle is not a duplicate"""
+    size = 3 * PARTIAL_HASH_BYTES
+    original = os.urandom(size)
+    middle_changed = bytearray(original)
+    middle_changed[size // 2] ^= 0xFF
+
+    _write(tmp_path / "b_copy.jpg", original, 2_000_000_000)
+    _write(tmp_path / "a_original.jpg", original, 1_000_000_000)
+    _write(tmp_path / "c_edited.jpg", bytes(middle_changed), 1_500_000_000)
+    _write(tmp_path / "small1.mp3", b"x" * 100, 1_000_000_000)
+    _write(tmp_path / "small2.mp3", b"x" * 100, 1_000_000_000)
+    _write(tmp_path / "empty1.jpg", b"", 1_000_000_000)
+    _write(tmp_path / "empty2.jpg", b"", 1_000_000_000)
+
+    media = scan_directory(tmp_path, [".jpg", ".mp3"], show_progress=False)
+    clusters = find_exact_duplicates(media, show_progress=False)
+
+    assert [[p.name for p in c.photos] for c in clusters] == [
+        ["a_original.jpg", "b_copy.jpg"],  # oldest first
+        ["small1.mp3", "small2.mp3"],
+    ]
+    assert clusters[0].hashes == [full_hash(tmp_path / "a_original.jpg")] * 2
+
+
+def test_partial_hash_covers_small_files(tmp_path):
+    """Up to two windows the partial hash is the full content hash"""
+    for size in (10, PARTIAL_HASH_BYTES + 10, 2 * PARTIAL_HASH_BYTES):
+        path = tmp_path / f"{size}.bin"
+        path.write_bytes(os.urandom(size))
+        assert partial_hash(path, size) == full_hash(path)
@@ -0,0 +1,111 @@
+"""
+Tests for the header-only EXIF reader
+"""
+
+from datetime import datetime
+
+import pytest
+from PIL import Image
+
+from photo_tool.io.exif import get_camera_info, get_capture_time, get_image_dimensions
+from photo_tool.io.exif_header import read_exif_header
+
+
+def _exif():
+    exif = Image.Exif()
+    exif[0x0110] = "TestCam"
+    exif[0x0112] = 6
+    exif[0x0132] = "2024:01:01 10:00:00"
+    sub = exif.get_ifd(0x8769)
+    sub[0x9003] = "2024:05:06 07:08:09"
+    sub[0x9291] = "25"
+    sub[0x829D] = 2.8
+    sub[0x8827] = 400
+    sub[0xA434] = "50mm F1.8"
+    return exif
+
+
+@pytest.mark.parametrize("ext", ["jpg", "png"])
+def test_header_matches_pil(tmp_path, ext):
+    """Tags read from the header match what PIL decodes"""
+    path = tmp_path / f"photo.{ext}"
+    Image.new("RGB", (320, 200)).save(path, exif=_exif())
+
+    tags = read_exif_header(path)
+
+    assert tags["Model"] == "TestCam"
+    assert tags["Orientation"] == 6
+    assert tags["DateTimeOriginal"] == "2024:05:06 07:08:09"
+    assert tags["FNumber"] == pytest.approx(2.8)
+    assert tags["ISOSpeedRatings"] == 400
+    assert (tags["ImageWidth"], tags["ImageLength"]) == (320, 200)
+
+    assert get_capture_time(path) == datetime(2024, 5, 6, 7, 8, 9, 250000)
+    assert get_camera_info(path)["lens_model"] == "50mm F1.8"
+    assert get_image_dimensions(path) == (320, 200)
+
+
+def test_tiff_ifd_outside_window(tmp_path):
+    """IFDs past the header window are read with a seek"""
+    path = tmp_path / "photo.tif"
+    Image.new("RGB", (64, 48)).save(path, exif=_exif())
+
+    tags = read_exif_header(path, window=16)
+
+    assert tags["Model"] == "TestCam"
+    assert (tags["ImageWidth"], tags["ImageLength"]) == (64, 48)
+
+
+def test_unsupported_format(tmp_path):
+    """Unknown formats return None so callers fall back to PIL"""
+    path = tmp_path / "photo.webp"
+    Image.new("RGB", (8, 8)).save(path)
+
+    assert read_exif_header(path) is None
+
+
+def test_photo_records_cached_in_index(tmp_path, monkeypatch):
+    """Unchanged files are served from the workspace index without parsing"""
+    from photo_tool.io import exif
+
+    path = tmp_path / "photo.jpg"
+    Image.new("RGB", (32, 16)).save(path, exif=_exif())
+    db_path = tmp_path / "index.sqlite"
+
+    record = exif.load_photo_records([path], db_path)[path]
+    assert record.captured_time == datetime(2024, 5, 6, 7, 8, 9, 250000)
+    assert (record.width, record.height, record.iso) == (32, 16, 400)
+    assert record.aperture == pytest.approx(2.8)
+
+    def fail(image_path):
+        raise AssertionError("parsed again")
+
+    monkeypatch.setattr(exif, "extract_photo_record", fail)
+    assert exif.load_photo_records([path], db_path)[path].camera_model == "TestCam"
+
+    # A changed file is parsed again
+    monkeypatch.undo()
+    Image.new("RGB", (48, 16)).save(path)
+    assert exif.load_photo_records([path], db_path)[path].width == 48
+
+
+def test_read_capture_times_parallel_keeps_order(tmp_path):
+    """Process-pool results line up with the input; bad files yield None"""
+    from photo_tool.io.exif import MIN_PARALLEL_FILES, read_capture_times
+
+    paths = []
+    for i in range(MIN_PARALLEL_FILES + 6):
+        exif = Image.Exif()
+        exif.get_ifd(0x8769)[0x9003] = f"2024:05:06 07:{i // 60:02d}:{i % 60:02d}"
+        path = tmp_path / f"{i:03d}.jpg"
+        Image.new("RGB", (8, 8)).save(path, exif=exif)
+        paths.append(path)
+    paths.insert(3, tmp_path / "missing.jpg")
+
+    progress = []
+    times = read_capture_times(paths, jobs=2, progress=lambda done, total: progress.append((done, total)))
+
+    assert times[3] is None
+    del times[3]
+    assert times == [datetime(2024, 5, 6, 7, i // 60, i % 60) for i in range(MIN_PARALLEL_FILES + 6)]
+    assert progress[-1] == (len(paths), len(paths))
@@ -0,0 +1,114 @@
+"""
+Tests for embedded JPEG preview extraction
+"""
+
+import struct
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from photo_tool.analysis.similarity import compute_phash
+from photo_tool.io.exif_preview import list_embedded_previews, open_embedded_preview
+from photo_tool.io.thumbnails import generate_thumbnail
+
+
+def _jpeg_bytes(img, quality=90):
+    buf = BytesIO()
+    img.save(buf, 'JPEG', quality=quality)
+    return buf.getvalue()
+
+
+def _picture(size):
+    """Red top-left quarter on blue"""
+    img = Image.new('RGB', size, (0, 0, 255))
+    img.paste((255, 0, 0), (0, 0, size[0] // 2, size[1] // 2))
+    return img
+
+
+def _app1(thumb, orientation=1):
+    """APP1 with IFD0 (Orientation) and IFD1 pointing at an embedded thumbnail"""
+    ifd0 = struct.pack('<H', 1) + struct.pack('<HHLHH', 0x0112, 3, 1, orientation, 0)
+    ifd1_offset = 8 + len(ifd0) + 4
+    ifd1 = struct.pack('<H', 2)
+    thumb_offset = ifd1_offset + len(ifd1) + 24 + 4
+    ifd1 += struct.pack('<HHLL', 0x0201, 4, 1, thumb_offset)
+    ifd1 += struct.pack('<HHLL', 0x0202, 4, 1, len(thumb))
+    tiff = b'II*\x00' + struct.pack('<L', 8) + ifd0 + struct.pack('<L', ifd1_offset) + ifd1 + struct.pack('<L', 0) + thumb
+    payload = b'Exif\x00\x00' + tiff
+    return b'\xff\xe1' + struct.pack('>H', len(payload) + 2) + payload
+
+
+def _with_segments(main_jpeg, *segments):
+    return main_jpeg[:2] + b''.join(segments) + main_jpeg[2:]
+
+
+def test_letterboxed_exif_thumbnail(tmp_path):
+    """3:2 photo with a 4:3 thumbnail: bars are cropped, orientation applied"""
+    thumb = Image.new('RGB', (160, 120), (0, 0, 0))
+    thumb.paste(_picture((160, 107)), (0, 6))
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(_with_segments(_jpeg_bytes(_picture((1500, 1000))), _app1(_jpeg_bytes(thumb), orientation=6)))
+
+    previews = list_embedded_previews(path)
+    assert [(p.width, p.height, p.source) for p in previews] == [(160, 120, 'exif')]
+
+    img = open_embedded_preview(path, (100, 100))
+    assert img.size == (107, 160)  # rotated by orientation 6
+    assert img.getpixel((100, 5))[0] > 200  # red quarter now top-right
+    assert img.getpixel((5, 5))[2] > 200
+
+    # Too small for a 256px box
+    assert open_embedded_preview(path, (256, 256)) is None
+
+
+def test_mpf_preview_used_for_thumbnail(tmp_path):
+    """Large MPF preview appended after the main image"""
+    main = _jpeg_bytes(_picture((1500, 1000)))
+    preview = _jpeg_bytes(_picture((600, 400)))
+
+    # MPF index: one primary and one large-thumbnail entry
+    entries_offset = 8 + 2 + 12 + 4
+    ifd = struct.pack('<H', 1) + struct.pack('<HHLL', 0xB002, 7, 32, entries_offset) + struct.pack('<L', 0)
+    mpf_tiff_len = 8 + len(ifd) + 32
+    segment_len = 2 + 4 + mpf_tiff_len
+    mpf_start = 2 + 2 + 2 + 4  # SOI, marker, length, 'MPF\0'
+    preview_offset = len(main) + 2 + segment_len - mpf_start
+    entries = struct.pack('<LLLHH', 0x030000, len(main), 0, 0, 0)
+    entries += struct.pack('<LLLHH', 0x010001, len(preview), preview_offset, 0, 0)
+    tiff = b'II*\x00' + struct.pack('<L', 8) + ifd + entries
+    app2 = b'\xff\xe2' + struct.pack('>H', segment_len) + b'MPF\x00' + tiff
+
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(_with_segments(main, app2) + preview)
+
+    previews = list_embedded_previews(path)
+    assert [(p.width, p.height, p.source) for p in previews] == [(600, 400, 'mpf')]
+
+    # Make the main image unreadable: the thumbnail must come from the preview
+    data = bytearray(path.read_bytes())
+    data[len(main) - 200 + len(app2):len(main) - 2 + len(app2)] = bytes(198)
+    path.write_bytes(bytes(data))
+
+    thumb_path = generate_thumbnail(path, tmp_path / "thumbs", size=(256, 256))
+    with Image.open(thumb_path) as thumb:
+        assert thumb.size == (256, 171)
+        assert thumb.getpixel((10, 10))[0] > 200
+
+
+def test_phash_from_preview(tmp_path):
+    """Preview hash stays within the default threshold; no preview falls back"""
+    y, x = np.mgrid[0:1000, 0:1500]
+    wave = (128 + 60 * np.sin(x * 0.004 + y * 0.007) + 50 * np.cos(x * 0.009 - y * 0.003)).astype(np.uint8)
+    picture = Image.fromarray(np.stack([wave, wave[::-1], wave[:, ::-1]], axis=2))
+    thumb = _jpeg_bytes(picture.resize((160, 107), Image.Resampling.LANCZOS), quality=75)
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(_with_segments(_jpeg_bytes(picture), _app1(thumb)))
+
+    full = int(compute_phash(path), 16)
+    fast = int(compute_phash(path, use_preview=True), 16)
+    assert bin(full ^ fast).count('1') <= 6
+
+    plain = tmp_path / "plain.jpg"
+    plain.write_bytes(_jpeg_bytes(picture))
+    assert compute_phash(plain, use_preview=True) == compute_phash(plain)
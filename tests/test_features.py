@@ -0,0 +1,87 @@
+"""
+Tests for single-decode feature extraction
+"""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from photo_tool.analysis import clustering
+from photo_tool.analysis.clustering import score_photos
+from photo_tool.analysis.features import FeatureExtractor
+from photo_tool.analysis.similarity import BlurMethod, HashMethod, compute_phash, detect_blur
+from photo_tool.analysis.similarity.exposure import compute_exposure_score, compute_histogram
+from photo_tool.analysis.similarity.hash_cache import HashCache
+
+
+def _photo(path, seed=0, size=(320, 240)):
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 6, size[0])
+    y = np.linspace(0, 4, size[1])
+    base = np.sin(x)[None, :, None] * np.cos(y)[:, None, None] * 110 + 128
+    pixels = (base + rng.normal(0, 8, (size[1], size[0], 3))).clip(0, 255).astype(np.uint8)
+    Image.fromarray(pixels).save(path, quality=90)
+    return path
+
+
+def test_features_match_separate_functions(tmp_path):
+    """One decode gives the same values as compute_phash, detect_blur and the exposure functions"""
+    path = _photo(tmp_path / "a.jpg")
+    features = FeatureExtractor(hash_methods=list(HashMethod)).extract(path)
+
+    assert (features.width, features.height) == (320, 240)
+    assert features.hashes == {method: compute_phash(path, method) for method in HashMethod}
+    assert features.blur_score == pytest.approx(detect_blur(path), rel=1e-12)
+
+    histograms = compute_histogram(path)
+    assert features.luminance_histogram.dtype == np.uint32
+    assert (features.luminance_histogram == histograms['luminance']).all()
+    assert (features.rgb_histograms == [histograms['red'], histograms['green'], histograms['blue']]).all()
+
+    expected = compute_exposure_score(path)
+    for key, value in features.exposure.items():
+        assert value == pytest.approx(expected[key], rel=1e-6)
+
+    variance = FeatureExtractor(hash_methods=(), blur_method=BlurMethod.VARIANCE, exposure=False).extract(path)
+    assert variance.hashes == {} and variance.luminance_histogram is None
+    assert variance.blur_score == pytest.approx(detect_blur(path, BlurMethod.VARIANCE), rel=1e-12)
+
+
+def test_16bit_image_matches_detect_blur(tmp_path):
+    """16-bit samples are scaled like OpenCV does, not clipped"""
+    path = tmp_path / "depth16.png"
+    rng = np.random.default_rng(0)
+    Image.fromarray((rng.random((240, 320)) * 65535).astype(np.uint16)).save(path)
+
+    features = FeatureExtractor().extract(path)
+
+    assert features.hashes[HashMethod.PHASH] == compute_phash(path)
+    assert features.blur_score == pytest.approx(detect_blur(path), rel=1e-12)
+    assert (features.luminance_histogram == compute_histogram(path)['luminance']).all()
+
+
+def test_extract_many_in_pool(tmp_path):
+    """Pool results keep input order; unreadable files give None"""
+    paths = [_photo(tmp_path / f"{i}.jpg", seed=i, size=(64, 48)) for i in range(20)]
+    (tmp_path / "broken.jpg").write_bytes(b"not an image")
+    paths.insert(5, tmp_path / "broken.jpg")
+
+    extractor = FeatureExtractor(exposure=False)
+    results = extractor.extract_many(paths, jobs=2)
+    assert results[5] is None
+    assert [r.path for r in results if r is not None] == paths[:5] + paths[6:]
+    assert [r.hashes[HashMethod.PHASH] for r in results[:3]] == [compute_phash(p) for p in paths[:3]]
+
+
+def test_score_photos_fills_hash_cache(tmp_path, monkeypatch):
+    """Blur scoring hashes uncached photos, so clustering afterwards decodes nothing"""
+    paths = [_photo(tmp_path / f"{i}.jpg", seed=i, size=(64, 48)) for i in range(3)]
+    cache = HashCache(tmp_path / "hashes")
+    cache.insert([(cache.file_key(paths[0]), compute_phash(paths[0]))])
+
+    scores = score_photos(paths, hash_cache=cache, jobs=1)
+    assert scores == {p: pytest.approx(detect_blur(p)) for p in paths}
+
+    monkeypatch.setattr(clustering, 'compute_phash', lambda *a, **k: pytest.fail("decoded again"))
+    hashes = clustering.compute_hashes(paths, hash_cache=HashCache(tmp_path / "hashes"))
+    assert hashes[1:] == [FeatureExtractor().extract(p).hashes[HashMethod.PHASH] for p in paths[1:]]
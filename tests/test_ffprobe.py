@@ -0,0 +1,69 @@
+"""
+Tests for the ffprobe execution layer (with a fake ffprobe on PATH)
+"""
+
+import os
+import sys
+
+import pytest
+
+from photo_tool.io import ffprobe
+
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="fake ffprobe is a shell script")
+
+
+@pytest.fixture
+def fake_ffprobe(tmp_path, monkeypatch):
+    """ffprobe stand-in that logs each call; returns the log file"""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    log = tmp_path / "calls.log"
+    script = bin_dir / "ffprobe"
+    script.write_text(
+        "#!/bin/sh\n"
+        f"echo \"$@\" >> {log}\n"
+        "case \"$*\" in *slow*) sleep 5;; esac\n"
+        "echo '{\"format\": {\"duration\": \"12.5\", \"size\": \"3\"}, "
+        "\"streams\": [{\"codec_type\": \"video\", \"width\": 640, \"height\": 480}]}'\n"
+    )
+    script.chmod(0o755)
+
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    ffprobe.is_ffprobe_available.cache_clear()
+    yield log
+    ffprobe.is_ffprobe_available.cache_clear()
+
+
+def _calls(log):
+    lines = log.read_text().splitlines() if log.exists() else []
+    return [line for line in lines if line != "-version"]
+
+
+def test_probe_files_cached(tmp_path, fake_ffprobe):
+    """Second run over unchanged files spawns no ffprobe"""
+    clips = [tmp_path / f"clip{i}.mp4" for i in range(5)]
+    for clip in clips:
+        clip.write_bytes(b"abc")
+    cache = tmp_path / "ffprobe.sqlite"
+
+    first = ffprobe.probe_files(clips, cache, max_workers=3)
+    assert all(first[c]["streams"][0]["width"] == 640 for c in clips)
+    assert len(_calls(fake_ffprobe)) == 5
+
+    second = ffprobe.probe_files(clips, cache)
+    assert second == first
+    assert len(_calls(fake_ffprobe)) == 5
+
+    # Changed file is probed again
+    clips[0].write_bytes(b"abcd")
+    ffprobe.probe_files(clips, cache)
+    assert len(_calls(fake_ffprobe)) == 6
+
+
+def test_probe_timeout(tmp_path, fake_ffprobe):
+    """A hanging ffprobe is killed and reported as None"""
+    clip = tmp_path / "slow.mp4"
+    clip.write_bytes(b"abc")
+
+    assert ffprobe.probe_files([clip], timeout=0.5) == {clip: None}
@@ -0,0 +1,88 @@
+"""
+Tests for packed hash arrays and vectorized Hamming distances
+"""
+
+import imagehash
+import numpy as np
+
+from photo_tool.analysis.clustering import _sequential_clusters
+from photo_tool.analysis.similarity import hash_array
+from photo_tool.analysis.similarity.hash_array import (
+    hamming_distances,
+    hash_pairs_within,
+    pack_hashes,
+    pairwise_distances,
+)
+from photo_tool.analysis.similarity.phash import compare_hashes
+
+
+def _random_hashes(count, hash_size, seed=0):
+    rng = np.random.default_rng(seed)
+    return [str(imagehash.ImageHash(rng.random((hash_size, hash_size)) > 0.5)) for _ in range(count)]
+
+
+def test_distances_match_imagehash():
+    """One-vs-many, all-pairs and compare_hashes agree with imagehash (1 and 4 words, odd sizes)"""
+    for hash_size in (6, 8, 16):
+        hashes = _random_hashes(40, hash_size, seed=hash_size)
+        objects = [imagehash.hex_to_hash(h) if hash_size != 6 else None for h in hashes]
+        packed, valid = pack_hashes(hashes)
+        assert valid.all()
+
+        matrix = pairwise_distances(packed)
+        for i in range(len(hashes)):
+            assert (hamming_distances(packed[i], packed) == matrix[i]).all()
+            for j in range(len(hashes)):
+                expected = bin(int(hashes[i], 16) ^ int(hashes[j], 16)).count('1')
+                assert matrix[i, j] == expected == compare_hashes(hashes[i], hashes[j])
+                if objects[i] is not None:
+                    assert expected == objects[i] - objects[j]
+
+
+def test_popcount_fallback_without_bitwise_count(monkeypatch):
+    """The byte lookup table gives the same counts as np.bitwise_count"""
+    words = np.random.default_rng(1).integers(0, 2**63, size=(50, 4), dtype=np.uint64) * 2 + 1
+    expected = [[bin(int(w)).count('1') for w in row] for row in words]
+    monkeypatch.delattr(np, 'bitwise_count', raising=False)
+    assert hash_array.popcount(words).tolist() == expected
+
+
+def test_pairs_within_blocks(monkeypatch):
+    """Blockwise pair search finds exactly the pairs of the full matrix"""
+    hashes = _random_hashes(300, 8)
+    # Near-copies so the threshold actually matches something
+    hashes += [format(int(h, 16) ^ (1 << k), '016x') for k, h in enumerate(hashes[:50])]
+    packed, _ = pack_hashes(hashes)
+    matrix = pairwise_distances(packed)
+    expected = {(i, j, int(matrix[i, j])) for i, j in zip(*np.nonzero(matrix <= 10)) if i < j}
+
+    monkeypatch.setattr(hash_array, 'PAIR_BLOCK_WORDS', 64 * 17)  # several uneven blocks
+    assert set(hash_pairs_within(packed, 10)) == expected
+
+
+def test_sequential_clusters_match_pairwise_greedy(tmp_path):
+    """Vectorized grouping keeps the order and members of the original loop"""
+    base = _random_hashes(30, 8, seed=3)
+    hashes = []
+    for k, h in enumerate(base):
+        hashes += [h, format(int(h, 16) ^ (0b111 << (k % 50)), '016x')]
+    hashes[5] = None
+    photos = [tmp_path / f"{i}.jpg" for i in range(len(hashes))]
+
+    expected = []
+    used = set()
+    for i, h in enumerate(hashes):
+        if i in used or h is None:
+            continue
+        members = [i]
+        used.add(i)
+        for j in range(i + 1, len(hashes)):
+            if j not in used and hashes[j] is not None and compare_hashes(h, hashes[j]) <= 6:
+                members.append(j)
+                used.add(j)
+        if len(members) >= 2:
+            expected.append([photos[m] for m in members])
+
+    clusters = _sequential_clusters(photos, hashes, 6, {photos[0]: 12.5})
+    assert [c.photos for c in clusters] == expected
+    assert clusters[0].blur_scores[0] == 12.5
@@ -0,0 +1,107 @@
+"""
+Tests for the persistent perceptual-hash cache
+"""
+
+import multiprocessing
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from photo_tool.analysis import clustering
+from photo_tool.analysis.clustering import compute_hashes
+from photo_tool.analysis.similarity import hash_cache
+from photo_tool.analysis.similarity.hash_cache import HashCache, SegmentCache
+from photo_tool.analysis.similarity.phash import HashMethod, compute_phash
+
+
+def _key(i):
+    return i.to_bytes(16, 'little')
+
+
+def _hex(i, digits=16):
+    return format(i * 0x9E3779B97F4A7C15 % (1 << (4 * digits)), f'0{digits}x')
+
+
+def _insert_range(cache_dir, start, count):
+    cache = HashCache(cache_dir)
+    for batch in range(start, start + count, 10):
+        cache.insert([(_key(i), _hex(i)) for i in range(batch, min(batch + 10, start + count))])
+
+
+def test_lookup_insert_and_compaction(tmp_path, monkeypatch):
+    """Batches persist across instances, merge into one segment, and sizes are checked"""
+    monkeypatch.setattr(hash_cache, 'MAX_SEGMENTS', 3)
+    cache = HashCache(tmp_path)
+    assert cache.lookup([_key(1)]) == [None]
+
+    for start in range(0, 50, 10):
+        cache.insert([(_key(i), _hex(i)) for i in range(start, start + 10)])
+    assert len(list(cache.dir.glob('*.seg'))) <= 3
+    assert cache.lookup([_key(7), _key(99), _key(42)]) == [_hex(7), None, _hex(42)]
+
+    reopened = HashCache(tmp_path)
+    assert reopened.lookup([_key(i) for i in range(50)]) == [_hex(i) for i in range(50)]
+    reopened.compact()
+    assert len(list(reopened.dir.glob('*.seg'))) == 1
+
+    big = HashCache(tmp_path, hash_size=16)  # 4 words, separate directory
+    big.insert([(_key(1), _hex(1, 64))])
+    assert HashCache(tmp_path, hash_size=16).lookup([_key(1)]) == [_hex(1, 64)]
+    assert HashCache(tmp_path, HashMethod.DHASH).lookup([_key(1)]) == [None]
+
+    with pytest.raises(TypeError):
+        SegmentCache(tmp_path, 1)  # abstract: no _encode/_decode
+
+
+def test_concurrent_writers(tmp_path, monkeypatch):
+    """Processes inserting and merging at the same time lose nothing"""
+    monkeypatch.setattr(hash_cache, 'MAX_SEGMENTS', 4)
+    ctx = multiprocessing.get_context('fork' if hasattr(os, 'fork') else 'spawn')
+    workers = [ctx.Process(target=_insert_range, args=(tmp_path, w * 200, 200)) for w in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    assert HashCache(tmp_path).lookup([_key(i) for i in range(800)]) == [_hex(i) for i in range(800)]
+
+
+def test_unchanged_files_are_not_decoded(tmp_path, monkeypatch):
+    """Second pass is served from the cache; modified files are rehashed"""
+    rng = np.random.default_rng(0)
+    photos = []
+    for i in range(3):
+        path = tmp_path / f"{i}.png"
+        Image.fromarray(rng.integers(0, 255, (32, 32, 3), dtype=np.uint8)).save(path)
+        photos.append(path)
+    photos.append(tmp_path / "missing.png")
+
+    calls = []
+    def counting_phash(path, **kwargs):
+        calls.append(path)
+        return compute_phash(path, **kwargs)
+    monkeypatch.setattr(clustering, 'compute_phash', counting_phash)
+
+    first = compute_hashes(photos, hash_cache=HashCache(tmp_path / "hashes"))
+    assert first[:3] == [compute_phash(p) for p in photos[:3]] and first[3] is None
+    assert len(calls) == 3
+
+    calls.clear()
+    assert compute_hashes(photos, hash_cache=HashCache(tmp_path / "hashes")) == first
+    assert calls == []
+
+    stat = os.stat(photos[1])
+    os.utime(photos[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    compute_hashes(photos, hash_cache=HashCache(tmp_path / "hashes"))
+    assert calls == [photos[1]]
+
+    # Content identity follows a renamed file
+    by_content = HashCache(tmp_path / "hashes", content_fingerprint=True)
+    compute_hashes(photos[:1], hash_cache=by_content)
+    moved = photos[0].rename(tmp_path / "renamed.png")
+    calls.clear()
+    assert compute_hashes([moved], hash_cache=HashCache(tmp_path / "hashes", content_fingerprint=True)) == first[:1]
+    assert calls == []
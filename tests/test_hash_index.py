@@ -0,0 +1,94 @@
+"""
+Tests for the multi-index near-duplicate hash index
+"""
+
+import numpy as np
+import pytest
+
+from photo_tool.analysis.clustering import _sequential_clusters, cluster_single_group, find_similar_photos
+from photo_tool.analysis.similarity import hash_index
+from photo_tool.analysis.similarity.hash_array import hash_pairs_within, pack_hashes
+from photo_tool.analysis.similarity.hash_index import HashIndex
+
+
+def _library(count, seed=0):
+    """Random 64-bit hashes plus near-copies 1-7 bits away"""
+    rng = np.random.default_rng(seed)
+    hashes = [format(int(h), '016x') for h in rng.integers(0, 2**63, size=count, dtype=np.uint64)]
+    for k, h in enumerate(hashes[:count // 3]):
+        bits = rng.choice(64, size=k % 7 + 1, replace=False)
+        hashes.append(format(int(h, 16) ^ sum(1 << int(b) for b in bits), '016x'))
+    return hashes
+
+
+def _brute_query(hashes, query, radius):
+    found = [(str(i), bin(int(h, 16) ^ int(query, 16)).count('1')) for i, h in enumerate(hashes)]
+    return sorted([f for f in found if f[1] <= radius], key=lambda f: (f[1], int(f[0])))
+
+
+@pytest.fixture
+def small_tables(monkeypatch):
+    """Use the chunk tables and joins already for small test indexes"""
+    monkeypatch.setattr(hash_index, 'MIN_INDEXED_ROWS', 1)
+    monkeypatch.setattr(hash_index, 'REINDEX_TAIL', 50)
+    monkeypatch.setattr(hash_index, 'PAIR_BATCH', 500)
+
+
+@pytest.mark.parametrize("radius", [0, 3, 6, 11, 20])
+def test_query_and_pairs_match_brute_force(small_tables, radius):
+    """Chunk search (radius // 4 = 0, 1, 2) and scan fallback (20) find the same as a full scan"""
+    hashes = _library(600)
+    index = HashIndex()
+    index.add_many((str(i), h) for i, h in enumerate(hashes))
+
+    for i in range(0, len(hashes), 37):
+        assert index.query(hashes[i], radius) == _brute_query(hashes, hashes[i], radius)
+
+    packed, _ = pack_hashes(hashes)
+    expected = [(str(i), str(j), d) for i, j, d in sorted(hash_pairs_within(packed, radius))]
+    assert index.all_pairs(radius) == expected
+
+
+def test_incremental_updates_and_persistence(small_tables, tmp_path):
+    """Inserts land in the scanned tail, updates and removals hide old rows, save/load keeps the rest"""
+    hashes = _library(300, seed=1)
+    index = HashIndex()
+    index.add_many((str(i), h) for i, h in enumerate(hashes[:200]))
+    index.query(hashes[0], 6)  # builds the tables
+
+    assert index.add_many((str(i), h) for i, h in enumerate(hashes)) == len(hashes) - 200
+    index.add("3", hashes[7])  # changed hash
+    assert index.remove("5") and not index.remove("5")
+    assert index.add_many([("3", hashes[7])]) == 0
+
+    current = {str(i): h for i, h in enumerate(hashes) if i != 5}
+    current["3"] = hashes[7]
+    assert len(index) == len(current)
+    assert ("3", 0) in index.query(hashes[7], 0)
+    assert not any(key == "5" for key, _ in index.query(hashes[5], 64))
+
+    index.save(tmp_path / "index.npz")
+    loaded = HashIndex.load(tmp_path / "index.npz")
+    assert {key: loaded.get(key) for key in loaded.keys()} == current
+    assert loaded.all_pairs(6) == index.all_pairs(6)
+
+    with pytest.raises(ValueError):
+        loaded.add("x", "0" * 64)
+    assert len(HashIndex.load(tmp_path / "missing.npz")) == 0
+
+
+def test_cluster_single_group_and_find_similar(small_tables, tmp_path):
+    """Index-backed whole-library clustering groups like the sequential loop"""
+    hashes = _library(240, seed=2)
+    photos = [tmp_path / f"{i}.jpg" for i in range(len(hashes))]
+    index = HashIndex()
+    index.add_many((str(p), h) for p, h in zip(photos, hashes))
+
+    clusters = cluster_single_group(photos, similarity_threshold=6, index=index)
+    expected = _sequential_clusters(photos, hashes, 6, None)
+    assert clusters and [c.photos for c in clusters] == [c.photos for c in expected]
+    assert [c.hashes for c in clusters] == [c.hashes for c in expected]
+
+    similar = find_similar_photos(photos[0], index, similarity_threshold=6)
+    assert similar == [(photos[int(k)], d) for k, d in _brute_query(hashes, hashes[0], 6) if k != "0"]
+    assert similar
@@ -0,0 +1,63 @@
+"""
+Tests for the columnar media table
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+from photo_tool.io.media_table import MediaTable, MediaTableBuilder
+from photo_tool.io.scanner import filter_by_type, scan_directory, scan_multiple_directories
+
+
+def _build_table():
+    """Small table with mixed types, added out of order"""
+    builder = MediaTableBuilder()
+    builder.append("/lib/2024/b.JPG", 200, 2_000_000_000_000_000_000)
+    builder.append("/lib/2024/a.mp4", 300, 1_000_000_000_000_000_000)
+    builder.append("/lib/a.wav", 100, 1_500_000_000_000_000_000)
+    builder.append("/lib/2024/c.jpg", 400, 1_700_000_000_000_000_000)
+    return builder.build()
+
+
+def test_table_sorted_and_interned():
+    """Rows are ordered by directory then name; directories are interned"""
+    table = _build_table()
+
+    assert [str(p) for p in table.paths()] == [
+        "/lib/a.wav",
+        "/lib/2024/a.mp4",
+        "/lib/2024/b.JPG",
+        "/lib/2024/c.jpg",
+    ]
+    assert len(table.dirs) == 2
+    assert table.media_type.dtype == np.uint8
+    assert table.size_bytes.dtype == np.int64
+
+
+def test_table_filters():
+    """Type, extension and date filters are vectorized sub-tables"""
+    table = _build_table()
+
+    photos = table.filter_by_type("photo")
+    assert [r.filename for r in photos] == ["b.JPG", "c.jpg"]
+    assert [r.filename for r in table.filter_by_extension([".JPG"])] == ["b.JPG", "c.jpg"]
+
+    recent = table.filter_by_date(start=datetime.fromtimestamp(1_600_000_000))
+    assert sorted(r.filename for r in recent) == ["b.JPG", "c.jpg"]
+    assert table.count_by_type() == {"unknown": 0, "photo": 2, "video": 1, "audio": 1}
+    assert filter_by_type(table, "video")[0].is_video
+
+
+def test_row_view_matches_media_file(tmp_path):
+    """Rows expose the same values as MediaFile from a regular scan"""
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "x.jpg").write_bytes(b"x" * 5)
+    (tmp_path / "sub" / "y.mov").write_bytes(b"y" * 7)
+
+    files = scan_directory(tmp_path, [".jpg", ".mov"], show_progress=False)
+    table = scan_multiple_directories([tmp_path], [".jpg", ".mov"], show_progress=False, as_table=True)
+
+    assert isinstance(table, MediaTable)
+    rows = sorted((r.to_media_file() for r in table), key=lambda m: m.path)
+    assert rows == files
@@ -0,0 +1,158 @@
+"""
+Tests for the memory-mapped quality statistics matrix
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from photo_tool.analysis.features import FeatureExtractor
+from photo_tool.analysis.quality_matrix import COLUMNS, QualityMatrix, update_quality_matrix
+from photo_tool.analysis.similarity import HashCache, HashMethod, compute_phash
+from photo_tool.io import MediaFile
+
+
+def _photos(tmp_path, count):
+    rng = np.random.default_rng(0)
+    photos = []
+    for i in range(count):
+        path = tmp_path / f"{i}.png"
+        level = 20 + 60 * i
+        Image.fromarray(rng.integers(level, level + 40, (24, 32, 3), dtype=np.uint8)).save(path)
+        photos.append(MediaFile.from_path(path))
+    return photos
+
+
+def _synthetic(count, seed=0):
+    rng = np.random.default_rng(seed)
+    histogram = rng.integers(0, 500, (count, 64)).astype(np.uint32)
+    columns = {
+        'mtime_ns': rng.integers(0, 2 ** 60, count),
+        'size_bytes': rng.integers(0, 2 ** 30, count),
+        'time_ns': rng.integers(1_600_000_000, 1_700_000_000, count) * 10 ** 9,
+        'blur_score': (rng.random(count) * 500).astype(np.float32),
+        'mean_brightness': (rng.random(count) * 255).astype(np.float32),
+        'std_dev': rng.random(count).astype(np.float32),
+        'shadow_clipping': (rng.random(count) * 0.05).astype(np.float32),
+        'highlight_clipping': (rng.random(count) * 0.05).astype(np.float32),
+        'pixels': histogram.sum(axis=1, dtype=np.int64),
+        'histogram': histogram,
+    }
+    columns['blur_score'][::7] = np.nan
+    paths = [f"/lib/{i:05d}.jpg".encode() for i in range(count)]
+    columns['path_end'] = np.cumsum([len(p) for p in paths])
+    return QualityMatrix(columns, b''.join(paths))
+
+
+def test_update_analyzes_only_new_and_changed_photos(tmp_path, monkeypatch):
+    """Saved rows are reused; changed, new and settings-changed photos are analyzed again"""
+    photos = _photos(tmp_path, 4)
+    matrix_file = tmp_path / "quality_matrix.bin"
+
+    analyzed = []
+    extract_many = FeatureExtractor.extract_many
+    def counting(self, paths, *args, **kwargs):
+        analyzed.extend(paths)
+        return extract_many(self, paths, *args, **kwargs)
+    monkeypatch.setattr(FeatureExtractor, 'extract_many', counting)
+
+    matrix = update_quality_matrix(matrix_file, photos, jobs=1)
+    assert matrix.paths() == [p.path for p in photos] and len(analyzed) == 4
+
+    features = FeatureExtractor(hash_methods=()).extract(photos[2].path)
+    loaded = QualityMatrix.load(matrix_file)
+    assert isinstance(loaded.blur_score, np.memmap)
+    assert loaded.paths() == matrix.paths()
+    assert loaded.blur_score[2] == pytest.approx(features.blur_score, rel=1e-6)
+    assert (loaded.histogram[2] == features.luminance_histogram.reshape(64, 4).sum(axis=1)).all()
+    assert loaded.pixels[2] == 24 * 32
+    assert loaded.mean_brightness[1] < loaded.mean_brightness[3]
+
+    # Unchanged: nothing decoded; one touched, one removed from the library
+    analyzed.clear()
+    stat = os.stat(photos[1].path)
+    os.utime(photos[1].path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+    current = [photos[0], MediaFile.from_path(photos[1].path), photos[3]]
+    matrix = update_quality_matrix(matrix_file, current, jobs=1)
+    assert analyzed == [photos[1].path]
+    assert matrix.paths() == [p.path for p in current]
+
+    analyzed.clear()
+    update_quality_matrix(matrix_file, current, analysis_scale=2, jobs=1)
+    assert len(analyzed) == 3
+    assert QualityMatrix.load(matrix_file).analysis_scale == 2
+
+    (tmp_path / "broken.bin").write_bytes(b"PTQM garbage")
+    assert len(QualityMatrix.load(tmp_path / "broken.bin")) == 0
+
+
+def test_update_subset_without_prune(tmp_path, monkeypatch):
+    """Scoring part of the library keeps the other rows; a re-run decodes and writes nothing"""
+    photos = _photos(tmp_path, 4)
+    matrix_file = tmp_path / "quality_matrix.bin"
+    update_quality_matrix(matrix_file, photos[:2], exposure=False, jobs=1)
+
+    analyzed = []
+    extract_many = FeatureExtractor.extract_many
+    def counting(self, paths, *args, **kwargs):
+        analyzed.extend(paths)
+        return extract_many(self, paths, *args, **kwargs)
+    monkeypatch.setattr(FeatureExtractor, 'extract_many', counting)
+
+    matrix = update_quality_matrix(matrix_file, photos[1:3], exposure=False, jobs=1, prune=False)
+    assert analyzed == [photos[2].path]
+    assert matrix.paths() == [p.path for p in photos[:3]]
+    assert np.isnan(matrix.mean_brightness).all()
+
+    analyzed.clear()
+    written = os.stat(matrix_file).st_mtime_ns
+    matrix = update_quality_matrix(matrix_file, photos[2:0:-1], exposure=False, jobs=1, prune=False)
+    assert analyzed == []
+    assert os.stat(matrix_file).st_mtime_ns == written
+    assert matrix.paths() == [p.path for p in photos[:3]]
+
+
+def test_update_fills_hash_cache(tmp_path):
+    """Analyzed photos are hashed from the same decode"""
+    photos = _photos(tmp_path, 2)
+    hash_cache = HashCache(tmp_path / "hashes", HashMethod.PHASH)
+
+    update_quality_matrix(tmp_path / "quality_matrix.bin", photos, jobs=1, hash_cache=hash_cache)
+
+    assert hash_cache.lookup([hash_cache.file_key(p.path) for p in photos]) == [
+        compute_phash(p.path, method=HashMethod.PHASH) for p in photos
+    ]
+
+
+def test_queries_match_brute_force(tmp_path):
+    """Vectorized queries on the mapped file equal plain Python filters"""
+    _synthetic(3000).save(tmp_path / "m.bin")
+    matrix = QualityMatrix.load(tmp_path / "m.bin")
+    reference = _synthetic(3000)
+    for name, _, _ in COLUMNS:
+        np.testing.assert_array_equal(getattr(matrix, name), getattr(reference, name))
+
+    rows = range(len(matrix))
+    assert np.flatnonzero(matrix.underexposed(60)).tolist() == [i for i in rows if reference.mean_brightness[i] < 60]
+    assert np.flatnonzero(matrix.highlight_clipped(0.02)).tolist() == [
+        i for i in rows if reference.highlight_clipping[i] > 0.02
+    ]
+
+    start = datetime.fromtimestamp(1_620_000_000)
+    end = start + timedelta(days=60)
+    in_range = [i for i in rows
+                if start.timestamp() <= reference.time_ns[i] / 1e9 <= end.timestamp()
+                and not np.isnan(reference.blur_score[i])]
+    expected = sorted(in_range, key=lambda i: -reference.blur_score[i])[:20]
+    assert matrix.sharpest(20, matrix.in_date_range(start, end)).tolist() == expected
+    assert matrix.blurriest(5).tolist() == sorted(
+        (i for i in rows if not np.isnan(reference.blur_score[i])), key=lambda i: reference.blur_score[i]
+    )[:5]
+
+    share = matrix.brightness_share(0, 64)
+    assert share == pytest.approx(reference.histogram[:, :16].sum(axis=1) / reference.pixels)
+    assert matrix.path(5) == reference.path(5)
+    assert matrix.take(np.array([5, 9])).paths() == [reference.path(5), reference.path(9)]
@@ -0,0 +1,195 @@
+"""
+Tests for directory walking and media scanning
+"""
+
+import os
+import shutil
+import time
+from pathlib import Path
+
+from photo_tool.io.manifest import ScanManifest, incremental_scan
+from photo_tool.io.watcher import LibraryWatcher
+from photo_tool.io.scanner import iter_media, scan_directory, scan_multiple_directories
+from photo_tool.util.paths import find_files, iter_files
+
+
+def _make_tree(root: Path) -> None:
+    """Create a small media tree with nested folders"""
+    (root / "2024" / "day1").mkdir(parents=True)
+    (root / "2024" / "day2").mkdir(parents=True)
+    (root / "a.jpg").write_bytes(b"x" * 10)
+    (root / "notes.txt").write_bytes(b"ignore me")
+    (root / "2024" / "B.JPG").write_bytes(b"x" * 20)
+    (root / "2024" / "day1" / "c.mp4").write_bytes(b"x" * 30)
+    (root / "2024" / "day2" / "d.wav").write_bytes(b"x" * 40)
+
+
+def test_find_files_recursive(tmp_path):
+    """All matching files are found, case-insensitive, sorted"""
+    _make_tree(tmp_path)
+
+    files = find_files(tmp_path, [".jpg", ".mp4", ".wav"])
+
+    assert files == sorted([
+        tmp_path / "a.jpg",
+        tmp_path / "2024" / "B.JPG",
+        tmp_path / "2024" / "day1" / "c.mp4",
+        tmp_path / "2024" / "day2" / "d.wav",
+    ])
+
+
+def test_find_files_not_recursive(tmp_path):
+    """Only top-level files are returned without recursion"""
+    _make_tree(tmp_path)
+
+    assert find_files(tmp_path, [".jpg", ".mp4"], recursive=False) == [tmp_path / "a.jpg"]
+
+
+def test_iter_files_serial_and_parallel_agree(tmp_path):
+    """Serial and threaded walks yield the same files and stat results"""
+    _make_tree(tmp_path)
+
+    serial = sorted(iter_files(tmp_path, [".jpg", ".mp4", ".wav"], max_workers=1))
+    parallel = sorted(iter_files(tmp_path, [".jpg", ".mp4", ".wav"], max_workers=4))
+
+    assert [p for p, _ in serial] == [p for p, _ in parallel]
+    assert [s.st_size for _, s in parallel] == [p.stat().st_size for p, _ in parallel]
+
+
+def test_scan_directory_uses_walk_stat(tmp_path):
+    """MediaFile objects carry size and type from the walk"""
+    _make_tree(tmp_path)
+
+    media = scan_directory(tmp_path, [".jpg", ".mp4", ".wav"], show_progress=False)
+    by_name = {m.filename: m for m in media}
+
+    assert [m.path for m in media] == sorted(m.path for m in media)
+    assert by_name["a.jpg"].size_bytes == 10
+    assert by_name["B.JPG"].is_photo
+    assert by_name["c.mp4"].is_video
+    assert by_name["d.wav"].is_audio
+
+
+def test_scan_multiple_directories_removes_overlap(tmp_path):
+    """Overlapping roots do not produce duplicate entries"""
+    _make_tree(tmp_path)
+
+    media = scan_multiple_directories(
+        [tmp_path, tmp_path / "2024"],
+        [".jpg", ".mp4", ".wav"],
+        show_progress=False
+    )
+
+    assert len(media) == 4
+
+
+def _age_tree(root: Path, seconds: float = 60.0) -> None:
+    """Backdate directory mtimes so the manifest trusts them"""
+    past = time.time() - seconds
+    for directory in [root, *[p for p in root.rglob("*") if p.is_dir()]]:
+        os.utime(directory, (past, past))
+
+
+def test_incremental_scan_reuses_unchanged_directories(tmp_path):
+    """A rescan of an unchanged tree lists no directory"""
+    media_root = tmp_path / "media"
+    media_root.mkdir()
+    _make_tree(media_root)
+    _age_tree(media_root)
+    manifest = ScanManifest(tmp_path / "manifest.sqlite")
+    extensions = [".jpg", ".mp4", ".wav"]
+
+    first = incremental_scan([media_root], extensions, manifest, show_progress=False)
+    second = incremental_scan([media_root], extensions, manifest, show_progress=False)
+
+    assert len(first.added) == 4
+    assert second.dirs_listed == 0
+    assert not second.has_changes
+    assert [m.path for m in second.media] == [m.path for m in first.media]
+    assert [m.size_bytes for m in second.media] == [m.size_bytes for m in first.media]
+
+
+def test_reused_directory_matches_fresh_scan(tmp_path):
+    """Reused manifest entries give the same modified_time as os.stat()"""
+    media_root = tmp_path / "media"
+    media_root.mkdir()
+    for i in range(200):
+        path = media_root / f"{i:03d}.jpg"
+        path.write_bytes(b"x")
+        mtime_ns = 1_700_000_000_123_456_000 + i * 7919  # several where ns / 1e9 != st_mtime
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    _age_tree(media_root)
+    manifest = ScanManifest(tmp_path / "manifest.sqlite")
+
+    incremental_scan([media_root], [".jpg"], manifest, show_progress=False)
+    reused = incremental_scan([media_root], [".jpg"], manifest, show_progress=False)
+    fresh = scan_directory(media_root, [".jpg"], show_progress=False)
+
+    assert reused.dirs_listed == 0
+    assert {m.path: m.modified_time for m in reused.media} == {m.path: m.modified_time for m in fresh}
+
+
+def test_incremental_scan_reports_delta(tmp_path):
+    """Added, changed and removed files are reported"""
+    media_root = tmp_path / "media"
+    media_root.mkdir()
+    _make_tree(media_root)
+    _age_tree(media_root)
+    manifest = ScanManifest(tmp_path / "manifest.sqlite")
+    extensions = [".jpg", ".mp4", ".wav"]
+    incremental_scan([media_root], extensions, manifest, show_progress=False)
+
+    (media_root / "new.jpg").write_bytes(b"new")
+    (media_root / "2024" / "B.JPG").write_bytes(b"changed content")
+    shutil.rmtree(media_root / "2024" / "day1")
+    _age_tree(media_root)
+
+    delta = incremental_scan([media_root], extensions, manifest, show_progress=False, full=True)
+
+    assert [m.filename for m in delta.added] == ["new.jpg"]
+    assert [m.filename for m in delta.changed] == ["B.JPG"]
+    assert delta.removed == [media_root / "2024" / "day1" / "c.mp4"]
+    assert len(delta.media) == 4
+
+
+def test_iter_media_streams_and_chunks(tmp_path):
+    """iter_media yields each file once, singly or in chunks"""
+    _make_tree(tmp_path)
+    extensions = [".jpg", ".mp4", ".wav"]
+
+    single = list(iter_media([tmp_path, tmp_path / "2024"], extensions))
+    chunks = list(iter_media([tmp_path], extensions, chunk_size=3))
+
+    assert sorted(m.path for m in single) == find_files(tmp_path, extensions)
+    assert [len(c) for c in chunks] == [3, 1]
+    assert sorted(m.path for c in chunks for m in c) == find_files(tmp_path, extensions)
+
+
+def test_library_watcher_polling_reports_new_files(tmp_path):
+    """The polling backend picks up files added after start()"""
+    media_root = tmp_path / "media"
+    media_root.mkdir()
+    _make_tree(media_root)
+    received = []
+
+    watcher = LibraryWatcher(
+        [media_root],
+        [".jpg", ".mp4", ".wav"],
+        tmp_path / "manifest.sqlite",
+        poll_interval=0.05,
+        use_native=False
+    )
+    watcher.add_listener(received.extend)
+    watcher.start()
+    try:
+        assert len(watcher.media) == 4
+        (media_root / "2024" / "day2" / "new.jpg").write_bytes(b"new")
+
+        deadline = time.time() + 5
+        while not received and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        watcher.stop()
+
+    assert [(e.kind, e.path.name) for e in received] == [("added", "new.jpg")]
+    assert len(watcher.media) == 5
@@ -0,0 +1,92 @@
+"""
+Tests for batch SSIM on cached proxies and the SSIM clustering stage
+"""
+
+from datetime import datetime
+
+import cv2
+import numpy as np
+import pytest
+from skimage.metrics import structural_similarity
+
+from photo_tool.analysis import clustering
+from photo_tool.analysis.clustering import cluster_similar_photos
+from photo_tool.analysis.similarity.ssim import ProxyCache, batch_ssim, compute_proxy
+from photo_tool.analysis.time_grouping import TimeGroup
+
+
+def _scene(seed):
+    rng = np.random.default_rng(seed)
+    img = np.full((300, 400, 3), 90, np.uint8)
+    for _ in range(25):
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        corner = (int(rng.integers(0, 360)), int(rng.integers(0, 260)))
+        size = (int(rng.integers(20, 120)), int(rng.integers(20, 120)))
+        cv2.rectangle(img, corner, (corner[0] + size[0], corner[1] + size[1]), color, -1)
+    return img
+
+
+def _group(photos):
+    now = datetime(2024, 5, 1, 12)
+    return TimeGroup(photos=photos, capture_times=[now] * len(photos), start_time=now, end_time=now)
+
+
+def test_batch_ssim_matches_skimage(tmp_path):
+    """Vectorized pair scores equal skimage on the same proxies; the cache round-trips them"""
+    paths = []
+    for i in range(4):
+        paths.append(tmp_path / f"{i}.jpg")
+        cv2.imwrite(str(paths[-1]), _scene(i // 2) + i)
+    proxies = np.stack([compute_proxy(p) for p in paths])
+    assert proxies.shape == (4, 64, 64) and proxies.dtype == np.uint8
+
+    pairs = np.array([(a, b) for a in range(4) for b in range(4)])
+    expected = [structural_similarity(proxies[a], proxies[b]) for a, b in pairs]
+    assert batch_ssim(proxies, pairs) == pytest.approx(expected, abs=1e-6)
+    assert len(batch_ssim(proxies, np.zeros((0, 2)))) == 0
+
+    cache = ProxyCache(tmp_path / "proxies", size=60)  # not a whole number of words
+    proxy = compute_proxy(paths[0], size=60)
+    cache.insert([(cache.file_key(paths[0]), proxy)])
+    assert (ProxyCache(tmp_path / "proxies", size=60).lookup([cache.file_key(paths[0])])[0] == proxy).all()
+    with pytest.raises(ValueError):
+        cache.insert([(cache.file_key(paths[0]), proxies[0])])
+
+
+def test_ssim_stage_splits_hash_matches(tmp_path, monkeypatch):
+    """Only hash candidates are scored; low-SSIM pairs are split off and proxies are cached"""
+    scenes = [_scene(0), _scene(0), _scene(1), _scene(0)]
+    scenes[1] = cv2.GaussianBlur(scenes[1], (3, 3), 0)
+    photos = []
+    for i, img in enumerate(scenes):
+        photos.append(tmp_path / f"{i}.jpg")
+        cv2.imwrite(str(photos[-1]), img)
+    photos.append(tmp_path / "alone.jpg")
+    cv2.imwrite(str(photos[-1]), np.full((300, 400, 3), 200, np.uint8))
+    groups = [_group(photos[:4]), _group(photos[4:])]
+
+    # Every pair is a hash match at threshold 64
+    hash_only = cluster_similar_photos(groups, similarity_threshold=64, show_progress=False)
+    assert [c.photos for c in hash_only] == [photos[:4]]
+    lenient = cluster_similar_photos(groups, similarity_threshold=64, show_progress=False, ssim_threshold=-1.0)
+    assert [c.photos for c in lenient] == [c.photos for c in hash_only]
+
+    computed = []
+    def counting_proxy(path, *args, **kwargs):
+        computed.append(path)
+        return compute_proxy(path, *args, **kwargs)
+    monkeypatch.setattr(clustering, 'compute_proxy', counting_proxy)
+
+    cache = ProxyCache(tmp_path / "proxies")
+    strict = cluster_similar_photos(
+        groups, similarity_threshold=64, show_progress=False, ssim_threshold=0.9, proxy_cache=cache
+    )
+    assert [c.photos for c in strict] == [[photos[0], photos[1], photos[3]]]
+    assert sorted(computed) == sorted(photos[:4])  # the photo without candidates is not read
+
+    computed.clear()
+    again = cluster_similar_photos(
+        groups, similarity_threshold=64, show_progress=False, ssim_threshold=0.9,
+        proxy_cache=ProxyCache(tmp_path / "proxies")
+    )
+    assert [c.photos for c in again] == [c.photos for c in strict] and computed == []
@@ -0,0 +1,44 @@
+"""
+Tests for bulk thumbnail pre-generation
+"""
+
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from photo_tool.io.thumb_build import build_thumbnails, parse_sizes
+from photo_tool.io.thumb_store import ThumbnailStore, thumbnail_key
+
+
+def test_parse_sizes():
+    assert parse_sizes("256, 400,320x240,256") == [(256, 256), (400, 400), (320, 240)]
+    with pytest.raises(ValueError):
+        parse_sizes("0")
+
+
+def test_build_skips_up_to_date_and_remembers_failures(tmp_path):
+    photos = []
+    for i in range(20):
+        path = tmp_path / f"p{i:02d}.jpg"
+        Image.new('RGB', (640, 480), (i * 10, 0, 0)).save(path)
+        photos.append(path)
+    broken = tmp_path / "broken.jpg"
+    broken.write_bytes(b'\xff\xd8 not a jpeg')
+    checkpoint = tmp_path / "checkpoint.json"
+    store = ThumbnailStore(tmp_path / "store")
+
+    stats = build_thumbnails(photos + [broken], store, [(64, 64), (128, 128)], jobs=2, checkpoint_path=checkpoint)
+
+    assert (stats.files_rendered, stats.files_failed, stats.thumbnails_written) == (20, 1, 40)
+    with Image.open(BytesIO(bytes(store.get(thumbnail_key(photos[3], (128, 128)))))) as thumb:
+        assert thumb.size == (128, 96)
+
+    # Second run: nothing to do, the broken file is not retried
+    Image.new('RGB', (640, 480)).save(photos[0])
+    again = build_thumbnails(photos + [broken], store, [(64, 64), (128, 128)], jobs=1, checkpoint_path=checkpoint)
+    assert (again.files_skipped, again.files_rendered, again.files_failed) == (19, 1, 1)
+
+    # New size only renders that size
+    more = build_thumbnails(photos, store, [(64, 64), (32, 32)], jobs=1)
+    assert (more.files_rendered, more.thumbnails_written) == (20, 20)
@@ -0,0 +1,113 @@
+"""
+Tests for the packed thumbnail store
+"""
+
+import os
+import threading
+import urllib.request
+from pathlib import Path
+
+from flask import Flask, Response
+from PIL import Image
+from werkzeug.serving import make_server
+
+from photo_tool.io.thumb_store import ThumbnailStore, thumbnail_key
+from photo_tool.io.thumbnails import get_thumbnail_data
+from photo_tool.workspace import create_workspace
+
+
+def _key(n):
+    return n.to_bytes(16, 'big')
+
+
+def test_put_get_and_reopen(tmp_path):
+    with ThumbnailStore(tmp_path / "store") as store:
+        store.put_many([(_key(1), b'one'), (_key(2), b'two' * 10)])
+        assert bytes(store.get(_key(1))) == b'one'
+        assert _key(3) not in store
+
+    reopened = ThumbnailStore(tmp_path / "store")
+    assert len(reopened) == 2
+    view = reopened.get(_key(2))
+    assert isinstance(view, memoryview)
+    assert bytes(view) == b'two' * 10
+
+
+def test_entries_from_other_instance_and_segment_rollover(tmp_path):
+    """A second writer's thumbnails are found; segments roll over at the limit"""
+    reader = ThumbnailStore(tmp_path / "store", segment_bytes=1000)
+    writer = ThumbnailStore(tmp_path / "store", segment_bytes=1000)
+
+    writer.put_many([(_key(i), bytes([i]) * 400) for i in range(5)])
+
+    assert bytes(reader.get(_key(4))) == bytes([4]) * 400
+    assert len(list((tmp_path / "store").glob("seg_*.pack"))) == 3
+
+
+def test_lru_budget_and_compaction(tmp_path):
+    store = ThumbnailStore(tmp_path / "store", max_bytes=2500, segment_bytes=1000)
+    store.put_many([(_key(i), bytes(400)) for i in range(5)])  # 2000 bytes
+
+    # Keep key 0 hot, then overflow the budget
+    store._touched.clear()
+    store.get(_key(0))
+    store.flush()
+    store.put_many([(_key(10), bytes(400)), (_key(11), bytes(400))])
+
+    assert store.live_bytes() <= 2250
+    assert _key(0) in store
+    assert _key(1) not in store
+    assert bytes(store.get(_key(11))) == bytes(400)
+
+    # Half-empty segments are rewritten; only live data remains on disk
+    assert store.compact(min_live_ratio=0.75) == 800
+    total = sum(p.stat().st_size for p in (tmp_path / "store").glob("seg_*.pack"))
+    assert total == store.live_bytes() == 2000
+    assert bytes(store.get(_key(0))) == bytes(400)
+
+
+def test_thumbnail_data_served_from_view(tmp_path):
+    photo = tmp_path / "photo.jpg"
+    Image.new('RGB', (800, 600), (200, 10, 10)).save(photo)
+    store = ThumbnailStore(tmp_path / "store")
+
+    first = get_thumbnail_data(photo, store, (100, 100))
+    cached = get_thumbnail_data(photo, store, (100, 100))
+    assert bytes(first) == bytes(cached)
+    assert len(store) == 1
+
+    app = Flask(__name__)
+    app.add_url_rule('/t', 't', lambda: Response(bytes(store.get(thumbnail_key(photo, (100, 100)))), mimetype='image/jpeg'))
+    response = app.test_client().get('/t')
+    assert response.data == bytes(cached)
+
+    # Modified photo -> new key
+    stat = photo.stat()
+    os.utime(photo, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    get_thumbnail_data(photo, store, (100, 100))
+    assert len(store) == 2
+
+
+def test_gui_thumbnail_over_http(tmp_path, monkeypatch):
+    """The GUI route serves store thumbnails through a real WSGI server"""
+    monkeypatch.syspath_prepend(str(Path(__file__).parent.parent / "gui_poc"))
+    import server
+
+    photos = tmp_path / "photos"
+    photos.mkdir()
+    Image.new('RGB', (800, 600), (200, 10, 10)).save(photos / "photo.jpg")
+    monkeypatch.chdir(tmp_path)  # the GUI's fixed workspace path is relative here
+    create_workspace(Path("C:/PhotoTool_Test"), scan_roots=[photos])
+    monkeypatch.setitem(server._thumb_store, 'store', None)
+
+    httpd = make_server('127.0.0.1', 0, server.app)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        for _ in range(2):  # generated, then served from the store
+            with urllib.request.urlopen(f"http://127.0.0.1:{httpd.server_port}/thumbnails/photo.jpg") as response:
+                assert response.headers['Content-Type'] == 'image/jpeg'
+                assert response.read()[:2] == b'\xff\xd8'
+    finally:
+        httpd.shutdown()
+        server._thumb_store['store'].close()
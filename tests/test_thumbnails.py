@@ -0,0 +1,102 @@
+"""
+Tests for reduced-resolution thumbnail rendering
+"""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from photo_tool.io.thumbnails import generate_thumbnail, open_image_for_size, render_thumbnails
+
+
+def _jpeg(path, orientation=1, size=(4000, 3000)):
+    """JPEG with a red block in the stored top-left corner"""
+    img = Image.new('RGB', size, (0, 0, 0))
+    img.paste((255, 0, 0), (0, 0, size[0] // 10, size[1] // 10))
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    img.save(path, exif=exif, quality=90)
+
+
+def _red_corner(img):
+    w, h = img.size
+    corners = {'tl': (2, 2), 'tr': (w - 3, 2), 'bl': (2, h - 3), 'br': (w - 3, h - 3)}
+    return [name for name, xy in corners.items() if img.getpixel(xy)[0] > 200 and img.getpixel(xy)[1] < 60]
+
+
+@pytest.mark.parametrize("orientation,size,corner", [
+    (1, (500, 375), 'tl'),
+    (2, (500, 375), 'tr'),  # mirrored
+    (3, (500, 375), 'br'),
+    (4, (500, 375), 'bl'),  # mirrored
+    (5, (375, 500), 'tl'),  # transposed
+    (6, (375, 500), 'tr'),
+    (7, (375, 500), 'br'),  # transversed
+    (8, (375, 500), 'bl'),
+])
+def test_draft_decode_and_orientation(tmp_path, orientation, size, corner):
+    """JPEG decoded at 1/8 scale (still >= the box) and oriented"""
+    path = tmp_path / "photo.jpg"
+    _jpeg(path, orientation)
+
+    img = open_image_for_size(path, (300, 300))
+
+    assert img.size == size
+    assert img.mode == 'RGB'
+    assert _red_corner(img) == [corner]
+
+
+def test_render_several_sizes(tmp_path):
+    path = tmp_path / "photo.jpg"
+    _jpeg(path, orientation=6)
+
+    thumbs = render_thumbnails(path, [(1000, 1000), (200, 200)])
+
+    assert thumbs[(1000, 1000)].size == (750, 1000)
+    assert thumbs[(200, 200)].size == (150, 200)
+
+
+def test_png_reduce_and_alpha(tmp_path):
+    path = tmp_path / "logo.png"
+    Image.new('RGBA', (1200, 800), (0, 0, 0, 0)).save(path)
+
+    thumb_path = generate_thumbnail(path, tmp_path / "thumbs", size=(256, 256))
+
+    with Image.open(thumb_path) as thumb:
+        assert thumb.size == (256, 171)
+        assert thumb.getpixel((10, 10)) == (255, 255, 255)
+
+
+@pytest.mark.parametrize("name,mode", [
+    ("palette.gif", 'P'),
+    ("palette.png", 'P'),
+    ("bilevel.png", '1'),
+    ("depth16.png", 'I;16'),
+])
+def test_reduce_unsupported_modes(tmp_path, name, mode):
+    """Modes Image.reduce() rejects are converted first"""
+    path = tmp_path / name
+    Image.new('RGB', (2000, 1500), (200, 40, 40)).convert(mode).save(path)
+    with Image.open(path) as img:
+        assert img.mode == mode
+
+    thumb_path = generate_thumbnail(path, tmp_path / "thumbs", size=(256, 256))
+
+    with Image.open(thumb_path) as thumb:
+        assert thumb.size == (256, 192)
+        assert thumb.mode == 'RGB'
+
+
+@pytest.mark.parametrize("size", [(2000, 1500), (200, 150)])
+def test_16bit_gradient_is_scaled(tmp_path, size):
+    """16-bit samples are scaled to 8 bits, not clipped (reduced and unreduced)"""
+    path = tmp_path / "depth16.png"
+    gradient = np.tile(np.linspace(0, 65535, size[0]).astype(np.uint16), (size[1], 1))
+    Image.fromarray(gradient).save(path)
+    with Image.open(path) as img:
+        assert img.mode == 'I;16'
+
+    thumb = np.asarray(open_image_for_size(path, (256, 256)).convert('L'))
+
+    assert thumb.min() < 5 and thumb.max() > 250
+    assert 100 < thumb.mean() < 155
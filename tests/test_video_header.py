@@ -0,0 +1,91 @@
+"""
+Tests for the native video container reader
+"""
+
+import struct
+from datetime import datetime
+
+from photo_tool.io.video_header import MP4_EPOCH, read_video_header
+from photo_tool.io.video_metadata import get_video_capture_time
+
+
+def _box(box_type, payload):
+    return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+
+def _mp4(created, duration_s=4, width=1920, height=1080, frames=100):
+    seconds = int((created - MP4_EPOCH).total_seconds())
+    mvhd = _box(b'mvhd', struct.pack('>B3xIIII', 0, seconds, seconds, 1000, duration_s * 1000) + bytes(80))
+    tkhd = _box(b'tkhd', struct.pack('>B3xIIIII', 0, seconds, seconds, 1, 0, duration_s * 1000)
+                + bytes(8 + 8 + 36) + struct.pack('>II', width << 16, height << 16))
+    mdhd = _box(b'mdhd', struct.pack('>B3xIIII', 0, seconds, seconds, 25000, duration_s * 25000) + bytes(4))
+    hdlr = _box(b'hdlr', bytes(8) + b'vide' + bytes(13))
+    stsd = _box(b'stsd', struct.pack('>B3xI', 0, 1) + struct.pack('>I4s', 16, b'avc1') + bytes(8))
+    stts = _box(b'stts', struct.pack('>B3xIII', 0, 1, frames, 1000))
+    stbl = _box(b'stbl', stsd + stts)
+    mdia = _box(b'mdia', mdhd + hdlr + _box(b'minf', stbl))
+    moov = _box(b'moov', mvhd + _box(b'trak', tkhd + mdia))
+    # mdat first: moov at the end must be found by seeking
+    return _box(b'ftyp', b'isom' + bytes(4)) + _box(b'mdat', bytes(100_000)) + moov
+
+
+def test_mp4_header(tmp_path):
+    """Creation time, duration, size, codec and fps from moov"""
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(_mp4(datetime(2024, 5, 6, 7, 8, 9)))
+
+    meta = read_video_header(path)
+
+    assert meta['created_time'] == datetime(2024, 5, 6, 7, 8, 9)
+    assert meta['duration'] == 4.0
+    assert (meta['width'], meta['height']) == (1920, 1080)
+    assert meta['codec'] == 'avc1'
+    assert meta['fps'] == 25.0
+
+
+def _ts_packet(pid, payload=b'', pcr=None):
+    header = struct.pack('>BHB', 0x47, pid, 0x10 | (0x20 if pcr is not None else 0))
+    if pcr is not None:
+        base, ext = divmod(pcr, 300)
+        adaptation = bytes([7, 0x10]) + (base << 15 | 0x7E << 9 | ext).to_bytes(6, 'big')
+        header += adaptation
+    return (header + payload).ljust(188, b'\xff')
+
+
+def test_mts_mdpm_and_pcr(tmp_path):
+    """AVCHD recording time from MDPM split across packets, duration from PCR"""
+    mdpm = b'MDPM' + bytes([2]) + bytes([0x18, 0x00, 0x20, 0x24, 0x05]) + bytes([0x19, 0x06, 0x07, 0x08, 0x09])
+    packets = [
+        _ts_packet(0x100, pcr=0),
+        _ts_packet(0x1011, b'\x00' * 176 + mdpm[:8]),
+        _ts_packet(0x1100, b'audio'),
+        _ts_packet(0x1011, mdpm[8:]),
+    ] + [_ts_packet(0x1011, b'\x00' * 10) for _ in range(20)] + [_ts_packet(0x100, pcr=27_000_000 * 12)]
+    path = tmp_path / "00001.MTS"
+    path.write_bytes(b''.join(packets))
+
+    meta = read_video_header(path)
+
+    assert meta['created_time'] == datetime(2024, 5, 6, 7, 8, 9)
+    assert meta['duration'] == 12.0
+
+
+def test_unsupported(tmp_path):
+    path = tmp_path / "clip.avi"
+    path.write_bytes(b'RIFF' + bytes(100))
+    assert read_video_header(path) is None
+
+
+def test_truncated_boxes(tmp_path):
+    """Empty mvhd/tkhd/mdhd boxes make the header unreadable, not an exception"""
+    ftyp = _box(b'ftyp', b'isom' + bytes(4))
+    for moov in (
+        _box(b'moov', _box(b'mvhd', b'')),
+        _box(b'moov', _box(b'trak', _box(b'tkhd', b''))),
+        _box(b'moov', _box(b'trak', _box(b'mdia', _box(b'mdhd', b'')))),
+    ):
+        path = tmp_path / "clip.mp4"
+        path.write_bytes(ftyp + moov)
+
+        assert read_video_header(path) is None
+        assert isinstance(get_video_capture_time(path), datetime)
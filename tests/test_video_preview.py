@@ -0,0 +1,66 @@
+"""
+Tests for video sprite sheets and poster frames
+"""
+
+import cv2
+import numpy as np
+
+from photo_tool.io.video_preview import build_video_preview, extract_frames, read_poster_frame
+
+
+def _write_clip(path, seconds=4, fps=10, size=(320, 240)):
+    """Clip whose frame brightness encodes the frame index"""
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    for i in range(seconds * fps):
+        writer.write(np.full((size[1], size[0], 3), i * 6, dtype=np.uint8))
+    writer.release()
+
+
+def test_extract_frames_evenly_spaced(tmp_path):
+    """Frames come from the middle of equal segments, in time order"""
+    clip = tmp_path / "clip.mp4"
+    _write_clip(clip)
+
+    frames = extract_frames(clip, 4, max_size=(80, 80))
+
+    assert [round(t, 2) for t, _ in frames] == [0.5, 1.5, 2.5, 3.5]
+    assert all(frame.shape == (60, 80, 3) for _, frame in frames)
+    brightness = [frame.mean() for _, frame in frames]
+    assert brightness == sorted(brightness)
+    # ~frame 5 (value 30) and ~frame 35 (value 210), allowing for codec loss
+    assert abs(brightness[0] - 30) < 15
+    assert abs(brightness[-1] - 210) < 15
+
+
+def test_poster_frame_short_clip_falls_back_to_start(tmp_path):
+    """Clips shorter than the poster time use the first frame"""
+    clip = tmp_path / "short.mp4"
+    _write_clip(clip, seconds=1, fps=2)
+
+    frame = read_poster_frame(clip, at=10.0)
+
+    assert frame.shape[2] == 3
+
+
+def test_sprite_sheet_and_vtt(tmp_path):
+    """Sprite grid and cues; second call reuses the cache"""
+    clip = tmp_path / "clip.mp4"
+    _write_clip(clip)
+    cache = tmp_path / "thumbs"
+
+    preview = build_video_preview(clip, cache, frames=8, columns=4, tile_width=80)
+
+    assert preview.frame_count == 8
+    sheet = cv2.imread(str(preview.sprite_path))
+    assert sheet.shape[:2] == (2 * 60, 4 * 80)
+
+    vtt = preview.vtt_path.read_text().splitlines()
+    assert vtt[0] == "WEBVTT"
+    assert vtt[2] == "00:00:00.000 --> 00:00:00.500"
+    assert vtt[3] == f"{preview.sprite_path.name}#xywh=0,0,80,60"
+    assert vtt[-1].endswith("#xywh=240,60,80,60")
+
+    mtime = preview.sprite_path.stat().st_mtime_ns
+    again = build_video_preview(clip, cache, frames=8, columns=4, tile_width=80)
+    assert again.frame_count == 8
+    assert preview.sprite_path.stat().st_mtime_ns == mtime
@@ -0,0 +1,101 @@
+"""
+Tests for waveform peaks
+"""
+
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from photo_tool.io.waveform import compute_waveform, get_waveform_file, read_waveform, write_waveform
+
+
+def _wav(path, samples, sample_rate=8000, bits=16, tag=1):
+    """Write a WAV file from an int/float array of shape (frames, channels)"""
+    channels = samples.shape[1]
+    if bits == 24:
+        raw = b''.join(int(v).to_bytes(3, 'little', signed=True) for v in samples.ravel())
+    else:
+        raw = samples.astype({16: '<i2', 32: '<f4'}[bits]).tobytes()
+    block = channels * bits // 8
+    fmt = struct.pack('<HHIIHH', tag, channels, sample_rate, sample_rate * block, block, bits)
+    body = (b'WAVE' + b'fmt ' + struct.pack('<I', len(fmt)) + fmt
+            + b'data' + struct.pack('<I', len(raw)) + raw)
+    path.write_bytes(b'RIFF' + struct.pack('<I', len(body)) + body)
+
+
+def test_peaks_per_level(tmp_path):
+    """Min/max per block across channels and chunks, partial last peak"""
+    frames = 256 * 10 + 100
+    left = np.zeros(frames, dtype=np.int16)
+    right = np.zeros(frames, dtype=np.int16)
+    left[300] = 16384     # peak 1: +0.5
+    right[2600] = -32768  # last (partial) peak: -1.0
+    path = tmp_path / "a.wav"
+    _wav(path, np.stack([left, right], axis=1))
+
+    # Small chunks force carry-over between chunks
+    waveform = compute_waveform(path, levels=(256, 1024), chunk_frames=300)
+
+    assert waveform.frames == frames
+    assert waveform.sample_rate == 8000
+    fine, coarse = waveform.levels
+    assert fine.peaks.shape == (11, 2)
+    assert tuple(fine.peaks[1]) == (0, 64)
+    assert tuple(fine.peaks[10]) == (-127, 0)
+    assert coarse.peaks.shape == (3, 2)
+    assert tuple(coarse.peaks[0]) == (0, 64)
+
+
+def test_float_and_24bit(tmp_path):
+    float_path = tmp_path / "f.wav"
+    _wav(float_path, np.full((512, 1), -0.25, dtype=np.float32), bits=32, tag=3)
+    assert tuple(compute_waveform(float_path).levels[0].peaks[0]) == (-32, -32)
+
+    pcm24_path = tmp_path / "p.wav"
+    _wav(pcm24_path, np.full((512, 1), 4194304), bits=24)
+    assert tuple(compute_waveform(pcm24_path).levels[0].peaks[0]) == (64, 64)
+
+
+def test_peaks_file_roundtrip_and_cache(tmp_path):
+    path = tmp_path / "a.wav"
+    _wav(path, (np.sin(np.arange(40000) / 10) * 20000).astype(np.int16).reshape(-1, 1))
+    cache = tmp_path / "waveforms"
+
+    peaks_path = get_waveform_file(path, cache)
+    loaded = read_waveform(peaks_path)
+
+    assert loaded.frames == 40000
+    assert abs(loaded.duration - 5.0) < 1e-9
+    assert [level.samples_per_peak for level in loaded.levels] == [256, 1024, 4096, 16384]
+    assert [len(level.peaks) for level in loaded.levels] == [157, 40, 10, 3]
+    assert np.array_equal(loaded.levels[0].peaks, compute_waveform(path).levels[0].peaks)
+
+    mtime = peaks_path.stat().st_mtime_ns
+    assert get_waveform_file(path, cache) == peaks_path
+    assert peaks_path.stat().st_mtime_ns == mtime
+
+
+def test_concurrent_writers(tmp_path):
+    """Writers of the same peaks file do not share a temporary file"""
+    path = tmp_path / "a.wav"
+    _wav(path, (np.sin(np.arange(40000) / 10) * 20000).astype(np.int16).reshape(-1, 1))
+    waveform = compute_waveform(path)
+    peaks_path = tmp_path / "a.peaks"
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: write_waveform(waveform, peaks_path), range(32)))
+
+    assert np.array_equal(read_waveform(peaks_path).levels[0].peaks, waveform.levels[0].peaks)
+    assert list(tmp_path.glob("*.tmp")) == []
+
+
+def test_unsupported_without_ffmpeg(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", str(tmp_path))
+    from photo_tool.io import waveform
+    waveform.is_ffmpeg_available.cache_clear()
+
+    path = tmp_path / "a.ogg"
+    path.write_bytes(b'OggS' + bytes(100))
+    assert compute_waveform(path) is None
+    waveform.is_ffmpeg_available.cache_clear()